@@ -0,0 +1,119 @@
+"""
+Benchmark - Agregados do Livro de Contas
+Compara, para uma planilha sintética, os indicadores do dashboard:
+
+- recalculo: ler o livro e indicadores_contas.calcular (o que cada
+  atualização da tela fazia)
+- agregados: agregados_contas.indicadores, a partir dos agregados em disco
+
+e mede a inclusão de algumas linhas com a diferença aplicada aos agregados
+(agregados_contas.alteracao), conferindo no fim que eles batem com o livro.
+
+Compara também a timeline por mês (to_period + groupby sobre o livro, como
+era feito a cada atualização da tela) com os totais do cubo mensal
+(cubo_contas), e mede recortes e totais do cubo por outras dimensões.
+
+Para executar: python benchmarks/benchmark_agregados.py [--linhas 50000] [--novas 10] [--repeticoes 1000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigo'))
+
+import agregados_contas
+import cubo_contas
+import esquema_contas
+import indicadores_contas
+import planilha_xlsx
+from benchmark_planilha import gerar_planilha, nova_linha
+
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def recalcular(caminho):
+    return indicadores_contas.calcular(esquema_contas.ler_planilha(caminho))
+
+
+def medir_repetido(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return resultado, (time.perf_counter() - inicio) / repeticoes
+
+
+def timeline_livro(df):
+    com_vencimento = df[df['Dt. Vencimento'].notna()].copy()
+    com_vencimento['Mes_Venc'] = com_vencimento['Dt. Vencimento'].dt.to_period('M')
+    return com_vencimento.groupby('Mes_Venc').size().sort_index()
+
+
+def incluir(caminho, linhas):
+    with agregados_contas.alteracao(caminho) as mudancas:
+        planilha_xlsx.anexar_linhas(caminho, linhas, esquema_contas.COLUNAS_PADRAO, esquema_contas.COLUNAS_DATA)
+        mudancas.incluir(linhas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos agregados do livro de contas")
+    parser.add_argument('--linhas', type=int, default=50000)
+    parser.add_argument('--novas', type=int, default=10, help="Linhas incluídas com atualização por diferença")
+    parser.add_argument('--repeticoes', type=int, default=1000, help="Repetições dos totais do cubo")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'contasapagar_benchmark.xlsx')
+        gerar_planilha(args.linhas).to_excel(caminho, index=False)
+
+        _, tempo_geracao = medir(agregados_contas.atualizar, caminho)
+        recalculado, tempo_recalculo = medir(recalcular, caminho)
+        agregado, tempo_agregados = medir(agregados_contas.indicadores, caminho)
+
+        novas = [nova_linha(args.linhas + i + 1) for i in range(args.novas)]
+        _, tempo_inclusao = medir(incluir, caminho, novas)
+        depois, tempo_depois = medir(agregados_contas.indicadores, caminho)
+        diferencas = agregados_contas.verificar(caminho)
+
+        livro = esquema_contas.ler_planilha(caminho)
+        timeline, tempo_timeline = medir_repetido(lambda: timeline_livro(livro), 10)
+        cubo, tempo_cubo = medir(cubo_contas.carregar, caminho)
+        totais = {}
+        for por in (('mes',), ('mes', 'status'), ('fornecedor',), ('mes', 'fornecedor', 'forma', 'status')):
+            totais[por] = medir_repetido(lambda: cubo.somar(*por), args.repeticoes)
+        _, tempo_recorte = medir_repetido(
+            lambda: cubo.fatiar(status=agregados_contas.VENCIDO).somar('forma'), args.repeticoes)
+
+    assert agregado.total_registros == recalculado.total_registros
+    assert agregado.contas_vencidas == recalculado.contas_vencidas
+    assert abs(agregado.total_vencido - recalculado.total_vencido) < 0.01
+    assert agregado.vazios.equals(recalculado.vazios)
+    assert depois.total_registros == args.linhas + args.novas
+    assert not diferencas, diferencas
+    meses_cubo = totais[('mes',)][0]['linhas'].drop(cubo_contas.SEM_VENCIMENTO, errors='ignore')
+    assert list(meses_cubo.index) == [str(mes) for mes in timeline.index]
+    assert (meses_cubo.values == timeline.values).all()
+
+    print(f"Planilha sintética: {args.linhas} linhas")
+    print(f"{'geração dos agregados':>34}: {tempo_geracao * 1000:10.1f} ms")
+    print(f"{'indicadores: reler + calcular':>34}: {tempo_recalculo * 1000:10.1f} ms")
+    print(f"{'indicadores: agregados':>34}: {tempo_agregados * 1000:10.1f} ms")
+    print(f"{f'inclusão de {args.novas} linha(s) + diferença':>34}: {tempo_inclusao * 1000:10.1f} ms")
+    print(f"{'indicadores depois da inclusão':>34}: {tempo_depois * 1000:10.1f} ms (sem reler o livro)")
+    print("✓ Agregados conferem com o livro")
+
+    print(f"\nCubo mensal: {len(cubo)} células (carregado em {tempo_cubo * 1000:.1f} ms)")
+    print(f"{'timeline: to_period + groupby':>40}: {tempo_timeline * 1000:10.3f} ms")
+    for por, (_, tempo) in totais.items():
+        print(f"{'cubo: ' + ' x '.join(por):>40}: {tempo * 1000:10.3f} ms")
+    print(f"{'cubo: vencidas por forma':>40}: {tempo_recorte * 1000:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark - Tipos do Livro de Contas em Memória
+Compara, para um livro sintético (ou uma planilha real com --planilha), o
+preparo do DataFrame depois da leitura:
+
+- anterior: df.replace(r'^\\s*$', pd.NA, regex=True) em todas as células +
+  to_datetime/to_numeric (caminho anterior dos dashboards)
+- esquema: esquema_contas.tipar (categorias, datas, float64, Número de
+  largura fixa, brancos tratados só nas colunas de texto)
+
+Mostra bytes por linha (memory_usage deep=True) e o tempo de preparo. A
+leitura do xlsx em si (pd.read_excel) não muda e não entra na conta.
+
+Para executar: python benchmarks/benchmark_esquema.py [--linhas 200000] [--planilha dados/contasapagar_1.xlsx]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigo'))
+
+import esquema_contas
+from benchmark_planilha import gerar_planilha
+
+
+def livro_como_lido(linhas):
+    """Livro sintético como sai do read_excel: textos, alguns em branco, e Número misto."""
+    df = gerar_planilha(linhas).astype({'Número': object})
+    # Números antigos gravados como inteiro e células só com espaço
+    df.loc[df.index % 7 == 0, 'Número'] = df.loc[df.index % 7 == 0, 'Número'].astype(int)
+    df.loc[df.index % 50 == 0, 'Fornecedor'] = ' '
+    df.loc[df.index % 3 == 0, 'Dt. Pagamento'] = df['Dt. Vencimento']
+    df['Histórico'] = df['Histórico'].astype(object)
+    return df
+
+
+def preparo_anterior(df):
+    df = df.replace(r'^\s*$', pd.NA, regex=True)
+    for coluna in esquema_contas.COLUNAS_DATA:
+        df[coluna] = pd.to_datetime(df[coluna], errors='coerce')
+    for coluna in esquema_contas.COLUNAS_NUMERICAS:
+        if coluna in df.columns:
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce')
+    return df
+
+
+def medir(funcao, df):
+    inicio = time.perf_counter()
+    resultado = funcao(df)
+    return resultado, time.perf_counter() - inicio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos tipos do livro de contas em memória")
+    parser.add_argument('--linhas', type=int, default=200000)
+    parser.add_argument('--planilha', help="Planilha real em vez do livro sintético")
+    args = parser.parse_args(argv)
+
+    if args.planilha:
+        bruto = pd.read_excel(args.planilha)
+        origem = os.path.basename(args.planilha)
+    else:
+        bruto = livro_como_lido(args.linhas)
+        origem = "sintético"
+
+    anterior, tempo_anterior = medir(preparo_anterior, bruto)
+    esquema, tempo_esquema = medir(esquema_contas.tipar, bruto)
+
+    memoria_anterior = esquema_contas.memoria_por_linha(anterior)
+    memoria_esquema = esquema_contas.memoria_por_linha(esquema)
+    print(f"Livro: {origem} ({len(bruto)} linhas)")
+    print(f"{'':>10} {'Bytes/linha':>12} {'Total (MB)':>11} {'Preparo (s)':>12}")
+    for nome, df, memoria, tempo in (
+        ('anterior', anterior, memoria_anterior, tempo_anterior),
+        ('esquema', esquema, memoria_esquema, tempo_esquema),
+    ):
+        print(f"{nome:>10} {memoria:>12.0f} {memoria * len(df) / 2**20:>11.1f} {tempo:>12.3f}")
+    print(f"Memória: {memoria_anterior / memoria_esquema:.1f}x menor | "
+          f"preparo: {tempo_anterior / tempo_esquema:.1f}x mais rápido")
+
+    # Mesmos totais e datas nos dois caminhos
+    for coluna in esquema_contas.COLUNAS_NUMERICAS:
+        if coluna in bruto.columns:
+            assert np.allclose(anterior[coluna].astype(float), esquema[coluna], equal_nan=True), coluna
+    for coluna in esquema_contas.COLUNAS_DATA:
+        assert anterior[coluna].equals(esquema[coluna]), coluna
+    print("\nTipos (esquema):")
+    print(esquema.dtypes.to_string())
+
+
+if __name__ == "__main__":
+    main()
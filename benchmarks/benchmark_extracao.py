@@ -0,0 +1,165 @@
+"""
+Microbenchmark - Motor de Extração de Campos
+Compara, por documento, o motor pré-compilado (extracao_campos) com a
+abordagem anterior: lista de padrões reconstruída e re.findall/re.search
+sobre o texto inteiro a cada chamada.
+
+Para executar: python benchmarks/benchmark_extracao.py [repeticoes]
+"""
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigo'))
+
+import extracao_campos
+from extracao_campos import (
+    VARIANTE_AUTOMACAO,
+    VARIANTE_DASHBOARD,
+    PADROES_VALOR,
+    PADROES_DATA_EMISSAO,
+    PADROES_VENCIMENTO,
+    PADROES_FORNECEDOR,
+    PADROES_NUMERO_DOCUMENTO,
+)
+
+TEXTO_SAFRA = """BANCO SAFRA S.A. 422-7 42297.77778 12345.678903 09876.543217 1 11700000121777
+Local de Pagamento Vencimento
+PAGÁVEL EM QUALQUER BANCO ATÉ O VENCIMENTO 11/08/2025
+Beneficiário CNPJ / CPF Ag./Cód.Beneficiário
+SUMAY DO BRASIL LTDA 12.345.678/0001-90 0001/123456-7
+Data Documento Vencimento
+Nº Doc Espécie Aceite Data Processamento
+11/06/2025 11/08/2025
+(=) Valor do Documento
+01 R$ 1.217,77
+Número do Documento
+NF123456
+(-) Desconto / Abatimento
+Pagador
+FUSION TECH COMERCIO LTDA
+"""
+
+_LINHAS_TABELA = "\n".join(
+    f"{1000 + i} 14/10/2025 SAO PAULO/SP {i % 7 + 1} 12,{i % 90 + 10:02d} {150 + i},{i % 90 + 10:02d}"
+    for i in range(40)
+)
+
+TEXTO_BRASPRESS = f"""BRASPRESS TRANSPORTES URGENTES LTDA
+FATURA DE SERVIÇOS Nº Fatura: 47191977
+Emissão: 14 de Outubro de 2025
+{_LINHAS_TABELA}
+1.829,65 DM
+VALOR LÍQUIDO R$
+1.829,65
+Beneficiário Final CNPJ
+BRASPRESS TRANSPORTES URGENTES LTDA 48.740.351/0001-65
+14/11/2025 REAL
+"""
+
+TEXTO_GENERICO = """Recibo do Pagador
+Cedente: ACME SERVICOS DE TI LTDA
+Data de Emissão: 02/09/2025
+Vencimento: 30/09/2025
+Número do Documento: 2025/0042
+Valor do Documento: 350,00
+"""
+
+DOCUMENTOS = {
+    'safra': TEXTO_SAFRA,
+    'braspress': TEXTO_BRASPRESS,
+    'generico': TEXTO_GENERICO,
+}
+
+
+# ---------------------------------------------------------------------------
+# Referência: comportamento anterior (padrões recompilados a cada chamada)
+# ---------------------------------------------------------------------------
+
+def _valor_referencia(texto, variante):
+    padroes = [regex for regex, _ in PADROES_VALOR[variante]]
+    valores = []
+    for padrao in padroes:
+        for match in re.findall(padrao, texto, re.IGNORECASE | re.MULTILINE):
+            try:
+                valor = float(match.strip().replace('.', '').replace(',', '.'))
+            except ValueError:
+                continue
+            if 10 <= valor <= 1000000:
+                if variante == VARIANTE_DASHBOARD:
+                    return valor
+                valores.append(valor)
+    if valores:
+        return max(set(valores), key=valores.count)
+    return None
+
+
+def _primeiro_match_referencia(padroes, texto):
+    for regex, _ in padroes:
+        match = re.search(regex, texto, re.IGNORECASE | re.MULTILINE)
+        if match:
+            yield match
+
+
+def _data_referencia(padroes, texto):
+    for match in _primeiro_match_referencia(padroes, texto):
+        return extracao_campos._montar_data(match.groups())
+    return None
+
+
+def _fornecedor_referencia(texto):
+    for match in _primeiro_match_referencia(PADROES_FORNECEDOR, texto):
+        fornecedor = ' '.join(match.group(1).strip().split())
+        if 'Ficha' in fornecedor or 'Compensa' in fornecedor:
+            continue
+        fornecedor = fornecedor[:60]
+        if len(fornecedor) > 5:
+            return fornecedor
+    return "Fornecedor não identificado"
+
+
+def _numero_referencia(texto, variante):
+    for match in _primeiro_match_referencia(PADROES_NUMERO_DOCUMENTO[variante], texto):
+        return match.group(1).strip()
+    return None
+
+
+def extrair_campos_referencia(texto, variante):
+    return {
+        'valor': _valor_referencia(texto, variante),
+        'vencimento': _data_referencia(PADROES_VENCIMENTO, texto),
+        'data_emissao': _data_referencia(PADROES_DATA_EMISSAO, texto),
+        'fornecedor': _fornecedor_referencia(texto),
+        'numero_documento': _numero_referencia(texto, variante),
+    }
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    print("=" * 78)
+    print("MICROBENCHMARK - EXTRAÇÃO DE CAMPOS (por documento)")
+    print("=" * 78)
+    print(f"{'Documento':<12} {'Variante':<10} {'Anterior (µs)':>14} {'Motor (µs)':>12} {'Speedup':>9}  Saída")
+    print("-" * 78)
+
+    for nome, texto in DOCUMENTOS.items():
+        for variante in (VARIANTE_AUTOMACAO, VARIANTE_DASHBOARD):
+            esperado = extrair_campos_referencia(texto, variante)
+            campos = extracao_campos.extrair_campos(texto, variante)
+            obtido = {campo: campos[campo] for campo in esperado}
+            igual = "igual" if esperado == obtido else f"DIFERENTE {esperado} != {obtido}"
+
+            t_ref = timeit.timeit(lambda: extrair_campos_referencia(texto, variante), number=repeticoes)
+            t_motor = timeit.timeit(lambda: extracao_campos.extrair_campos(texto, variante), number=repeticoes)
+            us_ref = t_ref / repeticoes * 1e6
+            us_motor = t_motor / repeticoes * 1e6
+            print(f"{nome:<12} {variante:<10} {us_ref:>14.1f} {us_motor:>12.1f} {us_ref / us_motor:>8.2f}x  {igual}")
+
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmark - Cadastro de Fornecedores
+Gera grafias sintéticas de fornecedores (acentos, "S.A."/"S/A", sufixos
+societários, código e nome fantasia do ERP colados, nomes cortados em 60
+caracteres, erros de digitação) e compara o agrupamento das chaves:
+
+- pares: todas as chaves contra todas (trigramas e prefixos, O(n²)),
+  medido numa amostra e estimado para o total
+- indice: fornecedores_contas.agrupar_chaves, blocos pela primeira palavra
+
+Mede também a tabela de apelidos: indexação inicial, consulta de um lote
+já conhecido e a inclusão de um lote com nomes novos.
+
+Para executar: python benchmarks/benchmark_fornecedores.py [--fornecedores 8000] [--grafias 5] [--amostra 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigo'))
+
+import fornecedores_contas
+
+_PALAVRAS = ['COMERCIO', 'INDUSTRIA', 'DISTRIBUIDORA', 'TRANSPORTES', 'SERVICOS', 'TECNOLOGIA', 'ALIMENTOS',
+             'CONSTRUCOES', 'PAPELARIA', 'QUIMICA', 'METALURGICA', 'LOGISTICA', 'ENGENHARIA', 'MATERIAIS',
+             'EQUIPAMENTOS', 'INFORMATICA', 'CONSULTORIA', 'PLASTICOS', 'TEXTIL', 'GRAFICA']
+_ACENTOS = {'COMERCIO': 'COMÉRCIO', 'INDUSTRIA': 'INDÚSTRIA', 'SERVICOS': 'SERVIÇOS',
+            'QUIMICA': 'QUÍMICA', 'LOGISTICA': 'LOGÍSTICA', 'INFORMATICA': 'INFORMÁTICA',
+            'GRAFICA': 'GRÁFICA', 'METALURGICA': 'METALÚRGICA', 'PLASTICOS': 'PLÁSTICOS'}
+_SUFIXOS = ['LTDA', 'S.A.', 'ME', 'EPP', 'EIRELI']
+_GRAFIAS_SUFIXO = {'LTDA': ['LTDA', 'Ltda.', 'LIMITADA'], 'S.A.': ['S.A.', 'S/A', 'SA'],
+                   'ME': ['ME', 'M.E.'], 'EPP': ['EPP', 'E.P.P.'], 'EIRELI': ['EIRELI', 'Eireli']}
+_LETRAS = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+
+
+def fornecedores_sinteticos(quantidade, gerador):
+    """Razões sociais distintas: nome próprio inventado, duas ou três palavras e sufixo."""
+    nomes = set()
+    while len(nomes) < quantidade:
+        proprio = ''.join(gerador.choice(_LETRAS, gerador.integers(4, 9)))
+        palavras = gerador.choice(_PALAVRAS, gerador.integers(1, 4), replace=False)
+        nomes.add((proprio, ' '.join(palavras), _SUFIXOS[gerador.integers(len(_SUFIXOS))]))
+    return sorted(nomes)
+
+
+def grafia(fornecedor, codigo, gerador):
+    """Uma grafia do fornecedor, como chegaria de uma planilha ou de um PDF."""
+    proprio, palavras, sufixo = fornecedor
+    if gerador.random() < 0.4:
+        palavras = ' '.join(_ACENTOS.get(p, p) for p in palavras.split())
+    nome = f"{proprio} {palavras} {gerador.choice(_GRAFIAS_SUFIXO[sufixo])}"
+    sorteio = gerador.random()
+    if sorteio < 0.25:
+        # ERP: código, razão social e nome fantasia colados
+        nome = f"{codigo} - {nome.upper()}{proprio}"
+    elif sorteio < 0.4:
+        nome = nome.title()
+    elif sorteio < 0.5 and len(proprio) > 5:
+        # Erro de digitação no nome próprio
+        posicao = gerador.integers(1, len(proprio) - 1)
+        nome = proprio[:posicao] + proprio[posicao + 1:] + nome[len(proprio):]
+    elif sorteio < 0.6:
+        # Cortado pela extração (limite de caracteres ou últimas palavras perdidas)
+        nome = nome[:max(len(proprio) + 8, len(nome) - 12)].rstrip()
+    return nome
+
+
+def grafias_sinteticas(quantidade, por_fornecedor, gerador):
+    fornecedores = fornecedores_sinteticos(quantidade, gerador)
+    grafias = {}
+    for codigo, fornecedor in enumerate(fornecedores, start=1):
+        for _ in range(gerador.integers(1, 2 * por_fornecedor)):
+            grafias.setdefault(grafia(fornecedor, codigo, gerador), codigo)
+    return pd.Series(grafias)
+
+
+def agrupar_em_pares(chaves):
+    """Todas as chaves contra todas, com os mesmos critérios do índice."""
+    chaves = sorted(set(chaves))
+    pai = list(range(len(chaves)))
+
+    def raiz(i):
+        while pai[i] != i:
+            pai[i] = pai[pai[i]]
+            i = pai[i]
+        return i
+
+    trigramas = [fornecedores_contas._trigramas(c) for c in chaves]
+    for i, a in enumerate(chaves):
+        for j in range(i + 1, len(chaves)):
+            b = chaves[j]
+            uniao = len(trigramas[i] | trigramas[j])
+            parecidas = len(trigramas[i] & trigramas[j]) / uniao >= fornecedores_contas.SIMILARIDADE_MINIMA
+            prefixo = len(a) >= fornecedores_contas.TAMANHO_MINIMO_PREFIXO and b.startswith(a)
+            if parecidas or prefixo:
+                pai[raiz(j)] = raiz(i)
+    return {c: chaves[raiz(i)] for i, c in enumerate(chaves)}
+
+
+def pureza(grupos, verdadeiro):
+    """Fração das grafias cujo grupo tem um único fornecedor verdadeiro, e grupos por fornecedor."""
+    tabela = pd.DataFrame({'grupo': grupos, 'fornecedor': verdadeiro})
+    misturados = tabela.groupby('grupo')['fornecedor'].transform('nunique') > 1
+    return 1 - misturados.mean(), tabela.groupby('fornecedor')['grupo'].nunique().mean()
+
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do cadastro de fornecedores")
+    parser.add_argument('--fornecedores', type=int, default=8000)
+    parser.add_argument('--grafias', type=int, default=5, help="Média de grafias por fornecedor")
+    parser.add_argument('--amostra', type=int, default=2000, help="Chaves comparadas em pares")
+    args = parser.parse_args(argv)
+
+    gerador = np.random.default_rng(42)
+    grafias = grafias_sinteticas(args.fornecedores, args.grafias, gerador)
+    chaves, tempo_chaves = medir(lambda nomes: [fornecedores_contas.chave(nome) for nome in nomes], grafias.index)
+    grupos_chave, tempo_indice = medir(fornecedores_contas.agrupar_chaves, chaves)
+
+    amostra = sorted(set(chaves))[:args.amostra]
+    grupos_pares, tempo_pares = medir(agrupar_em_pares, amostra)
+    estimado = tempo_pares * (len(set(chaves)) / len(amostra)) ** 2
+    # Na amostra, o índice junta um subconjunto do que a comparação de todos os pares junta
+    grupos_amostra = fornecedores_contas.agrupar_chaves(amostra)
+    assert all(grupos_pares[a] == grupos_pares[grupos_amostra[a]] for a in amostra)
+
+    grupo = [grupos_chave[c] for c in chaves]
+    puros, por_fornecedor = pureza(grupo, grafias.to_numpy())
+
+    with tempfile.TemporaryDirectory() as pasta:
+        planilha = os.path.join(pasta, 'livro.xlsx')
+        metade = len(grafias) // 2
+        _, tempo_inicial = medir(fornecedores_contas.indexar, planilha, list(grafias.index[:metade]))
+        _, tempo_conhecidos = medir(fornecedores_contas.identificar, planilha, list(grafias.index[:200]))
+        resumo, tempo_novos = medir(fornecedores_contas.indexar, planilha, list(grafias.index[metade:]))
+        identificados = fornecedores_contas.identificar(planilha, list(grafias.index))
+
+    print(f"Grafias sintéticas: {len(grafias)} de {args.fornecedores} fornecedores "
+          f"({len(set(chaves))} chaves distintas)")
+    print(f"{'chaves (normalização)':>34}: {tempo_chaves * 1000:10.1f} ms")
+    print(f"{'indice (blocos por palavra)':>34}: {tempo_indice * 1000:10.1f} ms")
+    print(f"{f'pares ({len(amostra)} chaves)':>34}: {tempo_pares * 1000:10.1f} ms")
+    print(f"{'pares (estimado, todas)':>34}: {estimado * 1000:10.1f} ms")
+    print(f"{'tabela: indexar metade':>34}: {tempo_inicial * 1000:10.1f} ms")
+    print(f"{'tabela: 200 nomes conhecidos':>34}: {tempo_conhecidos * 1000:10.1f} ms")
+    print(f"{'tabela: incluir a outra metade':>34}: {tempo_novos * 1000:10.1f} ms "
+          f"({resumo['fornecedores']} fornecedor(es) novo(s), {resumo['fusoes']} fusão(ões))")
+    print(f"Índice: {estimado / tempo_indice:.0f}x mais rápido que comparar todos os pares")
+    print(f"\nGrafias em grupos de um só fornecedor: {puros:.2%} | "
+          f"grupos por fornecedor: {por_fornecedor:.2f} (1,00 = todas as grafias juntas)")
+    print(f"Códigos na tabela: {identificados['fornecedor_id'].nunique()} para {args.fornecedores} fornecedores")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark - Indicadores do Livro de Contas
+Compara, para um livro sintético tipado (esquema_contas), o cálculo dos
+indicadores:
+
+- anterior: as contas separadas de analise_contas_pagar (dados vazios,
+  financeiro, pagamentos, formas de pagamento) mais as do dashboard
+  analítico (métricas do topo e isnull().sum() de novo na aba de vazios)
+- indicadores: indicadores_contas.calcular, uma passada com máscaras únicas
+
+Confere que os dois caminhos dão os mesmos números.
+
+Para executar: python benchmarks/benchmark_indicadores.py [--linhas 1000000] [--repeticoes 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigo'))
+
+import esquema_contas
+import indicadores_contas
+from benchmark_planilha import gerar_planilha
+
+
+def livro_sintetico(linhas):
+    """Livro tipado com pagamentos, vazios e vencimentos dos dois lados de hoje."""
+    df = gerar_planilha(linhas)
+    df['Dt. Vencimento'] = pd.Timestamp.now().normalize() + pd.to_timedelta(
+        pd.RangeIndex(linhas) % 730 - 365, unit='D')
+    df['Dt. Pagamento'] = df['Dt. Vencimento'].where(pd.RangeIndex(linhas) % 3 == 0)
+    df.loc[df.index % 41 == 0, 'Fornecedor'] = None
+    df.loc[df.index % 97 == 0, 'Vr. Título'] = np.nan
+    df.loc[df.index % 5 == 1, 'Forma de Pgto.'] = '2 - PIX'
+    return esquema_contas.tipar(df)
+
+
+def indicadores_anteriores(df):
+    """Contas como eram feitas na análise e no dashboard, cada uma com a sua passada."""
+    hoje = pd.Timestamp.now()
+    # analisar_dados_vazios
+    dados_vazios = df.isnull().sum()
+    percentual_vazios = (df.isnull().sum() / len(df)) * 100
+    # analisar_financeiro
+    valores_titulo_vazios = df['Vr. Título'].isnull().sum()
+    total_titulos = df['Vr. Título'].sum()
+    total_pago = df['Vr. Dev/Pag'].sum()
+    # analisar_pagamentos
+    contas_pagas = df['Dt. Pagamento'].notna().sum()
+    contas_pendentes = df['Dt. Pagamento'].isna().sum()
+    contas_vencidas = df[(df['Dt. Pagamento'].isna()) & (df['Dt. Vencimento'] < hoje)]
+    valor_vencido = contas_vencidas['Vr. Título'].sum()
+    formas_pgto = df['Forma de Pgto.'].value_counts()
+    # dashboard: métricas do topo e abas
+    df['Dt. Pagamento'].notna().sum()
+    df['Dt. Pagamento'].isna().sum()
+    vencidas_dashboard = df[(df['Dt. Pagamento'].isna()) & (df['Dt. Vencimento'] < hoje)]
+    vencidas_dashboard['Vr. Título'].sum()
+    df['Vr. Título'].sum()
+    df['Dt. Pagamento'].isnull().sum()
+    df['Fornecedor'].isna().sum()
+    df['Histórico'].isna().sum()
+    df['Vr. Título'].isna().sum()
+    df['Forma de Pgto.'].dropna().astype(str).value_counts()
+    df.isnull().sum().sort_values(ascending=True)
+    return {
+        'vazios': dados_vazios, 'percentual_vazios': percentual_vazios,
+        'valores_titulo_vazios': valores_titulo_vazios, 'total_titulos': total_titulos,
+        'total_pago': total_pago, 'contas_pagas': contas_pagas, 'contas_pendentes': contas_pendentes,
+        'contas_vencidas': len(contas_vencidas), 'total_vencido': valor_vencido, 'formas_pgto': formas_pgto,
+    }
+
+
+def medir(funcao, df, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(df)
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, min(tempos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos indicadores do livro de contas")
+    parser.add_argument('--linhas', type=int, default=1000000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    df = livro_sintetico(args.linhas)
+    anterior, tempo_anterior = medir(indicadores_anteriores, df, args.repeticoes)
+    indicadores, tempo_indicadores = medir(indicadores_contas.calcular, df, args.repeticoes)
+
+    # Mesmos números nos dois caminhos
+    assert anterior['vazios'].equals(indicadores.vazios)
+    assert np.allclose(anterior['percentual_vazios'], indicadores.percentual_vazios)
+    assert anterior['valores_titulo_vazios'] == indicadores.vazios['Vr. Título']
+    for nome in ('contas_pagas', 'contas_pendentes', 'contas_vencidas'):
+        assert anterior[nome] == getattr(indicadores, nome), nome
+    for nome in ('total_titulos', 'total_pago', 'total_vencido'):
+        assert np.isclose(anterior[nome], getattr(indicadores, nome)), nome
+    formas = anterior['formas_pgto']
+    assert (formas[formas > 0].values == indicadores.formas_pgto.values).all()
+
+    print(f"Livro sintético: {args.linhas} linhas (melhor de {args.repeticoes})")
+    print(f"{'anterior':>12}: {tempo_anterior * 1000:9.1f} ms")
+    print(f"{'indicadores':>12}: {tempo_indicadores * 1000:9.1f} ms")
+    print(f"{tempo_anterior / tempo_indicadores:.1f}x mais rápido")
+    print(f"\nPagas {indicadores.contas_pagas} | pendentes {indicadores.contas_pendentes} | "
+          f"vencidas {indicadores.contas_vencidas} | total vencido R$ {indicadores.total_vencido:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark - Partições Mensais do Livro
+Compara, para um livro sintético com vencimentos espalhados por vários
+meses, a leitura da planilha inteira (esquema_contas.ler_planilha) com a
+leitura pelas partições (particoes_contas.ler):
+
+- geração das partições (primeira leitura depois de o livro mudar)
+- todo o histórico pelas partições
+- só os últimos meses (apenas as partições do intervalo são abertas)
+- nova geração depois de mudar um único mês (o livro é lido de novo e todas
+  as partições são regravadas: as gravações não atualizam as partições)
+
+Confere que o recorte pelas partições é igual ao filtro sobre o livro inteiro.
+
+Para executar: python benchmarks/benchmark_particoes.py [--linhas 50000] [--meses 36] [--ultimos 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigo'))
+
+import esquema_contas
+import particoes_contas
+from benchmark_planilha import gerar_planilha
+
+
+def livro_sintetico(linhas, meses):
+    df = gerar_planilha(linhas)
+    dias = (pd.Timestamp('2023-01-01') + pd.DateOffset(months=meses) - pd.Timestamp('2023-01-01')).days
+    df['Dt. Vencimento'] = pd.Timestamp('2023-01-01') + pd.to_timedelta(pd.RangeIndex(linhas) % dias, unit='D')
+    df['Dt. Emissão'] = df['Dt. Vencimento'] - pd.Timedelta(days=30)
+    return df
+
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das partições mensais do livro")
+    parser.add_argument('--linhas', type=int, default=50000)
+    parser.add_argument('--meses', type=int, default=36)
+    parser.add_argument('--ultimos', type=int, default=3, help="Meses lidos no recorte")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'contasapagar_benchmark.xlsx')
+        livro = livro_sintetico(args.linhas, args.meses)
+        livro.to_excel(caminho, index=False)
+
+        completo, tempo_planilha = medir(esquema_contas.ler_planilha, caminho)
+        manifesto, tempo_geracao = medir(particoes_contas.atualizar, caminho)
+        historico, tempo_historico = medir(particoes_contas.ler, caminho)
+        meses = particoes_contas.meses_disponiveis(caminho)
+        inicio, fim = meses[-args.ultimos], meses[-1]
+        recorte, tempo_recorte = medir(particoes_contas.ler, caminho, inicio, fim)
+
+        # Um mês alterado: nova versão do livro, todas as partições regravadas
+        alterado = livro.copy()
+        alterado.loc[alterado['Dt. Vencimento'].dt.strftime('%Y-%m') == meses[0], 'Vr. Título'] += 1
+        alterado.to_excel(caminho, index=False)
+        novo_manifesto, tempo_incremental = medir(particoes_contas.atualizar, caminho)
+        regravadas = len(novo_manifesto['particoes'])
+        depois, _ = medir(particoes_contas.ler, caminho, meses[0], meses[0])
+
+    esperado = completo[
+        (completo['Dt. Vencimento'] >= pd.Period(inicio, freq='M').start_time)
+        & (completo['Dt. Vencimento'] <= pd.Period(fim, freq='M').end_time)
+    ].reset_index(drop=True)
+    assert historico.equals(completo)
+    assert recorte.equals(esquema_contas.tipar(esperado))
+    assert (depois['Vr. Título'].to_numpy() == esquema_contas.tipar(
+        alterado[alterado['Dt. Vencimento'].dt.strftime('%Y-%m') == meses[0]])['Vr. Título'].to_numpy()).all()
+
+    print(f"Livro: {args.linhas} linhas em {len(meses)} meses ({manifesto['formato']})")
+    print(f"{'planilha inteira (read_excel)':>38}: {tempo_planilha:8.3f}s  {len(completo):>7} linhas")
+    print(f"{'geração das partições':>38}: {tempo_geracao:8.3f}s  (inclui a leitura da planilha)")
+    print(f"{'partições: todo o histórico':>38}: {tempo_historico:8.3f}s  {len(historico):>7} linhas")
+    print(f"{f'partições: {inicio} a {fim}':>38}: {tempo_recorte:8.3f}s  {len(recorte):>7} linhas")
+    print(f"{'nova geração (1 mês alterado)':>38}: {tempo_incremental:8.3f}s  "
+          f"{regravadas} partição(ões) regravada(s)")
+    print(f"Recorte: {tempo_planilha / tempo_recorte:.0f}x mais rápido que ler a planilha inteira")
+
+
+if __name__ == "__main__":
+    main()
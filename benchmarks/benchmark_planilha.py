@@ -0,0 +1,119 @@
+"""
+Benchmark - Inclusão de Boleto na Planilha
+Compara, para planilhas de 1 mil, 10 mil e 100 mil linhas, o custo de
+acrescentar um boleto:
+
+- reescrita: pd.read_excel + pd.concat + to_excel (caminho anterior de
+  adicionar_na_planilha)
+- in-place: inclusão da linha no fim da aba, direto no xlsx
+  (planilha_xlsx.anexar_linhas, caminho atual)
+- numeração: leitura da coluna Número (planilha_xlsx.ler_coluna), feita só
+  para semear a sequência, e uma reserva na sequência já semeada
+  (sequencia_numeros.reservar), feita a cada lote
+
+Para executar: python benchmarks/benchmark_planilha.py [--tamanhos 1000 10000 100000] [--repeticoes 2]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigo'))
+
+import planilha_xlsx
+import sequencia_numeros
+from automacao_boletos import COLUMNS_PADRAO, COLUNAS_DATA
+
+
+def gerar_planilha(linhas):
+    """Planilha sintética com o layout de COLUMNS_PADRAO."""
+    vencimentos = pd.Timestamp('2025-01-01') + pd.to_timedelta(pd.RangeIndex(linhas) % 365, unit='D')
+    valores = (pd.RangeIndex(linhas) % 5000 + 10.5).astype(float)
+    return pd.DataFrame({
+        'Número': [f"{i:06d}" for i in range(1, linhas + 1)],
+        'Fornecedor': [f"FORNECEDOR {i % 300} LTDA" for i in range(linhas)],
+        'Plano de contas': 'CONTAS A PAGAR',
+        'Histórico': [f"Boleto processado automaticamente - boleto_{i}.pdf" for i in range(linhas)],
+        'Dt. Emissão': vencimentos - pd.Timedelta(days=30),
+        'Dt. Vencimento': vencimentos,
+        'Dt. Pagamento': pd.NaT,
+        'Vr. Título': valores,
+        'Vr. Dev/Pag': valores,
+        'Valor Total a Pagar': valores,
+        'Forma de Pgto.': '3 - BOLETO',
+    }, columns=COLUMNS_PADRAO)
+
+
+def nova_linha(numero):
+    return {
+        'Número': f"{numero:06d}",
+        'Fornecedor': 'SUMAY DO BRASIL LTDA',
+        'Plano de contas': 'CONTAS A PAGAR',
+        'Histórico': 'Boleto processado automaticamente - benchmark.pdf',
+        'Dt. Emissão': pd.Timestamp('2025-06-11'),
+        'Dt. Vencimento': pd.Timestamp('2025-08-11'),
+        'Dt. Pagamento': None,
+        'Vr. Título': 1217.77,
+        'Vr. Dev/Pag': 1217.77,
+        'Valor Total a Pagar': 1217.77,
+        'Forma de Pgto.': '3 - BOLETO',
+    }
+
+
+def anexar_reescrevendo(caminho, linha):
+    """Caminho anterior: planilha inteira em DataFrame e regravada."""
+    df = pd.read_excel(caminho)
+    df = pd.concat([df, pd.DataFrame([linha])], ignore_index=True)
+    df = df.reindex(columns=COLUMNS_PADRAO)
+    df.to_excel(caminho, index=False)
+
+
+def anexar_in_place(caminho, linha):
+    planilha_xlsx.anexar_linhas(caminho, [linha], COLUMNS_PADRAO, COLUNAS_DATA)
+
+
+def medir(funcao, caminho, linhas, repeticoes):
+    tempos = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(caminho, nova_linha(linhas + i + 1))
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de inclusão de linha na planilha xlsx")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeticoes', type=int, default=2)
+    args = parser.parse_args(argv)
+
+    print(f"{'Linhas':>8} {'Reescrita (s)':>14} {'In-place (s)':>13} {'Ganho':>7} {'Semente (s)':>12} {'Reserva (ms)':>13}")
+    with tempfile.TemporaryDirectory() as pasta:
+        for linhas in args.tamanhos:
+            base = gerar_planilha(linhas)
+            caminho_reescrita = os.path.join(pasta, f'reescrita_{linhas}.xlsx')
+            caminho_in_place = os.path.join(pasta, f'in_place_{linhas}.xlsx')
+            base.to_excel(caminho_reescrita, index=False)
+            base.to_excel(caminho_in_place, index=False)
+
+            reescrita = medir(anexar_reescrevendo, caminho_reescrita, linhas, args.repeticoes)
+            in_place = medir(anexar_in_place, caminho_in_place, linhas, args.repeticoes)
+            inicio = time.perf_counter()
+            sequencia_numeros.reservar(
+                caminho_in_place, semente=lambda: sequencia_numeros.numeros_existentes(caminho_in_place)
+            )
+            semente = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            sequencia_numeros.reservar(caminho_in_place, 50)
+            reserva = time.perf_counter() - inicio
+            print(f"{linhas:>8} {reescrita:>14.3f} {in_place:>13.3f} {reescrita / in_place:>6.1f}x "
+                  f"{semente:>12.3f} {reserva * 1000:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark de Processamento de PDFs - Fusion Tech
+Mede processar_pdf (automação) e processar_pdf_integrado (dashboard) sobre
+um corpus sintético com gabarito (ver gerar_corpus_boletos.py).
+
+Para cada função informa: documentos/s, latência p50/p95 por PDF, pico de
+memória residente (RSS) e acurácia por campo contra o gabarito. Cada função
+roda em um processo novo, para que o pico de RSS de uma não contamine a
+outra. O cache de extração fica desligado, salvo com --com-cache.
+
+Para executar:
+    python benchmarks/benchmark_processamento.py --corpus corpus_boletos
+    python benchmarks/benchmark_processamento.py --gerar --safra 50 --braspress 20 --generico 30 --paginas 5
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DIRETORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DIRETORIO_BENCHMARKS, '..', 'codigo'))
+
+import gerar_corpus_boletos
+
+CAMPOS = ('Fornecedor', 'Valor', 'Vencimento', 'Data_Emissao', 'Numero_Documento')
+
+ALVOS = {
+    'processar_pdf': ('automacao_boletos', 'processar_pdf'),
+    'processar_pdf_integrado': ('dashboard_fusion_tech_integrado', 'processar_pdf_integrado'),
+}
+
+
+def _pico_rss_mb():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def _campo_correto(campo, esperado, obtido):
+    if campo == 'Valor':
+        return obtido is not None and abs(obtido - esperado) < 0.005
+    return obtido == esperado
+
+
+def _percentil(valores, p):
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method='inclusive')[p - 1]
+
+
+def medir(alvo, pasta_corpus, com_cache=False):
+    """
+    Processa o corpus inteiro com a função alvo (executado no processo filho).
+
+    Returns:
+        dict: documentos, tempo total, latências (s), pico de RSS e acertos por campo
+    """
+    import importlib
+    import cache_extracao
+
+    cache_extracao.HABILITADO = com_cache
+    modulo, funcao = ALVOS[alvo]
+    # O dashboard emite avisos do Streamlit fora do `streamlit run`
+    with contextlib.redirect_stderr(io.StringIO()):
+        processar = getattr(importlib.import_module(modulo), funcao)
+
+    gabarito = gerar_corpus_boletos.carregar_gabarito(pasta_corpus)
+    latencias = []
+    acertos = dict.fromkeys(CAMPOS, 0)
+    falhas = 0
+
+    inicio = time.perf_counter()
+    for arquivo, esperado in gabarito.items():
+        caminho = os.path.join(pasta_corpus, arquivo)
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            dados = processar(caminho)
+        latencias.append(time.perf_counter() - t0)
+        if not dados:
+            falhas += 1
+            continue
+        for campo in CAMPOS:
+            if _campo_correto(campo, esperado[campo], dados.get(campo)):
+                acertos[campo] += 1
+    total = time.perf_counter() - inicio
+
+    return {
+        'documentos': len(gabarito),
+        'total': total,
+        'latencias': latencias,
+        'pico_rss_mb': _pico_rss_mb(),
+        'acertos': acertos,
+        'falhas': falhas,
+    }
+
+
+def imprimir_resultado(alvo, resultado):
+    n = resultado['documentos']
+    latencias_ms = sorted(t * 1000 for t in resultado['latencias'])
+    pico = resultado['pico_rss_mb']
+
+    print(f"\n{alvo}")
+    print(f"   Documentos:      {n} ({resultado['falhas']} sem dados mínimos)")
+    print(f"   Vazão:           {n / resultado['total']:.1f} docs/s")
+    print(f"   Latência p50:    {_percentil(latencias_ms, 50):.1f} ms")
+    print(f"   Latência p95:    {_percentil(latencias_ms, 95):.1f} ms")
+    print(f"   Pico de RSS:     {f'{pico:.1f} MB' if pico is not None else 'indisponível'}")
+    print("   Acurácia por campo:")
+    for campo in CAMPOS:
+        acertos = resultado['acertos'][campo]
+        print(f"      {campo:<18} {acertos / n:7.1%} ({acertos}/{n})")
+
+
+def _parse_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de vazão e acurácia da extração de PDFs")
+    parser.add_argument('--corpus', help="Pasta com os PDFs e o gabarito.json")
+    parser.add_argument('--gerar', action='store_true',
+                        help="Gera um corpus temporário (usa --safra/--braspress/--generico/--paginas)")
+    parser.add_argument('--safra', type=int, default=20)
+    parser.add_argument('--braspress', type=int, default=20)
+    parser.add_argument('--generico', type=int, default=20)
+    parser.add_argument('--paginas', type=int, default=1)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--alvo', choices=list(ALVOS), action='append',
+                        help="Função a medir (padrão: todas)")
+    parser.add_argument('--com-cache', action='store_true',
+                        help="Mantém o cache de extração ligado")
+    args = parser.parse_args(argv)
+    if not args.corpus and not args.gerar:
+        parser.error("informe --corpus ou --gerar")
+    return args
+
+
+def main(argv=None):
+    args = _parse_argumentos(argv)
+
+    with tempfile.TemporaryDirectory() as temporario:
+        pasta_corpus = args.corpus
+        if args.gerar:
+            pasta_corpus = pasta_corpus or temporario
+            quantidades = {'safra': args.safra, 'braspress': args.braspress, 'generico': args.generico}
+            print(f"Gerando corpus em {pasta_corpus}...")
+            gerar_corpus_boletos.gerar_corpus(pasta_corpus, quantidades, args.paginas, args.semente)
+
+        print("=" * 60)
+        print("BENCHMARK DE PROCESSAMENTO DE PDFs")
+        print("=" * 60)
+        print(f"Corpus: {os.path.abspath(pasta_corpus)}")
+        print(f"Cache de extração: {'ligado' if args.com_cache else 'desligado'}")
+
+        for alvo in args.alvo or ALVOS:
+            # Processo novo por alvo: pico de RSS isolado
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                resultado = executor.submit(medir, alvo, pasta_corpus, args.com_cache).result()
+            imprimir_resultado(alvo, resultado)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark - Projeção de Caixa
+Compara, para um livro sintético com vários anos de vencimentos, a
+projeção diária das saídas:
+
+- laço: um filtro por dia do horizonte sobre as pendentes (a forma
+  direta de escrever "quanto sai em cada dia")
+- projecao: projecao_contas.projetar, calendário denso com bincount/cumsum
+- agrupada: a mesma projeção sobre as pendentes agrupadas por dia (como
+  chegam de agregados_contas.pendentes no dashboard)
+
+Confere que os três caminhos dão as mesmas saídas e, no livro de exemplo,
+que nenhum valor fica sem vencimento (o "Total Geral" do rodapé não é conta).
+
+Para executar: python benchmarks/benchmark_projecao.py [--linhas 2000000] [--anos 5] [--dias 365]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigo'))
+
+import esquema_contas
+import projecao_contas
+
+LIVRO_EXEMPLO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dados', 'contasapagar_1.xlsx')
+
+
+def pendentes_sinteticas(linhas, anos, referencia):
+    """Pendentes com vencimentos de `anos` anos, metade já vencida."""
+    gerador = np.random.default_rng(42)
+    dias = int(anos * 365)
+    deslocamento = gerador.integers(-dias // 2, dias // 2, linhas)
+    vencimento = referencia.normalize() + pd.to_timedelta(deslocamento, unit='D')
+    vencimento = vencimento.where(gerador.random(linhas) > 0.01)
+    return pd.DataFrame({
+        'vencimento': vencimento,
+        'linhas': 1,
+        'titulo': np.round(gerador.random(linhas) * 5000, 2),
+    })
+
+
+def projecao_em_laco(pendentes, referencia, horizonte):
+    hoje = (referencia - pd.Timedelta(1, 'ns')).normalize()
+    vencimento = pendentes['vencimento']
+    saidas = []
+    for dia in range(horizonte):
+        data = hoje + pd.Timedelta(days=dia)
+        mascara = vencimento <= data if dia == 0 else vencimento == data
+        saidas.append(pendentes.loc[mascara, 'titulo'].sum())
+    return np.array(saidas)
+
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da projeção de caixa")
+    parser.add_argument('--linhas', type=int, default=2000000)
+    parser.add_argument('--anos', type=float, default=5)
+    parser.add_argument('--dias', type=int, default=365, help="Horizonte da projeção")
+    parser.add_argument('--livro', default=LIVRO_EXEMPLO, help="Livro real conferido (padrão: o de exemplo)")
+    args = parser.parse_args(argv)
+
+    referencia = pd.Timestamp.now()
+    pendentes = pendentes_sinteticas(args.linhas, args.anos, referencia)
+    agrupadas = pendentes.groupby('vencimento', dropna=False, as_index=False)[['linhas', 'titulo']].sum()
+
+    laco, tempo_laco = medir(projecao_em_laco, pendentes, referencia, args.dias)
+    projecao, tempo_projecao = medir(projecao_contas.projetar, pendentes, referencia, args.dias)
+    agrupada, tempo_agrupada = medir(projecao_contas.projetar, agrupadas, referencia, args.dias)
+    comparacao, tempo_cenarios = medir(projecao_contas.comparar, agrupadas, referencia, args.dias)
+
+    assert np.allclose(laco, projecao.saidas)
+    assert np.allclose(projecao.saidas, agrupada.saidas)
+    assert np.isclose(comparacao[projecao_contas.ROLAR].acumulado[-1]
+                      + comparacao[projecao_contas.ROLAR].alem_do_horizonte,
+                      projecao.acumulado[-1] + projecao.alem_do_horizonte)
+    exemplo = projecao_contas.projetar(
+        projecao_contas.pendentes_do_livro(esquema_contas.ler_planilha(args.livro)), referencia, args.dias
+    )
+    assert exemplo.sem_vencimento == 0, f"Pendente sem vencimento no livro: R$ {exemplo.sem_vencimento:,.2f}"
+
+    print(f"Livro sintético: {args.linhas} pendentes em {args.anos:g} anos, horizonte de {args.dias} dias")
+    print(f"{'laço por dia':>28}: {tempo_laco * 1000:10.1f} ms")
+    print(f"{'projecao (linhas)':>28}: {tempo_projecao * 1000:10.1f} ms")
+    print(f"{f'projecao ({len(agrupadas)} dias agrupados)':>28}: {tempo_agrupada * 1000:10.1f} ms")
+    print(f"{'dois cenários (agrupados)':>28}: {tempo_cenarios * 1000:10.1f} ms")
+    print(f"Projeção: {tempo_laco / tempo_projecao:.0f}x mais rápida que o laço")
+    print(f"\nVencido hoje: R$ {projecao.vencido:,.2f} | próximos 30 dias: R$ {projecao.nos_proximos(30):,.2f}")
+    print(f"{os.path.basename(args.livro)}: vencido R$ {exemplo.vencido:,.2f} | "
+          f"sem vencimento R$ {exemplo.sem_vencimento:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark - Resumo de Vários Livros
+Gera vários livros sintéticos (um por filial) e compara duas formas de
+calcular os indicadores de todos eles juntos:
+
+- concatenar: lê todos os livros, junta num DataFrame só e calcula
+  (indicadores_contas.calcular)
+- resumo: resumo_contas.resumir_livros, um resumo por livro somado ao total,
+  com 1 worker e com --workers processos
+
+Mede o tempo e o pico de memória do processo principal (tracemalloc) e
+confere que os indicadores são os mesmos.
+
+Para executar: python benchmarks/benchmark_resumo.py [--livros 8] [--linhas 20000] [--workers 4]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigo'))
+
+import indicadores_contas
+import particoes_contas
+import resumo_contas
+from benchmark_particoes import livro_sintetico
+
+REFERENCIA = pd.Timestamp('2024-06-15')
+
+
+def concatenar(caminhos):
+    df = pd.concat([particoes_contas.ler(caminho) for caminho in caminhos], ignore_index=True)
+    return indicadores_contas.calcular(df, REFERENCIA)
+
+
+def resumir(caminhos, workers):
+    return resumo_contas.resumir_livros(caminhos, workers=workers).indicadores(REFERENCIA)
+
+
+def iguais(a, b):
+    """Mesmos indicadores (valores em reais comparados até o centavo)."""
+    for campo in ('total_registros', 'contas_pagas', 'contas_pendentes', 'contas_vencidas', 'fornecedores_unicos'):
+        assert getattr(a, campo) == getattr(b, campo), campo
+    for campo in ('total_titulos', 'total_pago', 'total_vencido'):
+        assert abs(getattr(a, campo) - getattr(b, campo)) < 0.01, campo
+    assert a.vazios.equals(b.vazios)
+    assert a.formas_pgto.equals(b.formas_pgto)
+
+
+def medir(funcao, *args):
+    """Resultado, tempo e pico de memória (numa segunda execução: o tracemalloc deixa tudo mais lento)."""
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    tempo = time.perf_counter() - inicio
+    tracemalloc.start()
+    funcao(*args)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, tempo, pico
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do resumo de vários livros")
+    parser.add_argument('--livros', type=int, default=8)
+    parser.add_argument('--linhas', type=int, default=20000, help="Linhas por livro")
+    parser.add_argument('--meses', type=int, default=24)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminhos = []
+        for numero in range(args.livros):
+            caminho = os.path.join(pasta, f'filial_{numero}.xlsx')
+            livro_sintetico(args.linhas, args.meses).to_excel(caminho, index=False)
+            # Partições geradas antes: as duas formas leem pelo mesmo caminho
+            particoes_contas.atualizar(caminho)
+            caminhos.append(caminho)
+
+        esperado, tempo_concatenar, pico_concatenar = medir(concatenar, caminhos)
+        serial, tempo_serial, pico_serial = medir(resumir, caminhos, 1)
+        paralelo, tempo_paralelo, pico_paralelo = medir(resumir, caminhos, args.workers)
+
+    iguais(serial, esperado)
+    iguais(paralelo, esperado)
+
+    print(f"Livros: {args.livros} x {args.linhas} linhas ({esperado.total_registros} registros)")
+    print(f"{'concatenar':>24}: {tempo_concatenar * 1000:10.1f} ms | pico {pico_concatenar / 2**20:8.1f} MiB")
+    print(f"{'resumo (1 worker)':>24}: {tempo_serial * 1000:10.1f} ms | pico {pico_serial / 2**20:8.1f} MiB")
+    print(f"{f'resumo ({args.workers} workers)':>24}: {tempo_paralelo * 1000:10.1f} ms | "
+          f"pico {pico_paralelo / 2**20:8.1f} MiB (só o processo principal)")
+    print(f"\nMemória com 1 worker: {pico_concatenar / pico_serial:.1f}x menor que concatenar | "
+          f"{args.workers} workers: aceleração de {tempo_concatenar / tempo_paralelo:.1f}x sobre concatenar "
+          f"({os.cpu_count()} CPU(s) nesta máquina)")
+
+
+if __name__ == "__main__":
+    main()
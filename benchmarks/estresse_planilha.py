@@ -0,0 +1,160 @@
+"""
+Teste de Estresse - Gravação Concorrente na Planilha
+Vários processos gravam a mesma planilha ao mesmo tempo e, no fim, confere
+que nenhuma linha se perdeu:
+
+- automação: N processos incluem lotes de boletos (sequencia_numeros +
+  planilha_xlsx.anexar_linhas), como o automacao_boletos.py
+- pagamento: baixa/reabertura de títulos célula a célula dentro da trava,
+  como o dashboard
+- editor: lê a planilha, altera o Histórico e regrava a planilha inteira
+  com conferência de versão (ConflitoDeVersao -> relê e tenta de novo)
+- leitor: relê a planilha sem parar e conta leituras com erro (arquivo
+  pela metade)
+
+Resultado esperado: todos os números incluídos presentes exatamente uma
+vez e nenhuma leitura com erro. Sai com código 1 se algo falhar.
+
+Para executar: python benchmarks/estresse_planilha.py [--processos 6] [--lotes 10] [--linhas-por-lote 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigo'))
+
+import planilha_xlsx
+import sequencia_numeros
+from automacao_boletos import COLUMNS_PADRAO, COLUNAS_DATA
+from benchmark_planilha import gerar_planilha, nova_linha
+
+
+def _semente(caminho):
+    return lambda: sequencia_numeros.numeros_existentes(caminho)
+
+
+def automacao(caminho, lotes, linhas_por_lote, semente):
+    """Inclui `lotes` lotes e devolve os números gravados."""
+    rng = random.Random(semente)
+    gravados = []
+    for _ in range(lotes):
+        faixa = sequencia_numeros.reservar(caminho, linhas_por_lote, semente=_semente(caminho))
+        linhas = []
+        for numero in faixa:
+            linha = nova_linha(numero)
+            linha['Número'] = sequencia_numeros.formatar(numero)
+            linhas.append(linha)
+        planilha_xlsx.anexar_linhas(caminho, linhas, COLUMNS_PADRAO, COLUNAS_DATA)
+        gravados.extend(linha['Número'] for linha in linhas)
+        time.sleep(rng.uniform(0, 0.02))
+    return gravados
+
+
+def pagamento(caminho, ciclos, semente):
+    """Marca e desmarca Dt. Pagamento de linhas aleatórias."""
+    rng = random.Random(semente)
+    for ciclo in range(ciclos):
+        with planilha_xlsx.trava(caminho):
+            wb, ws, cabecalho = planilha_xlsx.abrir(caminho)
+            linhas = rng.sample(range(2, ws.max_row + 1), k=min(3, ws.max_row - 1))
+            valor = pd.Timestamp('2025-09-01').to_pydatetime() if ciclo % 2 == 0 else None
+            planilha_xlsx.atualizar_celulas(
+                ws, cabecalho, linhas, 'Dt. Pagamento', valor, formato_de='Dt. Vencimento'
+            )
+            planilha_xlsx.salvar(wb, caminho)
+        time.sleep(rng.uniform(0, 0.02))
+    return ciclos
+
+
+def editor(caminho, gravacoes, semente):
+    """Regrava a planilha inteira `gravacoes` vezes; devolve quantos conflitos detectou."""
+    rng = random.Random(semente)
+    conflitos = 0
+    feitas = 0
+    while feitas < gravacoes:
+        df, versao = planilha_xlsx.ler_com_versao(caminho, dtype={'Número': str})
+        df.loc[rng.randrange(len(df)), 'Histórico'] = f"Editado ({semente}/{feitas})"
+        time.sleep(rng.uniform(0, 0.05))  # Usuário editando
+        try:
+            with planilha_xlsx.trava(caminho):
+                planilha_xlsx.verificar_versao(caminho, versao)
+                planilha_xlsx.gravar_dataframe(df, caminho)
+            feitas += 1
+        except planilha_xlsx.ConflitoDeVersao:
+            conflitos += 1
+    return conflitos
+
+
+def leitor(caminho, duracao):
+    """Relê a planilha durante `duracao` segundos; devolve (leituras, erros)."""
+    leituras = erros = 0
+    limite = time.monotonic() + duracao
+    while time.monotonic() < limite:
+        try:
+            pd.read_excel(caminho)
+            leituras += 1
+        except Exception:
+            erros += 1
+    return leituras, erros
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estresse de gravação concorrente na planilha xlsx")
+    parser.add_argument('--processos', type=int, default=6, help="Processos de automação")
+    parser.add_argument('--lotes', type=int, default=10, help="Lotes por processo de automação")
+    parser.add_argument('--linhas-por-lote', type=int, default=5)
+    parser.add_argument('--editores', type=int, default=2)
+    parser.add_argument('--iniciais', type=int, default=200, help="Linhas da planilha inicial")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'contasapagar_estresse.xlsx')
+        planilha_xlsx.gravar_dataframe(gerar_planilha(args.iniciais), caminho)
+        esperados = {sequencia_numeros.formatar(i) for i in range(1, args.iniciais + 1)}
+
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.processos + args.editores + 2) as executor:
+            inclusoes = [
+                executor.submit(automacao, caminho, args.lotes, args.linhas_por_lote, i)
+                for i in range(args.processos)
+            ]
+            edicoes = [executor.submit(editor, caminho, args.lotes, i) for i in range(args.editores)]
+            baixas = executor.submit(pagamento, caminho, args.lotes * 2, 99)
+            leituras = executor.submit(leitor, caminho, 3.0)
+
+            gravados = [numero for futuro in inclusoes for numero in futuro.result()]
+            conflitos = sum(futuro.result() for futuro in edicoes)
+            baixas.result()
+            total_leituras, erros_leitura = leituras.result()
+        duracao = time.perf_counter() - inicio
+
+        final = pd.read_excel(caminho, dtype={'Número': str})
+        contagem = Counter(final['Número'])
+        esperados |= set(gravados)
+        perdidos = esperados - set(contagem)
+        duplicados = [numero for numero, vezes in contagem.items() if vezes > 1]
+
+    print(f"Processos de automação: {args.processos} x {args.lotes} lotes x {args.linhas_por_lote} linhas")
+    print(f"Linhas esperadas:       {len(esperados)} (final: {len(final)})")
+    print(f"Linhas perdidas:        {len(perdidos)}")
+    print(f"Números duplicados:     {len(duplicados)}")
+    print(f"Conflitos do editor:    {conflitos} (detectados e refeitos)")
+    print(f"Leituras concorrentes:  {total_leituras} ({erros_leitura} com erro)")
+    print(f"Duração:                {duracao:.1f}s")
+
+    if perdidos or duplicados or erros_leitura or len(final) != len(esperados):
+        print("❌ FALHOU")
+        sys.exit(1)
+    print("✓ OK")
+
+
+if __name__ == "__main__":
+    main()
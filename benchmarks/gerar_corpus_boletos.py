@@ -0,0 +1,253 @@
+"""
+Gerador de Corpus Sintético de Boletos - Fusion Tech
+Cria PDFs de boleto nos layouts Safra, Braspress e genérico com o backend
+PDF do matplotlib (texto extraível pelo pdfplumber) e grava o gabarito de
+cada arquivo em gabarito.json.
+
+Os valores, datas, fornecedores e números são sorteados a partir de uma
+semente, então o mesmo comando gera sempre o mesmo corpus. Os boletos Safra
+trazem uma linha digitável válida com o mesmo valor e vencimento do corpo.
+
+Para executar:
+    python benchmarks/gerar_corpus_boletos.py --saida corpus --safra 50 --braspress 20 --generico 30 --paginas 5
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+import matplotlib
+matplotlib.use('Agg')
+matplotlib.rcParams['pdf.fonttype'] = 42
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codigo'))
+
+from linha_digitavel import gerar_linha_digitavel
+
+ARQUIVO_GABARITO = 'gabarito.json'
+
+TAMANHO_PAGINA = (8.27, 11.69)  # A4 em polegadas
+LINHAS_POR_PAGINA = 55
+
+FORNECEDORES = [
+    'SUMAY DO BRASIL LTDA',
+    'DISTRIBUIDORA ALFA LTDA',
+    'COMERCIAL SANTOS & FILHOS LTDA',
+    'METALURGICA NOVA ERA S.A.',
+    'PAPELARIA CENTRAL ME',
+    'TRANSPORTES RAPIDO SUL LTDA',
+    'INDUSTRIA QUIMICA BETA S.A.',
+    'SERVICOS GERAIS OMEGA LTDA',
+]
+FORNECEDOR_BRASPRESS = 'BRASPRESS TRANSPORTES URGENTES LTDA'
+CIDADES = ['SAO PAULO', 'CAMPINAS', 'CURITIBA', 'BELO HORIZONTE', 'PORTO ALEGRE', 'RECIFE']
+MESES = [
+    'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+    'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro',
+]
+
+
+def formatar_valor(valor):
+    """1234.5 -> '1.234,50'"""
+    return f"{valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+def formatar_data(data):
+    return data.strftime('%d/%m/%Y')
+
+
+def _cnpj(rng):
+    n = f"{rng.randrange(10**8):08d}"
+    return f"{n[:2]}.{n[2:5]}.{n[5:8]}/0001-{rng.randrange(100):02d}"
+
+
+def _pagina(pp, linhas, tamanho_fonte=7):
+    fig = plt.figure(figsize=TAMANHO_PAGINA)
+    y = 0.97
+    for linha in linhas:
+        fig.text(0.05, y, linha, fontsize=tamanho_fonte)
+        y -= 0.016
+    pp.savefig(fig)
+    plt.close(fig)
+
+
+def _linhas_detalhamento(rng, emissao, quantidade, inicio):
+    """Linhas de tabela (CT-e, data, cidade, valor) que enchem as páginas extras."""
+    return [
+        f"{inicio + i} {formatar_data(emissao)} {rng.choice(CIDADES)} {rng.randrange(1, 99)} "
+        f"{formatar_valor(rng.uniform(5, 95))}"
+        for i in range(quantidade)
+    ]
+
+
+def _sortear_boleto(rng, hoje):
+    emissao = hoje - timedelta(days=rng.randrange(0, 90))
+    vencimento = emissao + timedelta(days=rng.choice((15, 28, 30, 45, 60)))
+    return {
+        'valor': round(rng.uniform(10, 50000), 2),
+        'emissao': emissao,
+        'vencimento': vencimento,
+    }
+
+
+def gerar_safra(caminho, rng, paginas, hoje):
+    b = _sortear_boleto(rng, hoje)
+    fornecedor = rng.choice(FORNECEDORES)
+    numero = f"NF{rng.randrange(10**6):06d}"
+    campo_livre = f"{rng.randrange(10**25):025d}"
+    linha = gerar_linha_digitavel('422', b['valor'], b['vencimento'], campo_livre)
+
+    with PdfPages(caminho) as pp:
+        _pagina(pp, [
+            f"BANCO SAFRA S.A. 422-7 {linha}",
+            "Local de Pagamento Vencimento",
+            f"PAGÁVEL EM QUALQUER BANCO ATÉ O VENCIMENTO {formatar_data(b['vencimento'])}",
+            "Beneficiário CNPJ / CPF Ag./Cód.Beneficiário",
+            f"{fornecedor} {_cnpj(rng)} 0001/123456-7",
+            "Data Documento Vencimento",
+            "Nº Doc Espécie Aceite Data Processamento",
+            f"{formatar_data(b['emissao'])} {formatar_data(b['vencimento'])}",
+            "(=) Valor do Documento",
+            f"01 R$ {formatar_valor(b['valor'])}",
+            "Número do Documento",
+            numero,
+            "(-) Desconto / Abatimento",
+        ], tamanho_fonte=9)
+        for k in range(paginas - 1):
+            _pagina(pp, ["Demonstrativo"] + _linhas_detalhamento(
+                rng, b['emissao'], LINHAS_POR_PAGINA, 1000 + k * LINHAS_POR_PAGINA))
+
+    return fornecedor, numero, b
+
+
+def gerar_braspress(caminho, rng, paginas, hoje):
+    b = _sortear_boleto(rng, hoje)
+    numero = f"{rng.randrange(10**7, 10**8)}"
+    emissao = b['emissao']
+    cabecalho = [
+        FORNECEDOR_BRASPRESS,
+        f"FATURA DE SERVIÇOS Nº Fatura: {numero}",
+        f"Emissão: {emissao.day} de {MESES[emissao.month - 1]} de {emissao.year}",
+    ]
+    fechamento = [
+        f"{formatar_valor(b['valor'])} DM",
+        "VALOR LÍQUIDO R$",
+        formatar_valor(b['valor']),
+        "Beneficiário Final CNPJ",
+        f"{FORNECEDOR_BRASPRESS} {_cnpj(rng)}",
+        f"{formatar_data(b['vencimento'])} REAL",
+    ]
+
+    with PdfPages(caminho) as pp:
+        if paginas == 1:
+            _pagina(pp, cabecalho + _linhas_detalhamento(rng, emissao, 20, 1000) + fechamento)
+        else:
+            _pagina(pp, cabecalho + _linhas_detalhamento(rng, emissao, LINHAS_POR_PAGINA - 3, 1000))
+            for k in range(paginas - 2):
+                _pagina(pp, _linhas_detalhamento(
+                    rng, emissao, LINHAS_POR_PAGINA, 2000 + k * LINHAS_POR_PAGINA))
+            _pagina(pp, fechamento)
+
+    return FORNECEDOR_BRASPRESS, numero, b
+
+
+def gerar_generico(caminho, rng, paginas, hoje):
+    b = _sortear_boleto(rng, hoje)
+    fornecedor = rng.choice(FORNECEDORES)
+    numero = f"{b['emissao'].year}/{rng.randrange(10**4):04d}"
+
+    with PdfPages(caminho) as pp:
+        _pagina(pp, [
+            "RECIBO DO PAGADOR",
+            f"Cedente: {fornecedor}",
+            _cnpj(rng),
+            f"Data de Emissão: {formatar_data(b['emissao'])}",
+            f"Vencimento: {formatar_data(b['vencimento'])}",
+            f"Número do Documento: {numero}",
+            f"Valor do Documento: {formatar_valor(b['valor'])}",
+        ], tamanho_fonte=9)
+        for k in range(paginas - 1):
+            _pagina(pp, ["Instruções"] + _linhas_detalhamento(
+                rng, b['emissao'], LINHAS_POR_PAGINA, 1000 + k * LINHAS_POR_PAGINA))
+
+    return fornecedor, numero, b
+
+
+GERADORES = {
+    'safra': gerar_safra,
+    'braspress': gerar_braspress,
+    'generico': gerar_generico,
+}
+
+
+def gerar_corpus(pasta_saida, quantidades, paginas=1, semente=42, hoje=None):
+    """
+    Gera o corpus e o gabarito.
+
+    Args:
+        quantidades: {layout: quantidade de PDFs}
+        paginas: Páginas por PDF (o conteúdo do boleto fica na primeira,
+            ou na última no caso da fatura Braspress)
+
+    Returns:
+        dict: Gabarito {arquivo: campos esperados}, também salvo em gabarito.json
+    """
+    os.makedirs(pasta_saida, exist_ok=True)
+    rng = random.Random(semente)
+    hoje = hoje or date.today()
+    gabarito = {}
+
+    for layout, quantidade in quantidades.items():
+        for i in range(quantidade):
+            arquivo = f"{layout}_{i:04d}.pdf"
+            fornecedor, numero, b = GERADORES[layout](
+                os.path.join(pasta_saida, arquivo), rng, paginas, hoje
+            )
+            gabarito[arquivo] = {
+                'layout': layout,
+                'paginas': paginas,
+                'Fornecedor': fornecedor,
+                'Valor': b['valor'],
+                'Vencimento': formatar_data(b['vencimento']),
+                'Data_Emissao': formatar_data(b['emissao']),
+                'Numero_Documento': numero,
+            }
+
+    with open(os.path.join(pasta_saida, ARQUIVO_GABARITO), 'w', encoding='utf-8') as f:
+        json.dump(gabarito, f, ensure_ascii=False, indent=2)
+    return gabarito
+
+
+def carregar_gabarito(pasta_corpus):
+    with open(os.path.join(pasta_corpus, ARQUIVO_GABARITO), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _parse_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Gera PDFs sintéticos de boletos com gabarito")
+    parser.add_argument('--saida', default='corpus_boletos', help="Pasta de saída (padrão: corpus_boletos)")
+    parser.add_argument('--safra', type=int, default=20, help="Quantidade de boletos Safra")
+    parser.add_argument('--braspress', type=int, default=20, help="Quantidade de faturas Braspress")
+    parser.add_argument('--generico', type=int, default=20, help="Quantidade de boletos genéricos")
+    parser.add_argument('--paginas', type=int, default=1, help="Páginas por PDF (padrão: 1)")
+    parser.add_argument('--semente', type=int, default=42, help="Semente do sorteio (padrão: 42)")
+    args = parser.parse_args(argv)
+    if args.paginas < 1:
+        parser.error("--paginas deve ser pelo menos 1")
+    return args
+
+
+def main(argv=None):
+    args = _parse_argumentos(argv)
+    quantidades = {'safra': args.safra, 'braspress': args.braspress, 'generico': args.generico}
+    gabarito = gerar_corpus(args.saida, quantidades, args.paginas, args.semente)
+    print(f"✓ {len(gabarito)} PDF(s) gerado(s) em {os.path.abspath(args.saida)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Aging das Contas a Pagar - Fusion Tech
+Contas pendentes (sem Dt. Pagamento) distribuídas em faixas de prazo por
+fornecedor: vencidas há 1-30, 31-60, 61-90 e mais de 90 dias; a vencer em
+até 7, 8-15, 16-30 e mais de 30 dias; e as sem vencimento. Só linhas com
+Número válido são contas: o "Total Geral" do rodapé e linhas em branco
+ficam de fora.
+
+As faixas são configuráveis (FAIXAS_VENCIDAS / FAIXAS_A_VENCER no
+config.py, ou por parâmetro) e o enquadramento é todo vetorizado: a faixa
+de cada conta sai de np.searchsorted sobre os dias até o vencimento, e os
+totais por fornecedor e faixa de um np.bincount. Serve tanto ao livro
+linha a linha (calcular) quanto aos grupos por dia dos agregados
+(agregados_contas.pendentes), que o dashboard usa.
+
+Os dias seguem indicadores_contas: a conta vence à meia-noite do dia de
+vencimento, então no próprio dia ela já conta 1 dia de atraso.
+
+Para executar:
+    python codigo/aging_contas.py dados/contasapagar_1.xlsx
+    python codigo/aging_contas.py dados/contasapagar_1.xlsx --vencidas 15 30 60 90 --a-vencer 7 30
+"""
+
+import argparse
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import esquema_contas
+
+try:
+    from config import FAIXAS_VENCIDAS
+except ImportError:
+    FAIXAS_VENCIDAS = [30, 60, 90]
+
+try:
+    from config import FAIXAS_A_VENCER
+except ImportError:
+    FAIXAS_A_VENCER = [7, 15, 30]
+
+SEM_VENCIMENTO = 'Sem vencimento'
+SEM_FORNECEDOR = 'Não informado'
+
+
+@dataclass(frozen=True)
+class Aging:
+    """Aging das contas pendentes, calculado em calcular() ou calcular_grupos()."""
+    valores: pd.DataFrame       # Vr. Título por fornecedor (linhas) e faixa (colunas)
+    quantidades: pd.DataFrame   # Contas por fornecedor e faixa
+    vencidas: list              # Faixas de contas vencidas, da mais antiga à mais recente
+    a_vencer: list              # Faixas de contas a vencer, da mais próxima à mais distante
+    referencia: pd.Timestamp
+
+    @property
+    def totais(self):
+        """Contas e Vr. Título por faixa."""
+        return pd.DataFrame({'Contas': self.quantidades.sum(), 'Vr. Título': self.valores.sum()})
+
+    @property
+    def total_vencido(self):
+        return float(self.valores[self.vencidas].to_numpy().sum())
+
+    def maiores_vencidos(self, quantidade=10):
+        """Fornecedores com mais valor vencido, com as faixas de cada um."""
+        vencido = self.valores[self.vencidas].sum(axis=1)
+        ordem = vencido[vencido > 0].sort_values(ascending=False).head(quantidade).index
+        return self.valores.loc[ordem]
+
+
+def _validar(limites, nome):
+    limites = [int(limite) for limite in limites]
+    if not limites or limites[0] < 1 or any(b <= a for a, b in zip(limites, limites[1:])):
+        raise ValueError(f"{nome}: informe dias positivos em ordem crescente (ex.: 30 60 90)")
+    return limites
+
+
+def rotulos_faixas(faixas_vencidas=None, faixas_a_vencer=None):
+    """
+    Nomes das faixas, na ordem das colunas do relatório.
+
+    Returns:
+        tuple: (faixas vencidas da mais antiga para a mais recente,
+            faixas a vencer da mais próxima para a mais distante)
+    """
+    vencidas = _validar(FAIXAS_VENCIDAS if faixas_vencidas is None else faixas_vencidas, "Faixas vencidas")
+    a_vencer = _validar(FAIXAS_A_VENCER if faixas_a_vencer is None else faixas_a_vencer, "Faixas a vencer")
+
+    def nomes(prefixo, limites):
+        inicios = [1] + [limite + 1 for limite in limites[:-1]]
+        return [f"{prefixo} {inicio}-{fim}" for inicio, fim in zip(inicios, limites)] + [f"{prefixo} {limites[-1]}+"]
+
+    return nomes("Vencido", vencidas)[::-1], nomes("A vencer", a_vencer)
+
+
+def _agrupar(vencimento, fornecedor, valor, quantidade, referencia, faixas_vencidas, faixas_a_vencer):
+    """
+    Aging de arrays alinhados (uma posição por conta ou por grupo de contas).
+
+    Args:
+        vencimento: datetime64 (NaT: sem vencimento)
+        fornecedor: Série ou array de nomes (vazios: não informado)
+        valor: Vr. Título (NaN conta como 0)
+        quantidade: Contas em cada posição
+    """
+    referencia = pd.Timestamp.now() if referencia is None else pd.Timestamp(referencia)
+    nomes_vencidas, nomes_a_vencer = rotulos_faixas(faixas_vencidas, faixas_a_vencer)
+    vencidas = _validar(FAIXAS_VENCIDAS if faixas_vencidas is None else faixas_vencidas, "Faixas vencidas")
+    a_vencer = _validar(FAIXAS_A_VENCER if faixas_a_vencer is None else faixas_a_vencer, "Faixas a vencer")
+    colunas = nomes_vencidas + nomes_a_vencer + [SEM_VENCIMENTO]
+
+    # Último dia já vencido na referência (mesma regra de indicadores_contas)
+    ultimo_vencido = np.datetime64((referencia - pd.Timedelta(1, 'ns')).normalize(), 'D')
+    vencimento = np.asarray(vencimento, dtype='datetime64[ns]').astype('datetime64[D]')
+    sem_vencimento = np.isnat(vencimento)
+    # Dias até o vencimento: <= 0 já venceu (atraso = 1 - dias), >= 1 a vencer
+    dias = np.where(sem_vencimento, 0, (vencimento - ultimo_vencido).astype(np.int64))
+
+    faixa = np.where(
+        dias <= 0,
+        len(vencidas) - np.searchsorted(vencidas, 1 - dias, side='left'),
+        len(nomes_vencidas) + np.searchsorted(a_vencer, dias, side='left'),
+    )
+    faixa[sem_vencimento] = len(colunas) - 1
+
+    fornecedor = pd.Series(fornecedor).astype(object)
+    fornecedor = fornecedor.where(fornecedor.notna() & (fornecedor != ''), SEM_FORNECEDOR)
+    codigos, nomes_fornecedores = pd.factorize(fornecedor.to_numpy(), sort=True)
+    celula = codigos * len(colunas) + faixa
+    tamanho = len(nomes_fornecedores) * len(colunas)
+
+    def tabela(pesos):
+        totais = np.bincount(celula, weights=pesos, minlength=tamanho)
+        return pd.DataFrame(
+            totais.reshape(len(nomes_fornecedores), len(colunas)),
+            index=pd.Index(nomes_fornecedores, name='Fornecedor'), columns=colunas,
+        )
+
+    valores = tabela(np.nan_to_num(np.asarray(valor, dtype=float)))
+    quantidades = tabela(np.asarray(quantidade, dtype=float)).astype(np.int64)
+    # Fornecedores com mais valor pendente primeiro
+    ordem = valores.sum(axis=1).sort_values(ascending=False, kind='stable').index
+    return Aging(
+        valores=valores.loc[ordem],
+        quantidades=quantidades.loc[ordem],
+        vencidas=nomes_vencidas,
+        a_vencer=nomes_a_vencer,
+        referencia=referencia,
+    )
+
+
+def calcular(df, referencia=None, faixas_vencidas=None, faixas_a_vencer=None):
+    """
+    Aging das contas pendentes do DataFrame (tipos de esquema_contas).
+
+    Args:
+        referencia: Instante de referência (padrão: agora)
+        faixas_vencidas: Limites em dias de atraso (padrão: FAIXAS_VENCIDAS)
+        faixas_a_vencer: Limites em dias até o vencimento (padrão: FAIXAS_A_VENCER)
+
+    Returns:
+        Aging
+    """
+    pendentes = df['Dt. Pagamento'].isna()
+    if 'Número' in df.columns:
+        pendentes &= esquema_contas.numerados(df['Número'])
+    pendentes = df[pendentes]
+    fornecedor = pendentes['Fornecedor'] if 'Fornecedor' in pendentes.columns else pd.Series(None, index=pendentes.index)
+    return _agrupar(
+        pendentes['Dt. Vencimento'].to_numpy(),
+        fornecedor,
+        pendentes['Vr. Título'].to_numpy(dtype=float, na_value=np.nan),
+        np.ones(len(pendentes)),
+        referencia, faixas_vencidas, faixas_a_vencer,
+    )
+
+
+def calcular_grupos(grupos, referencia=None, faixas_vencidas=None, faixas_a_vencer=None):
+    """
+    Aging a partir de contas pendentes já agrupadas (agregados_contas.pendentes):
+    colunas vencimento, fornecedor, linhas e titulo. Mesmo resultado de
+    calcular() sobre as linhas, com custo proporcional aos grupos.
+    """
+    return _agrupar(
+        grupos['vencimento'].to_numpy(),
+        grupos['fornecedor'],
+        grupos['titulo'].to_numpy(dtype=float),
+        grupos['linhas'].to_numpy(),
+        referencia, faixas_vencidas, faixas_a_vencer,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aging das contas a pagar - Fusion Tech")
+    parser.add_argument('planilha', help="Planilha do livro")
+    parser.add_argument('--vencidas', type=int, nargs='+', metavar='DIAS', help="Limites das faixas de atraso")
+    parser.add_argument('--a-vencer', type=int, nargs='+', metavar='DIAS', help="Limites das faixas a vencer")
+    parser.add_argument('--fornecedores', type=int, default=10, help="Fornecedores listados")
+    args = parser.parse_args(argv)
+
+    aging = calcular(esquema_contas.ler_planilha(args.planilha), faixas_vencidas=args.vencidas,
+                     faixas_a_vencer=args.a_vencer)
+    print(f"Aging em {aging.referencia:%d/%m/%Y}")
+    for faixa, linha in aging.totais.iterrows():
+        print(f"   {faixa:<20} {linha['Contas']:>6.0f} conta(s)   R$ {linha['Vr. Título']:>15,.2f}")
+    maiores = aging.maiores_vencidos(args.fornecedores)
+    if not maiores.empty:
+        print("\nFornecedores com mais valor vencido:")
+        with pd.option_context('display.width', 200, 'display.max_columns', None):
+            print(maiores[aging.vencidas].to_string(float_format=lambda valor: f"{valor:,.2f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,652 @@
+"""
+Agregados do Livro de Contas - Fusion Tech
+Contagens e somas do livro mantidas em disco e atualizadas pela diferença
+a cada gravação, para os indicadores não dependerem de reler o livro.
+
+Os agregados ficam em <planilha>.agregados.sqlite3:
+
+- grupos: por dia de vencimento, situação (pago/pendente), fornecedor,
+  forma de pagamento e se a linha tem Número válido -> linhas, soma de
+  Vr. Título e de Vr. Dev/Pag (em centavos, inteiros: somar e subtrair
+  diferenças não acumula erro). Linhas sem Número (o "Total Geral" do
+  rodapé, linhas em branco) contam nos indicadores do livro, como em
+  indicadores_contas, mas não são contas pendentes para aging e projeção
+- vazios: por dia de vencimento e coluna -> células vazias
+- cubo: por mês de vencimento, fornecedor, forma de pagamento e status
+  (pago / vencido / a vencer) -> as mesmas medidas, para a timeline e os
+  recortes do dashboard (ver cubo_contas)
+- estado: versão do livro a que os agregados correspondem
+
+O dia de vencimento (e não só o mês) é guardado porque "vencida" depende
+da data de hoje: a conta pendente vence à meia-noite do dia seguinte.
+O cubo guarda o último dia considerado vencido; cada diferença aplicada
+marca os meses que tocou, e a virada do dia marca os meses com pendentes
+que venceram desde então. Só esses meses do cubo são refeitos.
+
+As gravações do livro (inclusão de boletos, baixa, reabertura, exclusão e
+a gravação do editor do dashboard) passam por alteracao(), que anota as
+linhas que entram e saem e aplica a diferença se os agregados estavam na
+versão do livro de antes da gravação. Qualquer outra alteração do livro
+(ex.: edição da planilha no Excel) é percebida pela versão, e a próxima
+leitura recalcula tudo a partir do livro.
+
+Para executar:
+    python codigo/agregados_contas.py mostrar dados/contasapagar_automacao.xlsx
+    python codigo/agregados_contas.py verificar dados/contasapagar_automacao.xlsx
+    python codigo/agregados_contas.py reconstruir dados/contasapagar_automacao.xlsx
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import base_contas
+import esquema_contas
+import indicadores_contas
+import particoes_contas
+from trava_arquivo import travado
+
+PAGO = 'pago'
+PENDENTE = 'pendente'
+# Status do cubo (as pendentes se dividem pela data de referência)
+VENCIDO = 'vencido'
+A_VENCER = 'a vencer'
+CHAVES = ['vencimento', 'situacao', 'fornecedor', 'forma', 'numerada']
+MEDIDAS = ['linhas', 'titulo_centavos', 'pago_centavos']
+# Chave sem valor (vencimento, fornecedor ou forma vazios)
+SEM_VALOR = ''
+
+
+def caminho_agregados(caminho_planilha):
+    """Base dos agregados (mesmo nome da planilha, extensão .agregados.sqlite3)."""
+    return os.path.splitext(str(caminho_planilha))[0] + '.agregados.sqlite3'
+
+
+def _caminho_trava(caminho_planilha):
+    return os.path.splitext(str(caminho_planilha))[0] + '.agregados.lock'
+
+
+def _conectar(caminho_planilha):
+    conexao = sqlite3.connect(caminho_agregados(caminho_planilha))
+    colunas_grupos = {linha[1] for linha in conexao.execute("PRAGMA table_info(grupos)")}
+    if colunas_grupos and 'numerada' not in colunas_grupos:
+        # Agregados de antes da coluna numerada: refeitos a partir do livro na próxima leitura
+        conexao.executescript("DROP TABLE grupos; DROP TABLE vazios; DROP TABLE cubo; DROP TABLE estado;")
+    conexao.executescript("""
+        CREATE TABLE IF NOT EXISTS grupos (
+            vencimento TEXT NOT NULL,
+            situacao TEXT NOT NULL,
+            fornecedor TEXT NOT NULL,
+            forma TEXT NOT NULL,
+            numerada INTEGER NOT NULL,
+            linhas INTEGER NOT NULL,
+            titulo_centavos INTEGER NOT NULL,
+            pago_centavos INTEGER NOT NULL,
+            PRIMARY KEY (vencimento, situacao, fornecedor, forma, numerada)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS vazios (
+            vencimento TEXT NOT NULL,
+            coluna TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            PRIMARY KEY (vencimento, coluna)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS cubo (
+            mes TEXT NOT NULL,
+            fornecedor TEXT NOT NULL,
+            forma TEXT NOT NULL,
+            status TEXT NOT NULL,
+            linhas INTEGER NOT NULL,
+            titulo_centavos INTEGER NOT NULL,
+            pago_centavos INTEGER NOT NULL,
+            PRIMARY KEY (mes, fornecedor, forma, status)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS meses_cubo (mes TEXT PRIMARY KEY) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS estado (chave TEXT PRIMARY KEY, valor TEXT);
+    """)
+    return conexao
+
+
+def _ler_estado(conexao, chave):
+    linha = conexao.execute("SELECT valor FROM estado WHERE chave = ?", (chave,)).fetchone()
+    return json.loads(linha[0]) if linha else None
+
+
+def _gravar_estado(conexao, chave, valor):
+    conexao.execute("INSERT OR REPLACE INTO estado (chave, valor) VALUES (?, ?)", (chave, json.dumps(valor)))
+
+
+# ---------------------------------------------------------------------------
+# Agrupamento de linhas
+# ---------------------------------------------------------------------------
+
+def _texto_chave(df, coluna):
+    if coluna not in df.columns:
+        return pd.Series(SEM_VALOR, index=df.index)
+    return df[coluna].astype(object).where(df[coluna].notna(), SEM_VALOR).astype(str)
+
+
+def _centavos(df, coluna):
+    if coluna not in df.columns:
+        return pd.Series(0, index=df.index, dtype='int64')
+    return (df[coluna] * 100).round().fillna(0).astype('int64')
+
+
+def agrupar(linhas, colunas=None):
+    """
+    Agregados de um conjunto de linhas do livro.
+
+    Args:
+        linhas: DataFrame ou lista de dicts no formato da planilha
+        colunas: Colunas cujos vazios são contados (padrão: todas as presentes)
+
+    Returns:
+        tuple: (grupos, vazios) como DataFrames nas colunas das tabelas
+    """
+    df = esquema_contas.tipar(pd.DataFrame(linhas))
+    if 'Dt. Vencimento' in df.columns:
+        vencimento = df['Dt. Vencimento'].dt.strftime('%Y-%m-%d').fillna(SEM_VALOR)
+    else:
+        vencimento = pd.Series(SEM_VALOR, index=df.index)
+    pagamento = df['Dt. Pagamento'] if 'Dt. Pagamento' in df.columns else pd.Series(pd.NaT, index=df.index)
+    # Sem a coluna Número (ex.: outro livro em resumo_contas) todas as linhas são contas
+    numerada = esquema_contas.numerados(df['Número']) if 'Número' in df.columns else 1
+
+    grupos = pd.DataFrame({
+        'vencimento': vencimento,
+        'situacao': np.where(pagamento.notna(), PAGO, PENDENTE),
+        'fornecedor': _texto_chave(df, 'Fornecedor'),
+        'forma': _texto_chave(df, 'Forma de Pgto.'),
+        'numerada': np.asarray(numerada, dtype='int64'),
+        'linhas': 1,
+        'titulo_centavos': _centavos(df, 'Vr. Título'),
+        'pago_centavos': _centavos(df, 'Vr. Dev/Pag'),
+    })
+    grupos = grupos.groupby(CHAVES, as_index=False, sort=False)[MEDIDAS].sum()
+
+    colunas = [coluna for coluna in (colunas or df.columns) if coluna in df.columns]
+    vazios = df[colunas].isna().groupby(vencimento.values).sum()
+    vazios = vazios.rename_axis('vencimento').reset_index().melt(
+        id_vars='vencimento', var_name='coluna', value_name='quantidade'
+    )
+    vazios = vazios[vazios['quantidade'] > 0]
+    return grupos, vazios
+
+
+def _somar(conexao, grupos, vazios, sinal):
+    conexao.executemany(
+        """INSERT INTO grupos VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+           ON CONFLICT (vencimento, situacao, fornecedor, forma, numerada) DO UPDATE SET
+               linhas = linhas + excluded.linhas,
+               titulo_centavos = titulo_centavos + excluded.titulo_centavos,
+               pago_centavos = pago_centavos + excluded.pago_centavos""",
+        [(*chave, *(sinal * int(valor) for valor in medidas))
+         for chave, medidas in zip(grupos[CHAVES].itertuples(index=False), grupos[MEDIDAS].itertuples(index=False))],
+    )
+    conexao.executemany(
+        """INSERT INTO vazios VALUES (?, ?, ?)
+           ON CONFLICT (vencimento, coluna) DO UPDATE SET quantidade = quantidade + excluded.quantidade""",
+        [(vencimento, coluna, sinal * int(quantidade))
+         for vencimento, coluna, quantidade in vazios.itertuples(index=False)],
+    )
+    conexao.execute("DELETE FROM grupos WHERE linhas = 0")
+    conexao.execute("DELETE FROM vazios WHERE quantidade = 0")
+    # Meses do cubo a refazer
+    conexao.executemany(
+        "INSERT OR IGNORE INTO meses_cubo VALUES (?)",
+        [(mes,) for mes in grupos['vencimento'].str[:7].unique()],
+    )
+
+
+def _ler_livro(caminho_planilha):
+    """
+    Livro para os agregados, com as colunas opcionais mesmo vazias.
+
+    Returns:
+        tuple: (livro, versão, colunas opcionais a omitir quando não têm
+            nenhum valor, como faz base_contas.ler_contas para a base)
+    """
+    livro, versao = base_contas.ler_livro(caminho_planilha, manter_opcionais_vazias=True)
+    omitir = esquema_contas.COLUNAS_OPCIONAIS if base_contas.livro_na_base(caminho_planilha) else []
+    return livro, versao, omitir
+
+
+def _substituir(conexao, livro, versao, omitir_vazias=()):
+    colunas = list(livro.columns)
+    grupos, vazios = agrupar(livro, colunas)
+    conexao.execute("DELETE FROM grupos")
+    conexao.execute("DELETE FROM vazios")
+    conexao.execute("DELETE FROM cubo")
+    conexao.execute("DELETE FROM estado WHERE chave = 'referencia_cubo'")
+    _somar(conexao, grupos, vazios, 1)
+    _atualizar_cubo(conexao, _ultimo_vencido())
+    _gravar_estado(conexao, 'colunas', colunas)
+    _gravar_estado(conexao, 'omitir_vazias', list(omitir_vazias))
+    _gravar_estado(conexao, 'versao_origem', versao)
+
+
+def _ultimo_vencido(referencia=None):
+    """Último dia de vencimento ('AAAA-MM-DD') já vencido na referência (padrão: agora)."""
+    referencia = pd.Timestamp.now() if referencia is None else pd.Timestamp(referencia)
+    # Vencimentos à meia-noite: vencida se o dia é anterior à referência
+    return (referencia - pd.Timedelta(1, 'ns')).strftime('%Y-%m-%d')
+
+
+def _atualizar_cubo(conexao, ultimo_vencido):
+    """
+    Refaz, a partir dos grupos por dia, os meses do cubo marcados em
+    meses_cubo e os que mudam de status desde o último dia vencido usado.
+    """
+    anterior = _ler_estado(conexao, 'referencia_cubo')
+    if anterior is None:
+        conexao.execute("DELETE FROM cubo")
+        conexao.execute("INSERT OR IGNORE INTO meses_cubo SELECT DISTINCT substr(vencimento, 1, 7) FROM grupos")
+    elif anterior != ultimo_vencido:
+        # Pendentes com vencimento entre os dois dias trocam de status
+        conexao.execute(
+            f"""INSERT OR IGNORE INTO meses_cubo
+                SELECT DISTINCT substr(vencimento, 1, 7) FROM grupos
+                WHERE situacao = '{PENDENTE}' AND vencimento > ? AND vencimento <= ?""",
+            sorted([anterior, ultimo_vencido]),
+        )
+    conexao.execute("DELETE FROM cubo WHERE mes IN (SELECT mes FROM meses_cubo)")
+    conexao.execute(
+        f"""INSERT INTO cubo
+            SELECT substr(vencimento, 1, 7) AS mes, fornecedor, forma,
+                   CASE WHEN situacao = '{PAGO}' THEN '{PAGO}'
+                        WHEN vencimento != '' AND vencimento <= ? THEN '{VENCIDO}'
+                        ELSE '{A_VENCER}' END AS status,
+                   SUM(linhas), SUM(titulo_centavos), SUM(pago_centavos)
+            FROM grupos WHERE substr(vencimento, 1, 7) IN (SELECT mes FROM meses_cubo)
+            GROUP BY 1, 2, 3, 4""",
+        (ultimo_vencido,),
+    )
+    conexao.execute("DELETE FROM meses_cubo")
+    _gravar_estado(conexao, 'referencia_cubo', ultimo_vencido)
+
+
+# ---------------------------------------------------------------------------
+# Atualização
+# ---------------------------------------------------------------------------
+
+class Alteracao:
+    """Linhas que uma gravação do livro inclui, remove ou altera (ver alteracao())."""
+
+    def __init__(self):
+        self.diferencas = []
+        self.livro_novo = None
+
+    def incluir(self, linhas):
+        """Linhas inteiras que entram no livro."""
+        self.diferencas.append((linhas, 1, True))
+
+    def remover(self, linhas):
+        """Linhas inteiras que saem do livro."""
+        self.diferencas.append((linhas, -1, True))
+
+    def alterar(self, antigas, novas):
+        """
+        Linhas alteradas: antes e depois, com as mesmas colunas (as que
+        mudaram e as de Dt. Vencimento, Fornecedor, Forma de Pgto. e Vr. Título).
+        """
+        self.diferencas.append((antigas, -1, False))
+        self.diferencas.append((novas, 1, False))
+
+    def substituir(self, livro):
+        """O livro inteiro foi regravado com este conteúdo."""
+        self.diferencas = []
+        self.livro_novo = livro
+
+
+@contextmanager
+def alteracao(caminho_planilha):
+    """
+    Gravação do livro com os agregados atualizados pela diferença.
+
+    Envolve a gravação (e a leitura que a precede, se ela depende do
+    conteúdo): a versão do livro é tomada antes e depois do bloco, com a
+    trava dos agregados, que fica entre a do índice de boletos e a da
+    planilha. A diferença só é aplicada se os agregados correspondiam à
+    versão de antes; se o bloco falha ou outra gravação passou por fora,
+    os agregados ficam para recalcular na próxima leitura.
+
+    Yields:
+        Alteracao: Onde registrar as linhas incluídas, removidas ou o livro novo
+    """
+    mudancas = Alteracao()
+    with travado(_caminho_trava(caminho_planilha)):
+        antes = base_contas.versao_livro(caminho_planilha)
+        yield mudancas
+        depois = base_contas.versao_livro(caminho_planilha)
+        if depois == antes or not os.path.exists(caminho_agregados(caminho_planilha)):
+            return
+        conexao = _conectar(caminho_planilha)
+        try:
+            with conexao:
+                if mudancas.livro_novo is not None:
+                    _substituir(conexao, mudancas.livro_novo, depois, _ler_estado(conexao, 'omitir_vazias') or [])
+                    return
+                if _ler_estado(conexao, 'versao_origem') != antes:
+                    return
+                colunas = _ler_estado(conexao, 'colunas')
+                for linhas, sinal, inteiras in mudancas.diferencas:
+                    df = pd.DataFrame(linhas)
+                    if df.empty:
+                        continue
+                    if inteiras:
+                        # Como a linha será lida de volta: só as colunas do livro
+                        df = df.reindex(columns=colunas)
+                    _somar(conexao, *agrupar(df, colunas), sinal)
+                _atualizar_cubo(conexao, _ultimo_vencido())
+                _gravar_estado(conexao, 'versao_origem', depois)
+        finally:
+            conexao.close()
+
+
+def atualizar(caminho_planilha, forcar=False):
+    """
+    Recalcula os agregados a partir do livro se ele mudou por fora de alteracao().
+
+    Returns:
+        bool: True se recalculou
+    """
+    with travado(_caminho_trava(caminho_planilha)):
+        conexao = _conectar(caminho_planilha)
+        try:
+            if not forcar and _ler_estado(conexao, 'versao_origem') == base_contas.versao_livro(caminho_planilha):
+                return False
+            livro, versao, omitir = _ler_livro(caminho_planilha)
+            with conexao:
+                _substituir(conexao, livro, versao, omitir)
+            return True
+        finally:
+            conexao.close()
+
+
+# ---------------------------------------------------------------------------
+# Leitura
+# ---------------------------------------------------------------------------
+
+def _filtro_periodo(inicio, fim):
+    """Cláusula WHERE e parâmetros do período de vencimento (sem período: tudo)."""
+    inicio, fim = particoes_contas.limites(inicio, fim)
+    if inicio is None and fim is None:
+        return "1 = 1", []
+    condicoes, parametros = ["vencimento != ''"], []
+    if inicio is not None:
+        condicoes.append("vencimento >= ?")
+        parametros.append(inicio.strftime('%Y-%m-%d'))
+    if fim is not None:
+        condicoes.append("vencimento <= ?")
+        parametros.append(fim.strftime('%Y-%m-%d'))
+    return " AND ".join(condicoes), parametros
+
+
+def indicadores(caminho_planilha, inicio=None, fim=None, referencia=None):
+    """
+    Indicadores do livro (ver indicadores_contas) a partir dos agregados.
+
+    O custo não depende do tamanho do livro, só da quantidade de grupos;
+    o livro é relido apenas se mudou por fora de alteracao().
+
+    Args:
+        inicio, fim: Período de vencimento, como em particoes_contas.ler()
+        referencia: Instante para contas vencidas (padrão: agora)
+
+    Returns:
+        indicadores_contas.Indicadores
+    """
+    atualizar(caminho_planilha)
+    referencia = pd.Timestamp.now() if referencia is None else pd.Timestamp(referencia)
+    ultimo_vencido = _ultimo_vencido(referencia)
+    filtro, parametros = _filtro_periodo(inicio, fim)
+
+    conexao = _conectar(caminho_planilha)
+    try:
+        total, pendentes, titulos, pagos, vencidas, total_vencido = conexao.execute(f"""
+            SELECT COALESCE(SUM(linhas), 0),
+                   COALESCE(SUM(CASE WHEN situacao = '{PENDENTE}' THEN linhas END), 0),
+                   COALESCE(SUM(titulo_centavos), 0),
+                   COALESCE(SUM(pago_centavos), 0),
+                   COALESCE(SUM(CASE WHEN situacao = '{PENDENTE}' AND vencimento != '' AND vencimento <= ?
+                                     THEN linhas END), 0),
+                   COALESCE(SUM(CASE WHEN situacao = '{PENDENTE}' AND vencimento != '' AND vencimento <= ?
+                                     THEN titulo_centavos END), 0)
+            FROM grupos WHERE {filtro}""", [ultimo_vencido, ultimo_vencido, *parametros]).fetchone()
+        fornecedores = conexao.execute(
+            f"SELECT COUNT(DISTINCT fornecedor) FROM grupos WHERE fornecedor != '' AND {filtro}", parametros
+        ).fetchone()[0]
+        formas = conexao.execute(
+            f"""SELECT forma, SUM(linhas) AS total FROM grupos WHERE forma != '' AND {filtro}
+                GROUP BY forma ORDER BY total DESC, forma""", parametros
+        ).fetchall()
+        contagem_vazios = dict(conexao.execute(
+            f"SELECT coluna, SUM(quantidade) FROM vazios WHERE {filtro} GROUP BY coluna", parametros
+        ).fetchall())
+        colunas = _ler_estado(conexao, 'colunas') or []
+        omitir = _ler_estado(conexao, 'omitir_vazias') or []
+        if omitir:
+            # Colunas opcionais sem nenhum valor no livro todo ficam de fora
+            total_livro = conexao.execute("SELECT COALESCE(SUM(linhas), 0) FROM grupos").fetchone()[0]
+            vazias_livro = dict(conexao.execute(
+                "SELECT coluna, SUM(quantidade) FROM vazios GROUP BY coluna"
+            ).fetchall())
+            colunas = [coluna for coluna in colunas
+                       if coluna not in omitir or vazias_livro.get(coluna, 0) < total_livro]
+    finally:
+        conexao.close()
+
+    return indicadores_contas.Indicadores(
+        total_registros=int(total),
+        contas_pagas=int(total - pendentes),
+        contas_pendentes=int(pendentes),
+        contas_vencidas=int(vencidas),
+        total_titulos=titulos / 100,
+        total_pago=pagos / 100,
+        total_vencido=total_vencido / 100,
+        vazios=pd.Series({coluna: int(contagem_vazios.get(coluna, 0)) for coluna in colunas}, dtype='int64'),
+        fornecedores_unicos=int(fornecedores),
+        formas_pgto=pd.Series(dict(formas), dtype='int64'),
+        referencia=referencia,
+    )
+
+
+def pendentes(caminho_planilha, inicio=None, fim=None):
+    """
+    Contas pendentes agrupadas por dia de vencimento e fornecedor (para o
+    aging, ver aging_contas.calcular_grupos). Só linhas com Número válido:
+    o "Total Geral" do rodapé e linhas em branco não são contas.
+
+    Args:
+        inicio, fim: Período de vencimento, como em particoes_contas.ler()
+
+    Returns:
+        DataFrame: vencimento (NaT sem vencimento), fornecedor (None sem
+            fornecedor), linhas e titulo (R$)
+    """
+    atualizar(caminho_planilha)
+    filtro, parametros = _filtro_periodo(inicio, fim)
+    conexao = _conectar(caminho_planilha)
+    try:
+        grupos = pd.read_sql_query(
+            f"""SELECT vencimento, fornecedor, SUM(linhas) AS linhas, SUM(titulo_centavos) AS titulo
+                FROM grupos WHERE situacao = '{PENDENTE}' AND numerada = 1 AND {filtro}
+                GROUP BY vencimento, fornecedor""", conexao, params=parametros)
+    finally:
+        conexao.close()
+    return _converter_pendentes(grupos)
+
+
+def _converter_pendentes(grupos):
+    grupos['vencimento'] = pd.to_datetime(grupos['vencimento'].replace(SEM_VALOR, None), format='%Y-%m-%d')
+    grupos['fornecedor'] = grupos['fornecedor'].replace(SEM_VALOR, None)
+    grupos['titulo'] = grupos['titulo'] / 100
+    return grupos
+
+
+# ---------------------------------------------------------------------------
+# Mesmas leituras sobre grupos em memória (ex.: vários livros, ver resumo_contas)
+# ---------------------------------------------------------------------------
+
+def indicadores_dos_grupos(grupos, vazios, colunas, referencia=None):
+    """
+    Indicadores (ver indicadores()) de grupos e vazios no formato de agrupar().
+
+    Args:
+        colunas: Colunas do livro, na ordem dos vazios do resultado
+        referencia: Instante para contas vencidas (padrão: agora)
+
+    Returns:
+        indicadores_contas.Indicadores
+    """
+    referencia = pd.Timestamp.now() if referencia is None else pd.Timestamp(referencia)
+    pendente = (grupos['situacao'] == PENDENTE).to_numpy()
+    vencida = pendente & ((grupos['vencimento'] != SEM_VALOR) & (grupos['vencimento'] <= _ultimo_vencido(referencia))).to_numpy()
+    linhas = grupos['linhas'].to_numpy(dtype=np.int64)
+    titulos = grupos['titulo_centavos'].to_numpy(dtype=np.int64)
+    total, pendentes_linhas = int(linhas.sum()), int(linhas[pendente].sum())
+
+    formas = grupos[grupos['forma'] != SEM_VALOR].groupby('forma')['linhas'].sum()
+    formas = formas.sort_index().sort_values(ascending=False, kind='stable').astype('int64')
+    formas.index.name = None
+    contagem_vazios = vazios.groupby('coluna')['quantidade'].sum()
+    return indicadores_contas.Indicadores(
+        total_registros=total,
+        contas_pagas=total - pendentes_linhas,
+        contas_pendentes=pendentes_linhas,
+        contas_vencidas=int(linhas[vencida].sum()),
+        total_titulos=int(titulos.sum()) / 100,
+        total_pago=int(grupos['pago_centavos'].sum()) / 100,
+        total_vencido=int(titulos[vencida].sum()) / 100,
+        vazios=pd.Series({coluna: int(contagem_vazios.get(coluna, 0)) for coluna in colunas}, dtype='int64'),
+        fornecedores_unicos=int(grupos.loc[grupos['fornecedor'] != SEM_VALOR, 'fornecedor'].nunique()),
+        formas_pgto=formas,
+        referencia=referencia,
+    )
+
+
+def _cubo(grupos, ultimo_vencido):
+    status = np.select(
+        [grupos['situacao'] == PAGO,
+         (grupos['vencimento'] != SEM_VALOR) & (grupos['vencimento'] <= ultimo_vencido)],
+        [PAGO, VENCIDO], A_VENCER,
+    )
+    return grupos.assign(mes=grupos['vencimento'].str[:7], status=status).groupby(
+        ['mes', 'fornecedor', 'forma', 'status'], as_index=False)[MEDIDAS].sum()
+
+
+def cubo_dos_grupos(grupos, referencia=None):
+    """Linhas do cubo mensal (como ler_cubo()) de grupos no formato de agrupar()."""
+    return _cubo(grupos, _ultimo_vencido(referencia))
+
+
+def pendentes_dos_grupos(grupos):
+    """Contas pendentes por dia e fornecedor (como pendentes()) de grupos no formato de agrupar()."""
+    pendentes = grupos[(grupos['situacao'] == PENDENTE) & (grupos['numerada'] == 1)]
+    pendentes = pendentes.groupby(['vencimento', 'fornecedor'], as_index=False).agg(
+        linhas=('linhas', 'sum'), titulo=('titulo_centavos', 'sum'))
+    return _converter_pendentes(pendentes)
+
+
+def ler_cubo(caminho_planilha):
+    """
+    Linhas do cubo mensal (mes, fornecedor, forma, status e as medidas),
+    com o status da data de hoje.
+
+    Só os meses que mudaram desde a última leitura (gravações ou a virada
+    do dia) são refeitos; o livro é relido apenas se mudou por fora de alteracao().
+
+    Returns:
+        DataFrame: Colunas de cubo, mes 'AAAA-MM' ('' sem vencimento)
+    """
+    atualizar(caminho_planilha)
+    with travado(_caminho_trava(caminho_planilha)):
+        conexao = _conectar(caminho_planilha)
+        try:
+            with conexao:
+                _atualizar_cubo(conexao, _ultimo_vencido())
+            return pd.read_sql_query("SELECT * FROM cubo ORDER BY mes, fornecedor, forma, status", conexao)
+        finally:
+            conexao.close()
+
+
+def verificar(caminho_planilha):
+    """
+    Compara os agregados guardados com um recálculo completo a partir do livro.
+
+    Returns:
+        list: Diferenças encontradas (textos); vazia se os agregados conferem
+    """
+    with travado(_caminho_trava(caminho_planilha)):
+        livro, versao, _ = _ler_livro(caminho_planilha)
+        conexao = _conectar(caminho_planilha)
+        try:
+            versao_guardada = _ler_estado(conexao, 'versao_origem')
+            guardados = pd.read_sql_query("SELECT * FROM grupos", conexao)
+            vazios_guardados = pd.read_sql_query("SELECT * FROM vazios", conexao)
+            cubo_guardado = pd.read_sql_query("SELECT * FROM cubo", conexao)
+            referencia_cubo = _ler_estado(conexao, 'referencia_cubo')
+            meses_pendentes = conexao.execute("SELECT COUNT(*) FROM meses_cubo").fetchone()[0]
+        finally:
+            conexao.close()
+
+    if versao_guardada != versao:
+        return ["versão do livro diferente da dos agregados (serão recalculados na próxima leitura)"]
+    diferencas = [f"{meses_pendentes} mês(es) do cubo por refazer"] if meses_pendentes else []
+    grupos, vazios = agrupar(livro, list(livro.columns))
+    # Cubo esperado com o mesmo último dia vencido do guardado
+    cubo = _cubo(grupos, referencia_cubo or '')
+    comparacoes = [
+        ('grupos', grupos, guardados, CHAVES),
+        ('vazios', vazios, vazios_guardados, ['vencimento', 'coluna']),
+    ]
+    if referencia_cubo is not None:
+        comparacoes.append(('cubo', cubo, cubo_guardado, ['mes', 'fornecedor', 'forma', 'status']))
+    for nome, esperado, atual, chaves in comparacoes:
+        comparacao = esperado.merge(atual, on=chaves, how='outer', suffixes=('_livro', '_agregados'))
+        for medida in [coluna for coluna in esperado.columns if coluna not in chaves]:
+            livro_valor = comparacao[f'{medida}_livro'].fillna(0)
+            agregado_valor = comparacao[f'{medida}_agregados'].fillna(0)
+            for _, linha in comparacao[livro_valor != agregado_valor].iterrows():
+                chave = ' | '.join(str(linha[coluna]) for coluna in chaves)
+                diferencas.append(
+                    f"{nome} [{chave}] {medida}: livro {linha[f'{medida}_livro']}, "
+                    f"agregados {linha[f'{medida}_agregados']}"
+                )
+    return diferencas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agregados do livro de contas - Fusion Tech")
+    parser.add_argument('comando', choices=['mostrar', 'verificar', 'reconstruir'])
+    parser.add_argument('planilha', help="Planilha do livro")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'reconstruir':
+        atualizar(args.planilha, forcar=True)
+        print(f"✓ Agregados recalculados em {caminho_agregados(args.planilha)}")
+        return
+    if args.comando == 'verificar':
+        diferencas = verificar(args.planilha)
+        if not diferencas:
+            print("✓ Agregados conferem com o livro")
+            return
+        print(f"❌ {len(diferencas)} diferença(s):")
+        for diferenca in diferencas[:50]:
+            print(f"   - {diferenca}")
+        return
+
+    resultado = indicadores(args.planilha)
+    print(f"Registros: {resultado.total_registros}")
+    print(f"Pagas: {resultado.contas_pagas} | pendentes: {resultado.contas_pendentes} | "
+          f"vencidas: {resultado.contas_vencidas} | a vencer: {resultado.contas_a_vencer}")
+    print(f"Total em títulos: R$ {resultado.total_titulos:,.2f} | pago: R$ {resultado.total_pago:,.2f} | "
+          f"vencido: R$ {resultado.total_vencido:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,17 @@ Análise de qualidade dos dados e insights básicos
 Projeto: Análise de Dados - Fusion Tech
 Disciplina: Programação Estruturada
 Instituição: IBMEC 2025.02
+
+Com --livros, analisa vários livros (ex.: um por filial ou por ano) como
+se fossem um só, somando os agregados de cada um (resumo_contas), sem
+carregá-los todos em memória.
+
+Para executar:
+    python codigo/analise_contas_pagar.py [--de AAAA-MM] [--ate AAAA-MM]
+    python codigo/analise_contas_pagar.py --livros "dados/filiais/*.xlsx" [--workers 4]
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 import os
@@ -15,144 +24,169 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 
+import aging_contas
+import base_contas
+import cubo_contas
+import fornecedores_contas
+import indicadores_contas
+import particoes_contas
+import resumo_contas
+
 # Importar configurações
 try:
     from config import ARQUIVO_CONTAS_PAGAR, NOME_EMPRESA
 except ImportError:
     print("⚠️  Arquivo config.py não encontrado. Usando caminho relativo.")
-    ARQUIVO_CONTAS_PAGAR = 'dados\contasapagar_1.xlsx'
+    ARQUIVO_CONTAS_PAGAR = os.path.join('dados', 'contasapagar_1.xlsx')
     NOME_EMPRESA = "Fusion Tech"
 
-def carregar_dados():
-    """Carrega a planilha de contas a pagar"""
-    print(f"Carregando dados de: {ARQUIVO_CONTAS_PAGAR}")
-    
-    if not os.path.exists(ARQUIVO_CONTAS_PAGAR):
+def carregar_dados(inicio=None, fim=None):
+    """
+    Carrega as contas a pagar com Dt. Vencimento entre `inicio` e `fim`.
+
+    A leitura passa pelas partições mensais (particoes_contas): com um
+    intervalo, só os meses dele são lidos; sem intervalo, todo o histórico.
+    """
+    usa_base = base_contas.usar_sqlite() and os.path.exists(base_contas.caminho_base(ARQUIVO_CONTAS_PAGAR))
+    origem = base_contas.caminho_base(ARQUIVO_CONTAS_PAGAR) if usa_base else ARQUIVO_CONTAS_PAGAR
+    periodo = "todo o histórico" if inicio is None and fim is None else f"{inicio or 'início'} a {fim or 'hoje'}"
+    print(f"Carregando dados de: {origem} ({periodo})")
+    
+    if not usa_base and not os.path.exists(ARQUIVO_CONTAS_PAGAR):
         print(f"❌ ERRO: Arquivo não encontrado!")
         print(f"   Caminho esperado: {ARQUIVO_CONTAS_PAGAR}")
         print(f"   Diretório atual: {os.getcwd()}")
         sys.exit(1)
     
     try:
-        df = pd.read_excel(ARQUIVO_CONTAS_PAGAR)
+        df = particoes_contas.ler(ARQUIVO_CONTAS_PAGAR, inicio, fim)
         print(f"✓ Dados carregados com sucesso! ({len(df)} registros)\n")
         return df
     except Exception as e:
         print(f"❌ Erro ao carregar arquivo: {e}")
         sys.exit(1)
 
-def analisar_dados_vazios(df):
+def carregar_livros(padroes, inicio=None, fim=None, workers=1):
+    """
+    Resumo (resumo_contas) dos livros dos padrões, lidos em paralelo, com
+    Dt. Vencimento entre `inicio` e `fim`.
+    """
+    try:
+        caminhos = resumo_contas.expandir(padroes)
+    except FileNotFoundError as e:
+        print(f"❌ ERRO: {e}")
+        sys.exit(1)
+    periodo = "todo o histórico" if inicio is None and fim is None else f"{inicio or 'início'} a {fim or 'hoje'}"
+    print(f"Carregando {len(caminhos)} livro(s) ({periodo}, {min(workers, len(caminhos))} worker(s)):")
+    for caminho in caminhos:
+        print(f"   - {caminho}")
+    
+    try:
+        resumo = resumo_contas.resumir_livros(caminhos, inicio, fim, workers)
+        print(f"✓ Dados resumidos com sucesso! ({resumo.registros} registros)\n")
+        return resumo
+    except Exception as e:
+        print(f"❌ Erro ao carregar livros: {e}")
+        sys.exit(1)
+
+def contar_fornecedores(canonicos, registros):
+    """Registros por fornecedor canônico, do maior para o menor (empates em ordem alfabética)"""
+    contagem = pd.Series(np.asarray(registros), index=pd.Index(canonicos, dtype=object)).groupby(level=0).sum()
+    return contagem.sort_index().sort_values(ascending=False, kind='stable')
+
+def analisar_dados_vazios(indicadores):
     """Analisa quantidade de dados não preenchidos"""
     print("[2] ANÁLISE DE DADOS NÃO PREENCHIDOS")
     print("-" * 70)
     
-    dados_vazios = df.isnull().sum()
-    percentual_vazios = (df.isnull().sum() / len(df)) * 100
-    
     resumo_vazios = pd.DataFrame({
-        'Coluna': dados_vazios.index,
-        'Qtd. Vazios': dados_vazios.values,
-        'Percentual': percentual_vazios.values
+        'Coluna': indicadores.vazios.index,
+        'Qtd. Vazios': indicadores.vazios.values,
+        'Percentual': indicadores.percentual_vazios.values
     })
     
     print(resumo_vazios.to_string(index=False))
     
     # Identificar colunas problemáticas (>20% de dados vazios)
-    colunas_problematicas = resumo_vazios[resumo_vazios['Percentual'] > 20]
+    colunas_problematicas = indicadores.colunas_problematicas()
     if len(colunas_problematicas) > 0:
-        print(f"\n⚠️  ATENÇÃO: {len(colunas_problematicas)} coluna(s) com mais de 20% de dados vazios:")
-        for _, row in colunas_problematicas.iterrows():
-            print(f"   - {row['Coluna']}: {row['Percentual']:.1f}% vazios")
+        print(f"\n⚠️  ATENÇÃO: {len(colunas_problematicas)} coluna(s) com mais de {indicadores_contas.LIMITE_VAZIOS}% de dados vazios:")
+        for coluna, percentual in colunas_problematicas.items():
+            print(f"   - {coluna}: {percentual:.1f}% vazios")
     
     return resumo_vazios, colunas_problematicas
 
-def analisar_financeiro(df):
+def analisar_financeiro(indicadores):
     """Analisa informações financeiras básicas"""
     print("\n[3] ANÁLISE FINANCEIRA BÁSICA")
     print("-" * 70)
     
     # Verificar se há valores não preenchidos
-    valores_titulo_vazios = df['Vr. Título'].isnull().sum()
-    valores_pago_vazios = df['Vr. Dev/Pag'].isnull().sum()
-    
-    print(f"Valores de Título não preenchidos: {valores_titulo_vazios}")
-    print(f"Valores Pagos não preenchidos: {valores_pago_vazios}")
-    
-    # Calcular totais (ignorando valores nulos)
-    total_titulos = df['Vr. Título'].sum()
-    total_pago = df['Vr. Dev/Pag'].sum()
-    
-    print(f"\nTotal em Títulos: R$ {total_titulos:,.2f}")
-    print(f"Total Pago: R$ {total_pago:,.2f}")
-    print(f"Diferença: R$ {(total_titulos - total_pago):,.2f}")
-    
-    return {
-        'total_titulos': total_titulos,
-        'total_pago': total_pago,
-        'valores_titulo_vazios': valores_titulo_vazios,
-        'valores_pago_vazios': valores_pago_vazios
-    }
+    print(f"Valores de Título não preenchidos: {indicadores.vazios['Vr. Título']}")
+    print(f"Valores Pagos não preenchidos: {indicadores.vazios['Vr. Dev/Pag']}")
+    
+    # Totais (ignorando valores nulos)
+    print(f"\nTotal em Títulos: R$ {indicadores.total_titulos:,.2f}")
+    print(f"Total Pago: R$ {indicadores.total_pago:,.2f}")
+    print(f"Diferença: R$ {(indicadores.total_titulos - indicadores.total_pago):,.2f}")
 
-def analisar_pagamentos(df):
+def analisar_pagamentos(indicadores):
     """Analisa status dos pagamentos"""
     print("\n[4] ANÁLISE DE PAGAMENTOS")
     print("-" * 70)
     
     # Contas pagas (com data de pagamento)
-    contas_pagas = df['Dt. Pagamento'].notna().sum()
-    contas_pendentes = df['Dt. Pagamento'].isna().sum()
-    
-    print(f"Contas pagas: {contas_pagas} ({(contas_pagas/len(df)*100):.1f}%)")
-    print(f"Contas pendentes: {contas_pendentes} ({(contas_pendentes/len(df)*100):.1f}%)")
-    
-    # Verificar contas vencidas (data vencimento passou e sem data de pagamento)
-    hoje = pd.Timestamp.now()
-    contas_vencidas = df[(df['Dt. Pagamento'].isna()) & (df['Dt. Vencimento'] < hoje)]
-    print(f"Contas vencidas (não pagas): {len(contas_vencidas)}")
-    
-    if len(contas_vencidas) > 0:
-        valor_vencido = contas_vencidas['Vr. Título'].sum()
-        print(f"Valor total vencido: R$ {valor_vencido:,.2f}")
-    
-    return {
-        'contas_pagas': contas_pagas,
-        'contas_pendentes': contas_pendentes,
-        'contas_vencidas': len(contas_vencidas)
-    }
+    print(f"Contas pagas: {indicadores.contas_pagas} ({indicadores.percentual(indicadores.contas_pagas):.1f}%)")
+    print(f"Contas pendentes: {indicadores.contas_pendentes} ({indicadores.percentual(indicadores.contas_pendentes):.1f}%)")
+    
+    # Contas vencidas (data vencimento passou e sem data de pagamento)
+    print(f"Contas vencidas (não pagas): {indicadores.contas_vencidas}")
+    
+    if indicadores.contas_vencidas > 0:
+        print(f"Valor total vencido: R$ {indicadores.total_vencido:,.2f}")
 
-def analisar_fornecedores(df):
-    """Analisa informações sobre fornecedores"""
+def analisar_fornecedores(fornecedores, indicadores):
+    """Analisa informações sobre fornecedores (grafias do mesmo fornecedor contam uma vez)"""
     print("\n[5] ANÁLISE DE FORNECEDORES")
     print("-" * 70)
     
-    fornecedores_unicos = df['Fornecedor'].nunique()
-    fornecedores_vazios = df['Fornecedor'].isnull().sum()
-    
-    print(f"Fornecedores únicos: {fornecedores_unicos}")
+    fornecedores_vazios = indicadores.vazios['Fornecedor']
+    print(f"Fornecedores únicos: {len(fornecedores)} "
+          f"({indicadores.fornecedores_unicos} grafia(s) diferentes)")
     print(f"Registros sem fornecedor: {fornecedores_vazios}")
     
     if fornecedores_vazios == 0:
-        top_fornecedores = df['Fornecedor'].value_counts().head(5)
+        top_fornecedores = fornecedores.head(5)
         print("\nTop 5 fornecedores (por quantidade de registros):")
         for fornecedor, count in top_fornecedores.items():
             print(f"   - {fornecedor}: {count} registro(s)")
-    
-    return fornecedores_unicos, fornecedores_vazios
 
-def analisar_formas_pagamento(df):
+def analisar_formas_pagamento(indicadores):
     """Analisa distribuição das formas de pagamento"""
     print("\n[6] FORMAS DE PAGAMENTO")
     print("-" * 70)
     
-    formas_pgto = df['Forma de Pgto.'].value_counts()
     print("Distribuição por forma de pagamento:")
-    for forma, count in formas_pgto.items():
-        print(f"   - {forma}: {count} registro(s) ({(count/len(df)*100):.1f}%)")
+    for forma, count in indicadores.formas_pgto.items():
+        print(f"   - {forma}: {count} registro(s) ({indicadores.percentual(count):.1f}%)")
+
+def analisar_aging(aging, quantidade_fornecedores=10):
+    """Aging das contas pendentes: faixas de atraso e de prazo, por fornecedor"""
+    print("\n[7] AGING DAS CONTAS PENDENTES")
+    print("-" * 70)
     
-    return formas_pgto
+    print(f"Referência: {aging.referencia.strftime('%d/%m/%Y')}")
+    for faixa, linha in aging.totais.iterrows():
+        print(f"   - {faixa}: {linha['Contas']:.0f} conta(s) | R$ {linha['Vr. Título']:,.2f}")
+    
+    maiores = aging.maiores_vencidos(quantidade_fornecedores)
+    if not maiores.empty:
+        print(f"\nFornecedores com mais valor vencido (top {len(maiores)}):")
+        for fornecedor, valores in maiores[aging.vencidas].iterrows():
+            faixas = " | ".join(f"{faixa}: R$ {valor:,.2f}" for faixa, valor in valores.items() if valor)
+            print(f"   - {fornecedor}: R$ {valores.sum():,.2f} ({faixas})")
 
-def gerar_resumo_executivo(df, resultados_financeiro, resultados_pagamentos, 
-                          colunas_problematicas, fornecedores_vazios):
+def gerar_resumo_executivo(indicadores, colunas_problematicas):
     """Gera resumo executivo com principais problemas identificados"""
     print("\n" + "="*70)
     print("RESUMO EXECUTIVO - PRINCIPAIS PROBLEMAS IDENTIFICADOS")
@@ -161,17 +195,17 @@ def gerar_resumo_executivo(df, resultados_financeiro, resultados_pagamentos,
     problemas = []
     
     # Verificar dados vazios críticos
-    if resultados_financeiro['valores_titulo_vazios'] > 0:
-        problemas.append(f"• {resultados_financeiro['valores_titulo_vazios']} registro(s) sem valor de título")
+    if indicadores.vazios['Vr. Título'] > 0:
+        problemas.append(f"• {indicadores.vazios['Vr. Título']} registro(s) sem valor de título")
     
-    if fornecedores_vazios > 0:
-        problemas.append(f"• {fornecedores_vazios} registro(s) sem fornecedor identificado")
+    if indicadores.vazios['Fornecedor'] > 0:
+        problemas.append(f"• {indicadores.vazios['Fornecedor']} registro(s) sem fornecedor identificado")
     
     if len(colunas_problematicas) > 0:
-        problemas.append(f"• {len(colunas_problematicas)} coluna(s) com mais de 20% de dados vazios")
+        problemas.append(f"• {len(colunas_problematicas)} coluna(s) com mais de {indicadores_contas.LIMITE_VAZIOS}% de dados vazios")
     
-    if resultados_pagamentos['contas_vencidas'] > 0:
-        problemas.append(f"• {resultados_pagamentos['contas_vencidas']} conta(s) vencida(s) e não paga(s)")
+    if indicadores.contas_vencidas > 0:
+        problemas.append(f"• {indicadores.contas_vencidas} conta(s) vencida(s) e não paga(s)")
     
     if len(problemas) > 0:
         print("\nProblemas identificados:")
@@ -182,8 +216,8 @@ def gerar_resumo_executivo(df, resultados_financeiro, resultados_pagamentos,
     
     print("\n" + "="*70)
 
-def criar_visualizacoes(df, resultados_pagamentos):
-    """Cria visualizações gráficas dos dados"""
+def criar_visualizacoes(indicadores, cubo):
+    """Cria visualizações gráficas dos dados (timeline a partir do cubo mensal)"""
     print("\n" + "="*70)
     print("GERANDO VISUALIZAÇÕES")
     print("="*70)
@@ -207,9 +241,9 @@ def criar_visualizacoes(df, resultados_pagamentos):
     fig, ax = plt.subplots(figsize=(10, 7))
     
     status_data = [
-        resultados_pagamentos['contas_pagas'],
-        resultados_pagamentos['contas_vencidas'],
-        resultados_pagamentos['contas_pendentes'] - resultados_pagamentos['contas_vencidas']
+        indicadores.contas_pagas,
+        indicadores.contas_vencidas,
+        indicadores.contas_a_vencer
     ]
     labels = ['Pagas', 'Vencidas', 'A Vencer']
     colors = ['#2ecc71', '#e74c3c', '#f39c12']
@@ -229,7 +263,7 @@ def criar_visualizacoes(df, resultados_pagamentos):
     print("\n[2] Criando gráfico de formas de pagamento...")
     fig, ax = plt.subplots(figsize=(10, 6))
     
-    formas_pgto = df['Forma de Pgto.'].value_counts()
+    formas_pgto = indicadores.formas_pgto
     colors_bar = ['#3498db', '#9b59b6', '#1abc9c']
     
     formas_pgto.plot(kind='bar', ax=ax, color=colors_bar, edgecolor='black', linewidth=1.2)
@@ -252,8 +286,8 @@ def criar_visualizacoes(df, resultados_pagamentos):
     print("\n[3] Criando gráfico de dados vazios...")
     fig, ax = plt.subplots(figsize=(10, 8))
     
-    dados_vazios = df.isnull().sum().sort_values(ascending=True)
-    percentual = (dados_vazios / len(df) * 100).round(1)
+    dados_vazios = indicadores.vazios.sort_values(ascending=True)
+    percentual = indicadores.percentual_vazios[dados_vazios.index].round(1)
     
     colors_vazios = ['#e74c3c' if x > 20 else '#3498db' for x in percentual]
     
@@ -270,7 +304,7 @@ def criar_visualizacoes(df, resultados_pagamentos):
     
     # Linha de referência 20%
     max_val = dados_vazios.max()
-    ref_line = len(df) * 0.2
+    ref_line = indicadores.total_registros * 0.2
     ax.axvline(x=ref_line, color='red', linestyle='--', linewidth=2, alpha=0.7, label='Limite 20%')
     ax.legend()
     
@@ -285,9 +319,8 @@ def criar_visualizacoes(df, resultados_pagamentos):
     fig, ax = plt.subplots(figsize=(12, 6))
     
     # Preparar dados
-    df_timeline = df[df['Dt. Vencimento'].notna()].copy()
-    df_timeline['Mes_Venc'] = df_timeline['Dt. Vencimento'].dt.to_period('M')
-    vencimentos_mes = df_timeline.groupby('Mes_Venc').size().sort_index()
+    totais_mes = cubo.somar('mes').drop(cubo_contas.SEM_VENCIMENTO, errors='ignore')
+    vencimentos_mes = totais_mes['linhas']
     
     # Converter período para string para plotar
     meses_str = [str(m) for m in vencimentos_mes.index]
@@ -313,43 +346,107 @@ def criar_visualizacoes(df, resultados_pagamentos):
     plt.close()
     print(f"    ✓ Salvo em: {caminho4}")
     
+    # GRÁFICO 5: Valor por mês de vencimento e status (barras empilhadas)
+    print("\n[5] Criando gráfico de valores por mês e status...")
+    valores_status = cubo.fatiar(mes=list(vencimentos_mes.index)).cruzar('mes', 'status', 'titulo')
+    valores_status = valores_status.reindex(columns=[status for status in cubo_contas.STATUS if status in valores_status.columns])
+    if valores_status.empty:
+        print("    ⚠️  Sem vencimentos no período; gráfico não gerado")
+    else:
+        fig, ax = plt.subplots(figsize=(12, 6))
+    
+        cores = [cubo_contas.CORES_STATUS[status] for status in valores_status.columns]
+        valores_status.plot(kind='bar', stacked=True, ax=ax, color=cores, edgecolor='black', linewidth=0.8)
+        ax.set_xlabel('Mês de Vencimento', fontsize=12, fontweight='bold')
+        ax.set_ylabel('Vr. Título (R$)', fontsize=12, fontweight='bold')
+        ax.set_title('Valor dos Títulos por Mês e Status', fontsize=16, fontweight='bold', pad=20)
+        ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
+        ax.legend(title='Status')
+    
+        plt.tight_layout()
+        caminho5 = os.path.join(pasta_graficos, '05_valores_mes_status.png')
+        plt.savefig(caminho5, dpi=300, bbox_inches='tight')
+        plt.close()
+        print(f"    ✓ Salvo em: {caminho5}")
+    
     print("\n✓ Todas as visualizações foram criadas com sucesso!")
     print(f"✓ Arquivos salvos em: {pasta_graficos}")
     print("="*70)
 
-def main():
+def main(argv=None):
     """Função principal que executa todas as análises"""
+    parser = argparse.ArgumentParser(description=f"Análise de contas a pagar - {NOME_EMPRESA}")
+    parser.add_argument('--de', metavar='AAAA-MM', help="Primeiro mês de vencimento (padrão: todo o histórico)")
+    parser.add_argument('--ate', metavar='AAAA-MM', help="Último mês de vencimento (padrão: todo o histórico)")
+    parser.add_argument('--livros', nargs='+', metavar='PLANILHA',
+                        help="Analisa estes livros juntos (caminhos ou padrões glob) em vez de ARQUIVO_CONTAS_PAGAR")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Com --livros, livros lidos em paralelo")
+    args = parser.parse_args(argv)
+
     print("\n" + "="*70)
     print(f"ANÁLISE DE DADOS - CONTAS A PAGAR {NOME_EMPRESA}")
     print("="*70)
     
-    df = carregar_dados()
+    if args.livros:
+        resumo = carregar_livros(args.livros, args.de, args.ate, args.workers)
+        registros = resumo.registros
+    else:
+        df = carregar_dados(args.de, args.ate)
+        registros = len(df)
+    if not registros:
+        print("⚠️  Nenhuma conta com vencimento no período escolhido.")
+        return
+    
+    if args.livros:
+        # Vários livros: tudo sai dos agregados somados, sem as linhas em memória
+        colunas = len(resumo.colunas)
+        emissao_min, emissao_max = resumo.emissao_min, resumo.emissao_max
+        indicadores = resumo.indicadores()
+        # Sem uma tabela de apelidos comum: grafias agrupadas só entre os nomes destes livros
+        contagem = resumo.fornecedores()
+        canonicos = fornecedores_contas.resolver(contagem)['fornecedor']
+        fornecedores = contar_fornecedores(canonicos, contagem)
+        pendentes = resumo.pendentes()
+        pendentes['fornecedor'] = pendentes['fornecedor'].map(canonicos)
+        aging = aging_contas.calcular_grupos(pendentes, indicadores.referencia)
+        cubo = resumo.cubo(indicadores.referencia)
+    else:
+        colunas = len(df.columns)
+        emissao_min, emissao_max = df['Dt. Emissão'].min(), df['Dt. Emissão'].max()
+        indicadores = indicadores_contas.calcular(df)
+        # Código e nome canônico do fornecedor de cada linha (grafias do mesmo fornecedor juntas)
+        canonicos = fornecedores_contas.identificar(ARQUIVO_CONTAS_PAGAR, df['Fornecedor'])['fornecedor']
+        fornecedores = contar_fornecedores(canonicos, np.ones(len(df), dtype=np.int64))
+        aging = aging_contas.calcular(df.assign(Fornecedor=canonicos), indicadores.referencia)
+        cubo = cubo_contas.carregar(ARQUIVO_CONTAS_PAGAR).fatiar(args.de, args.ate)
     
     print("[1] INFORMAÇÕES GERAIS")
     print("-" * 70)
-    print(f"Total de registros: {len(df)}")
-    print(f"Total de colunas: {len(df.columns)}")
-    print(f"Período dos dados: {df['Dt. Emissão'].min().strftime('%d/%m/%Y')} a {df['Dt. Emissão'].max().strftime('%d/%m/%Y')}")
+    print(f"Total de registros: {registros}")
+    print(f"Total de colunas: {colunas}")
+    print(f"Período dos dados: {emissao_min.strftime('%d/%m/%Y')} a {emissao_max.strftime('%d/%m/%Y')}")
     print()
     
-    resumo_vazios, colunas_problematicas = analisar_dados_vazios(df)
+    resumo_vazios, colunas_problematicas = analisar_dados_vazios(indicadores)
+    
+    analisar_financeiro(indicadores)
     
-    resultados_financeiro = analisar_financeiro(df)
+    analisar_pagamentos(indicadores)
     
-    resultados_pagamentos = analisar_pagamentos(df)
+    analisar_fornecedores(fornecedores, indicadores)
     
-    fornecedores_unicos, fornecedores_vazios = analisar_fornecedores(df)
+    analisar_formas_pagamento(indicadores)
     
-    analisar_formas_pagamento(df)
+    analisar_aging(aging)
     
-    gerar_resumo_executivo(df, resultados_financeiro, resultados_pagamentos, 
-                          colunas_problematicas, fornecedores_vazios)
+    gerar_resumo_executivo(indicadores, colunas_problematicas)
     
     print("Análise concluída!")
     print("="*70)
     
     # 8. Criar visualizações
-    criar_visualizacoes(df, resultados_pagamentos)
+    criar_visualizacoes(indicadores, cubo)
     
     print("\n💡 Análise completa! Verifique os gráficos na pasta 'analises/'\n")
 
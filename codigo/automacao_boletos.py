@@ -5,12 +5,31 @@ Extrai dados de boletos em PDF e atualiza planilha automaticamente
 Autor: Projeto Fusion Tech - IBMEC 2025.02
 """
 
-import pdfplumber
 import pandas as pd
+import argparse
+import io
 import os
-import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from functools import partial
 from datetime import datetime
 
+import agregados_contas
+import base_contas
+import diario_lancamentos
+import esquema_contas
+import extracao_campos
+import fornecedores_contas
+import indice_boletos
+import layouts_boleto
+import leitura_pdf
+import medicao_etapas
+import planilha_xlsx
+import sequencia_numeros
+from extracao_campos import FORNECEDOR_NAO_IDENTIFICADO, VARIANTE_AUTOMACAO
+from leitura_pdf import ORDEM_PRIMEIRA_ULTIMA, ORDENS_PAGINAS
+from medicao_etapas import etapa
+
 
 def _resolver_subpasta(base, nome_canonico):
     """
@@ -39,19 +58,8 @@ PASTA_PROCESSADOS = _resolver_subpasta(DIRETORIO_DADOS, 'boletos_processados')
 ARQUIVO_EXCEL = os.path.join(DIRETORIO_DADOS, 'contasapagar_automacao.xlsx')
 ARQUIVO_LOG = os.path.join(DIRETORIO_DADOS, 'log_processamento.txt')
 
-COLUMNS_PADRAO = [
-    'Número',
-    'Fornecedor',
-    'Plano de contas',
-    'Histórico',
-    'Dt. Emissão',
-    'Dt. Vencimento',
-    'Dt. Pagamento',
-    'Vr. Título',
-    'Vr. Dev/Pag',
-    'Valor Total a Pagar',
-    'Forma de Pgto.'
-]
+COLUMNS_PADRAO = list(esquema_contas.COLUNAS_PADRAO)
+COLUNAS_DATA = list(esquema_contas.COLUNAS_DATA)
 
 def criar_pastas():
     """Cria as pastas necessárias se não existirem"""
@@ -67,180 +75,36 @@ def criar_pastas():
 
 def garantir_planilha_base():
     """Garante que a planilha de automação exista com as colunas padrão."""
-    if os.path.exists(ARQUIVO_EXCEL):
-        return
-
-    df_vazio = pd.DataFrame(columns=COLUMNS_PADRAO)
-    df_vazio.to_excel(ARQUIVO_EXCEL, index=False)
-    print(f"Planilha criada: {ARQUIVO_EXCEL}")
+    if planilha_xlsx.garantir_planilha(ARQUIVO_EXCEL, COLUMNS_PADRAO):
+        print(f"Planilha criada: {ARQUIVO_EXCEL}")
 
 def extrair_valor(texto):
     """Extrai o valor do boleto do texto"""
-    # Padrões comuns para valores em boletos - do mais específico ao mais genérico
-    padroes = [
-        # ALTA PRIORIDADE: Valor líquido final (evita valores de tabelas)
-        r'VALOR\s+L.QUIDO\s+R\$\s*\n?\s*([\d.,]+)',  # Braspress - valor final (aceita quebra de linha)
-        # Safra - formato com R$ antes: "(=) Valor do Documento\n01 R$ 1.217,77"
-        r'\(=\)\s*Valor\s+do\s+Documento\s*\n.*?R\$\s*([\d.,]+)',  # Safra com R$
-        r'\(=\)\s*Valor\s+do\s+Documento\s*\n\s*([\d.,]+)',  # Safra - linha abaixo
-        r'Valor\s+do\s+Documento\s*\n.*?R\$\s*([\d.,]+)',  # Safra alternativo com R$
-        r'Valor\s+do\s+Documento\s*\n\s*([\d.,]+)',  # Safra alternativo
-        # MÉDIA PRIORIDADE: Padrões específicos
-        r'\(=\)\s*Valor\s+do\s+Doc\.\s+([\d.,]+)',  # Boletos padrão
-        r'Valor\s+do\s+Documento[:\s]*([\d.,]+)',  # Mesmo nível
-        r'Valor\s+Cobrado.*?\n.*?([\d.,]+)',
-        # BAIXA PRIORIDADE: Braspress tabular
-        r'^([\d]+,\d{2})\s+DM',  # Braspress tabela (pode ser subtotal)
-        r'^\s*([\d.]+,\d{2})\s*$',  # Valor sozinho na linha
-    ]
-    
-    valores_encontrados = []
-    
-    for padrao in padroes:
-        matches = re.findall(padrao, texto, re.IGNORECASE | re.MULTILINE)
-        for match in matches:
-            valor_str = match.replace('.', '').replace(',', '.')
-            try:
-                valor = float(valor_str)
-                # Validar se é um valor razoável (entre R$10 e R$1.000.000)
-                if 10 <= valor <= 1000000:
-                    valores_encontrados.append(valor)
-            except:
-                continue
-    
-    # Retornar o valor mais comum ou o último
-    if valores_encontrados:
-        return max(set(valores_encontrados), key=valores_encontrados.count)
-    return None
+    return extracao_campos.extrair_valor(texto, VARIANTE_AUTOMACAO)
 
 def extrair_data_emissao(texto):
     """Extrai a data de emissão do boleto"""
-    # Padrões comuns para data de emissão
-    padroes = [
-        # Safra - formato: "Data Documento Vencimento ... 11/06/2025 11/08/2025" (primeira data)
-        r'Data\s+Documento\s+Vencimento.*?\n.*?\n(\d{2}/\d{2}/\d{4})',
-        # Safra - formato: "Data do Documento ... 11/06/2025"
-        r'Data\s+do\s+Documento[^\n]*\n\s*(\d{2}/\d{2}/\d{4})',
-        # Braspress - formato: "Emissão: 14 de Outubro de 2025"
-        r'Emiss[ãa]o:\s+(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})',
-        # Formato genérico: Data de Emissão / Data Documento
-        r'Data\s+(?:de\s+)?Emiss[ãa]o[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})',
-        r'Data\s+Documento[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})',
-    ]
-
-    meses = {
-        'janeiro': '01', 'fevereiro': '02', 'março': '03', 'marco': '03',
-        'abril': '04', 'maio': '05', 'junho': '06',
-        'julho': '07', 'agosto': '08', 'setembro': '09',
-        'outubro': '10', 'novembro': '11', 'dezembro': '12'
-    }
-
-    for padrao in padroes:
-        match = re.search(padrao, texto, re.IGNORECASE)
-        if match:
-            try:
-                grupos = match.groups()
-                if len(grupos) == 1:
-                    # Data completa DD/MM/YYYY
-                    return grupos[0]
-                elif len(grupos) == 3:
-                    # Pode ser formato por extenso ou DD MM YYYY
-                    if grupos[1].lower() in meses:
-                        # Formato por extenso: "14 de Outubro de 2025"
-                        dia = grupos[0].zfill(2)
-                        mes = meses[grupos[1].lower()]
-                        ano = grupos[2]
-                        return f"{dia}/{mes}/{ano}"
-                    else:
-                        # Formato separado DD MM YYYY
-                        dia, mes, ano = grupos
-                        return f"{dia}/{mes}/{ano}"
-            except:
-                continue
-    return None
+    return extracao_campos.extrair_data_emissao(texto)
 
 def extrair_vencimento(texto):
     """Extrai a data de vencimento do texto"""
-    # Padrões comuns para datas - do mais específico ao mais genérico
-    padroes = [
-        # Safra - formato: "Data Documento Vencimento ... 11/06/2025 11/08/2025" (pega a segunda data)
-        r'Data\s+Documento\s+Vencimento.*?\n.*?\n\d{2}/\d{2}/\d{4}\s+(\d{2}/\d{2}/\d{4})',
-        r'Vencimento\s*\n\s*(\d{2}/\d{2}/\d{4})',  # Safra - linha abaixo direto
-        r'(\d{2}/\d{2}/\d{4})\s+(?:REAL|Ag\./Cód)',  # Braspress - antes de REAL ou Ag./Cód
-        r'Vencimento[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})',  # Mesmo nível
-        r'Data[:\s]*(?:de\s*)?Vencimento[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})',  # Genérico
-    ]
-    
-    for padrao in padroes:
-        match = re.search(padrao, texto, re.IGNORECASE)
-        if match:
-            try:
-                grupos = match.groups()
-                if len(grupos) == 1:
-                    # Formato DD/MM/YYYY completo
-                    return grupos[0]
-                else:
-                    # Formato separado
-                    dia, mes, ano = grupos
-                    return f"{dia}/{mes}/{ano}"
-            except:
-                continue
-    return None
+    return extracao_campos.extrair_vencimento(texto)
 
 def extrair_fornecedor(texto):
     """Extrai o nome do fornecedor/beneficiário do texto"""
-    padroes = [
-        # ALTA PRIORIDADE: Formatos Safra (mais específicos primeiro)
-        # Safra - formato: "Beneficiário CNPJ / CPF Ag./Cód.Beneficiário\nSUMAY DO BRASIL LTDA"
-        r'Benefici[áa]rio\s+CNPJ\s*/\s*CPF[^\n]+\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)',  # Safra quebra de linha
-        # Safra - formato: "Beneficiário Ag./Cód... Motivos...\nSUMAY DO BRASIL LTDA"
-        r'Benefici[áa]rio\s+Ag\./C[óo]d\.[^\n]+\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)',  # Safra com Ag.
-        # Braspress - só pega se tiver "Final" E não tiver "Compensa"
-        r'Benefici[áa]rio\s+Final[^\n]*\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+?)(?:\s+\d|\s+CNPJ)',  # Braspress
-        r'Benefici[áa]rio\s*\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)',  # Safra - linha nova
-        # MÉDIA PRIORIDADE: Mesmo nível
-        r'Benefici[áa]rio[:\s]*([A-ZÀ-Ú0-9.,\s&/-]+)',
-        r'Cedente[:\s]*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)',
-        r'Sacador[:\s]*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)',
-    ]
-
-    for padrao in padroes:
-        match = re.search(padrao, texto, re.IGNORECASE | re.MULTILINE)
-        if match:
-            fornecedor = match.group(1).strip()
-            # Remover possíveis quebras de linha e caracteres extras
-            fornecedor = ' '.join(fornecedor.split())
-            fornecedor = fornecedor.split('\n')[0]  # Pegar só primeira linha
-            # Filtrar nomes inválidos
-            if 'Ficha' in fornecedor or 'Compensa' in fornecedor:
-                continue  # Pular e tentar próximo padrão
-            # Limitar tamanho
-            if len(fornecedor) > 60:
-                fornecedor = fornecedor[:60]
-            # Validar que não é só espaços ou muito curto
-            if len(fornecedor) > 5:
-                return fornecedor
-    return "Fornecedor não identificado"
+    return extracao_campos.extrair_fornecedor(texto)
 
 def extrair_numero_documento(texto):
     """Extrai o número do documento/fatura"""
-    padroes = [
-        r'N[úu]mero\s+do\s+Doc[.:]\s*([\w\/.-]+)',
-        r'Nº\s+do\s+Doc[.:]\s*([\w\/.-]+)',
-        r'N[úu]mero\s+do\s+Documento[:\s]*([\w\/.-]+)',
-        r'N[úu]mero\s+da\s+Fatura[:\s]*([\w\/.-]+)',
-        r'Nº\s+Fatura[:\s]*([\w\/.-]+)',
-    ]
-    
-    for padrao in padroes:
-        match = re.search(padrao, texto, re.IGNORECASE)
-        if match:
-            return match.group(1)
-    return None
+    return extracao_campos.extrair_numero_documento(texto, VARIANTE_AUTOMACAO)
 
-def processar_pdf(caminho_pdf):
+def processar_pdf(caminho_pdf, streaming=True, ordem_paginas=ORDEM_PRIMEIRA_ULTIMA):
     """
     Processa um arquivo PDF de boleto e extrai as informações
+
+    Args:
+        streaming: Para de ler páginas assim que valor e vencimento aparecem
+        ordem_paginas: Ordem de visita das páginas (ver leitura_pdf)
     
     Returns:
         dict: Dicionário com os dados extraídos ou None se falhar
@@ -250,24 +114,22 @@ def processar_pdf(caminho_pdf):
     print(f"{'='*60}")
     
     try:
-        # Abrir PDF e extrair texto
-        with pdfplumber.open(caminho_pdf) as pdf:
-            texto_completo = ""
-            for pagina in pdf.pages:
-                texto = pagina.extract_text()
-                if texto:
-                    texto_completo += texto + "\n"
-        
-        if not texto_completo:
+        # Cache por conteúdo do PDF + leitura de páginas sob demanda
+        campos, do_cache = leitura_pdf.campos_do_pdf(
+            caminho_pdf, VARIANTE_AUTOMACAO, streaming, ordem_paginas
+        )
+
+        if campos is None:
             print("⚠️  PDF vazio ou não foi possível extrair texto")
             return None
-        
-        # Extrair informações
-        valor = extrair_valor(texto_completo)
-        vencimento = extrair_vencimento(texto_completo)
-        data_emissao = extrair_data_emissao(texto_completo)
-        fornecedor = extrair_fornecedor(texto_completo)
-        numero_doc = extrair_numero_documento(texto_completo)
+        if do_cache:
+            print("✓ Dados recuperados do cache de extração")
+
+        valor = campos['valor']
+        vencimento = campos['vencimento']
+        data_emissao = campos['data_emissao']
+        fornecedor = campos['fornecedor']
+        numero_doc = campos['numero_documento']
 
         # Verificar se conseguiu extrair dados mínimos
         if not valor or not vencimento:
@@ -282,6 +144,7 @@ def processar_pdf(caminho_pdf):
             'Vencimento': vencimento,
             'Data_Emissao': data_emissao,  # Adicionar data de emissão extraída
             'Numero_Documento': numero_doc,
+            'Codigo_Barras': campos.get('codigo_barras'),
             'Arquivo_PDF': os.path.basename(caminho_pdf),
             'Data_Processamento': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
         }
@@ -303,81 +166,129 @@ def processar_pdf(caminho_pdf):
         traceback.print_exc()
         return None
 
-def adicionar_na_planilha(dados):
+def _montar_linha(dados, numero):
+    """Monta a linha da planilha para os dados extraídos de um boleto"""
+    # Criar histórico
+    historico = f"Boleto processado automaticamente"
+    if dados.get('Numero_Documento'):
+        historico += f" - Doc: {dados['Numero_Documento']}"
+    historico += f" - {dados['Arquivo_PDF']}"
+    if dados.get('Duplicata_De'):
+        historico = f"POSSÍVEL DUPLICATA ({dados['Duplicata_De']}) - {historico}"
+    
+    # Usar data de emissão extraída ou data atual como fallback
+    if dados.get('Data_Emissao'):
+        dt_emissao = pd.to_datetime(dados['Data_Emissao'], format='%d/%m/%Y')
+    else:
+        dt_emissao = datetime.now().strftime('%Y-%m-%d')
+
+    return {
+        'Número': numero,
+        'Fornecedor': dados['Fornecedor'],
+        'Plano de contas': 'CONTAS A PAGAR',
+        'Histórico': historico,
+        'Dt. Emissão': dt_emissao,  # Usar data extraída do boleto
+        'Dt. Vencimento': pd.to_datetime(dados['Vencimento'], format='%d/%m/%Y'),
+        'Dt. Pagamento': None,  # Vazio até ser pago
+        'Vr. Título': dados['Valor'],
+        'Vr. Dev/Pag': dados['Valor'],
+        'Valor Total a Pagar': dados['Valor'],  # Valor total (mesmo que Vr. Título por padrão)
+        'Forma de Pgto.': '3 - BOLETO'
+    }
+
+def adicionar_lote_na_planilha(lista_dados, duplicados=None, ao_reservar=None):
     """
-    Adiciona os dados extraídos na planilha Excel
+    Adiciona os dados extraídos de vários boletos na planilha Excel,
+    com uma única leitura e uma única gravação para o lote todo.
+
+    Registros com dados inválidos são descartados sem impedir os demais.
+    Boletos já lançados (ver indice_boletos) ficam com
+    dados['Duplicata_De'] preenchido e são ignorados ou, com
+    duplicados='marcar', incluídos com o Histórico sinalizado.
+    `ao_reservar`, se informado, recebe os Números atribuídos antes da
+    gravação (ver diario_lancamentos.compactar).
+    
+    Returns:
+        list: Número atribuído a cada registro, na ordem de entrada
+            (None para os que não entraram na planilha)
     """
+    duplicados = duplicados or indice_boletos.MODO_DUPLICADOS
+    numeros_atribuidos = [None] * len(lista_dados)
+    if not lista_dados:
+        return numeros_atribuidos
+
     try:
         garantir_planilha_base()
 
-        # Carregar planilha existente
-        df = pd.read_excel(ARQUIVO_EXCEL)
-        if df.empty:
-            df = pd.DataFrame(columns=COLUMNS_PADRAO)
-        
-        # Gerar próximo número
-        numeros_existentes = df['Número'].dropna()
-        if len(numeros_existentes) > 0:
-            # Extrair números e encontrar o maior
-            try:
-                numeros = []
-                for n in numeros_existentes:
-                    num_str = str(n).replace('000', '').strip()
-                    if num_str.isdigit():
-                        numeros.append(int(num_str))
-                
-                if numeros:
-                    ultimo_num = max(numeros)
-                    proximo_numero = f"{ultimo_num + 1:06d}"
+        banco = base_contas.garantir_base(ARQUIVO_EXCEL) if base_contas.usar_sqlite() else None
+
+        # Índice travado até o registro: outro processo não inclui o mesmo boleto no meio
+        with indice_boletos.aberto(ARQUIVO_EXCEL) as indice_lancados:
+            # Nome canônico do fornecedor antes da chave do boleto e da gravação
+            with etapa('fornecedores'):
+                fornecedores_contas.canonizar_lote(ARQUIVO_EXCEL, lista_dados, ignorar={FORNECEDOR_NAO_IDENTIFICADO})
+            with etapa('indice_boletos'):
+                indice_boletos.marcar_duplicatas(indice_lancados, lista_dados)
+
+            linhas_validas = []
+            for indice, dados in enumerate(lista_dados):
+                if dados.get('Duplicata_De') and duplicados == indice_boletos.PULAR:
+                    print(f"↺ {dados.get('Arquivo_PDF')} já lançado ({dados['Duplicata_De']}) - ignorado")
+                    continue
+                try:
+                    linhas_validas.append((indice, _montar_linha(dados, None)))
+                except Exception as e:
+                    print(f"❌ Erro ao preparar registro de {dados.get('Arquivo_PDF')}: {e}")
+
+            # Faixa de números reservada de uma vez na sequência (sem ler a coluna Número)
+            with etapa('sequencia_numeros'):
+                faixa = sequencia_numeros.reservar(
+                    ARQUIVO_EXCEL, len(linhas_validas),
+                    semente=lambda: sequencia_numeros.numeros_existentes(ARQUIVO_EXCEL),
+                )
+            novas_linhas = []
+            for (indice, linha), numero in zip(linhas_validas, faixa):
+                linha['Número'] = sequencia_numeros.formatar(numero)
+                novas_linhas.append(linha)
+                numeros_atribuidos[indice] = linha['Número']
+
+            if not novas_linhas:
+                return numeros_atribuidos
+            if ao_reservar:
+                ao_reservar(numeros_atribuidos)
+            
+            with agregados_contas.alteracao(ARQUIVO_EXCEL) as mudancas:
+                if base_contas.usar_sqlite():
+                    # Inclusão linha a linha na base, sem regravar o restante
+                    with etapa('sqlite_inserir'):
+                        base_contas.inserir_contas(banco, novas_linhas)
                 else:
-                    proximo_numero = "000052"
-            except:
-                proximo_numero = "000052"
-        else:
-            proximo_numero = "000001"
-        
-        # Criar histórico
-        historico = f"Boleto processado automaticamente"
-        if dados.get('Numero_Documento'):
-            historico += f" - Doc: {dados['Numero_Documento']}"
-        historico += f" - {dados['Arquivo_PDF']}"
+                    # Adicionar novas linhas no fim da aba, sem regravar as existentes
+                    with etapa('xlsx_anexar'):
+                        planilha_xlsx.anexar_linhas(ARQUIVO_EXCEL, novas_linhas, COLUMNS_PADRAO, COLUNAS_DATA)
+                mudancas.incluir(novas_linhas)
+
+            with etapa('indice_boletos'):
+                indice_boletos.registrar(indice_lancados, zip(lista_dados, numeros_atribuidos))
         
-        # Usar data de emissão extraída ou data atual como fallback
-        if dados.get('Data_Emissao'):
-            dt_emissao = pd.to_datetime(dados['Data_Emissao'], format='%d/%m/%Y')
+        if len(novas_linhas) == 1:
+            print(f"\n✓ Registro adicionado à planilha com número: {novas_linhas[0]['Número']}")
         else:
-            dt_emissao = datetime.now().strftime('%Y-%m-%d')
-
-        # Criar nova linha
-        nova_linha = {
-            'Número': proximo_numero,
-            'Fornecedor': dados['Fornecedor'],
-            'Plano de contas': 'CONTAS A PAGAR',
-            'Histórico': historico,
-            'Dt. Emissão': dt_emissao,  # Usar data extraída do boleto
-            'Dt. Vencimento': pd.to_datetime(dados['Vencimento'], format='%d/%m/%Y'),
-            'Dt. Pagamento': None,  # Vazio até ser pago
-            'Vr. Título': dados['Valor'],
-            'Vr. Dev/Pag': dados['Valor'],
-            'Valor Total a Pagar': dados['Valor'],  # Valor total (mesmo que Vr. Título por padrão)
-            'Forma de Pgto.': '3 - BOLETO'
-        }
-        
-        # Adicionar nova linha
-        df = pd.concat([df, pd.DataFrame([nova_linha])], ignore_index=True)
-        df = df.reindex(columns=COLUMNS_PADRAO)
-        
-        # Salvar planilha
-        df.to_excel(ARQUIVO_EXCEL, index=False)
-        
-        print(f"\n✓ Registro adicionado à planilha com número: {proximo_numero}")
-        return True
+            print(f"\n✓ {len(novas_linhas)} registros adicionados à planilha "
+                  f"({novas_linhas[0]['Número']} a {novas_linhas[-1]['Número']})")
+        return numeros_atribuidos
         
     except Exception as e:
         print(f"❌ Erro ao atualizar planilha: {e}")
         import traceback
         traceback.print_exc()
-        return False
+        return [None] * len(lista_dados)
+
+def adicionar_na_planilha(dados, duplicados=None):
+    """
+    Adiciona os dados extraídos na planilha Excel
+    """
+    return adicionar_lote_na_planilha([dados], duplicados)[0] is not None
 
 def mover_para_processados(caminho_pdf):
     """Move o PDF para a pasta de processados"""
@@ -393,7 +304,8 @@ def mover_para_processados(caminho_pdf):
         
         # Mover arquivo
         import shutil
-        shutil.move(caminho_pdf, destino)
+        with etapa('mover_para_processados'):
+            shutil.move(caminho_pdf, destino)
         print(f"✓ Arquivo movido para: {destino}")
         
     except Exception as e:
@@ -408,8 +320,150 @@ def salvar_log(mensagem):
     except:
         pass
 
-def main():
+def imprimir_estatisticas_layout():
+    """Mostra quantos PDFs caíram em cada layout e quantos usaram a cascata completa"""
+    estatisticas = layouts_boleto.estatisticas()
+    if not estatisticas:
+        return
+    print("\nLayouts detectados (documentos / cascata completa):")
+    for layout, contagem in sorted(estatisticas.items()):
+        print(f"   - {layout}: {contagem['documentos']} / {contagem['fallback']}")
+
+def _processar_pdf_medido(caminho_pdf, **opcoes):
+    """Executa processar_pdf medindo as etapas. Retorna (dados, etapas)."""
+    medicao = medicao_etapas.nova_medicao(os.path.basename(caminho_pdf))
+    with medicao_etapas.medindo(medicao):
+        dados = processar_pdf(caminho_pdf, **opcoes)
+    return dados, medicao['etapas']
+
+def _processar_pdf_isolado(caminho_pdf, metricas=True, **opcoes):
+    """
+    Executa processar_pdf capturando a saída de console.
+
+    Usado pelos workers do pool de processos: a saída, os contadores de
+    layout e os tempos por etapa são devolvidos junto com os dados para que
+    o estágio escritor os imprima e acumule na ordem original.
+    """
+    buffer = io.StringIO()
+    layouts_boleto.zerar()
+    medicao_etapas.HABILITADO = metricas
+    with redirect_stdout(buffer), redirect_stderr(buffer):
+        dados, etapas = _processar_pdf_medido(caminho_pdf, **opcoes)
+    return dados, buffer.getvalue(), layouts_boleto.estatisticas(), etapas
+
+def extrair_lote(caminhos_pdf, workers=1, **opcoes):
+    """
+    Extrai os dados de uma lista de PDFs, preservando a ordem de entrada.
+
+    Com workers > 1 a leitura do PDF e os extrair_* rodam em um pool de
+    processos; os resultados são entregues em ordem, um a um. As opções
+    extras são repassadas para processar_pdf.
+
+    Yields:
+        tuple: (dados, etapas) de cada PDF - dados é None se falhar e etapas
+            traz os tempos medidos na extração (ver medicao_etapas)
+    """
+    if workers <= 1 or len(caminhos_pdf) <= 1:
+        for caminho in caminhos_pdf:
+            yield _processar_pdf_medido(caminho, **opcoes)
+        return
+
+    # Lotes pequenos por tarefa reduzem o custo de IPC sem desbalancear os workers
+    chunksize = max(1, len(caminhos_pdf) // (workers * 4))
+    tarefa = partial(_processar_pdf_isolado, metricas=medicao_etapas.HABILITADO, **opcoes)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for dados, saida, estatisticas_layout, etapas in executor.map(tarefa, caminhos_pdf, chunksize=chunksize):
+            print(saida, end='')
+            layouts_boleto.mesclar(estatisticas_layout)
+            yield dados, etapas
+
+def _compactar_diario(diario, pendentes, gravar, medicoes, contagem):
+    """
+    Leva os boletos pendentes do diário para a planilha (uma gravação para
+    todos) e só então move os PDFs e registra o log de cada um.
+    """
+    if not pendentes:
+        return
+    medicao_lote = medicao_etapas.nova_medicao('(planilha)')
+    with medicao_etapas.medindo(medicao_lote):
+        resultados = diario_lancamentos.compactar(diario, ARQUIVO_EXCEL, gravar)
+    medicoes.append(medicao_lote)
+    medicao_etapas.gravar_registros([medicao_etapas.registro(
+        medicao_lote, origem='automacao', situacao='lote', documentos=len(pendentes)
+    )])
+
+    for id_boleto, arquivo, caminho_completo, dados, medicao in pendentes:
+        numero = resultados[id_boleto]['numero']
+        duplicata_de = resultados[id_boleto]['duplicata_de']
+        with medicao_etapas.medindo(medicao):
+            if numero:
+                # Mover para pasta de processados
+                mover_para_processados(caminho_completo)
+                contagem['processados'] += 1
+                situacao = 'processado'
+                salvar_log(f"✓ Processado: {arquivo} - R$ {dados['Valor']:.2f} - Nº {numero}")
+                if duplicata_de:
+                    salvar_log(f"⚠️  Possível duplicata incluída: {arquivo} - Nº {numero} (já lançado: {duplicata_de})")
+            elif duplicata_de:
+                # Já está no livro: sai da pasta de entrada para não voltar no próximo lote
+                mover_para_processados(caminho_completo)
+                contagem['duplicados'] += 1
+                situacao = 'duplicado'
+                salvar_log(f"↺ Duplicado ignorado: {arquivo} - R$ {dados['Valor']:.2f} (já lançado: {duplicata_de})")
+            else:
+                contagem['erros'] += 1
+                situacao = 'erro_planilha'
+                salvar_log(f"✗ Erro ao adicionar na planilha: {arquivo}")
+        medicao_etapas.gravar_registros(
+            [medicao_etapas.registro(medicao, origem='automacao', situacao=situacao)]
+        )
+
+def _concluir_retomado(registro, resultado, retomado):
+    """Boleto de um diário interrompido: move o PDF que ficou na pasta de entrada."""
+    arquivo = os.path.basename(registro['arquivo'])
+    if not (resultado['numero'] or resultado['duplicata_de']):
+        return  # Não entrou no livro: o PDF continua na pasta e é processado de novo
+    if retomado:
+        if resultado['numero']:
+            salvar_log(f"♻ Retomado do diário: {arquivo} - Nº {resultado['numero']}")
+        else:
+            salvar_log(f"↺ Duplicado ignorado (diário): {arquivo} (já lançado: {resultado['duplicata_de']})")
+    if os.path.exists(registro['arquivo']):
+        mover_para_processados(registro['arquivo'])
+
+def _parse_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Automação de Boletos - Fusion Tech")
+    parser.add_argument(
+        '--workers', type=int, default=os.cpu_count() or 1,
+        help="Processos para extração dos PDFs (padrão: número de CPUs; 1 = serial)"
+    )
+    parser.add_argument(
+        '--ordem-paginas', choices=ORDENS_PAGINAS, default=ORDEM_PRIMEIRA_ULTIMA,
+        help="Ordem de leitura das páginas (padrão: primeira, última e depois as demais)"
+    )
+    parser.add_argument(
+        '--sem-streaming', action='store_true',
+        help="Lê todas as páginas antes de extrair (desativa a parada antecipada)"
+    )
+    parser.add_argument(
+        '--duplicados', choices=indice_boletos.MODOS_DUPLICADOS, default=indice_boletos.MODO_DUPLICADOS,
+        help="Boleto já lançado: pular (padrão) ou marcar (inclui com o Histórico sinalizado)"
+    )
+    parser.add_argument(
+        '--compactar-a-cada', type=int, default=0, metavar='N',
+        help="Grava na planilha a cada N boletos anotados no diário (padrão: só no fim do lote)"
+    )
+    parser.add_argument(
+        '--sem-metricas', action='store_true',
+        help="Desativa a medição de tempo por etapa"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Função principal - processa todos os boletos na pasta"""
+    args = _parse_argumentos(argv)
+    medicao_etapas.HABILITADO = not args.sem_metricas
+
     print("\n" + "="*60)
     print("AUTOMAÇÃO DE BOLETOS - FUSION TECH")
     print("="*60)
@@ -422,6 +476,12 @@ def main():
         print(f"\n❌ Pasta de boletos não encontrada: {PASTA_BOLETOS}")
         return
     
+    # Boletos de uma execução interrompida: vão para o livro antes dos novos
+    gravar = partial(adicionar_lote_na_planilha, duplicados=args.duplicados)
+    retomados = diario_lancamentos.recuperar(ARQUIVO_EXCEL, gravar, _concluir_retomado)
+    if retomados:
+        print(f"\n♻️  {retomados} boleto(s) de uma execução interrompida incluído(s) a partir do diário")
+    
     arquivos_pdf = [f for f in os.listdir(PASTA_BOLETOS) if f.lower().endswith('.pdf')]
     
     if not arquivos_pdf:
@@ -432,39 +492,55 @@ def main():
     print(f"\n✓ Encontrados {len(arquivos_pdf)} arquivo(s) PDF para processar\n")
     
     # Processar cada PDF
-    processados = 0
-    erros = 0
+    contagem = {'processados': 0, 'duplicados': 0, 'erros': 0}
     
-    for arquivo in arquivos_pdf:
-        caminho_completo = os.path.join(PASTA_BOLETOS, arquivo)
-        
-        # Extrair dados do PDF
-        dados = processar_pdf(caminho_completo)
-        
-        if dados:
-            # Adicionar na planilha
-            if adicionar_na_planilha(dados):
-                # Mover para pasta de processados
-                mover_para_processados(caminho_completo)
-                processados += 1
-                salvar_log(f"✓ Processado: {arquivo} - R$ {dados['Valor']:.2f}")
+    caminhos = [os.path.join(PASTA_BOLETOS, arquivo) for arquivo in arquivos_pdf]
+    
+    # Estágio escritor único: consome as extrações na ordem dos arquivos
+    resultados = extrair_lote(
+        caminhos, args.workers, streaming=not args.sem_streaming, ordem_paginas=args.ordem_paginas
+    )
+    medicoes = []
+    with diario_lancamentos.aberto(ARQUIVO_EXCEL) as diario:
+        pendentes = []
+        for arquivo, caminho_completo, (dados, etapas) in zip(arquivos_pdf, caminhos, resultados):
+            # Tempos da extração (worker) + escrita na planilha (este processo)
+            medicao = medicao_etapas.nova_medicao(arquivo)
+            medicao_etapas.mesclar(medicao, etapas)
+            medicoes.append(medicao)
+            if dados:
+                # Um append com fsync por boleto; o livro é gravado na compactação
+                with medicao_etapas.medindo(medicao), etapa('diario_anotar'):
+                    id_boleto = diario_lancamentos.registrar_boleto(diario, dados, caminho_completo)
+                pendentes.append((id_boleto, arquivo, caminho_completo, dados, medicao))
+                if args.compactar_a_cada and len(pendentes) >= args.compactar_a_cada:
+                    _compactar_diario(diario, pendentes, gravar, medicoes, contagem)
+                    pendentes = []
             else:
-                erros += 1
-                salvar_log(f"✗ Erro ao adicionar na planilha: {arquivo}")
-        else:
-            erros += 1
-            salvar_log(f"✗ Erro ao extrair dados: {arquivo}")
+                contagem['erros'] += 1
+                salvar_log(f"✗ Erro ao extrair dados: {arquivo}")
+                medicao_etapas.gravar_registros(
+                    [medicao_etapas.registro(medicao, origem='automacao', situacao='erro_extracao')]
+                )
+        _compactar_diario(diario, pendentes, gravar, medicoes, contagem)
+    processados, duplicados, erros = contagem['processados'], contagem['duplicados'], contagem['erros']
     
     # Resumo
     print("\n" + "="*60)
     print("RESUMO DO PROCESSAMENTO")
     print("="*60)
     print(f"✓ Processados com sucesso: {processados}")
+    if duplicados:
+        print(f"↺ Duplicados ignorados: {duplicados}")
     print(f"✗ Erros: {erros}")
     print(f"Total: {len(arquivos_pdf)}")
+    imprimir_estatisticas_layout()
+    if medicao_etapas.HABILITADO:
+        medicao_etapas.imprimir_resumo(medicoes)
+        print(f"\n✓ Métricas por PDF em: {medicao_etapas.ARQUIVO_METRICAS}")
     if os.path.exists(ARQUIVO_LOG):
         print(f"\n✓ Log salvo em: {ARQUIVO_LOG}")
     print("="*60 + "\n")
 
 if __name__ == "__main__":
-    main()
+    main()
\ No newline at end of file
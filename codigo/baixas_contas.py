@@ -0,0 +1,328 @@
+"""
+Baixas e Exclusões em Lote - Fusion Tech
+Baixa de pagamento, reabertura e exclusão de títulos em lote, pelo Número.
+
+As operações são vetorizadas: o livro (planilha ou base SQLite) vira uma
+tabela indexada pelo Número normalizado ('000051', 51 e '51.0' são o mesmo
+título) e os títulos afetados saem de máscaras booleanas, sem percorrer
+linha a linha. Na planilha só as células alteradas são regravadas; na
+base, só as linhas alteradas.
+
+Entradas aceitas (ler_lancamentos): lista de números, lista de dicts,
+DataFrame ou CSV com as colunas Número e, opcionalmente, Dt. Pagamento e
+Vr. Dev/Pag (separador , ou ;, datas dd/mm/aaaa ou aaaa-mm-dd).
+
+Cada operação devolve um resumo com os números alterados, os que já
+estavam no estado pedido e os não encontrados.
+
+Para executar:
+    python codigo/baixas_contas.py pagar baixas.csv
+    python codigo/baixas_contas.py pagar 000051 000052 --data 05/09/2025
+    python codigo/baixas_contas.py reabrir 000051
+    python codigo/baixas_contas.py excluir 000051 000052 --planilha dados/contasapagar_automacao.xlsx
+"""
+
+import argparse
+import os
+
+import pandas as pd
+
+import agregados_contas
+import base_contas
+import indice_boletos
+import planilha_xlsx
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_EXCEL = os.path.join(os.path.dirname(BASE_DIR), 'dados', 'contasapagar_automacao.xlsx')
+
+COLUNA_NUMERO = 'Número'
+COLUNA_PAGAMENTO = 'Dt. Pagamento'
+COLUNA_VALOR_PAGO = 'Vr. Dev/Pag'
+# Lidas junto para atualizar os agregados do livro (agregados_contas)
+COLUNAS_AGREGADOS = ['Dt. Vencimento', 'Fornecedor', 'Forma de Pgto.', 'Vr. Título']
+
+# Nomes aceitos no CSV -> coluna do livro
+_SINONIMOS = {
+    'numero': COLUNA_NUMERO,
+    'número': COLUNA_NUMERO,
+    'dt. pagamento': COLUNA_PAGAMENTO,
+    'dt_pagamento': COLUNA_PAGAMENTO,
+    'data_pagamento': COLUNA_PAGAMENTO,
+    'data pagamento': COLUNA_PAGAMENTO,
+    'vr. dev/pag': COLUNA_VALOR_PAGO,
+    'vr_dev_pag': COLUNA_VALOR_PAGO,
+    'valor_pago': COLUNA_VALOR_PAGO,
+    'valor pago': COLUNA_VALOR_PAGO,
+}
+
+
+def chaves_numero(valores):
+    """
+    Número normalizado para comparação, vetorizado.
+
+    '000051', 51, 51.0 e '51.0' viram '51'; textos não numéricos são
+    mantidos (sem espaços nas pontas) e vazios viram None.
+    """
+    serie = pd.Series(valores, dtype=object)
+    texto = serie.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    digitos = texto.str.fullmatch(r'\d+')
+    texto = texto.mask(digitos, texto.str.lstrip('0').replace('', '0'))
+    return texto.where(serie.notna() & (texto != ''), None)
+
+
+def _converter_datas(serie):
+    """Datas dd/mm/aaaa (formato brasileiro) ou ISO."""
+    texto = serie.astype(object).where(serie.notna(), None)
+    brasileiras = texto.astype(str).str.contains('/', regex=False)
+    datas = pd.to_datetime(texto.where(~brasileiras), errors='coerce')
+    return datas.mask(brasileiras, pd.to_datetime(texto.where(brasileiras), dayfirst=True, errors='coerce'))
+
+
+def _converter_valores(serie):
+    """Valores como número: 1.234,56 (brasileiro) ou 1234.56."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return pd.to_numeric(serie, errors='coerce')
+    texto = serie.astype(str).str.strip()
+    brasileiros = texto.str.contains(',', regex=False)
+    texto = texto.mask(brasileiros, texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+    return pd.to_numeric(texto.where(serie.notna()), errors='coerce')
+
+
+def ler_lancamentos(origem):
+    """
+    Normaliza a entrada das baixas.
+
+    Args:
+        origem: Caminho ou arquivo CSV, DataFrame, lista de dicts ou lista de números
+
+    Returns:
+        pd.DataFrame: Número, Dt. Pagamento (datetime64, NaT = não informada),
+            Vr. Dev/Pag (float, NaN = não informado) e a chave normalizada.
+            Números repetidos: vale o último lançamento.
+    """
+    if isinstance(origem, pd.DataFrame):
+        df = origem.copy()
+    elif isinstance(origem, (str, os.PathLike)) or hasattr(origem, 'read'):
+        df = pd.read_csv(origem, sep=None, engine='python', dtype=str, encoding='utf-8-sig')
+    else:
+        origem = list(origem)
+        if origem and isinstance(origem[0], dict):
+            df = pd.DataFrame(origem)
+        else:
+            df = pd.DataFrame({COLUNA_NUMERO: origem}, dtype=object)
+
+    df = df.rename(columns=lambda coluna: _SINONIMOS.get(str(coluna).strip().lower(), str(coluna).strip()))
+    if COLUNA_NUMERO not in df.columns:
+        raise ValueError(f"Coluna '{COLUNA_NUMERO}' não encontrada nos lançamentos")
+
+    lancamentos = pd.DataFrame({COLUNA_NUMERO: df[COLUNA_NUMERO].astype(object)})
+    lancamentos[COLUNA_PAGAMENTO] = (
+        _converter_datas(df[COLUNA_PAGAMENTO]) if COLUNA_PAGAMENTO in df.columns
+        else pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    )
+    lancamentos[COLUNA_VALOR_PAGO] = (
+        _converter_valores(df[COLUNA_VALOR_PAGO]) if COLUNA_VALOR_PAGO in df.columns
+        else pd.Series(float('nan'), index=df.index)
+    )
+    lancamentos['chave'] = chaves_numero(lancamentos[COLUNA_NUMERO]).values
+    lancamentos = lancamentos[lancamentos['chave'].notna()]
+    return lancamentos.drop_duplicates('chave', keep='last').reset_index(drop=True)
+
+
+def _resumo(lancamentos, chaves_alteradas, chaves_no_estado):
+    """Números (como informados) por situação."""
+    numeros = lancamentos.set_index('chave')[COLUNA_NUMERO].astype(str).str.strip()
+    encontrados = set(chaves_alteradas) | set(chaves_no_estado)
+    return {
+        'alterados': numeros[numeros.index.isin(set(chaves_alteradas))].tolist(),
+        'ja_no_estado': numeros[numeros.index.isin(set(chaves_no_estado) - set(chaves_alteradas))].tolist(),
+        'nao_encontrados': numeros[~numeros.index.isin(encontrados)].tolist(),
+    }
+
+
+def calcular_baixas(livro, lancamentos, pago=True, data_padrao=None):
+    """
+    Calcula, sem gravar, as alterações de Dt. Pagamento (e Vr. Dev/Pag) no livro.
+
+    Para pagar: títulos sem pagamento recebem a data do lançamento (ou
+    data_padrao, padrão hoje); títulos já pagos só mudam se o lançamento
+    trouxer data ou valor diferentes. Para reabrir: a data é apagada dos
+    títulos pagos.
+
+    Args:
+        livro: DataFrame com Número, Dt. Pagamento e Vr. Dev/Pag (qualquer índice)
+        lancamentos: Saída de ler_lancamentos()
+
+    Returns:
+        tuple: (DataFrame das linhas alteradas, no índice do livro, só com as
+            colunas que mudam e os valores novos; resumo)
+    """
+    chaves = chaves_numero(livro[COLUNA_NUMERO]).set_axis(livro.index)
+    alvo = lancamentos.set_index('chave')
+    selecionados = chaves.isin(alvo.index)
+    atual_data = pd.to_datetime(livro[COLUNA_PAGAMENTO], errors='coerce')
+
+    if pago:
+        data_padrao = pd.Timestamp(data_padrao or pd.Timestamp.now()).normalize()
+        data_informada = chaves.map(alvo[COLUNA_PAGAMENTO])
+        valor_informado = chaves.map(alvo[COLUNA_VALOR_PAGO])
+        atual_valor = pd.to_numeric(livro[COLUNA_VALOR_PAGO], errors='coerce')
+
+        nova_data = data_informada.fillna(data_padrao)
+        muda_data = atual_data.isna() | (data_informada.notna() & (atual_data != data_informada))
+        muda_valor = valor_informado.notna() & (
+            atual_valor.isna() | ((atual_valor - valor_informado).abs() >= 0.005)
+        )
+        alterar = selecionados & (muda_data | muda_valor)
+
+        alteracoes = pd.DataFrame({COLUNA_PAGAMENTO: nova_data.where(muda_data, atual_data)})
+        if (alterar & muda_valor).any():
+            alteracoes[COLUNA_VALOR_PAGO] = valor_informado.where(muda_valor, atual_valor)
+        alteracoes = alteracoes[alterar]
+    else:
+        alterar = selecionados & atual_data.notna()
+        alteracoes = pd.DataFrame({COLUNA_PAGAMENTO: pd.Series(pd.NaT, index=livro.index)})[alterar]
+
+    resumo = _resumo(lancamentos, chaves[alterar].unique(), chaves[selecionados].unique())
+    return alteracoes, resumo
+
+
+def aplicar_baixas_dataframe(livro, lancamentos, pago=True, data_padrao=None):
+    """calcular_baixas + atribuição por máscara em uma cópia do DataFrame. Retorna (livro, resumo)."""
+    alteracoes, resumo = calcular_baixas(livro, lancamentos, pago, data_padrao)
+    livro = livro.copy()
+    for coluna in alteracoes.columns:
+        if coluna == COLUNA_PAGAMENTO:
+            livro[coluna] = pd.to_datetime(livro[coluna], errors='coerce')
+        livro.loc[alteracoes.index, coluna] = alteracoes[coluna]
+    return livro, resumo
+
+
+def _data_para_planilha(valor):
+    return None if pd.isna(valor) else pd.Timestamp(valor).to_pydatetime()
+
+
+def _alteracoes_nos_agregados(mudancas, livro, alteracoes):
+    """Linhas alteradas, antes e depois, para os agregados do livro."""
+    if alteracoes.empty:
+        return
+    antigas = livro.loc[alteracoes.index]
+    novas = antigas.copy()
+    for coluna in alteracoes.columns:
+        novas[coluna] = alteracoes[coluna]
+    mudancas.alterar(antigas, novas)
+
+
+def baixar(caminho_planilha, origem, pago=True, data_padrao=None):
+    """
+    Baixa (pago=True) ou reabre (pago=False) os títulos no livro oficial.
+
+    Args:
+        caminho_planilha: Planilha do livro (com BACKEND_CONTAS = 'sqlite', a base ao lado dela)
+        origem: Lançamentos (ver ler_lancamentos)
+
+    Returns:
+        dict: alterados, ja_no_estado e nao_encontrados (listas de números)
+    """
+    lancamentos = ler_lancamentos(origem)
+    colunas = [COLUNA_NUMERO, COLUNA_PAGAMENTO, COLUNA_VALOR_PAGO] + COLUNAS_AGREGADOS
+
+    if base_contas.usar_sqlite():
+        banco = base_contas.garantir_base(caminho_planilha)
+        with agregados_contas.alteracao(caminho_planilha) as mudancas:
+            livro = base_contas.ler_colunas(banco, colunas)
+            alteracoes, resumo = calcular_baixas(livro, lancamentos, pago, data_padrao)
+            base_contas.atualizar_por_id(banco, alteracoes)
+            _alteracoes_nos_agregados(mudancas, livro, alteracoes)
+        return resumo
+
+    if not os.path.exists(caminho_planilha):
+        return _resumo(lancamentos, [], [])
+    with agregados_contas.alteracao(caminho_planilha) as mudancas, planilha_xlsx.trava(caminho_planilha):
+        wb, ws, cabecalho = planilha_xlsx.abrir(caminho_planilha)
+        if COLUNA_NUMERO not in cabecalho or COLUNA_PAGAMENTO not in cabecalho:
+            return _resumo(lancamentos, [], [])
+        livro = planilha_xlsx.tabela(ws, cabecalho, colunas)
+        alteracoes, resumo = calcular_baixas(livro, lancamentos, pago, data_padrao)
+        if len(alteracoes):
+            # Só as células das linhas alteradas são regravadas
+            planilha_xlsx.gravar_celulas(
+                ws, cabecalho, COLUNA_PAGAMENTO,
+                alteracoes[COLUNA_PAGAMENTO].map(_data_para_planilha).to_dict(),
+                formato_de='Dt. Vencimento',
+            )
+            if COLUNA_VALOR_PAGO in alteracoes.columns and COLUNA_VALOR_PAGO in cabecalho:
+                planilha_xlsx.gravar_celulas(ws, cabecalho, COLUNA_VALOR_PAGO, alteracoes[COLUNA_VALOR_PAGO].to_dict())
+            else:
+                alteracoes = alteracoes.drop(columns=[COLUNA_VALOR_PAGO], errors='ignore')
+            planilha_xlsx.salvar(wb, caminho_planilha)
+            _alteracoes_nos_agregados(mudancas, livro, alteracoes)
+    return resumo
+
+
+def excluir(caminho_planilha, origem):
+    """
+    Exclui do livro oficial os títulos informados (todas as linhas com o mesmo Número).
+
+    As chaves desses títulos saem também do índice de boletos lançados.
+
+    Returns:
+        dict: excluidos (linhas removidas), alterados e nao_encontrados (listas de números)
+    """
+    lancamentos = ler_lancamentos(origem)
+
+    if base_contas.usar_sqlite():
+        banco = base_contas.garantir_base(caminho_planilha)
+        with agregados_contas.alteracao(caminho_planilha) as mudancas:
+            livro = base_contas.ler_colunas(banco, list(base_contas.COLUNAS_SQL))
+            remover = chaves_numero(livro[COLUNA_NUMERO]).set_axis(livro.index).isin(lancamentos['chave'])
+            base_contas.excluir_por_id(banco, livro.index[remover])
+            mudancas.remover(livro[remover])
+    else:
+        if not os.path.exists(caminho_planilha):
+            return {'excluidos': 0, **_resumo(lancamentos, [], [])}
+        with agregados_contas.alteracao(caminho_planilha) as mudancas, planilha_xlsx.trava(caminho_planilha):
+            livro = pd.read_excel(caminho_planilha, dtype={COLUNA_NUMERO: object})
+            remover = chaves_numero(livro[COLUNA_NUMERO]).set_axis(livro.index).isin(lancamentos['chave'])
+            if remover.any():
+                planilha_xlsx.gravar_dataframe(livro[~remover], caminho_planilha)
+                mudancas.remover(livro[remover])
+
+    chaves_removidas = chaves_numero(livro.loc[remover, COLUNA_NUMERO]).unique()
+    # Fora da trava da planilha: o boleto excluído pode voltar a ser lançado
+    indice_boletos.remover(caminho_planilha, livro[remover], livro[~remover])
+    return {'excluidos': int(remover.sum()), **_resumo(lancamentos, chaves_removidas, [])}
+
+
+def imprimir_resumo(resumo, acao):
+    print(f"✓ {len(resumo['alterados'])} título(s) {acao}")
+    if resumo.get('ja_no_estado'):
+        print(f"   {len(resumo['ja_no_estado'])} já estavam nesse estado: {', '.join(resumo['ja_no_estado'][:20])}")
+    if resumo['nao_encontrados']:
+        print(f"⚠️  {len(resumo['nao_encontrados'])} não encontrado(s): {', '.join(resumo['nao_encontrados'][:20])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Baixa, reabertura e exclusão de títulos em lote - Fusion Tech")
+    parser.add_argument('comando', choices=['pagar', 'reabrir', 'excluir'])
+    parser.add_argument('entrada', nargs='+', help="Arquivo CSV ou números dos títulos")
+    parser.add_argument('--planilha', default=ARQUIVO_EXCEL, help="Planilha do livro (padrão: a da automação)")
+    parser.add_argument('--data', help="Data de pagamento para lançamentos sem data (padrão: hoje)")
+    args = parser.parse_args(argv)
+
+    origem = args.entrada[0] if len(args.entrada) == 1 and args.entrada[0].lower().endswith('.csv') else args.entrada
+    try:
+        if args.comando == 'excluir':
+            resumo = excluir(args.planilha, origem)
+            imprimir_resumo(resumo, f"excluído(s) ({resumo['excluidos']} linha(s))")
+            return
+        data_padrao = pd.to_datetime(args.data, dayfirst='/' in args.data) if args.data else None
+        resumo = baixar(args.planilha, origem, pago=args.comando == 'pagar', data_padrao=data_padrao)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    imprimir_resumo(resumo, 'pago(s)' if args.comando == 'pagar' else 'reaberto(s)')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""
+Base de Contas a Pagar (SQLite) - Fusion Tech
+Livro de contas a pagar em SQLite (biblioteca padrão), com as colunas de
+COLUNAS_PADRAO e índices em Número, Dt. Vencimento, Dt. Pagamento e
+Fornecedor.
+
+Com BACKEND_CONTAS = 'sqlite' (config.py) a base passa a ser o registro
+oficial: inclusões, baixas de pagamento e exclusões alteram só as linhas
+envolvidas, sem reler e regravar a planilha inteira. Cada planilha tem a
+sua base ao lado, com o mesmo nome e extensão .sqlite3; na primeira
+utilização a planilha existente é importada uma única vez. A planilha xlsx
+vira uma exportação sob demanda.
+
+Cada gravação incrementa, na mesma transação, o contador de versão da base
+(tabela estado): quem leu a base sabe se outro processo gravou depois.
+
+Para executar:
+    python codigo/base_contas.py importar dados/contasapagar_1.xlsx
+    python codigo/base_contas.py exportar dados/contasapagar_1.xlsx
+"""
+
+import argparse
+import os
+import sqlite3
+
+import pandas as pd
+
+import esquema_contas
+import planilha_xlsx
+from esquema_contas import COLUNAS_DATA, COLUNAS_NUMERICAS, COLUNAS_OPCIONAIS, COLUNAS_PADRAO
+
+BACKEND_XLSX = 'xlsx'
+BACKEND_SQLITE = 'sqlite'
+
+try:
+    from config import BACKEND_CONTAS
+except ImportError:
+    BACKEND_CONTAS = BACKEND_XLSX
+
+# Coluna da planilha -> coluna da tabela
+COLUNAS_SQL = {
+    'Número': 'numero',
+    'Fornecedor': 'fornecedor',
+    'Plano de contas': 'plano_contas',
+    'Histórico': 'historico',
+    'Dt. Emissão': 'dt_emissao',
+    'Dt. Vencimento': 'dt_vencimento',
+    'Dt. Pagamento': 'dt_pagamento',
+    'Vr. Título': 'vr_titulo',
+    'Vr. Dev/Pag': 'vr_dev_pag',
+    'Valor Total a Pagar': 'valor_total',
+    'Forma de Pgto.': 'forma_pgto',
+}
+
+_TIPOS_SQL = {coluna: 'REAL' for coluna in COLUNAS_NUMERICAS}
+_INDICES = {
+    'idx_contas_numero': 'numero',
+    'idx_contas_vencimento': 'dt_vencimento',
+    'idx_contas_pagamento': 'dt_pagamento',
+    'idx_contas_fornecedor': 'fornecedor',
+}
+
+_bases_preparadas = set()
+
+
+def usar_sqlite():
+    return BACKEND_CONTAS == BACKEND_SQLITE
+
+
+def caminho_base(caminho_xlsx):
+    """Base SQLite correspondente à planilha (mesmo nome, extensão .sqlite3)."""
+    return os.path.splitext(str(caminho_xlsx))[0] + '.sqlite3'
+
+
+def conectar(caminho_banco):
+    """Abre a base, criando a tabela e os índices na primeira vez."""
+    conexao = sqlite3.connect(caminho_banco, timeout=30)
+    if caminho_banco not in _bases_preparadas:
+        definicoes = ', '.join(
+            f"{sql} {_TIPOS_SQL.get(coluna, 'TEXT')}" for coluna, sql in COLUNAS_SQL.items()
+        )
+        with conexao:
+            conexao.execute(f"CREATE TABLE IF NOT EXISTS contas (id INTEGER PRIMARY KEY, {definicoes})")
+            for indice, coluna in _INDICES.items():
+                conexao.execute(f"CREATE INDEX IF NOT EXISTS {indice} ON contas ({coluna})")
+            conexao.execute("CREATE TABLE IF NOT EXISTS estado (nome TEXT PRIMARY KEY, valor INTEGER)")
+        _bases_preparadas.add(caminho_banco)
+    return conexao
+
+
+def _versao(conexao):
+    linha = conexao.execute("SELECT valor FROM estado WHERE nome = 'versao'").fetchone()
+    return linha[0] if linha else 0
+
+
+def _incrementar_versao(conexao):
+    """Mais uma gravação na base (chamar dentro da transação da gravação)."""
+    conexao.execute(
+        "INSERT INTO estado VALUES ('versao', 1) ON CONFLICT (nome) DO UPDATE SET valor = valor + 1"
+    )
+
+
+def versao_base(caminho_banco):
+    """Contador de gravações da base (0 se nada foi gravado)."""
+    conexao = conectar(caminho_banco)
+    try:
+        return _versao(conexao)
+    finally:
+        conexao.close()
+
+
+def _texto_numero(valor):
+    """Número como texto: 51, 51.0 e '51' viram '51'; '000052' é mantido."""
+    if pd.isna(valor):
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor).strip() or None
+
+
+def _texto_data(valor):
+    data = pd.to_datetime(valor, errors='coerce', dayfirst=isinstance(valor, str) and '/' in valor)
+    return None if pd.isna(data) else data.strftime('%Y-%m-%d')
+
+
+def _valor_sql(coluna, valor):
+    if coluna == 'Número':
+        return _texto_numero(valor)
+    if coluna in COLUNAS_DATA:
+        return _texto_data(valor)
+    if coluna in COLUNAS_NUMERICAS:
+        numero = pd.to_numeric(valor, errors='coerce')
+        return None if pd.isna(numero) else float(numero)
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return None
+    texto = str(valor)
+    return texto if texto.strip() else None
+
+
+def _tuplas(linhas):
+    """Converte registros (dicts ou DataFrame) nas tuplas do INSERT."""
+    if isinstance(linhas, pd.DataFrame):
+        linhas = linhas.to_dict('records')
+    return [
+        tuple(_valor_sql(coluna, linha.get(coluna)) for coluna in COLUNAS_PADRAO)
+        for linha in linhas
+    ]
+
+
+def _placeholders(quantidade):
+    return ', '.join('?' * quantidade)
+
+
+def ler_contas(caminho_banco, manter_opcionais_vazias=True):
+    """
+    Lê a base inteira no formato da planilha.
+
+    Args:
+        manter_opcionais_vazias: Se False, as COLUNAS_OPCIONAIS sem nenhum
+            valor são omitidas (mesmo formato da planilha histórica)
+
+    Returns:
+        pd.DataFrame: Colunas de COLUNAS_PADRAO, com os tipos de esquema_contas
+    """
+    return ler_contas_com_versao(caminho_banco, manter_opcionais_vazias)[0]
+
+
+def ler_contas_com_versao(caminho_banco, manter_opcionais_vazias=True):
+    """
+    ler_contas() junto com a versão exata do conteúdo lido.
+
+    Returns:
+        tuple: (DataFrame, versão)
+    """
+    conexao = conectar(caminho_banco)
+    try:
+        # Versão e linhas na mesma transação de leitura
+        conexao.execute("BEGIN")
+        versao = _versao(conexao)
+        colunas = ', '.join(f'{sql} AS "{coluna}"' for coluna, sql in COLUNAS_SQL.items())
+        df = pd.read_sql_query(f"SELECT {colunas} FROM contas ORDER BY id", conexao)
+    finally:
+        conexao.close()
+    df = esquema_contas.tipar(df)
+    if not manter_opcionais_vazias:
+        df = df.drop(columns=[coluna for coluna in COLUNAS_OPCIONAIS if df[coluna].isna().all()])
+    return df, versao
+
+
+def ler_numeros(caminho_banco):
+    """Coluna Número da base (para gerar o próximo número sem ler as demais)."""
+    conexao = conectar(caminho_banco)
+    try:
+        return [linha[0] for linha in conexao.execute("SELECT numero FROM contas ORDER BY id")]
+    finally:
+        conexao.close()
+
+
+def inserir_contas(caminho_banco, linhas):
+    """Acrescenta registros (lista de dicts ou DataFrame). Retorna quantos entraram."""
+    tuplas = _tuplas(linhas)
+    if not tuplas:
+        return 0
+    colunas = ', '.join(COLUNAS_SQL.values())
+    conexao = conectar(caminho_banco)
+    try:
+        with conexao:
+            conexao.executemany(
+                f"INSERT INTO contas ({colunas}) VALUES ({_placeholders(len(COLUNAS_SQL))})", tuplas
+            )
+            _incrementar_versao(conexao)
+    finally:
+        conexao.close()
+    return len(tuplas)
+
+
+def substituir_contas(caminho_banco, df, versao=None):
+    """
+    Troca todo o conteúdo da base pelo DataFrame, em uma única transação.
+
+    Args:
+        versao: Versão lida (ler_contas_com_versao). Se informada, a troca é
+            recusada com planilha_xlsx.ConflitoDeVersao quando outro processo
+            gravou na base depois da leitura
+
+    Raises:
+        planilha_xlsx.ConflitoDeVersao: A base não está mais na versão informada
+    """
+    colunas = ', '.join(COLUNAS_SQL.values())
+    conexao = conectar(caminho_banco)
+    try:
+        with conexao:
+            # Trava de escrita antes de conferir: nada grava entre a conferência e a troca
+            conexao.execute("BEGIN IMMEDIATE")
+            if versao is not None and _versao(conexao) != versao:
+                raise planilha_xlsx.ConflitoDeVersao(
+                    f"{os.path.basename(str(caminho_banco))} foi alterada por outro processo desde a leitura"
+                )
+            conexao.execute("DELETE FROM contas")
+            conexao.executemany(
+                f"INSERT INTO contas ({colunas}) VALUES ({_placeholders(len(COLUNAS_SQL))})", _tuplas(df)
+            )
+            _incrementar_versao(conexao)
+    finally:
+        conexao.close()
+
+
+def ler_colunas(caminho_banco, colunas):
+    """Colunas da planilha informadas, indexadas pelo id da linha na base."""
+    conexao = conectar(caminho_banco)
+    try:
+        selecao = ', '.join(f'{COLUNAS_SQL[coluna]} AS "{coluna}"' for coluna in colunas)
+        df = pd.read_sql_query(f"SELECT id, {selecao} FROM contas ORDER BY id", conexao, index_col='id')
+    finally:
+        conexao.close()
+    for coluna in colunas:
+        if coluna in COLUNAS_DATA:
+            df[coluna] = pd.to_datetime(df[coluna], errors='coerce')
+    return df
+
+
+def atualizar_por_id(caminho_banco, alteracoes):
+    """
+    Grava os valores novos das linhas alteradas (DataFrame indexado pelo id,
+    colunas no formato da planilha), em uma única transação.
+
+    Returns:
+        int: Linhas alteradas
+    """
+    if alteracoes.empty:
+        return 0
+    colunas = list(alteracoes.columns)
+    atribuicoes = ', '.join(f"{COLUNAS_SQL[coluna]} = ?" for coluna in colunas)
+    parametros = [
+        (*(_valor_sql(coluna, valor) for coluna, valor in zip(colunas, linha)), int(id_linha))
+        for id_linha, linha in zip(alteracoes.index, alteracoes.itertuples(index=False))
+    ]
+    conexao = conectar(caminho_banco)
+    try:
+        with conexao:
+            conexao.executemany(f"UPDATE contas SET {atribuicoes} WHERE id = ?", parametros)
+            _incrementar_versao(conexao)
+    finally:
+        conexao.close()
+    return len(parametros)
+
+
+def excluir_por_id(caminho_banco, ids):
+    """Remove as linhas com os ids informados. Retorna quantas saíram."""
+    ids = [(int(id_linha),) for id_linha in ids]
+    if not ids:
+        return 0
+    conexao = conectar(caminho_banco)
+    try:
+        with conexao:
+            conexao.executemany("DELETE FROM contas WHERE id = ?", ids)
+            _incrementar_versao(conexao)
+    finally:
+        conexao.close()
+    return len(ids)
+
+
+def contar(caminho_banco):
+    conexao = conectar(caminho_banco)
+    try:
+        return conexao.execute("SELECT COUNT(*) FROM contas").fetchone()[0]
+    finally:
+        conexao.close()
+
+
+def importar_xlsx(caminho_xlsx, caminho_banco=None, substituir=False):
+    """
+    Carga inicial da base a partir de uma planilha existente.
+
+    Recusa importar sobre uma base que já tem registros, salvo com substituir=True.
+
+    Returns:
+        int: Registros importados
+    """
+    caminho_banco = caminho_banco or caminho_base(caminho_xlsx)
+    if not substituir and os.path.exists(caminho_banco) and contar(caminho_banco) > 0:
+        raise ValueError(f"A base {caminho_banco} já tem registros (use --substituir para sobrescrever)")
+    df = pd.read_excel(caminho_xlsx)
+    substituir_contas(caminho_banco, df)
+    return len(df)
+
+
+def exportar_xlsx(caminho_xlsx, caminho_banco=None):
+    """Gera a planilha a partir da base. Retorna quantos registros foram exportados."""
+    caminho_banco = caminho_banco or caminho_base(caminho_xlsx)
+    df = ler_contas(caminho_banco)
+    with planilha_xlsx.trava(caminho_xlsx):
+        planilha_xlsx.gravar_dataframe(df, caminho_xlsx)
+    return len(df)
+
+
+def garantir_base(caminho_xlsx):
+    """
+    Base da planilha, importando a planilha na primeira utilização.
+
+    Returns:
+        str: Caminho da base SQLite
+    """
+    caminho_banco = caminho_base(caminho_xlsx)
+    if not os.path.exists(caminho_banco):
+        if os.path.exists(caminho_xlsx):
+            total = importar_xlsx(caminho_xlsx, caminho_banco)
+            print(f"✓ Planilha importada para a base SQLite: {total} registro(s) em {caminho_banco}")
+        else:
+            conectar(caminho_banco).close()
+    return caminho_banco
+
+
+def livro_na_base(caminho_xlsx):
+    """True se o livro oficial da planilha é a base SQLite (em uso e já criada)."""
+    return usar_sqlite() and os.path.exists(caminho_base(caminho_xlsx))
+
+
+def versao_livro(caminho_xlsx):
+    """
+    Versão do livro oficial da planilha, para saber se ele mudou.
+
+    Returns:
+        list: Versão da planilha ou, com a base SQLite, o contador de
+            gravações da base (None se o livro não existe)
+    """
+    if livro_na_base(caminho_xlsx):
+        return [BACKEND_SQLITE, versao_base(caminho_base(caminho_xlsx))]
+    atual = planilha_xlsx.versao(caminho_xlsx)
+    return list(atual) if atual else None
+
+
+def ler_livro(caminho_xlsx, manter_opcionais_vazias=False):
+    """
+    Livro oficial inteiro (a base SQLite, se em uso e já criada, ou a planilha).
+
+    Args:
+        manter_opcionais_vazias: Como em ler_contas() (só vale para a base)
+
+    Returns:
+        tuple: (DataFrame com os tipos de esquema_contas, versão lida)
+    """
+    if livro_na_base(caminho_xlsx):
+        livro, versao = ler_contas_com_versao(caminho_base(caminho_xlsx), manter_opcionais_vazias)
+        return livro, [BACKEND_SQLITE, versao]
+    livro, versao = planilha_xlsx.ler_com_versao(caminho_xlsx, dtype=esquema_contas.TIPOS_LEITURA)
+    return esquema_contas.tipar(livro), list(versao)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Base SQLite de contas a pagar - Fusion Tech")
+    parser.add_argument('comando', choices=['importar', 'exportar'])
+    parser.add_argument('planilha', help="Planilha xlsx de origem (importar) ou destino (exportar)")
+    parser.add_argument('--base', help="Base SQLite (padrão: mesmo nome da planilha, extensão .sqlite3)")
+    parser.add_argument('--substituir', action='store_true', help="Importa mesmo se a base já tiver registros")
+    args = parser.parse_args(argv)
+
+    caminho_banco = args.base or caminho_base(args.planilha)
+    if args.comando == 'importar':
+        try:
+            total = importar_xlsx(args.planilha, caminho_banco, args.substituir)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        print(f"✓ {total} registro(s) importado(s) para {caminho_banco}")
+    else:
+        total = exportar_xlsx(args.planilha, caminho_banco)
+        print(f"✓ {total} registro(s) exportado(s) para {args.planilha}")
+
+
+if __name__ == "__main__":
+    main()
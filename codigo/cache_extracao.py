@@ -0,0 +1,133 @@
+"""
+Cache de Extração - Fusion Tech
+Cache persistente dos campos extraídos de cada PDF, endereçado pelo
+SHA-256 dos bytes do arquivo.
+
+Reenvios do mesmo boleto (pelo dashboard ou por nova execução da
+automação) reaproveitam os campos já extraídos e não passam pelo
+pdfplumber. Cada entrada guarda a versão do extrator: ao mudar os padrões
+de extracao_campos, as entradas antigas deixam de valer e são removidas.
+O tamanho é limitado por MAX_ENTRADAS, com descarte LRU.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from extracao_campos import VERSAO_EXTRATOR
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DIRETORIO_DADOS = os.path.join(os.path.dirname(BASE_DIR), 'dados')
+ARQUIVO_CACHE = os.path.join(DIRETORIO_DADOS, 'cache_extracao.sqlite3')
+
+MAX_ENTRADAS = 10000
+TAMANHO_BLOCO = 1024 * 1024
+
+# Desligado, obter() sempre erra e gravar() não persiste (ex.: benchmarks)
+HABILITADO = True
+
+_caches_preparados = set()
+
+
+def hash_arquivo(caminho):
+    """Calcula o SHA-256 do conteúdo do arquivo."""
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(TAMANHO_BLOCO), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def _conectar(caminho_cache):
+    conexao = sqlite3.connect(caminho_cache, timeout=30)
+    if caminho_cache not in _caches_preparados:
+        with conexao:
+            conexao.execute("""
+                CREATE TABLE IF NOT EXISTS extracoes (
+                    hash TEXT NOT NULL,
+                    variante TEXT NOT NULL,
+                    versao TEXT NOT NULL,
+                    campos TEXT NOT NULL,
+                    ultimo_acesso REAL NOT NULL,
+                    PRIMARY KEY (hash, variante)
+                )
+            """)
+            conexao.execute(
+                "CREATE INDEX IF NOT EXISTS idx_extracoes_acesso ON extracoes (ultimo_acesso)"
+            )
+            # Entradas de versões anteriores do extrator não valem mais
+            conexao.execute("DELETE FROM extracoes WHERE versao != ?", (VERSAO_EXTRATOR,))
+        _caches_preparados.add(caminho_cache)
+    return conexao
+
+
+def obter(chave, variante, caminho_cache=ARQUIVO_CACHE):
+    """
+    Busca os campos extraídos de um PDF já visto.
+
+    Returns:
+        dict | None: Campos extraídos ou None se não estiver em cache
+    """
+    if not HABILITADO or not os.path.exists(caminho_cache):
+        return None
+    try:
+        conexao = _conectar(caminho_cache)
+        try:
+            with conexao:
+                linha = conexao.execute(
+                    "SELECT campos FROM extracoes WHERE hash = ? AND variante = ? AND versao = ?",
+                    (chave, variante, VERSAO_EXTRATOR),
+                ).fetchone()
+                if linha is None:
+                    return None
+                conexao.execute(
+                    "UPDATE extracoes SET ultimo_acesso = ? WHERE hash = ? AND variante = ?",
+                    (time.time(), chave, variante),
+                )
+            return json.loads(linha[0])
+        finally:
+            conexao.close()
+    except sqlite3.Error:
+        # Cache indisponível não impede o processamento
+        return None
+
+
+def gravar(chave, variante, campos, caminho_cache=ARQUIVO_CACHE, max_entradas=MAX_ENTRADAS):
+    """Guarda os campos extraídos e descarta as entradas menos usadas acima do limite."""
+    if not HABILITADO:
+        return
+    try:
+        os.makedirs(os.path.dirname(caminho_cache), exist_ok=True)
+        conexao = _conectar(caminho_cache)
+        try:
+            with conexao:
+                conexao.execute(
+                    "INSERT OR REPLACE INTO extracoes (hash, variante, versao, campos, ultimo_acesso) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (chave, variante, VERSAO_EXTRATOR, json.dumps(campos, ensure_ascii=False), time.time()),
+                )
+                total = conexao.execute("SELECT COUNT(*) FROM extracoes").fetchone()[0]
+                if total > max_entradas:
+                    conexao.execute(
+                        "DELETE FROM extracoes WHERE rowid IN ("
+                        "SELECT rowid FROM extracoes ORDER BY ultimo_acesso ASC LIMIT ?)",
+                        (total - max_entradas,),
+                    )
+        finally:
+            conexao.close()
+    except sqlite3.Error:
+        pass
+
+
+def limpar(caminho_cache=ARQUIVO_CACHE):
+    """Remove todas as entradas do cache. Retorna quantas foram removidas."""
+    if not os.path.exists(caminho_cache):
+        return 0
+    conexao = _conectar(caminho_cache)
+    try:
+        with conexao:
+            return conexao.execute("DELETE FROM extracoes").rowcount
+    finally:
+        conexao.close()
@@ -0,0 +1,163 @@
+"""
+Cubo Mensal do Livro de Contas - Fusion Tech
+Contagens e somas de Vr. Título e Vr. Dev/Pag por mês de vencimento,
+fornecedor, forma de pagamento e status (pago / vencido / a vencer).
+
+O cubo é materializado nos agregados do livro (agregados_contas, tabela
+cubo), que refazem só os meses tocados por cada gravação ou pela virada
+do dia. Aqui ele é carregado em memória com as dimensões como códigos
+inteiros (numpy), e os recortes e totais (fatiar / somar / cruzar) não
+voltam nem ao livro nem à base: custam frações de milissegundo.
+
+Para executar:
+    python codigo/cubo_contas.py dados/contasapagar_1.xlsx --por mes status
+    python codigo/cubo_contas.py dados/contasapagar_1.xlsx --por fornecedor --de 2025-01 --ate 2025-03
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import agregados_contas
+
+DIMENSOES = ['mes', 'fornecedor', 'forma', 'status']
+# Na ordem e com as cores usadas nos gráficos
+STATUS = [agregados_contas.PAGO, agregados_contas.VENCIDO, agregados_contas.A_VENCER]
+CORES_STATUS = {agregados_contas.PAGO: '#2ecc71', agregados_contas.VENCIDO: '#e74c3c', agregados_contas.A_VENCER: '#f39c12'}
+SEM_VENCIMENTO = agregados_contas.SEM_VALOR
+
+
+def _mes(valor):
+    return pd.Period(valor, freq='M').strftime('%Y-%m')
+
+
+class Cubo:
+    """Cubo mensal em memória (ver carregar())."""
+
+    def __init__(self, linhas):
+        """
+        Args:
+            linhas: DataFrame de agregados_contas.ler_cubo()
+        """
+        self._rotulos = {}
+        self._codigos = {}
+        for dimensao in DIMENSOES:
+            codigos, rotulos = pd.factorize(linhas[dimensao], sort=True)
+            self._codigos[dimensao] = codigos
+            self._rotulos[dimensao] = np.asarray(rotulos, dtype=object)
+        self._medidas = {medida: linhas[medida].to_numpy(dtype=np.int64) for medida in agregados_contas.MEDIDAS}
+
+    def __len__(self):
+        return len(self._medidas['linhas'])
+
+    def rotulos(self, dimensao):
+        """Valores da dimensão presentes no cubo (meses em ordem cronológica)."""
+        presentes = np.unique(self._codigos[dimensao])
+        return list(self._rotulos[dimensao][presentes])
+
+    def fatiar(self, de=None, ate=None, **filtros):
+        """
+        Recorte do cubo.
+
+        Args:
+            de, ate: Meses de vencimento ('AAAA-MM', inclusive); com um
+                deles, as contas sem vencimento ficam de fora
+            **filtros: dimensão=valor ou lista de valores (ex.: status='vencido')
+
+        Returns:
+            Cubo: Só as células do recorte
+        """
+        mascara = np.ones(len(self), dtype=bool)
+        if de is not None or ate is not None:
+            meses = self._rotulos['mes']
+            aceitos = meses != SEM_VENCIMENTO
+            if de is not None:
+                aceitos &= meses >= _mes(de)
+            if ate is not None:
+                aceitos &= meses <= _mes(ate)
+            mascara &= aceitos[self._codigos['mes']]
+        for dimensao, valores in filtros.items():
+            if dimensao not in DIMENSOES:
+                raise ValueError(f"Dimensão desconhecida: {dimensao}")
+            valores = [valores] if isinstance(valores, str) else list(valores)
+            mascara &= np.isin(self._rotulos[dimensao], valores)[self._codigos[dimensao]]
+
+        recorte = object.__new__(Cubo)
+        recorte._rotulos = self._rotulos
+        recorte._codigos = {dimensao: codigos[mascara] for dimensao, codigos in self._codigos.items()}
+        recorte._medidas = {medida: valores[mascara] for medida, valores in self._medidas.items()}
+        return recorte
+
+    def somar(self, *por):
+        """
+        Totais por dimensões (roll-up).
+
+        Args:
+            *por: Dimensões do agrupamento (nenhuma: total geral)
+
+        Returns:
+            DataFrame indexado pelas dimensões com linhas, titulo e pago
+            (R$), em ordem das chaves; sem dimensões, uma Series
+        """
+        if not por:
+            return pd.Series({
+                'linhas': int(self._medidas['linhas'].sum()),
+                'titulo': self._medidas['titulo_centavos'].sum() / 100,
+                'pago': self._medidas['pago_centavos'].sum() / 100,
+            })
+        for dimensao in por:
+            if dimensao not in DIMENSOES:
+                raise ValueError(f"Dimensão desconhecida: {dimensao}")
+        tamanhos = [len(self._rotulos[dimensao]) for dimensao in por]
+        chave = np.ravel_multi_index([self._codigos[dimensao] for dimensao in por], tamanhos)
+        chaves, grupo = np.unique(chave, return_inverse=True)
+
+        def total(medida):
+            return np.bincount(grupo, weights=self._medidas[medida], minlength=len(chaves))
+
+        codigos = np.unravel_index(chaves, tamanhos)
+        if len(por) == 1:
+            indice = pd.Index(self._rotulos[por[0]][codigos[0]], name=por[0])
+        else:
+            # Níveis já únicos e ordenados: sem fatorar de novo
+            indice = pd.MultiIndex(
+                levels=[self._rotulos[dimensao] for dimensao in por], codes=codigos,
+                names=list(por), verify_integrity=False,
+            ).remove_unused_levels()
+        return pd.DataFrame({
+            'linhas': total('linhas').astype(np.int64),
+            'titulo': total('titulo_centavos') / 100,
+            'pago': total('pago_centavos') / 100,
+        }, index=indice)
+
+    def cruzar(self, linhas, colunas, medida='linhas'):
+        """Tabela `linhas` x `colunas` de uma medida (zeros onde não há contas)."""
+        return self.somar(linhas, colunas)[medida].unstack(fill_value=0)
+
+
+def carregar(caminho_planilha):
+    """Cubo do livro com o status de hoje (ver agregados_contas.ler_cubo)."""
+    return Cubo(agregados_contas.ler_cubo(caminho_planilha))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cubo mensal do livro de contas - Fusion Tech")
+    parser.add_argument('planilha', help="Planilha do livro")
+    parser.add_argument('--por', nargs='+', choices=DIMENSOES, default=['mes'], help="Dimensões do total")
+    parser.add_argument('--de', metavar='AAAA-MM', help="Primeiro mês de vencimento")
+    parser.add_argument('--ate', metavar='AAAA-MM', help="Último mês de vencimento")
+    args = parser.parse_args(argv)
+
+    cubo = carregar(args.planilha).fatiar(args.de, args.ate)
+    if not len(cubo):
+        print("⚠️  Nenhuma conta no período escolhido.")
+        return
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(cubo.somar(*args.por).to_string(float_format=lambda valor: f"{valor:,.2f}"))
+    total = cubo.somar()
+    print(f"\nTotal: {total['linhas']:.0f} conta(s) | títulos R$ {total['titulo']:,.2f} | pago R$ {total['pago']:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,10 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 import os
 import sys
-import re
-import pdfplumber
 
 # ---------------------------------------------------------------------------
 # Configuração de caminhos absolutos
@@ -27,189 +26,57 @@ PROJETO_RAIZ = BASE_DIR.parent
 DIRETORIO_DADOS = PROJETO_RAIZ / "dados"
 
 # ---------------------------------------------------------------------------
-# Funções de extração de boletos (embutidas e melhoradas)
+# Funções de extração de boletos (motor compartilhado em extracao_campos)
 # ---------------------------------------------------------------------------
 
+import agregados_contas
+import baixas_contas
+import base_contas
+import esquema_contas
+import extracao_campos
+import fornecedores_contas
+import diario_lancamentos
+import indice_boletos
+import leitura_pdf
+import medicao_etapas
+import planilha_xlsx
+import sequencia_numeros
+from extracao_campos import FORNECEDOR_NAO_IDENTIFICADO, VARIANTE_DASHBOARD
+from medicao_etapas import etapa
+
 def extrair_valor_melhorado(texto):
     """Extrai o valor do boleto - VERSÃO MELHORADA para múltiplos formatos"""
-    padroes = [
-        # ALTA PRIORIDADE: Valor líquido final (evita valores de tabelas)
-        r'VALOR\s+L.QUIDO\s+R\$\s*\n?\s*([\d.,]+)',  # Braspress - valor final (aceita quebra de linha)
-        # Safra - formato com R$ antes: "(=) Valor do Documento\n01 R$ 1.217,77"
-        r'\(=\)\s*Valor\s+do\s+Documento\s*\n.*?R\$\s*([\d.,]+)',  # Safra com R$
-        r'\(=\)\s*Valor\s+do\s+Documento\s*\n\s*([\d.,]+)',  # Safra - linha abaixo
-        r'Valor\s+do\s+Documento\s*\n.*?R\$\s*([\d.,]+)',  # Safra alternativo com R$
-        r'Valor\s+do\s+Documento\s*\n\s*([\d.,]+)',  # Safra alternativo
-        # MÉDIA PRIORIDADE: Padrões específicos
-        r'\(=\)\s*Valor\s+do\s+Doc[.:]\s+([\d.,]+)',  # Boletos padrão
-        r'Valor\s+do\s+Documento[:\s]*([\d.,]+)',  # Mesmo nível
-        r'Valor\s+do\s+Doc[.:]\s*([\d.,]+)',
-        r'Documento\s*\n\s*([\d.,]+)',  # Valor sozinho após "Documento"
-        # BAIXA PRIORIDADE: Braspress tabular
-        r'^([\d]+,\d{2})\s+DM',  # Braspress tabela (pode ser subtotal)
-        r'^\s*([\d.]+,\d{2})\s*$',  # Valor sozinho na linha
-    ]
-
-    # Tentar padrões em ordem de prioridade e retornar o primeiro válido
-    for padrao in padroes:
-        matches = re.findall(padrao, texto, re.IGNORECASE | re.MULTILINE)
-        for match in matches:
-            valor_str = match.strip().replace('.', '').replace(',', '.')
-            try:
-                valor = float(valor_str)
-                # Validar valor razoável
-                if 10 <= valor <= 1000000:
-                    return valor  # Retorna o primeiro valor válido encontrado
-            except:
-                continue
-
-    return None
+    return extracao_campos.extrair_valor(texto, VARIANTE_DASHBOARD)
 
 def extrair_data_emissao_melhorado(texto):
     """Extrai a data de emissão do boleto"""
-    # Padrões comuns para data de emissão
-    padroes = [
-        # Safra - formato: "Data Documento Vencimento ... 11/06/2025 11/08/2025" (primeira data)
-        r'Data\s+Documento\s+Vencimento.*?\n.*?\n(\d{2}/\d{2}/\d{4})',
-        # Safra - formato: "Data do Documento ... 11/06/2025"
-        r'Data\s+do\s+Documento[^\n]*\n\s*(\d{2}/\d{2}/\d{4})',
-        # Braspress - formato: "Emissão: 14 de Outubro de 2025"
-        r'Emiss[ãa]o:\s+(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})',
-        # Formato genérico: Data de Emissão / Data Documento
-        r'Data\s+(?:de\s+)?Emiss[ãa]o[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})',
-        r'Data\s+Documento[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})',
-    ]
-
-    meses = {
-        'janeiro': '01', 'fevereiro': '02', 'março': '03', 'marco': '03',
-        'abril': '04', 'maio': '05', 'junho': '06',
-        'julho': '07', 'agosto': '08', 'setembro': '09',
-        'outubro': '10', 'novembro': '11', 'dezembro': '12'
-    }
-
-    for padrao in padroes:
-        match = re.search(padrao, texto, re.IGNORECASE | re.MULTILINE)
-        if match:
-            try:
-                grupos = match.groups()
-                if len(grupos) == 1:
-                    # Data completa DD/MM/YYYY
-                    return grupos[0]
-                elif len(grupos) == 3:
-                    # Pode ser formato por extenso ou DD MM YYYY
-                    if grupos[1].lower() in meses:
-                        # Formato por extenso: "14 de Outubro de 2025"
-                        dia = grupos[0].zfill(2)
-                        mes = meses[grupos[1].lower()]
-                        ano = grupos[2]
-                        return f"{dia}/{mes}/{ano}"
-                    else:
-                        # Formato separado DD MM YYYY
-                        dia, mes, ano = grupos
-                        return f"{dia}/{mes}/{ano}"
-            except:
-                continue
-    return None
+    return extracao_campos.extrair_data_emissao(texto)
 
 def extrair_vencimento_melhorado(texto):
     """Extrai data de vencimento - VERSÃO MELHORADA"""
-    padroes = [
-        # Safra - formato: "Data Documento Vencimento ... 11/06/2025 11/08/2025" (pega a segunda data)
-        r'Data\s+Documento\s+Vencimento.*?\n.*?\n\d{2}/\d{2}/\d{4}\s+(\d{2}/\d{2}/\d{4})',
-        r'Vencimento\s*\n\s*(\d{2}/\d{2}/\d{4})',  # Safra - linha abaixo direto
-        r'(\d{2}/\d{2}/\d{4})\s+(?:REAL|Ag\./Cód)',  # Braspress - antes de REAL ou Ag./Cód
-        r'Vencimento[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})',  # Mesmo nível
-        r'Data[:\s]*(?:de\s*)?Vencimento[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})',  # Genérico
-    ]
-    
-    for padrao in padroes:
-        match = re.search(padrao, texto, re.IGNORECASE | re.MULTILINE)
-        if match:
-            try:
-                grupos = match.groups()
-                if len(grupos) == 1:
-                    # Data completa DD/MM/YYYY
-                    return grupos[0]
-                else:
-                    # Separado
-                    dia, mes, ano = grupos
-                    return f"{dia}/{mes}/{ano}"
-            except:
-                continue
-    return None
+    return extracao_campos.extrair_vencimento(texto)
 
 def extrair_fornecedor_melhorado(texto):
     """Extrai fornecedor/beneficiário - VERSÃO MELHORADA"""
-    padroes = [
-        # ALTA PRIORIDADE: Formatos Safra (mais específicos primeiro)
-        # Safra - formato: "Beneficiário CNPJ / CPF Ag./Cód.Beneficiário\nSUMAY DO BRASIL LTDA"
-        r'Benefici[áa]rio\s+CNPJ\s*/\s*CPF[^\n]+\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)',  # Safra quebra de linha
-        # Safra - formato: "Beneficiário Ag./Cód... Motivos...\nSUMAY DO BRASIL LTDA"
-        r'Benefici[áa]rio\s+Ag\./C[óo]d\.[^\n]+\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)',  # Safra com Ag.
-        # Braspress - só pega se tiver "Final" E não tiver "Compensa"
-        r'Benefici[áa]rio\s+Final[^\n]*\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+?)(?:\s+\d|\s+CNPJ)',  # Braspress
-        r'Benefici[áa]rio\s*\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)',  # Safra - linha nova
-        # MÉDIA PRIORIDADE: Mesmo nível
-        r'Benefici[áa]rio[:\s]*([A-ZÀ-Ú0-9.,\s&/-]+)',
-        r'Cedente[:\s]*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)',
-        r'Sacador[:\s]*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)',
-    ]
-
-    for padrao in padroes:
-        match = re.search(padrao, texto, re.IGNORECASE | re.MULTILINE)
-        if match:
-            fornecedor = match.group(1).strip()
-            # Remover possíveis quebras de linha e caracteres extras
-            fornecedor = ' '.join(fornecedor.split())
-            fornecedor = fornecedor.split('\n')[0]  # Pegar só primeira linha
-            # Filtrar nomes inválidos
-            if 'Ficha' in fornecedor or 'Compensa' in fornecedor:
-                continue  # Pular e tentar próximo padrão
-            # Limitar tamanho
-            if len(fornecedor) > 60:
-                fornecedor = fornecedor[:60]
-            # Validar que não é só espaços ou muito curto
-            if len(fornecedor) > 5:
-                return fornecedor
-
-    return "Fornecedor não identificado"
+    return extracao_campos.extrair_fornecedor(texto)
 
 def extrair_numero_documento_melhorado(texto):
     """Extrai número do documento - VERSÃO MELHORADA"""
-    padroes = [
-        r'N[úu]mero\s+do\s+Documento\s*\n\s*(\S+)',
-        r'Número\s+do\s+Documento\s*\n\s*(\S+)',
-        r'N[úu]mero\s+do\s+Doc[.:]\s*(\S+)',
-        r'Nº\s+do\s+Doc[.:]\s*(\S+)',
-        r'N[úu]mero\s+da\s+Fatura[:\s]*(\d+)',
-        r'Nº\s+Fatura[:\s]*(\d+)',
-    ]
-    
-    for padrao in padroes:
-        match = re.search(padrao, texto, re.IGNORECASE | re.MULTILINE)
-        if match:
-            return match.group(1).strip()
-    return None
+    return extracao_campos.extrair_numero_documento(texto, VARIANTE_DASHBOARD)
 
 def processar_pdf_integrado(caminho_pdf):
     """Processa PDF usando funções embutidas melhoradas"""
     try:
-        with pdfplumber.open(caminho_pdf) as pdf:
-            texto_completo = ""
-            for pagina in pdf.pages:
-                texto = pagina.extract_text()
-                if texto:
-                    texto_completo += texto + "\n"
-        
-        if not texto_completo:
+        # Cache por conteúdo do PDF + leitura de páginas sob demanda
+        campos, _ = leitura_pdf.campos_do_pdf(caminho_pdf, VARIANTE_DASHBOARD)
+        if campos is None:
             return None
-        
-        # Extrair dados
-        valor = extrair_valor_melhorado(texto_completo)
-        vencimento = extrair_vencimento_melhorado(texto_completo)
-        data_emissao = extrair_data_emissao_melhorado(texto_completo)
-        fornecedor = extrair_fornecedor_melhorado(texto_completo)
-        numero_doc = extrair_numero_documento_melhorado(texto_completo)
+
+        valor = campos['valor']
+        vencimento = campos['vencimento']
+        data_emissao = campos['data_emissao']
+        fornecedor = campos['fornecedor']
+        numero_doc = campos['numero_documento']
 
         if not valor or not vencimento:
             return None
@@ -220,6 +87,7 @@ def processar_pdf_integrado(caminho_pdf):
             'Vencimento': vencimento,
             'Data_Emissao': data_emissao,  # Adicionar data de emissão
             'Numero_Documento': numero_doc,
+            'Codigo_Barras': campos.get('codigo_barras'),
             'Arquivo_PDF': os.path.basename(caminho_pdf),
             'Data_Processamento': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
         }
@@ -228,68 +96,109 @@ def processar_pdf_integrado(caminho_pdf):
         st.error(f"Erro ao processar PDF: {e}")
         return None
 
-def adicionar_na_planilha_integrado(dados, caminho_excel):
-    """Adiciona dados na planilha"""
+def _montar_linha_integrado(dados, numero):
+    """Monta a linha da planilha para os dados extraídos de um boleto"""
+    # Criar histórico
+    historico = f"Boleto processado automaticamente"
+    if dados.get('Numero_Documento'):
+        historico += f" - Doc: {dados['Numero_Documento']}"
+    historico += f" - {dados['Arquivo_PDF']}"
+    if dados.get('Duplicata_De'):
+        historico = f"POSSÍVEL DUPLICATA ({dados['Duplicata_De']}) - {historico}"
+    
+    # Usar data de emissão extraída ou data atual como fallback
+    if dados.get('Data_Emissao'):
+        dt_emissao = pd.to_datetime(dados['Data_Emissao'], format='%d/%m/%Y')
+    else:
+        dt_emissao = datetime.now().strftime('%Y-%m-%d')
+
+    return {
+        'Número': numero,
+        'Fornecedor': dados['Fornecedor'],
+        'Plano de contas': 'CONTAS A PAGAR',
+        'Histórico': historico,
+        'Dt. Emissão': dt_emissao,  # Usar data extraída do boleto
+        'Dt. Vencimento': pd.to_datetime(dados['Vencimento'], format='%d/%m/%Y'),
+        'Dt. Pagamento': None,
+        'Vr. Título': dados['Valor'],
+        'Vr. Dev/Pag': dados['Valor'],
+        'Valor Total a Pagar': dados['Valor'],
+        'Forma de Pgto.': '3 - BOLETO'
+    }
+
+def adicionar_lote_na_planilha_integrado(lista_dados, caminho_excel, duplicados=None, ao_reservar=None):
+    """
+    Adiciona vários registros na planilha com uma única leitura e gravação.
+
+    Boletos já lançados ficam com dados['Duplicata_De'] preenchido e são
+    ignorados (ou incluídos com o Histórico sinalizado, com duplicados='marcar').
+    `ao_reservar` recebe os Números atribuídos antes da gravação.
+
+    Returns:
+        list: Número atribuído a cada registro, na ordem de entrada
+            (None para os que não entraram na planilha)
+    """
+    numeros_atribuidos = [None] * len(lista_dados)
+    if not lista_dados:
+        return numeros_atribuidos
+
     try:
-        # Carregar ou criar planilha
-        if os.path.exists(caminho_excel):
-            df = pd.read_excel(caminho_excel)
-        else:
-            df = pd.DataFrame()
-        
-        # Gerar próximo número
-        if 'Número' in df.columns and len(df) > 0:
-            numeros_existentes = df['Número'].dropna()
-            try:
-                numeros = []
-                for n in numeros_existentes:
-                    num_str = str(n).replace('000', '').strip()
-                    if num_str.isdigit():
-                        numeros.append(int(num_str))
-                
-                if numeros:
-                    proximo_numero = f"{max(numeros) + 1:06d}"
-                else:
-                    proximo_numero = "000001"
-            except:
-                proximo_numero = "000001"
-        else:
-            proximo_numero = "000001"
-        
-        # Criar histórico
-        historico = f"Boleto processado automaticamente"
-        if dados.get('Numero_Documento'):
-            historico += f" - Doc: {dados['Numero_Documento']}"
-        historico += f" - {dados['Arquivo_PDF']}"
-        
-        # Usar data de emissão extraída ou data atual como fallback
-        if dados.get('Data_Emissao'):
-            dt_emissao = pd.to_datetime(dados['Data_Emissao'], format='%d/%m/%Y')
-        else:
-            dt_emissao = datetime.now().strftime('%Y-%m-%d')
-
-        # Nova linha
-        nova_linha = {
-            'Número': proximo_numero,
-            'Fornecedor': dados['Fornecedor'],
-            'Plano de contas': 'CONTAS A PAGAR',
-            'Histórico': historico,
-            'Dt. Emissão': dt_emissao,  # Usar data extraída do boleto
-            'Dt. Vencimento': pd.to_datetime(dados['Vencimento'], format='%d/%m/%Y'),
-            'Dt. Pagamento': None,
-            'Vr. Título': dados['Valor'],
-            'Vr. Dev/Pag': dados['Valor'],
-            'Valor Total a Pagar': dados['Valor'],
-            'Forma de Pgto.': '3 - BOLETO'
-        }
-        
-        df = pd.concat([df, pd.DataFrame([nova_linha])], ignore_index=True)
-        df.to_excel(caminho_excel, index=False)
+        duplicados = duplicados or indice_boletos.MODO_DUPLICADOS
+        banco = base_contas.garantir_base(caminho_excel) if base_contas.usar_sqlite() else None
+
+        # Índice travado até o registro: outro processo não inclui o mesmo boleto no meio
+        with indice_boletos.aberto(caminho_excel) as indice_lancados:
+            # Nome canônico do fornecedor antes da chave do boleto e da gravação
+            with etapa('fornecedores'):
+                fornecedores_contas.canonizar_lote(caminho_excel, lista_dados, ignorar={FORNECEDOR_NAO_IDENTIFICADO})
+            with etapa('indice_boletos'):
+                indice_boletos.marcar_duplicatas(indice_lancados, lista_dados)
+
+            linhas_validas = []
+            for indice, dados in enumerate(lista_dados):
+                if dados.get('Duplicata_De') and duplicados == indice_boletos.PULAR:
+                    continue
+                try:
+                    linhas_validas.append((indice, _montar_linha_integrado(dados, None)))
+                except Exception as e:
+                    st.error(f"Erro ao preparar registro de {dados.get('Arquivo_PDF')}: {e}")
+
+            # Faixa de números reservada de uma vez na sequência (sem ler a coluna Número)
+            with etapa('sequencia_numeros'):
+                faixa = sequencia_numeros.reservar(
+                    caminho_excel, len(linhas_validas),
+                    semente=lambda: sequencia_numeros.numeros_existentes(caminho_excel),
+                )
+            novas_linhas = []
+            for (indice, linha), numero in zip(linhas_validas, faixa):
+                linha['Número'] = sequencia_numeros.formatar(numero)
+                novas_linhas.append(linha)
+                numeros_atribuidos[indice] = linha['Número']
+
+            if novas_linhas and ao_reservar:
+                ao_reservar(numeros_atribuidos)
+            if novas_linhas:
+                with agregados_contas.alteracao(caminho_excel) as mudancas:
+                    if base_contas.usar_sqlite():
+                        with etapa('sqlite_inserir'):
+                            base_contas.inserir_contas(banco, novas_linhas)
+                    else:
+                        # Linhas novas no fim da aba, sem regravar as existentes
+                        with etapa('xlsx_anexar'):
+                            planilha_xlsx.anexar_linhas(caminho_excel, novas_linhas, COLUNAS_PADRAO, COLUNAS_DATA)
+                    mudancas.incluir(novas_linhas)
+
+            with etapa('indice_boletos'):
+                indice_boletos.registrar(indice_lancados, zip(lista_dados, numeros_atribuidos))
         
-        return True
+        return numeros_atribuidos
     except Exception as e:
         st.error(f"Erro ao adicionar na planilha: {e}")
-        return False
+        return [None] * len(lista_dados)
+
+def adicionar_na_planilha_integrado(dados, caminho_excel):
+    """Adiciona dados na planilha"""
+    return adicionar_lote_na_planilha_integrado([dados], caminho_excel)[0] is not None
 
 # ---------------------------------------------------------------------------
 # Tentar importar módulo de automação original (fallback)
@@ -327,11 +236,7 @@ except Exception as exc:
     PASTA_PROCESSADOS = DIRETORIO_DADOS / "boletos_processados"
     ARQUIVO_EXCEL = DIRETORIO_DADOS / "contasapagar_automacao.xlsx"
     ARQUIVO_LOG = DIRETORIO_DADOS / "log_processamento.txt"
-    COLUNAS_PADRAO = [
-        "Número", "Fornecedor", "Plano de contas", "Histórico",
-        "Dt. Emissão", "Dt. Vencimento", "Dt. Pagamento",
-        "Vr. Título", "Vr. Dev/Pag", "Valor Total a Pagar", "Forma de Pgto.",
-    ]
+    COLUNAS_PADRAO = list(esquema_contas.COLUNAS_PADRAO)
 
 # Garantir diretórios
 DIRETORIO_DADOS.mkdir(parents=True, exist_ok=True)
@@ -339,8 +244,8 @@ PASTA_PROCESSADOS.mkdir(parents=True, exist_ok=True)
 ARQUIVO_LOG.parent.mkdir(parents=True, exist_ok=True)
 
 AUTOMACAO_DISPONIVEL = True  # Sempre disponível agora (embutido ou importado)
-COLUNAS_DATA = ["Dt. Emissão", "Dt. Vencimento", "Dt. Pagamento"]
-COLUNAS_NUMERICAS = ["Vr. Título", "Vr. Dev/Pag"]
+COLUNAS_DATA = esquema_contas.COLUNAS_DATA
+COLUNAS_NUMERICAS = esquema_contas.COLUNAS_NUMERICAS
 
 # ---------------------------------------------------------------------------
 # Funções utilitárias (mantidas do seu código)
@@ -355,18 +260,33 @@ def rerun():
 def formatar_brl(valor: float) -> str:
     return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
-def ler_planilha_atual() -> pd.DataFrame:
-    if not ARQUIVO_EXCEL.exists():
-        salvar_planilha_atual(pd.DataFrame(columns=COLUNAS_PADRAO))
-    df = pd.read_excel(ARQUIVO_EXCEL)
-    df = df.replace(r"^\s*$", pd.NA, regex=True)
+def ler_planilha_com_versao() -> tuple:
+    """Planilha atual e a versão lida (da planilha ou, com a base SQLite, da base)."""
+    if base_contas.usar_sqlite():
+        df, versao = base_contas.ler_contas_com_versao(base_contas.garantir_base(ARQUIVO_EXCEL))
+        return df[[coluna for coluna in COLUNAS_PADRAO if coluna in df.columns]], versao
+    planilha_xlsx.garantir_planilha(ARQUIVO_EXCEL, COLUNAS_PADRAO)
+    df, versao = planilha_xlsx.ler_com_versao(ARQUIVO_EXCEL, dtype=esquema_contas.TIPOS_LEITURA)
     if df.empty:
         df = pd.DataFrame(columns=COLUNAS_PADRAO)
-    return df
+    return esquema_contas.tipar(df), versao
+
+def ler_planilha_atual() -> pd.DataFrame:
+    return ler_planilha_com_versao()[0]
+
+def _apenas_linhas_novas(original: pd.DataFrame, editado: pd.DataFrame) -> bool:
+    """True se `editado` é `original` com linhas acrescentadas no fim (nada alterado ou removido)."""
+    if len(editado) < len(original) or list(original.columns) != list(editado.columns):
+        return False
+
+    def comparavel(df):
+        df = df.reset_index(drop=True).astype(object)
+        return df.where(df.notna(), None).astype(str)
 
-def salvar_planilha_atual(dados: pd.DataFrame) -> None:
-    df_salvar = dados.copy()
-    df_salvar = df_salvar.replace(r"^\s*$", pd.NA, regex=True)
+    return comparavel(editado.iloc[:len(original)]).equals(comparavel(original))
+
+def _normalizar_para_salvar(dados: pd.DataFrame) -> pd.DataFrame:
+    df_salvar = esquema_contas.normalizar_brancos(dados)
     
     for coluna in COLUNAS_PADRAO:
         if coluna not in df_salvar.columns:
@@ -382,20 +302,80 @@ def salvar_planilha_atual(dados: pd.DataFrame) -> None:
         if coluna in df_salvar.columns:
             df_salvar[coluna] = pd.to_numeric(df_salvar[coluna], errors="coerce")
     
-    df_salvar.to_excel(ARQUIVO_EXCEL, index=False)
+    return df_salvar
+
+def _numerar_linhas_novas(df_salvar: pd.DataFrame, novas) -> None:
+    """Números da sequência (como os dos boletos) para as linhas novas sem Número."""
+    sem_numero = novas & df_salvar["Número"].isna()
+    if not sem_numero.any():
+        return
+    faixa = sequencia_numeros.reservar(
+        ARQUIVO_EXCEL, int(sem_numero.sum()),
+        semente=lambda: sequencia_numeros.numeros_existentes(ARQUIVO_EXCEL),
+    )
+    df_salvar.loc[sem_numero, "Número"] = [sequencia_numeros.formatar(numero) for numero in faixa]
+
+def salvar_planilha_atual(dados: pd.DataFrame, original: pd.DataFrame = None, versao=None, novas=None) -> None:
+    """
+    Salva a planilha editada.
+
+    Com `original` (a planilha como foi lida), se a edição só acrescentou
+    linhas no fim, apenas elas são gravadas (sem regravar o resto). Com
+    `versao` (a versão lida), a regravação completa é recusada com
+    planilha_xlsx.ConflitoDeVersao se outro processo gravou a planilha ou
+    a base SQLite depois da leitura (ex.: a automação incluiu boletos).
+    Linhas removidas no editor saem também do índice de boletos lançados.
+
+    As linhas novas (máscara `novas`; padrão: as que passam do tamanho de
+    `original`) sem Número recebem o próximo da sequência, e a sequência é
+    ressemeada depois de salvar: um Número digitado no editor não é
+    entregue de novo à automação. As chaves das linhas novas entram no
+    índice de boletos lançados, como as dos boletos da automação.
+    """
+    df_salvar = _normalizar_para_salvar(dados)
+    if novas is None:
+        novas = np.arange(len(df_salvar)) >= (len(original) if original is not None else len(df_salvar))
+    novas = pd.Series(novas, index=df_salvar.index, dtype=bool)
+
+    # Índice travado até o registro: o PDF de um boleto digitado aqui não entra no meio
+    with indice_boletos.aberto(ARQUIVO_EXCEL) as indice_lancados:
+        _numerar_linhas_novas(df_salvar, novas)
+        if base_contas.usar_sqlite():
+            banco = base_contas.garantir_base(ARQUIVO_EXCEL)
+            with agregados_contas.alteracao(ARQUIVO_EXCEL) as mudancas:
+                base_contas.substituir_contas(banco, df_salvar, versao)
+                mudancas.substituir(df_salvar)
+        elif (original is not None and ARQUIVO_EXCEL.exists()
+              and _apenas_linhas_novas(_normalizar_para_salvar(original), df_salvar)):
+            # Inclusão no fim não sobrescreve nada: dispensa a conferência de versão
+            novas_linhas = df_salvar.iloc[len(original):]
+            if len(novas_linhas):
+                with agregados_contas.alteracao(ARQUIVO_EXCEL) as mudancas:
+                    planilha_xlsx.anexar_linhas(
+                        ARQUIVO_EXCEL, novas_linhas.to_dict("records"), COLUNAS_PADRAO, COLUNAS_DATA
+                    )
+                    mudancas.incluir(novas_linhas)
+        else:
+            with agregados_contas.alteracao(ARQUIVO_EXCEL) as mudancas, planilha_xlsx.trava(ARQUIVO_EXCEL):
+                if versao is not None:
+                    planilha_xlsx.verificar_versao(ARQUIVO_EXCEL, versao)
+                planilha_xlsx.gravar_dataframe(df_salvar, ARQUIVO_EXCEL)
+                mudancas.substituir(df_salvar)
+        indice_boletos.registrar_linhas(indice_lancados, df_salvar[novas])
+    sequencia_numeros.ressemear(ARQUIVO_EXCEL, df_salvar["Número"])
+    _remover_do_indice(original, df_salvar)
+
+def _remover_do_indice(original: pd.DataFrame, salvo: pd.DataFrame) -> None:
+    """Retira do índice de boletos as chaves das linhas que estavam em `original` e não estão em `salvo`."""
+    if original is None or "Número" not in original.columns:
+        return
+    indice_boletos.remover(ARQUIVO_EXCEL, original, salvo)
 
-def excluir_registros_planilha(numeros: list[str]) -> int:
+def excluir_registros_planilha(numeros: list[str]) -> dict:
+    """Exclui os títulos pelo Número. Retorna o resumo de baixas_contas.excluir."""
     if not numeros:
-        return 0
-    df_atual = ler_planilha_atual()
-    if df_atual.empty or "Número" not in df_atual.columns:
-        return 0
-    numeros_set = {str(numero) for numero in numeros}
-    df_filtrado = df_atual[~df_atual["Número"].astype(str).isin(numeros_set)]
-    removidos = len(df_atual) - len(df_filtrado)
-    if removidos > 0:
-        salvar_planilha_atual(df_filtrado)
-    return removidos
+        return {"excluidos": 0, "alterados": [], "nao_encontrados": []}
+    return baixas_contas.excluir(ARQUIVO_EXCEL, numeros)
 
 def limpar_historico_boletos() -> int:
     removidos = 0
@@ -416,26 +396,27 @@ def limpar_log_processamento() -> bool:
     except OSError:
         return False
 
-def atualizar_status_pagamento(numeros: list[str], pago: bool) -> int:
-    if not numeros:
-        return 0
-    df = ler_planilha_atual()
-    if df.empty or "Número" not in df.columns:
-        return 0
-    numeros_set = {str(numero) for numero in numeros}
-    hoje = pd.Timestamp.now().normalize()
-    alterados = 0
-    for idx, linha in df.iterrows():
-        chave = str(linha.get("Número", ""))
-        if chave in numeros_set:
-            if pago:
-                df.at[idx, "Dt. Pagamento"] = hoje
-            else:
-                df.at[idx, "Dt. Pagamento"] = pd.NaT
-            alterados += 1
-    if alterados:
-        salvar_planilha_atual(df)
-    return alterados
+def atualizar_status_pagamento(lancamentos, pago: bool) -> dict:
+    """
+    Baixa (pago=True) ou reabre títulos em lote.
+
+    Args:
+        lancamentos: Números, ou CSV/DataFrame com Número, Dt. Pagamento e Vr. Dev/Pag
+
+    Returns:
+        dict: alterados, ja_no_estado e nao_encontrados (ver baixas_contas)
+    """
+    if lancamentos is None or (isinstance(lancamentos, list) and not lancamentos):
+        return {"alterados": [], "ja_no_estado": [], "nao_encontrados": []}
+    return baixas_contas.baixar(ARQUIVO_EXCEL, lancamentos, pago=pago)
+
+def _mensagem_resumo(resumo: dict, acao: str) -> str:
+    partes = [f"{len(resumo['alterados'])} título(s) {acao}"]
+    if resumo.get("ja_no_estado"):
+        partes.append(f"{len(resumo['ja_no_estado'])} já estavam assim")
+    if resumo.get("nao_encontrados"):
+        partes.append(f"{len(resumo['nao_encontrados'])} não encontrado(s)")
+    return "; ".join(partes) + "."
 
 # ---------------------------------------------------------------------------
 # Seções da interface (mantidas do seu código)
@@ -443,7 +424,14 @@ def atualizar_status_pagamento(numeros: list[str], pago: bool) -> int:
 
 def secao_planilha():
     st.markdown("### 📈 Planilha de Automação (tempo real)")
-    df_planilha = ler_planilha_atual()
+    df_planilha, versao_lida = ler_planilha_com_versao()
+    df_original = df_planilha
+
+    # Versão de referência do editor: a da planilha quando a edição começou.
+    # Enquanto não há edições pendentes, acompanha a planilha em disco.
+    estado_editor = st.session_state.get("editor_planilha_integrado") or {}
+    if not any(estado_editor.get(chave) for chave in ("edited_rows", "added_rows", "deleted_rows")):
+        st.session_state["versao_planilha_editor"] = versao_lida
 
     if df_planilha.empty:
         st.info("Planilha vazia. Processe um boleto para ver os dados.")
@@ -454,14 +442,14 @@ def secao_planilha():
         df_planilha["Dt. Pagamento"].notna(), "Pago", "Pendente"
     )
 
-    total_pago = (df_planilha["Status"] == "Pago").sum()
-    total_pendente = (df_planilha["Status"] == "Pendente").sum()
+    indicadores = agregados_contas.indicadores(ARQUIVO_EXCEL)
 
     col_a, col_b = st.columns(2)
-    col_a.metric("Títulos pagos", total_pago)
-    col_b.metric("Títulos pendentes", total_pendente)
+    col_a.metric("Títulos pagos", indicadores.contas_pagas)
+    col_b.metric("Títulos pendentes", indicadores.contas_pendentes)
 
-    df_editor = df_planilha.copy()
+    # Texto livre no editor (categorias virariam listas fechadas)
+    df_editor = esquema_contas.sem_categorias(df_planilha)
     df_editor.insert(0, "Linha", range(1, len(df_editor) + 1))
 
     for coluna in COLUNAS_DATA:
@@ -477,12 +465,15 @@ def secao_planilha():
         num_rows="dynamic",
         use_container_width=True,
         column_order=["Linha", "Status"] + [col for col in df_editor.columns if col not in ("Linha", "Status")],
+        disabled=["Linha", "Status"],
         key="editor_planilha_integrado",
     )
 
     # Botão de salvar alterações
     if st.button("💾 Salvar alterações", type="primary", use_container_width=True):
         df_salvar = pd.DataFrame(df_editado)
+        # Linhas acrescentadas no editor não têm o número de Linha
+        linhas_novas = df_salvar["Linha"].isna().to_numpy()
         for coluna in ("Linha", "Status"):
             if coluna in df_salvar.columns:
                 df_salvar = df_salvar.drop(columns=[coluna])
@@ -498,10 +489,28 @@ def secao_planilha():
             if coluna in df_salvar.columns:
                 df_salvar.loc[:, coluna] = pd.to_numeric(df_salvar[coluna], errors="coerce")
 
-        salvar_planilha_atual(df_salvar)
-        st.session_state["feedback_message"] = "Planilha atualizada!"
-        st.cache_data.clear()
-        rerun()
+        try:
+            salvar_planilha_atual(
+                df_salvar, original=df_original, versao=st.session_state.get("versao_planilha_editor"),
+                novas=linhas_novas,
+            )
+        except planilha_xlsx.ConflitoDeVersao:
+            st.session_state["conflito_planilha"] = True
+        else:
+            st.session_state["feedback_message"] = "Planilha atualizada!"
+            st.cache_data.clear()
+            rerun()
+
+    if st.session_state.get("conflito_planilha"):
+        st.error(
+            "A planilha foi alterada por outro processo (ex.: automação) depois que a edição começou. "
+            "Nada foi salvo. Recarregue a planilha e refaça as alterações."
+        )
+        if st.button("🔄 Recarregar planilha", use_container_width=True):
+            st.session_state.pop("conflito_planilha", None)
+            st.session_state.pop("editor_planilha_integrado", None)
+            st.cache_data.clear()
+            rerun()
 
     with st.expander("✅ Atualizar status de pagamento", expanded=False):
         pendentes = df_planilha[df_planilha["Dt. Pagamento"].isna()]
@@ -515,8 +524,10 @@ def secao_planilha():
                 key="pendentes_select",
             )
             if st.button("✅ Marcar como pagos", use_container_width=True):
-                alterados = atualizar_status_pagamento(selecionados_pendentes, pago=True)
-                st.session_state["feedback_message"] = f"{alterados} título(s) atualizados." if alterados else "Nenhum selecionado."
+                resumo = atualizar_status_pagamento(selecionados_pendentes, pago=True)
+                st.session_state["feedback_message"] = (
+                    _mensagem_resumo(resumo, "atualizados") if selecionados_pendentes else "Nenhum selecionado."
+                )
                 st.cache_data.clear()
                 rerun()
 
@@ -527,11 +538,43 @@ def secao_planilha():
                 key="pagos_select",
             )
             if st.button("↩️ Reabrir como pendentes", use_container_width=True):
-                alterados = atualizar_status_pagamento(selecionados_pagos, pago=False)
-                st.session_state["feedback_message"] = f"{alterados} título(s) reabertos." if alterados else "Nenhum selecionado."
+                resumo = atualizar_status_pagamento(selecionados_pagos, pago=False)
+                st.session_state["feedback_message"] = (
+                    _mensagem_resumo(resumo, "reabertos") if selecionados_pagos else "Nenhum selecionado."
+                )
                 st.cache_data.clear()
                 rerun()
 
+        st.markdown("**Baixa em lote (CSV)**")
+        st.caption("Colunas: Número e, opcionalmente, Dt. Pagamento e Vr. Dev/Pag (separador , ou ;).")
+        arquivo_baixas = st.file_uploader("CSV de baixas", type=["csv"], key="csv_baixas")
+        if arquivo_baixas is not None:
+            try:
+                lancamentos = baixas_contas.ler_lancamentos(arquivo_baixas)
+            except (ValueError, pd.errors.ParserError) as e:
+                st.error(f"CSV inválido: {e}")
+            else:
+                st.dataframe(lancamentos.drop(columns=["chave"]), hide_index=True, use_container_width=True)
+                if st.button(f"✅ Aplicar {len(lancamentos)} baixa(s)", use_container_width=True):
+                    resumo = atualizar_status_pagamento(lancamentos, pago=True)
+                    st.session_state["resumo_baixas"] = resumo
+                    st.session_state["feedback_message"] = _mensagem_resumo(resumo, "atualizados")
+                    st.cache_data.clear()
+                    rerun()
+
+        resumo_baixas = st.session_state.get("resumo_baixas")
+        if resumo_baixas:
+            st.success(_mensagem_resumo(resumo_baixas, "atualizados"))
+            if resumo_baixas["nao_encontrados"]:
+                st.warning("Não encontrados: " + ", ".join(resumo_baixas["nao_encontrados"]))
+
+    if base_contas.usar_sqlite():
+        # Base SQLite é o registro oficial: a planilha é gerada sob demanda
+        if st.button("📥 Exportar planilha (xlsx)", use_container_width=True):
+            total = base_contas.exportar_xlsx(ARQUIVO_EXCEL)
+            st.session_state["feedback_message"] = f"{total} registro(s) exportados para {ARQUIVO_EXCEL.name}."
+            rerun()
+
 def secao_upload():
     st.markdown("### 📤 Processar novos boletos")
 
@@ -559,13 +602,22 @@ def secao_upload():
                 import tempfile
                 import shutil
 
+                gravar = partial(adicionar_lote_na_planilha_integrado, caminho_excel=str(ARQUIVO_EXCEL))
                 try:
-                    with st.spinner("Processando boletos..."):
+                    # Boletos de um processamento interrompido entram antes dos novos
+                    diario_lancamentos.recuperar(str(ARQUIVO_EXCEL), gravar)
+                    with st.spinner("Processando boletos..."), diario_lancamentos.aberto(ARQUIVO_EXCEL) as diario:
                         resultados = []
+                        medicoes = []
+                        extraidos = []  # (posição em resultados, arquivo, PDF temporário, dados, status)
+                        ids_diario = []
                         temp_dir = tempfile.mkdtemp()
 
                         for uploaded_file in uploaded_files:
-                            with st.status(f"Processando {uploaded_file.name}...", expanded=True) as status:
+                            medicao = medicao_etapas.nova_medicao(uploaded_file.name)
+                            medicoes.append(medicao)
+                            with medicao_etapas.medindo(medicao), \
+                                    st.status(f"Processando {uploaded_file.name}...", expanded=True) as status:
                                 temp_pdf = os.path.join(temp_dir, uploaded_file.name)
                                 with open(temp_pdf, "wb") as f:
                                     f.write(uploaded_file.read())
@@ -574,41 +626,12 @@ def secao_upload():
                                 dados = processar_pdf_integrado(temp_pdf)
 
                                 if dados:
-                                    # Adicionar na planilha
-                                    if adicionar_na_planilha_integrado(dados, str(ARQUIVO_EXCEL)):
-                                        status.update(label=f"✓ {uploaded_file.name} processado!", state="complete")
-
-                                        # Mover para processados
-                                        try:
-                                            destino = PASTA_PROCESSADOS / uploaded_file.name
-                                            shutil.move(temp_pdf, str(destino))
-                                        except:
-                                            pass
-
-                                        # Salvar log
-                                        try:
-                                            with open(ARQUIVO_LOG, 'a', encoding='utf-8') as f:
-                                                timestamp = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
-                                                f.write(f"[{timestamp}] ✓ Processado: {uploaded_file.name} - R$ {dados['Valor']:.2f}\n")
-                                        except:
-                                            pass
-
-                                        resultados.append({
-                                            "Arquivo": uploaded_file.name,
-                                            "Status": "✅ Sucesso",
-                                            "Fornecedor": dados["Fornecedor"],
-                                            "Valor": formatar_brl(dados["Valor"]),
-                                            "Vencimento": dados["Vencimento"],
-                                        })
-                                    else:
-                                        status.update(label=f"✗ Erro ao salvar {uploaded_file.name}", state="error")
-                                        resultados.append({
-                                            "Arquivo": uploaded_file.name,
-                                            "Status": "❌ Erro ao salvar",
-                                            "Fornecedor": "-",
-                                            "Valor": "-",
-                                            "Vencimento": "-",
-                                        })
+                                    status.update(label=f"✓ {uploaded_file.name} extraído", state="running")
+                                    extraidos.append((len(resultados), uploaded_file.name, temp_pdf, dados, status))
+                                    # Anotado no diário (append com fsync) antes de ir para a planilha
+                                    with etapa('diario_anotar'):
+                                        ids_diario.append(diario_lancamentos.registrar_boleto(diario, dados, temp_pdf))
+                                    resultados.append(None)  # Preenchido após gravar a planilha
                                 else:
                                     status.update(label=f"✗ Falha em {uploaded_file.name}", state="error")
                                     resultados.append({
@@ -619,8 +642,86 @@ def secao_upload():
                                         "Vencimento": "-",
                                     })
 
+                        # Uma leitura e uma gravação da planilha para o lote inteiro
+                        medicao_lote = medicao_etapas.nova_medicao('(planilha)')
+                        with medicao_etapas.medindo(medicao_lote):
+                            gravados = diario_lancamentos.compactar(diario, str(ARQUIVO_EXCEL), gravar)
+                        numeros = [gravados[id_boleto]['numero'] for id_boleto in ids_diario]
+                        for id_boleto, (_, _, _, dados, _) in zip(ids_diario, extraidos):
+                            if gravados[id_boleto]['duplicata_de']:
+                                dados['Duplicata_De'] = gravados[id_boleto]['duplicata_de']
+
+                        for (posicao, nome, temp_pdf, dados, status), numero in zip(extraidos, numeros):
+                            if numero:
+                                status.update(label=f"✓ {nome} processado!", state="complete")
+
+                                # Mover para processados
+                                try:
+                                    destino = PASTA_PROCESSADOS / nome
+                                    with medicao_etapas.medindo(medicoes[posicao]), etapa('mover_para_processados'):
+                                        shutil.move(temp_pdf, str(destino))
+                                except:
+                                    pass
+
+                                # Salvar log
+                                mensagem = f"✓ Processado: {nome} - R$ {dados['Valor']:.2f} - Nº {numero}"
+                                if dados.get('Duplicata_De'):
+                                    mensagem += f" (possível duplicata de {dados['Duplicata_De']})"
+                                try:
+                                    with open(ARQUIVO_LOG, 'a', encoding='utf-8') as f:
+                                        timestamp = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+                                        f.write(f"[{timestamp}] {mensagem}\n")
+                                except:
+                                    pass
+
+                                resultados[posicao] = {
+                                    "Arquivo": nome,
+                                    "Status": "⚠️ Sucesso (possível duplicata)" if dados.get('Duplicata_De') else "✅ Sucesso",
+                                    "Fornecedor": dados["Fornecedor"],
+                                    "Valor": formatar_brl(dados["Valor"]),
+                                    "Vencimento": dados["Vencimento"],
+                                }
+                            elif dados.get('Duplicata_De'):
+                                status.update(label=f"↺ {nome} já lançado ({dados['Duplicata_De']})", state="complete")
+                                try:
+                                    with open(ARQUIVO_LOG, 'a', encoding='utf-8') as f:
+                                        timestamp = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+                                        f.write(f"[{timestamp}] ↺ Duplicado ignorado: {nome} - R$ {dados['Valor']:.2f} "
+                                                f"(já lançado: {dados['Duplicata_De']})\n")
+                                except:
+                                    pass
+                                resultados[posicao] = {
+                                    "Arquivo": nome,
+                                    "Status": f"↺ Já lançado ({dados['Duplicata_De']})",
+                                    "Fornecedor": dados["Fornecedor"],
+                                    "Valor": formatar_brl(dados["Valor"]),
+                                    "Vencimento": dados["Vencimento"],
+                                }
+                            else:
+                                status.update(label=f"✗ Erro ao salvar {nome}", state="error")
+                                resultados[posicao] = {
+                                    "Arquivo": nome,
+                                    "Status": "❌ Erro ao salvar",
+                                    "Fornecedor": "-",
+                                    "Valor": "-",
+                                    "Vencimento": "-",
+                                }
+
                         shutil.rmtree(temp_dir, ignore_errors=True)
 
+                        registros = [
+                            medicao_etapas.registro(medicao, origem='dashboard', situacao=resultado["Status"])
+                            for medicao, resultado in zip(medicoes, resultados)
+                        ]
+                        if extraidos:
+                            medicoes.append(medicao_lote)
+                            registros.append(medicao_etapas.registro(
+                                medicao_lote, origem='dashboard', situacao='lote', documentos=len(extraidos)
+                            ))
+                        medicao_etapas.gravar_registros(registros)
+                        # Exibido após o rerun, abaixo do uploader
+                        st.session_state.resumo_etapas = medicao_etapas.resumo_lote(medicoes)
+
                     st.success(f"✓ Concluído! ({len([r for r in resultados if '✅' in r['Status']])}/{len(resultados)} sucesso)")
                     st.markdown("#### Resultados:")
                     st.dataframe(pd.DataFrame(resultados), use_container_width=True, hide_index=True)
@@ -638,6 +739,18 @@ def secao_upload():
         else:
             st.info("👆 Selecione arquivos PDF para começar")
 
+        if st.session_state.get('resumo_etapas'):
+            with st.expander("⏱️ Tempo por etapa (último processamento)"):
+                resumo = pd.DataFrame(st.session_state.resumo_etapas)
+                resumo = resumo.sort_values('parede_ms', ascending=False)
+                st.dataframe(
+                    resumo.rename(columns={
+                        'etapa': 'Etapa', 'arquivos': 'Arquivos', 'parede_ms': 'Parede (ms)',
+                        'cpu_ms': 'CPU (ms)', 'media_ms': 'Média (ms)', 'maximo_ms': 'Máx. (ms)',
+                    }).round(2),
+                    use_container_width=True, hide_index=True,
+                )
+
     with col_instrucoes:
         st.markdown("#### 📋 Instruções")
         st.markdown("""
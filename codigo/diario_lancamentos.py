@@ -0,0 +1,291 @@
+"""
+Diário de Lançamentos - Fusion Tech
+Registro append-only (JSONL) dos boletos extraídos, antes de irem para o livro.
+
+Cada execução (automação ou upload do dashboard) tem o seu diário em
+<planilha>.diario/, aberto e travado enquanto o processo vive. Cada boleto
+extraído vira uma linha gravada com fsync: o custo por boleto é um append
+pequeno. A compactação leva os boletos pendentes para o livro de uma vez
+(no fim do lote ou a cada N boletos) e anota o resultado no próprio diário:
+
+    {"tipo": "boleto", "id": ..., "arquivo": ..., "dados": {...}}
+    {"tipo": "gravacao", "numeros": {id: Número}}      antes de gravar o livro
+    {"tipo": "compactado", "resultados": {id: {...}}}  depois de gravar
+
+Cada compactação resolve todos os boletos pendentes, então o processo
+guarda a posição (em bytes) logo depois do último "compactado" e a próxima
+compactação lê o diário só a partir dali: com --compactar-a-cada N o custo
+total cresce com o tamanho do diário, não com o quadrado dele.
+
+Terminado o lote, o diário é apagado. O diário que sobra de uma execução
+interrompida (trava livre) é retomado na próxima: boletos com Número
+reservado que já está no livro não são gravados de novo; os demais passam
+pela inclusão normal, com o índice de boletos evitando duplicatas.
+
+Para executar:
+    python codigo/diario_lancamentos.py mostrar
+"""
+
+import argparse
+import glob
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import count
+
+import indice_boletos
+import sequencia_numeros
+from trava_arquivo import TravaOcupada, travado
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_EXCEL = os.path.join(os.path.dirname(BASE_DIR), 'dados', 'contasapagar_automacao.xlsx')
+
+_sequencia_ids = count(1)
+# Por diário aberto neste processo: posição logo depois do último "compactado"
+_compactado_ate = {}
+
+
+def pasta_diario(caminho_planilha):
+    """Pasta dos diários (mesmo nome da planilha, extensão .diario)."""
+    return os.path.splitext(str(caminho_planilha))[0] + '.diario'
+
+
+def _caminho_trava(caminho_diario):
+    return caminho_diario + '.lock'
+
+
+def anotar(caminho_diario, registro):
+    """
+    Acrescenta um registro ao diário e só retorna depois do fsync.
+
+    Returns:
+        int: Tamanho do diário depois do registro (posição do próximo)
+    """
+    linha = json.dumps(registro, ensure_ascii=False, default=str) + '\n'
+    with open(caminho_diario, 'a', encoding='utf-8') as f:
+        f.write(linha)
+        f.flush()
+        os.fsync(f.fileno())
+        return os.fstat(f.fileno()).st_size
+
+
+def ler(caminho_diario, inicio=0):
+    """
+    Registros do diário a partir da posição `inicio` (em bytes).
+
+    Uma última linha incompleta, de uma queda no meio do append, é ignorada.
+    """
+    with open(caminho_diario, 'rb') as f:
+        f.seek(inicio)
+        linhas = f.read().decode('utf-8').split('\n')
+    registros = []
+    for posicao, linha in enumerate(linhas):
+        if not linha:
+            continue
+        try:
+            registros.append(json.loads(linha))
+        except json.JSONDecodeError:
+            if posicao < len(linhas) - 1 and any(linhas[posicao + 1:]):
+                raise
+    return registros
+
+
+def registrar_boleto(caminho_diario, dados, caminho_pdf):
+    """
+    Anota um boleto extraído.
+
+    Returns:
+        str: Id do boleto no diário
+    """
+    id_boleto = f"{os.getpid()}-{next(_sequencia_ids)}"
+    anotar(caminho_diario, {
+        'tipo': 'boleto',
+        'id': id_boleto,
+        'arquivo': str(caminho_pdf),
+        'dados': dados,
+        'registrado_em': datetime.now().isoformat(timespec='seconds'),
+    })
+    return id_boleto
+
+
+def _situacao(registros):
+    """(boletos por id, Números reservados por id, resultados por id)."""
+    boletos, reservados, resultados = {}, {}, {}
+    for registro in registros:
+        if registro['tipo'] == 'boleto':
+            boletos[registro['id']] = registro
+        elif registro['tipo'] == 'gravacao':
+            reservados.update(registro['numeros'])
+        elif registro['tipo'] == 'compactado':
+            resultados.update(registro['resultados'])
+    return boletos, reservados, resultados
+
+
+def pendentes(caminho_diario):
+    """Boletos do diário ainda não levados ao livro, na ordem de registro."""
+    boletos, _, resultados = _situacao(ler(caminho_diario, _compactado_ate.get(caminho_diario, 0)))
+    return [registro for id_boleto, registro in boletos.items() if id_boleto not in resultados]
+
+
+def _ja_gravados(caminho_planilha, reservados):
+    """Ids cujo Número reservado já está no livro (gravação concluída antes de uma queda)."""
+    if not reservados:
+        return {}
+    existentes = {
+        sequencia_numeros.numero_inteiro(numero)
+        for numero in sequencia_numeros.numeros_existentes(caminho_planilha)
+    }
+    return {
+        id_boleto: numero for id_boleto, numero in reservados.items()
+        if sequencia_numeros.numero_inteiro(numero) in existentes
+    }
+
+
+def compactar(caminho_diario, caminho_planilha, gravar):
+    """
+    Leva ao livro, de uma vez, os boletos pendentes do diário.
+
+    Args:
+        gravar: Função de inclusão em lote, chamada como
+            gravar(lista_dados, ao_reservar=...) e que devolve o Número de
+            cada registro (ex.: automacao_boletos.adicionar_lote_na_planilha);
+            ao_reservar recebe os Números antes da gravação no livro
+
+    Returns:
+        dict: Por id: {'numero', 'duplicata_de'} (numero None se o boleto
+            não entrou no livro)
+    """
+    # Antes da última compactação não há boleto pendente: lê só o resto
+    boletos, reservados, resultados_anteriores = _situacao(
+        ler(caminho_diario, _compactado_ate.get(caminho_diario, 0))
+    )
+    pendentes_ids = [id_boleto for id_boleto in boletos if id_boleto not in resultados_anteriores]
+    if not pendentes_ids:
+        return {}
+
+    # Gravação interrompida: o que já está no livro só é registrado no índice
+    gravados = _ja_gravados(
+        caminho_planilha, {i: n for i, n in reservados.items() if i in pendentes_ids and n}
+    )
+    resultados = {id_boleto: {'numero': numero, 'duplicata_de': None} for id_boleto, numero in gravados.items()}
+    if gravados:
+        recuperados = [(dict(boletos[id_boleto]['dados']), numero) for id_boleto, numero in gravados.items()]
+        for dados, _ in recuperados:
+            dados['Chave_Boleto'] = indice_boletos.chave_dos_dados(dados)
+        with indice_boletos.aberto(caminho_planilha) as indice_lancados:
+            indice_boletos.registrar(indice_lancados, recuperados)
+
+    restantes = [id_boleto for id_boleto in pendentes_ids if id_boleto not in gravados]
+    if restantes:
+        lista_dados = [dict(boletos[id_boleto]['dados']) for id_boleto in restantes]
+
+        def ao_reservar(numeros):
+            anotar(caminho_diario, {'tipo': 'gravacao', 'numeros': {
+                id_boleto: numero for id_boleto, numero in zip(restantes, numeros) if numero
+            }})
+
+        numeros = gravar(lista_dados, ao_reservar=ao_reservar)
+        for id_boleto, dados, numero in zip(restantes, lista_dados, numeros):
+            resultados[id_boleto] = {'numero': numero, 'duplicata_de': dados.get('Duplicata_De')}
+
+    _compactado_ate[caminho_diario] = anotar(caminho_diario, {
+        'tipo': 'compactado',
+        'resultados': resultados,
+        'compactado_em': datetime.now().isoformat(timespec='seconds'),
+    })
+    return resultados
+
+
+def _apagar(caminho_diario):
+    _compactado_ate.pop(caminho_diario, None)
+    for caminho in (caminho_diario, _caminho_trava(caminho_diario)):
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def aberto(caminho_planilha):
+    """
+    Diário desta execução, travado enquanto o bloco roda.
+
+    Saindo sem erro e sem boletos pendentes, o diário é apagado; do
+    contrário fica para recuperar() na próxima execução.
+
+    Yields:
+        str: Caminho do diário (para registrar_boleto() e compactar())
+    """
+    pasta = pasta_diario(caminho_planilha)
+    os.makedirs(pasta, exist_ok=True)
+    nome = f"{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}_{next(_sequencia_ids)}.jsonl"
+    caminho_diario = os.path.join(pasta, nome)
+    concluido = False
+    with travado(_caminho_trava(caminho_diario), tempo_espera=0):
+        open(caminho_diario, 'a', encoding='utf-8').close()
+        yield caminho_diario
+        if not pendentes(caminho_diario):
+            os.remove(caminho_diario)
+            concluido = True
+    if concluido:
+        _apagar(caminho_diario)
+
+
+def recuperar(caminho_planilha, gravar, ao_concluir=None):
+    """
+    Retoma os diários de execuções interrompidas.
+
+    Diários com a trava livre (o processo que os abriu terminou) têm os
+    boletos pendentes compactados no livro; em seguida `ao_concluir` é
+    chamado para cada boleto do diário (ex.: mover o PDF que ficou na pasta
+    de entrada) e o diário é apagado.
+
+    Args:
+        gravar: Como em compactar()
+        ao_concluir: Função (registro_do_boleto, resultado, retomado), em que
+            retomado indica se o boleto foi compactado nesta recuperação
+
+    Returns:
+        int: Boletos levados ao livro nesta recuperação
+    """
+    incluidos = 0
+    for caminho_diario in sorted(glob.glob(os.path.join(pasta_diario(caminho_planilha), '*.jsonl'))):
+        try:
+            with travado(_caminho_trava(caminho_diario), tempo_espera=0):
+                if not os.path.exists(caminho_diario):
+                    continue
+                resultados_novos = compactar(caminho_diario, caminho_planilha, gravar)
+                incluidos += sum(1 for resultado in resultados_novos.values() if resultado['numero'])
+                boletos, _, resultados = _situacao(ler(caminho_diario))
+                if ao_concluir:
+                    for id_boleto, registro in boletos.items():
+                        ao_concluir(registro, resultados[id_boleto], id_boleto in resultados_novos)
+                os.remove(caminho_diario)
+        except TravaOcupada:
+            continue  # Diário de uma execução em andamento
+        _apagar(caminho_diario)
+    return incluidos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diário de lançamentos - Fusion Tech")
+    parser.add_argument('comando', choices=['mostrar'])
+    parser.add_argument('--planilha', default=ARQUIVO_EXCEL, help="Planilha do livro (padrão: a da automação)")
+    args = parser.parse_args(argv)
+
+    diarios = sorted(glob.glob(os.path.join(pasta_diario(args.planilha), '*.jsonl')))
+    if not diarios:
+        print("✓ Nenhum diário pendente")
+        return
+    for caminho_diario in diarios:
+        try:
+            with travado(_caminho_trava(caminho_diario), tempo_espera=0):
+                situacao = "interrompido (será retomado na próxima execução)"
+        except TravaOcupada:
+            situacao = "em andamento"
+        print(f"{os.path.basename(caminho_diario)}: {len(pendentes(caminho_diario))} boleto(s) pendente(s) - {situacao}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Esquema de Contas a Pagar - Fusion Tech
+Definição única das colunas do livro de contas a pagar e dos tipos usados
+em memória:
+
+- Fornecedor, Plano de contas e Forma de Pgto.: category (poucos valores
+  distintos repetidos em muitas linhas)
+- Dt. Emissão, Dt. Vencimento e Dt. Pagamento: datetime64
+- Vr. Título, Vr. Dev/Pag e Valor Total a Pagar: float64
+- Número: texto de largura fixa ('000051'); valores não numéricos, como a
+  linha "Total Geral" da planilha histórica, ficam como estão
+- Histórico: texto
+
+Textos em branco viram vazio (NA) só nas colunas de texto, sem passar uma
+expressão regular por todas as células da tabela.
+
+Uso:
+    df = esquema_contas.ler_planilha('dados/contasapagar_1.xlsx')
+    df = esquema_contas.tipar(df_qualquer)
+"""
+
+import pandas as pd
+
+COLUNAS_PADRAO = [
+    'Número',
+    'Fornecedor',
+    'Plano de contas',
+    'Histórico',
+    'Dt. Emissão',
+    'Dt. Vencimento',
+    'Dt. Pagamento',
+    'Vr. Título',
+    'Vr. Dev/Pag',
+    'Valor Total a Pagar',
+    'Forma de Pgto.',
+]
+COLUNAS_DATA = ['Dt. Emissão', 'Dt. Vencimento', 'Dt. Pagamento']
+COLUNAS_NUMERICAS = ['Vr. Título', 'Vr. Dev/Pag', 'Valor Total a Pagar']
+COLUNAS_CATEGORICAS = ['Fornecedor', 'Plano de contas', 'Forma de Pgto.']
+COLUNAS_TEXTO = ['Número', 'Histórico'] + COLUNAS_CATEGORICAS
+# Ausente na planilha histórica (contasapagar_1.xlsx)
+COLUNAS_OPCIONAIS = ['Valor Total a Pagar']
+
+LARGURA_NUMERO = 6
+
+# Leitura da planilha: Número como texto (sem virar int e perder os zeros)
+TIPOS_LEITURA = {'Número': str}
+
+# pandas 3: 'str' é o tipo de texto nativo (ausentes como NaN); antes dele, object
+TIPO_TEXTO = 'str' if int(pd.__version__.split('.')[0]) >= 3 else object
+
+
+def _como_texto(serie):
+    """Texto com ausentes preservados (astype(str) direto viraria NaN em 'nan' no pandas < 3)."""
+    return serie.astype(object).where(serie.notna()).astype(TIPO_TEXTO)
+
+
+def _sem_brancos(serie):
+    """Textos vazios ou só com espaços viram NA; espaços nas pontas são mantidos."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        brancos = [categoria for categoria in serie.cat.categories if not str(categoria).strip()]
+        return serie.cat.remove_categories(brancos) if brancos else serie
+    texto = _como_texto(serie)
+    return texto.mask(texto.str.strip() == '')
+
+
+def numero_largura_fixa(valores):
+    """'51', 51, 51.0 e '000051' viram '000051'; textos não numéricos ficam como estão."""
+    serie = pd.Series(valores)
+    if pd.api.types.is_float_dtype(serie) and (serie.dropna() % 1 == 0).all():
+        serie = serie.astype('Int64')
+    texto = _sem_brancos(serie).str.strip()
+    texto = texto.str.replace(r'\.0$', '', regex=True)
+    digitos = texto.str.fullmatch(r'\d+').fillna(False).astype(bool)
+    return texto.mask(digitos, texto.str.zfill(LARGURA_NUMERO))
+
+
+def numerados(valores):
+    """
+    Máscara vetorizada das linhas com Número válido ('Total Geral' e vazios
+    não são contas do livro), normalizada como baixas_contas.chaves_numero.
+    """
+    texto = pd.Series(valores, dtype=object).astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    return texto.str.fullmatch(r'\d+').to_numpy(dtype=bool, na_value=False)
+
+
+def normalizar_brancos(df):
+    """Textos em branco viram NA nas colunas de texto presentes (cópia do DataFrame)."""
+    df = df.copy()
+    for coluna in COLUNAS_TEXTO:
+        if coluna in df.columns:
+            df[coluna] = _sem_brancos(df[coluna])
+    return df
+
+
+def tipar(df):
+    """
+    Aplica o esquema às colunas presentes (as demais não são alteradas).
+
+    Returns:
+        pd.DataFrame: Cópia com os tipos do esquema
+    """
+    df = normalizar_brancos(df)
+    if 'Número' in df.columns:
+        df['Número'] = numero_largura_fixa(df['Número'])
+    if 'Histórico' in df.columns:
+        df['Histórico'] = _como_texto(df['Histórico'])
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype('category')
+    for coluna in COLUNAS_DATA:
+        if coluna in df.columns:
+            df[coluna] = pd.to_datetime(df[coluna], errors='coerce')
+    for coluna in COLUNAS_NUMERICAS:
+        if coluna in df.columns:
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype('float64')
+    return df
+
+
+def ler_planilha(caminho, **opcoes):
+    """pd.read_excel com Número como texto, seguido de tipar()."""
+    return tipar(pd.read_excel(caminho, dtype=TIPOS_LEITURA, **opcoes))
+
+
+def sem_categorias(df):
+    """Colunas categóricas de volta a texto (ex.: para edição livre no st.data_editor)."""
+    df = df.copy()
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns and isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = _como_texto(df[coluna])
+    return df
+
+
+def memoria_por_linha(df):
+    """Bytes por linha (memory_usage com deep=True)."""
+    return df.memory_usage(deep=True).sum() / max(len(df), 1)
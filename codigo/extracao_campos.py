@@ -0,0 +1,436 @@
+"""
+Motor de Extração de Campos - Fusion Tech
+Padrões de extração de boletos compilados uma única vez e compartilhados
+pela automação (automacao_boletos) e pelo dashboard integrado.
+
+Cada padrão carrega um "gatilho": um trecho literal que precisa existir no
+texto para que a regex tenha chance de casar. O texto é normalizado uma vez
+por documento e os padrões sem gatilho presente são descartados sem rodar
+a regex, preservando a ordem de prioridade de cada campo.
+"""
+
+import hashlib
+import re
+
+from layouts_boleto import LAYOUTS, detectar_layout, registrar as registrar_layout
+from linha_digitavel import ler_linha_digitavel
+from medicao_etapas import etapa
+
+FLAGS = re.IGNORECASE | re.MULTILINE
+
+# Variantes de comportamento: a automação (CLI) escolhe o valor mais
+# frequente entre todos os padrões; o dashboard fica com o primeiro válido.
+VARIANTE_AUTOMACAO = 'automacao'
+VARIANTE_DASHBOARD = 'dashboard'
+
+MESES = {
+    'janeiro': '01', 'fevereiro': '02', 'março': '03', 'marco': '03',
+    'abril': '04', 'maio': '05', 'junho': '06',
+    'julho': '07', 'agosto': '08', 'setembro': '09',
+    'outubro': '10', 'novembro': '11', 'dezembro': '12'
+}
+
+# ---------------------------------------------------------------------------
+# Padrões (regex, gatilho) - do mais específico ao mais genérico
+# ---------------------------------------------------------------------------
+
+PADROES_VALOR = {
+    VARIANTE_AUTOMACAO: [
+        # ALTA PRIORIDADE: Valor líquido final (evita valores de tabelas)
+        (r'VALOR\s+L.QUIDO\s+R\$\s*\n?\s*([\d.,]+)', 'valor'),  # Braspress - valor final
+        # Safra - formato com R$ antes: "(=) Valor do Documento\n01 R$ 1.217,77"
+        (r'\(=\)\s*Valor\s+do\s+Documento\s*\n.*?R\$\s*([\d.,]+)', '(=)'),  # Safra com R$
+        (r'\(=\)\s*Valor\s+do\s+Documento\s*\n\s*([\d.,]+)', '(=)'),  # Safra - linha abaixo
+        (r'Valor\s+do\s+Documento\s*\n.*?R\$\s*([\d.,]+)', 'valor'),  # Safra alternativo com R$
+        (r'Valor\s+do\s+Documento\s*\n\s*([\d.,]+)', 'valor'),  # Safra alternativo
+        # MÉDIA PRIORIDADE: Padrões específicos
+        (r'\(=\)\s*Valor\s+do\s+Doc\.\s+([\d.,]+)', '(=)'),  # Boletos padrão
+        (r'Valor\s+do\s+Documento[:\s]*([\d.,]+)', 'valor'),  # Mesmo nível
+        (r'Valor\s+Cobrado.*?\n.*?([\d.,]+)', 'valor'),
+        # BAIXA PRIORIDADE: Braspress tabular
+        (r'^([\d]+,\d{2})\s+DM', 'dm'),  # Braspress tabela (pode ser subtotal)
+        (r'^\s*([\d.]+,\d{2})\s*$', ','),  # Valor sozinho na linha
+    ],
+    VARIANTE_DASHBOARD: [
+        # ALTA PRIORIDADE: Valor líquido final (evita valores de tabelas)
+        (r'VALOR\s+L.QUIDO\s+R\$\s*\n?\s*([\d.,]+)', 'valor'),  # Braspress - valor final
+        # Safra - formato com R$ antes: "(=) Valor do Documento\n01 R$ 1.217,77"
+        (r'\(=\)\s*Valor\s+do\s+Documento\s*\n.*?R\$\s*([\d.,]+)', '(=)'),  # Safra com R$
+        (r'\(=\)\s*Valor\s+do\s+Documento\s*\n\s*([\d.,]+)', '(=)'),  # Safra - linha abaixo
+        (r'Valor\s+do\s+Documento\s*\n.*?R\$\s*([\d.,]+)', 'valor'),  # Safra alternativo com R$
+        (r'Valor\s+do\s+Documento\s*\n\s*([\d.,]+)', 'valor'),  # Safra alternativo
+        # MÉDIA PRIORIDADE: Padrões específicos
+        (r'\(=\)\s*Valor\s+do\s+Doc[.:]\s+([\d.,]+)', '(=)'),  # Boletos padrão
+        (r'Valor\s+do\s+Documento[:\s]*([\d.,]+)', 'valor'),  # Mesmo nível
+        (r'Valor\s+do\s+Doc[.:]\s*([\d.,]+)', 'valor'),
+        (r'Documento\s*\n\s*([\d.,]+)', 'documento'),  # Valor sozinho após "Documento"
+        # BAIXA PRIORIDADE: Braspress tabular
+        (r'^([\d]+,\d{2})\s+DM', 'dm'),  # Braspress tabela (pode ser subtotal)
+        (r'^\s*([\d.]+,\d{2})\s*$', ','),  # Valor sozinho na linha
+    ],
+}
+
+# Padrões genéricos de valor: casam com linhas de tabela e subtotais, então
+# não bastam para encerrar a leitura antecipada de um PDF (ver leitura_pdf)
+PADROES_VALOR_FRACOS = {
+    r'Valor\s+Cobrado.*?\n.*?([\d.,]+)',
+    r'Documento\s*\n\s*([\d.,]+)',
+    r'^([\d]+,\d{2})\s+DM',
+    r'^\s*([\d.]+,\d{2})\s*$',
+}
+
+CAMPOS_OBRIGATORIOS = frozenset({'valor', 'vencimento'})
+
+PADROES_DATA_EMISSAO = [
+    # Safra - formato: "Data Documento Vencimento ... 11/06/2025 11/08/2025" (primeira data)
+    (r'Data\s+Documento\s+Vencimento.*?\n.*?\n(\d{2}/\d{2}/\d{4})', 'vencimento'),
+    # Safra - formato: "Data do Documento ... 11/06/2025"
+    (r'Data\s+do\s+Documento[^\n]*\n\s*(\d{2}/\d{2}/\d{4})', 'documento'),
+    # Braspress - formato: "Emissão: 14 de Outubro de 2025"
+    (r'Emiss[ãa]o:\s+(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})', 'emiss'),
+    # Formato genérico: Data de Emissão / Data Documento
+    (r'Data\s+(?:de\s+)?Emiss[ãa]o[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})', 'emiss'),
+    (r'Data\s+Documento[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})', 'documento'),
+]
+
+PADROES_VENCIMENTO = [
+    # Safra - formato: "Data Documento Vencimento ... 11/06/2025 11/08/2025" (pega a segunda data)
+    (r'Data\s+Documento\s+Vencimento.*?\n.*?\n\d{2}/\d{2}/\d{4}\s+(\d{2}/\d{2}/\d{4})', 'vencimento'),
+    (r'Vencimento\s*\n\s*(\d{2}/\d{2}/\d{4})', 'vencimento'),  # Safra - linha abaixo direto
+    (r'(\d{2}/\d{2}/\d{4})\s+(?:REAL|Ag\./Cód)', None),  # Braspress - antes de REAL ou Ag./Cód
+    (r'Vencimento[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})', 'vencimento'),  # Mesmo nível
+    (r'Data[:\s]*(?:de\s*)?Vencimento[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})', 'vencimento'),  # Genérico
+]
+
+PADROES_FORNECEDOR = [
+    # ALTA PRIORIDADE: Formatos Safra (mais específicos primeiro)
+    # Safra - formato: "Beneficiário CNPJ / CPF Ag./Cód.Beneficiário\nSUMAY DO BRASIL LTDA"
+    (r'Benefici[áa]rio\s+CNPJ\s*/\s*CPF[^\n]+\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)', 'benefici'),
+    # Safra - formato: "Beneficiário Ag./Cód... Motivos...\nSUMAY DO BRASIL LTDA"
+    (r'Benefici[áa]rio\s+Ag\./C[óo]d\.[^\n]+\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)', 'benefici'),
+    # Braspress - só pega se tiver "Final" E não tiver "Compensa"
+    (r'Benefici[áa]rio\s+Final[^\n]*\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+?)(?:\s+\d|\s+CNPJ)', 'benefici'),
+    (r'Benefici[áa]rio\s*\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)', 'benefici'),  # Safra - linha nova
+    # MÉDIA PRIORIDADE: Mesmo nível
+    (r'Benefici[áa]rio[:\s]*([A-ZÀ-Ú0-9.,\s&/-]+)', 'benefici'),
+    (r'Cedente[:\s]*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)', 'cedente'),
+    (r'Sacador[:\s]*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)', 'sacador'),
+]
+
+PADROES_NUMERO_DOCUMENTO = {
+    VARIANTE_AUTOMACAO: [
+        (r'N[úu]mero\s+do\s+Doc[.:]\s*([\w\/.-]+)', 'doc'),
+        (r'Nº\s+do\s+Doc[.:]\s*([\w\/.-]+)', 'nº'),
+        (r'N[úu]mero\s+do\s+Documento[:\s]*([\w\/.-]+)', 'documento'),
+        (r'N[úu]mero\s+da\s+Fatura[:\s]*([\w\/.-]+)', 'fatura'),
+        (r'Nº\s+Fatura[:\s]*([\w\/.-]+)', 'nº'),
+    ],
+    VARIANTE_DASHBOARD: [
+        (r'N[úu]mero\s+do\s+Documento\s*\n\s*(\S+)', 'documento'),
+        (r'Número\s+do\s+Documento\s*\n\s*(\S+)', 'documento'),
+        (r'N[úu]mero\s+do\s+Doc[.:]\s*(\S+)', 'doc'),
+        (r'Nº\s+do\s+Doc[.:]\s*(\S+)', 'nº'),
+        (r'N[úu]mero\s+da\s+Fatura[:\s]*(\d+)', 'fatura'),
+        (r'Nº\s+Fatura[:\s]*(\d+)', 'nº'),
+    ],
+}
+
+
+def _compilar(padroes):
+    """Compila a lista de (regex, gatilho) uma única vez, na importação."""
+    return tuple(
+        (re.compile(regex, FLAGS), gatilho.casefold() if gatilho else None)
+        for regex, gatilho in padroes
+    )
+
+
+_VALOR = {variante: _compilar(p) for variante, p in PADROES_VALOR.items()}
+_VALOR_FORTES = {
+    variante: _compilar([p for p in padroes if p[0] not in PADROES_VALOR_FRACOS])
+    for variante, padroes in PADROES_VALOR.items()
+}
+_DATA_EMISSAO = _compilar(PADROES_DATA_EMISSAO)
+_VENCIMENTO = _compilar(PADROES_VENCIMENTO)
+_FORNECEDOR = _compilar(PADROES_FORNECEDOR)
+_NUMERO_DOCUMENTO = {variante: _compilar(p) for variante, p in PADROES_NUMERO_DOCUMENTO.items()}
+
+
+def normalizar_texto(texto):
+    """Versão do texto usada para checar gatilhos (calculada uma vez por documento)."""
+    return texto.casefold()
+
+
+def _candidatos(padroes, texto_norm):
+    """Padrões cujo gatilho aparece no texto, na ordem de prioridade."""
+    for regex, gatilho in padroes:
+        if gatilho is None or gatilho in texto_norm:
+            yield regex
+
+
+def _converter_valor(bruto):
+    """Converte '1.217,77' em 1217.77; None se inválido ou fora da faixa razoável."""
+    valor_str = bruto.strip().replace('.', '').replace(',', '.')
+    try:
+        valor = float(valor_str)
+    except ValueError:
+        return None
+    # Validar se é um valor razoável (entre R$10 e R$1.000.000)
+    if 10 <= valor <= 1000000:
+        return valor
+    return None
+
+
+def _montar_data(grupos):
+    """Monta DD/MM/AAAA a partir dos grupos capturados (completa, separada ou por extenso)."""
+    if len(grupos) == 1:
+        return grupos[0]
+    dia, mes, ano = grupos
+    if mes.lower() in MESES:
+        # Formato por extenso: "14 de Outubro de 2025"
+        return f"{dia.zfill(2)}/{MESES[mes.lower()]}/{ano}"
+    return f"{dia}/{mes}/{ano}"
+
+
+# ---------------------------------------------------------------------------
+# Extratores por campo: recebem a lista de padrões compilados a usar
+# ---------------------------------------------------------------------------
+
+def _valor_por_padroes(texto, padroes, variante, texto_norm):
+    if variante == VARIANTE_DASHBOARD:
+        # Tentar padrões em ordem de prioridade e retornar o primeiro válido
+        for regex in _candidatos(padroes, texto_norm):
+            for match in regex.findall(texto):
+                valor = _converter_valor(match)
+                if valor is not None:
+                    return valor
+        return None
+
+    valores_encontrados = []
+    for regex in _candidatos(padroes, texto_norm):
+        for match in regex.findall(texto):
+            valor = _converter_valor(match)
+            if valor is not None:
+                valores_encontrados.append(valor)
+
+    # Retornar o valor mais comum
+    if valores_encontrados:
+        return max(set(valores_encontrados), key=valores_encontrados.count)
+    return None
+
+
+def _data_por_padroes(texto, padroes, variante, texto_norm):
+    for regex in _candidatos(padroes, texto_norm):
+        match = regex.search(texto)
+        if match:
+            return _montar_data(match.groups())
+    return None
+
+
+def _fornecedor_por_padroes(texto, padroes, variante, texto_norm):
+    for regex in _candidatos(padroes, texto_norm):
+        match = regex.search(texto)
+        if match:
+            # Remover possíveis quebras de linha e caracteres extras
+            fornecedor = ' '.join(match.group(1).split())
+            # Filtrar nomes inválidos
+            if 'Ficha' in fornecedor or 'Compensa' in fornecedor:
+                continue  # Pular e tentar próximo padrão
+            # Limitar tamanho
+            fornecedor = fornecedor[:60]
+            # Validar que não é só espaços ou muito curto
+            if len(fornecedor) > 5:
+                return fornecedor
+    return None
+
+
+def _numero_por_padroes(texto, padroes, variante, texto_norm):
+    for regex in _candidatos(padroes, texto_norm):
+        match = regex.search(texto)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+_EXTRATORES = {
+    'valor': _valor_por_padroes,
+    'vencimento': _data_por_padroes,
+    'data_emissao': _data_por_padroes,
+    'fornecedor': _fornecedor_por_padroes,
+    'numero_documento': _numero_por_padroes,
+}
+# Nome da etapa medida (medicao_etapas) para cada campo
+_ETAPAS = {campo: f'extrair_{campo}' for campo in _EXTRATORES}
+
+FORNECEDOR_NAO_IDENTIFICADO = "Fornecedor não identificado"
+
+
+def _cascata(campo, variante):
+    """Lista completa de padrões do campo (usada sem layout ou como fallback)."""
+    if campo == 'valor':
+        return _VALOR[variante]
+    if campo == 'vencimento':
+        return _VENCIMENTO
+    if campo == 'data_emissao':
+        return _DATA_EMISSAO
+    if campo == 'fornecedor':
+        return _FORNECEDOR
+    return _NUMERO_DOCUMENTO[variante]
+
+
+def _padroes_layout(layout, variante):
+    """Padrões do layout para a variante (campos com dict por variante só valem na variante listada)."""
+    padroes_variante = {}
+    for campo, padroes in layout['padroes'].items():
+        if isinstance(padroes, dict):
+            padroes = padroes.get(variante)
+        if padroes:
+            padroes_variante[campo] = _compilar(padroes)
+    return padroes_variante
+
+
+# Padrões de cada layout registrado, por variante, compilados uma vez
+_PADROES_LAYOUT = {
+    variante: {chave: _padroes_layout(layout, variante) for chave, layout in LAYOUTS.items()}
+    for variante in (VARIANTE_AUTOMACAO, VARIANTE_DASHBOARD)
+}
+
+
+# ---------------------------------------------------------------------------
+# API pública
+# ---------------------------------------------------------------------------
+
+def extrair_valor(texto, variante=VARIANTE_AUTOMACAO, texto_norm=None):
+    """Extrai o valor do boleto do texto"""
+    linha = ler_linha_digitavel(texto)
+    if linha and linha['valor'] is not None:
+        return linha['valor']
+    if texto_norm is None:
+        texto_norm = normalizar_texto(texto)
+    return _valor_por_padroes(texto, _VALOR[variante], variante, texto_norm)
+
+
+def extrair_data_emissao(texto, texto_norm=None):
+    """Extrai a data de emissão do boleto"""
+    if texto_norm is None:
+        texto_norm = normalizar_texto(texto)
+    return _data_por_padroes(texto, _DATA_EMISSAO, None, texto_norm)
+
+
+def extrair_vencimento(texto, texto_norm=None):
+    """Extrai a data de vencimento do texto"""
+    linha = ler_linha_digitavel(texto)
+    if linha and linha['vencimento'] is not None:
+        return linha['vencimento']
+    if texto_norm is None:
+        texto_norm = normalizar_texto(texto)
+    return _data_por_padroes(texto, _VENCIMENTO, None, texto_norm)
+
+
+def extrair_fornecedor(texto, texto_norm=None):
+    """Extrai o nome do fornecedor/beneficiário do texto"""
+    if texto_norm is None:
+        texto_norm = normalizar_texto(texto)
+    fornecedor = _fornecedor_por_padroes(texto, _FORNECEDOR, None, texto_norm)
+    return fornecedor or FORNECEDOR_NAO_IDENTIFICADO
+
+
+def extrair_numero_documento(texto, variante=VARIANTE_AUTOMACAO, texto_norm=None):
+    """Extrai o número do documento/fatura"""
+    if texto_norm is None:
+        texto_norm = normalizar_texto(texto)
+    return _numero_por_padroes(texto, _NUMERO_DOCUMENTO[variante], variante, texto_norm)
+
+
+def extrair_campos(texto, variante=VARIANTE_AUTOMACAO):
+    """
+    Extrai todos os campos do boleto de uma vez.
+
+    Valor e vencimento vêm da linha digitável quando ela existe e é válida.
+    Para o que faltar, o layout do emissor é detectado (layouts_boleto) e só
+    os padrões dele rodam; um campo não encontrado cai na cascata completa.
+    O texto é normalizado uma única vez e reaproveitado por todos os campos.
+
+    Returns:
+        dict: valor, vencimento, data_emissao, fornecedor, numero_documento,
+            codigo_barras (None sem linha digitável), layout detectado e
+            fallback (se algum campo caiu na cascata completa)
+    """
+    texto_norm = normalizar_texto(texto)
+    with etapa('linha_digitavel'):
+        linha = ler_linha_digitavel(texto) or {}
+    layout = detectar_layout(texto, linha.get('banco'))
+    padroes_layout = _PADROES_LAYOUT[variante].get(layout, {})
+
+    campos = {'valor': linha.get('valor'), 'vencimento': linha.get('vencimento')}
+    fallback = False
+    for campo, extrator in _EXTRATORES.items():
+        if campos.get(campo) is not None:
+            continue
+        with etapa(_ETAPAS[campo]):
+            resultado = None
+            if campo in padroes_layout:
+                resultado = extrator(texto, padroes_layout[campo], variante, texto_norm)
+            if resultado is None:
+                fallback = True
+                resultado = extrator(texto, _cascata(campo, variante), variante, texto_norm)
+        campos[campo] = resultado
+
+    if campos['fornecedor'] is None:
+        campos['fornecedor'] = FORNECEDOR_NAO_IDENTIFICADO
+    campos['codigo_barras'] = linha.get('codigo_barras')
+    campos['layout'] = layout
+    campos['fallback'] = fallback
+    registrar_layout(layout, fallback)
+    return campos
+
+
+def obrigatorios_encontrados(texto, variante=VARIANTE_AUTOMACAO):
+    """
+    Campos obrigatórios (CAMPOS_OBRIGATORIOS) presentes no texto.
+
+    Uma linha digitável válida já resolve os dois campos. Sem ela, o valor
+    só conta se vier de um padrão específico (fora de PADROES_VALOR_FRACOS);
+    usado para encerrar a leitura de páginas.
+
+    Returns:
+        set: Subconjunto de CAMPOS_OBRIGATORIOS
+    """
+    linha = ler_linha_digitavel(texto) or {}
+    encontrados = {campo for campo in CAMPOS_OBRIGATORIOS if linha.get(campo) is not None}
+    if encontrados >= CAMPOS_OBRIGATORIOS:
+        return encontrados
+
+    texto_norm = normalizar_texto(texto)
+    if 'vencimento' not in encontrados and _data_por_padroes(texto, _VENCIMENTO, variante, texto_norm):
+        encontrados.add('vencimento')
+    if 'valor' not in encontrados:
+        for regex in _candidatos(_VALOR_FORTES[variante], texto_norm):
+            if any(_converter_valor(match) is not None for match in regex.findall(texto)):
+                encontrados.add('valor')
+                break
+    return encontrados
+
+
+# ---------------------------------------------------------------------------
+# Versão do extrator (invalida caches quando padrões ou regras mudam)
+# ---------------------------------------------------------------------------
+
+# Incrementar ao alterar regras de pós-processamento que não estão nos padrões
+REVISAO_EXTRATOR = 5
+
+
+def _calcular_versao():
+    conteudo = repr((
+        REVISAO_EXTRATOR,
+        sorted(PADROES_VALOR.items()),
+        sorted(PADROES_VALOR_FRACOS),
+        PADROES_DATA_EMISSAO,
+        PADROES_VENCIMENTO,
+        PADROES_FORNECEDOR,
+        sorted(PADROES_NUMERO_DOCUMENTO.items()),
+        LAYOUTS,
+    ))
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]
+
+
+VERSAO_EXTRATOR = _calcular_versao()
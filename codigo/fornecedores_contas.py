@@ -0,0 +1,441 @@
+"""
+Cadastro de Fornecedores - Fusion Tech
+Normalização dos nomes de fornecedor e agrupamento das grafias de um
+mesmo fornecedor sob um código canônico.
+
+O mesmo fornecedor aparece com grafias diferentes: com e sem acento,
+"S.A." / "S/A" / "SA", o código e o nome fantasia do ERP colados à razão
+social ("2 - GOLDEN DISTRIBUIDORA LTDAGOLDEN"), e nomes cortados em 60
+caracteres ou sem as últimas palavras pela extração dos PDFs. Cada nome
+vira uma chave (chave()): sem acentos, pontuação, código do ERP, sufixo
+societário (LTDA, SA, ME, EPP, EIRELI...) e o que vem depois dele, e sem
+preposições. Chaves iguais são o mesmo fornecedor; além disso, cada chave
+só é comparada com as do seu bloco (mesma primeira palavra ou mesmo resto
+do nome), sem comparar todos os pares:
+
+- uma chave que é início de outra com a mesma primeira palavra (nome
+  cortado) se junta a ela, se não houver mais de um jeito de completá-la
+- chaves vizinhas na ordem alfabética do bloco com trigramas quase iguais
+  (erros de digitação) se juntam
+
+Os apelidos ficam em <planilha>.fornecedores.sqlite3 (nome -> código do
+fornecedor e nome canônico). A inclusão de boletos consulta a tabela antes
+de gravar e lança o nome canônico; nomes novos entram na tabela na hora.
+
+Para executar:
+    python codigo/fornecedores_contas.py indexar dados/contasapagar_1.xlsx
+    python codigo/fornecedores_contas.py mostrar dados/contasapagar_1.xlsx
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import unicodedata
+from collections import defaultdict
+
+import pandas as pd
+
+import base_contas
+from trava_arquivo import travado
+
+# Grafias dos sufixos societários -> forma canônica
+SUFIXOS = {
+    'LTDA': 'LTDA', 'LIMITADA': 'LTDA', 'LTD': 'LTDA',
+    'SA': 'SA', 'ME': 'ME', 'EPP': 'EPP', 'MEI': 'MEI',
+    'EIRELI': 'EIRELI', 'SS': 'SS',
+}
+PREPOSICOES = {'DA', 'DAS', 'DE', 'DO', 'DOS', 'E'}
+# Menor chave que pode ser tomada como nome cortado de outra
+TAMANHO_MINIMO_PREFIXO = 10
+# Vizinhos comparados por trigramas na ordem alfabética de cada bloco
+JANELA_SIMILARES = 5
+SIMILARIDADE_MINIMA = 0.8
+
+_CODIGO_ERP = re.compile(r'^\s*\d+\s*-\s*')
+_SA = re.compile(r'\bS\s*(?:\.\s*A\b\.?|/\s*A)')
+_SIGLAS = re.compile(r'\b(M\.E|E\.P\.P|L\.T\.D\.A)\b\.?')
+# Razão social e nome fantasia colados ("LTDAGOLDEN")
+_SUFIXO_COLADO = re.compile(r'\b(LTDA|EIRELI)(?=[A-Z])')
+# Siglas curtas só contam como coladas antes da primeira palavra repetida ("MEGOLDEN")
+_SIGLA_COLADA = re.compile(r'^(\w+)(.*\b(?:SA|ME|EPP|MEI))(?=\1)')
+# Nome fantasia igual à razão social, colado ("DIVERSOSDIVERSOS")
+_REPETIDO = re.compile(r'^(.{3,}?)\1$')
+_NAO_ALFANUMERICO = re.compile(r'[^A-Z0-9]+')
+
+
+def caminho_fornecedores(caminho_planilha):
+    """Tabela de apelidos (mesmo nome da planilha, extensão .fornecedores.sqlite3)."""
+    return os.path.splitext(str(caminho_planilha))[0] + '.fornecedores.sqlite3'
+
+
+def _caminho_trava(caminho_planilha):
+    return os.path.splitext(str(caminho_planilha))[0] + '.fornecedores.lock'
+
+
+# ---------------------------------------------------------------------------
+# Normalização
+# ---------------------------------------------------------------------------
+
+def normalizar(nome):
+    """Nome em maiúsculas, sem acentos, código do ERP e pontuação, com os sufixos canônicos."""
+    if nome is None or pd.isna(nome):
+        return ''
+    texto = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode('ascii').upper()
+    texto = _CODIGO_ERP.sub('', texto).strip()
+    texto = _REPETIDO.sub(r'\1', texto)
+    texto = _SA.sub(' SA ', texto)
+    texto = _SIGLAS.sub(lambda m: m.group(1).replace('.', ''), texto)
+    texto = _SUFIXO_COLADO.sub(r'\1 ', texto)
+    texto = _SIGLA_COLADA.sub(r'\1\2 ', texto)
+    palavras = _NAO_ALFANUMERICO.sub(' ', texto).split()
+    return ' '.join(SUFIXOS.get(palavra, palavra) for palavra in palavras)
+
+
+def chave(nome):
+    """
+    Chave de comparação: o nome normalizado até o sufixo societário (o que
+    vem depois é nome fantasia ou filial), sem sufixos e sem preposições.
+    """
+    palavras = normalizar(nome).split()
+    for posicao, palavra in enumerate(palavras[1:], start=1):
+        if palavra in SUFIXOS.values():
+            palavras = palavras[:posicao]
+            break
+    # A primeira palavra fica mesmo se for uma sigla ("ME SERVICOS LTDA")
+    return ' '.join(palavras[:1] + [p for p in palavras[1:] if p not in PREPOSICOES and p not in SUFIXOS.values()])
+
+
+# ---------------------------------------------------------------------------
+# Agrupamento
+# ---------------------------------------------------------------------------
+
+def _trigramas(texto):
+    texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _similares(a, b, trigramas):
+    ta, tb = trigramas(a), trigramas(b)
+    return len(ta & tb) / len(ta | tb) >= SIMILARIDADE_MINIMA
+
+
+def _blocos(chave_nome):
+    """Blocos da chave no índice: a primeira palavra e o resto do nome."""
+    primeira, _, resto = chave_nome.partition(' ')
+    return primeira, resto
+
+
+def agrupar_chaves(chaves):
+    """
+    Agrupa chaves do mesmo fornecedor.
+
+    Cada chave só é comparada com as do mesmo bloco: as que têm a mesma
+    primeira palavra (nomes cortados e erros no fim do nome) e as que têm
+    o mesmo resto do nome (erros na primeira palavra).
+
+    Args:
+        chaves: Chaves distintas (ver chave())
+
+    Returns:
+        dict: chave -> representante do grupo (a menor chave do grupo)
+    """
+    chaves = sorted(set(chaves))
+    pai = {c: c for c in chaves}
+
+    def raiz(c):
+        while pai[c] != c:
+            pai[c] = pai[pai[c]]
+            c = pai[c]
+        return c
+
+    def unir(a, b):
+        ra, rb = raiz(a), raiz(b)
+        if ra != rb:
+            pai[max(ra, rb)] = min(ra, rb)
+
+    cache = {}
+
+    def trigramas(texto):
+        if texto not in cache:
+            cache[texto] = _trigramas(texto)
+        return cache[texto]
+
+    por_primeira, por_resto = defaultdict(list), defaultdict(list)
+    for c in chaves:
+        primeira, resto = _blocos(c)
+        if primeira:
+            por_primeira[primeira].append(c)
+        if resto:
+            por_resto[resto].append(c)
+
+    for bloco in por_primeira.values():
+        # Em ordem alfabética, as chaves que começam por `c` vêm logo depois dela
+        for i, c in enumerate(bloco):
+            if len(c) >= TAMANHO_MINIMO_PREFIXO:
+                extensoes = []
+                for seguinte in bloco[i + 1:]:
+                    if not seguinte.startswith(c):
+                        break
+                    extensoes.append(seguinte)
+                # Nome cortado só se junta quando há um único jeito de completá-lo
+                if extensoes and all(max(extensoes, key=len).startswith(e) for e in extensoes):
+                    for e in extensoes:
+                        unir(c, e)
+    for bloco in [*por_primeira.values(), *por_resto.values()]:
+        for i, c in enumerate(bloco):
+            for vizinho in bloco[i + 1:i + 1 + JANELA_SIMILARES]:
+                if _similares(c, vizinho, trigramas):
+                    unir(c, vizinho)
+
+    return {c: raiz(c) for c in chaves}
+
+
+# ---------------------------------------------------------------------------
+# Tabela de apelidos
+# ---------------------------------------------------------------------------
+
+def _conectar(caminho_planilha):
+    return _criar_tabelas(sqlite3.connect(caminho_fornecedores(caminho_planilha)))
+
+
+def _criar_tabelas(conexao):
+    conexao.executescript("""
+        CREATE TABLE IF NOT EXISTS fornecedores (
+            id INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS apelidos (
+            nome TEXT PRIMARY KEY,
+            chave TEXT NOT NULL,
+            resto TEXT NOT NULL,
+            fornecedor_id INTEGER NOT NULL REFERENCES fornecedores (id)
+        );
+        CREATE INDEX IF NOT EXISTS apelidos_chave ON apelidos (chave);
+        CREATE INDEX IF NOT EXISTS apelidos_resto ON apelidos (resto);
+    """)
+    return conexao
+
+
+def _apelidos_dos_blocos(conexao, chaves):
+    """Apelidos já gravados nos mesmos blocos das chaves (ver agrupar_chaves())."""
+    blocos = [_blocos(c) for c in chaves]
+    encontrados = set()
+    for primeira in sorted({primeira for primeira, _ in blocos if primeira}):
+        encontrados.update(conexao.execute(
+            "SELECT nome, chave, fornecedor_id FROM apelidos WHERE chave = ? OR (chave >= ? AND chave < ?)",
+            (primeira, primeira + ' ', primeira + '!'),
+        ))
+    for resto in sorted({resto for _, resto in blocos if resto}):
+        encontrados.update(conexao.execute(
+            "SELECT nome, chave, fornecedor_id FROM apelidos WHERE resto = ?", (resto,)
+        ))
+    return sorted(encontrados)
+
+
+def _codigo(conexao, nome):
+    linha = conexao.execute("SELECT fornecedor_id FROM apelidos WHERE nome = ?", (nome,)).fetchone()
+    return linha[0] if linha else None
+
+
+def _indexar(conexao, contagem):
+    """
+    Inclui na tabela os nomes ainda sem apelido.
+
+    Args:
+        contagem: Series nome -> quantidade de registros (decide o nome
+            canônico de um fornecedor novo: o mais usado, depois o mais longo)
+
+    Returns:
+        dict: novos (nomes incluídos), fornecedores (códigos criados) e
+            fusoes (códigos que passaram a ser um só)
+    """
+    contagem = contagem[[_codigo(conexao, nome) is None for nome in contagem.index]]
+    resumo = {'novos': 0, 'fornecedores': 0, 'fusoes': 0}
+    if contagem.empty:
+        return resumo
+
+    # Nome sem nenhuma letra ou número aproveitável vira a própria chave
+    novas_chaves = {nome: chave(nome) or nome for nome in contagem.index}
+    existentes = _apelidos_dos_blocos(conexao, novas_chaves.values())
+    grupos = agrupar_chaves(list(novas_chaves.values()) + [c for _, c, _ in existentes])
+
+    codigos_por_grupo = defaultdict(set)
+    for _, c, codigo in existentes:
+        codigos_por_grupo[grupos[c]].add(codigo)
+    # Grupos que juntaram códigos diferentes ficam com o mais antigo
+    for codigos in codigos_por_grupo.values():
+        if len(codigos) > 1:
+            menor = min(codigos)
+            outros = sorted(codigos - {menor})
+            marcadores = ','.join('?' * len(outros))
+            conexao.execute(f"UPDATE apelidos SET fornecedor_id = ? WHERE fornecedor_id IN ({marcadores})",
+                            [menor, *outros])
+            conexao.execute(f"DELETE FROM fornecedores WHERE id IN ({marcadores})", outros)
+            resumo['fusoes'] += len(outros)
+            codigos.intersection_update({menor})
+
+    nomes_por_grupo = defaultdict(list)
+    for nome, c in novas_chaves.items():
+        nomes_por_grupo[grupos[c]].append(nome)
+    apelidos = []
+    for grupo, nomes in nomes_por_grupo.items():
+        if codigos_por_grupo.get(grupo):
+            codigo = next(iter(codigos_por_grupo[grupo]))
+        else:
+            canonico = max(nomes, key=lambda nome: (contagem[nome], len(nome), nome))
+            codigo = conexao.execute("INSERT INTO fornecedores (nome) VALUES (?)", (canonico,)).lastrowid
+            resumo['fornecedores'] += 1
+        apelidos += [(nome, novas_chaves[nome], _blocos(novas_chaves[nome])[1], codigo) for nome in nomes]
+    conexao.executemany("INSERT INTO apelidos VALUES (?, ?, ?, ?)", apelidos)
+    resumo['novos'] = len(apelidos)
+    return resumo
+
+
+def _nomes_do_livro(caminho_planilha):
+    livro, _ = base_contas.ler_livro(caminho_planilha)
+    if 'Fornecedor' not in livro.columns:
+        return pd.Series(dtype='int64')
+    return livro['Fornecedor'].dropna().astype(str).value_counts()
+
+
+def indexar(caminho_planilha, nomes=None):
+    """
+    Inclui na tabela de apelidos os nomes ainda desconhecidos.
+
+    Args:
+        nomes: Nomes a incluir (padrão: os fornecedores do livro, pesados
+            pela quantidade de registros de cada um)
+
+    Returns:
+        dict: novos, fornecedores e fusoes (ver _indexar)
+    """
+    with travado(_caminho_trava(caminho_planilha)):
+        nova = not os.path.exists(caminho_fornecedores(caminho_planilha))
+        conexao = _conectar(caminho_planilha)
+        try:
+            with conexao:
+                resumo = {'novos': 0, 'fornecedores': 0, 'fusoes': 0}
+                # Tabela nova começa pelos nomes já lançados no livro
+                if (nova or nomes is None) and base_contas.versao_livro(caminho_planilha):
+                    resumo = _indexar(conexao, _nomes_do_livro(caminho_planilha))
+                if nomes is not None:
+                    contagem = pd.Series(list(nomes), dtype=object).dropna().astype(str).value_counts()
+                    parcial = _indexar(conexao, contagem)
+                    resumo = {campo: resumo[campo] + parcial[campo] for campo in resumo}
+                return resumo
+        finally:
+            conexao.close()
+
+
+def identificar(caminho_planilha, nomes):
+    """
+    Código e nome canônico do fornecedor de cada nome.
+
+    Nomes desconhecidos entram na tabela antes (indexar()).
+
+    Returns:
+        DataFrame: fornecedor_id e fornecedor alinhados a `nomes` (vazios
+            para nomes vazios)
+    """
+    nomes = pd.Series(nomes).astype(object)
+    distintos = nomes.dropna().astype(str).unique()
+    indexar(caminho_planilha, distintos)
+    conexao = _conectar(caminho_planilha)
+    try:
+        consulta = """SELECT a.fornecedor_id, f.nome FROM apelidos a
+                      JOIN fornecedores f ON f.id = a.fornecedor_id WHERE a.nome = ?"""
+        tabela = pd.DataFrame(
+            [conexao.execute(consulta, (nome,)).fetchone() for nome in distintos],
+            index=distintos, columns=['fornecedor_id', 'fornecedor'],
+        )
+    finally:
+        conexao.close()
+    texto = nomes.where(nomes.isna(), nomes.astype(str))
+    return pd.DataFrame({
+        'fornecedor_id': texto.map(tabela['fornecedor_id']).astype('Int64'),
+        'fornecedor': texto.map(tabela['fornecedor']),
+    }, index=nomes.index)
+
+
+def resolver(contagem):
+    """
+    Código e nome canônico de cada nome sem tabela em disco: o mesmo
+    resultado de uma tabela nova semeada com estes nomes (ex.: a análise de
+    vários livros, que não têm uma tabela em comum).
+
+    Args:
+        contagem: Series nome -> quantidade de registros
+
+    Returns:
+        DataFrame: fornecedor_id e fornecedor, indexado pelo nome
+    """
+    conexao = _criar_tabelas(sqlite3.connect(':memory:'))
+    try:
+        _indexar(conexao, contagem[contagem.index.notna()].astype('int64'))
+        tabela = pd.read_sql_query(
+            """SELECT a.nome, a.fornecedor_id, f.nome AS fornecedor
+               FROM apelidos a JOIN fornecedores f ON f.id = a.fornecedor_id""", conexao)
+    finally:
+        conexao.close()
+    return tabela.set_index('nome').reindex(contagem.index.astype(str))
+
+
+def canonizar_lote(caminho_planilha, lista_dados, ignorar=()):
+    """
+    Troca dados['Fornecedor'] de cada boleto pelo nome canônico da tabela
+    de apelidos (nomes novos passam a ser apelidos deles mesmos). O nome
+    trocado fica em dados['Fornecedor_Extraido'].
+
+    Args:
+        ignorar: Nomes mantidos como estão (ex.: o marcador de fornecedor
+            não identificado)
+
+    Returns:
+        int: Quantidade de boletos com o nome trocado
+    """
+    boletos = [dados for dados in lista_dados if dados.get('Fornecedor') and dados['Fornecedor'] not in ignorar]
+    if not boletos:
+        return 0
+    canonicos = identificar(caminho_planilha, [dados['Fornecedor'] for dados in boletos])['fornecedor']
+    trocados = 0
+    for dados, canonico in zip(boletos, canonicos):
+        if isinstance(canonico, str) and canonico != dados['Fornecedor']:
+            print(f"↔ Fornecedor '{dados['Fornecedor']}' lançado como '{canonico}'")
+            dados['Fornecedor_Extraido'] = dados['Fornecedor']
+            dados['Fornecedor'] = canonico
+            trocados += 1
+    return trocados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cadastro de fornecedores - Fusion Tech")
+    parser.add_argument('comando', choices=['indexar', 'mostrar'])
+    parser.add_argument('planilha', help="Planilha do livro")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'indexar':
+        resumo = indexar(args.planilha)
+        print(f"✓ {resumo['novos']} nome(s) novo(s), {resumo['fornecedores']} fornecedor(es) novo(s), "
+              f"{resumo['fusoes']} fusão(ões) em {caminho_fornecedores(args.planilha)}")
+        return
+
+    indexar(args.planilha)
+    conexao = _conectar(args.planilha)
+    try:
+        tabela = pd.read_sql_query(
+            """SELECT f.id, f.nome AS fornecedor, a.nome AS apelido
+               FROM fornecedores f JOIN apelidos a ON a.fornecedor_id = f.id
+               ORDER BY f.id, a.nome""", conexao)
+    finally:
+        conexao.close()
+    print(f"{tabela['id'].nunique()} fornecedor(es), {len(tabela)} grafia(s)")
+    for (codigo, fornecedor), grupo in tabela.groupby(['id', 'fornecedor'], sort=False):
+        print(f"\n[{codigo}] {fornecedor}")
+        for apelido in grupo['apelido']:
+            if apelido != fornecedor:
+                print(f"   ↳ {apelido}")
+
+
+if __name__ == "__main__":
+    main()
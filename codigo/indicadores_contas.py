@@ -0,0 +1,126 @@
+"""
+Indicadores do Livro de Contas - Fusion Tech
+Cálculo único dos indicadores usados pela análise (analise_contas_pagar.py)
+e pelo dashboard analítico (dashboard_fusion_tech.py).
+
+calcular(df) monta uma vez as máscaras de pagamento e vencimento (arrays
+numpy) e tira delas todas as contagens e totais: pagas, pendentes,
+vencidas, a vencer, total dos títulos, total pago, total vencido, vazios
+por coluna, fornecedores e formas de pagamento. O resultado é um
+Indicadores (dataclass imutável) consumido pelos dois lados.
+
+Para executar:
+    python codigo/indicadores_contas.py dados/contasapagar_1.xlsx
+"""
+
+import argparse
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import esquema_contas
+
+# Colunas com mais vazios que isto (%) são apontadas como problemáticas
+LIMITE_VAZIOS = 20
+
+
+@dataclass(frozen=True)
+class Indicadores:
+    """Indicadores de um recorte do livro, calculados em calcular()."""
+    total_registros: int
+    contas_pagas: int
+    contas_pendentes: int
+    contas_vencidas: int
+    total_titulos: float
+    total_pago: float
+    total_vencido: float
+    vazios: pd.Series           # Quantidade de vazios por coluna, na ordem do livro
+    fornecedores_unicos: int
+    formas_pgto: pd.Series      # Registros por forma de pagamento, da maior para a menor
+    referencia: pd.Timestamp    # Instante usado para decidir o que está vencido
+
+    @property
+    def contas_a_vencer(self):
+        return self.contas_pendentes - self.contas_vencidas
+
+    @property
+    def percentual_vazios(self):
+        if not self.total_registros:
+            return self.vazios.astype(float) * 0
+        return self.vazios / self.total_registros * 100
+
+    def percentual(self, quantidade):
+        """`quantidade` em % do total de registros (0 para um livro vazio)."""
+        return quantidade / self.total_registros * 100 if self.total_registros else 0.0
+
+    def colunas_problematicas(self, limite=LIMITE_VAZIOS):
+        """Percentual de vazios das colunas acima do limite."""
+        percentual = self.percentual_vazios
+        return percentual[percentual > limite]
+
+
+def _soma(valores, mascara=None):
+    if mascara is not None:
+        valores = valores[mascara]
+    return float(np.nansum(valores))
+
+
+def calcular(df, referencia=None):
+    """
+    Indicadores do DataFrame (tipos de esquema_contas).
+
+    Args:
+        referencia: Instante de referência para contas vencidas (padrão: agora);
+            vencida = sem Dt. Pagamento e Dt. Vencimento anterior à referência
+
+    Returns:
+        Indicadores
+    """
+    referencia = pd.Timestamp.now() if referencia is None else pd.Timestamp(referencia)
+    vazios = df.isna().sum()
+
+    pendente = df['Dt. Pagamento'].isna().to_numpy()
+    # NaT nunca é anterior à referência: conta sem vencimento não fica vencida
+    vencida = pendente & (df['Dt. Vencimento'].to_numpy() < np.datetime64(referencia))
+    titulos = df['Vr. Título'].to_numpy(dtype=float, na_value=np.nan)
+    pagos = df['Vr. Dev/Pag'].to_numpy(dtype=float, na_value=np.nan)
+
+    formas = df['Forma de Pgto.'].value_counts() if 'Forma de Pgto.' in df.columns else pd.Series(dtype=int)
+    # Categorias sem registro no recorte (value_counts de categoria as inclui)
+    formas = formas[formas > 0]
+    formas.index = formas.index.astype(str)
+    # Empates em ordem alfabética, como nos agregados
+    formas = formas.sort_index().sort_values(ascending=False, kind='stable')
+
+    contas_pendentes = int(pendente.sum())
+    return Indicadores(
+        total_registros=len(df),
+        contas_pagas=len(df) - contas_pendentes,
+        contas_pendentes=contas_pendentes,
+        contas_vencidas=int(vencida.sum()),
+        total_titulos=_soma(titulos),
+        total_pago=_soma(pagos),
+        total_vencido=_soma(titulos, vencida),
+        vazios=vazios,
+        fornecedores_unicos=int(df['Fornecedor'].nunique()) if 'Fornecedor' in df.columns else 0,
+        formas_pgto=formas,
+        referencia=referencia,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indicadores do livro de contas - Fusion Tech")
+    parser.add_argument('planilha', help="Planilha do livro")
+    args = parser.parse_args(argv)
+
+    indicadores = calcular(esquema_contas.ler_planilha(args.planilha))
+    print(f"Registros: {indicadores.total_registros}")
+    print(f"Pagas: {indicadores.contas_pagas} | pendentes: {indicadores.contas_pendentes} | "
+          f"vencidas: {indicadores.contas_vencidas} | a vencer: {indicadores.contas_a_vencer}")
+    print(f"Total em títulos: R$ {indicadores.total_titulos:,.2f} | pago: R$ {indicadores.total_pago:,.2f} | "
+          f"vencido: R$ {indicadores.total_vencido:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Índice de Boletos - Fusion Tech
+Detecção de boletos já lançados, antes de qualquer gravação no livro.
+
+Cada boleto incluído fica registrado em um índice ao lado da planilha
+(mesmo nome, extensão .indice.sqlite3) pela chave normalizada
+
+    FORNECEDOR | valor em centavos | vencimento | documento
+
+em que o documento é o Nº do documento extraído (sem pontuação e zeros à
+esquerda) ou, na falta dele, o código de barras da linha digitável. A
+consulta é uma busca pela chave primária: não depende do tamanho do livro.
+
+Na primeira utilização o índice é semeado uma única vez com as linhas do
+livro (o Nº do documento sai do Histórico). Exclusões (baixas_contas.excluir
+e o editor do dashboard) retiram as chaves das linhas removidas; o comando
+reconstruir ressincroniza o índice com o livro depois de edições manuais.
+
+Para executar:
+    python codigo/indice_boletos.py mostrar
+    python codigo/indice_boletos.py duplicados
+    python codigo/indice_boletos.py reconstruir --planilha dados/contasapagar_automacao.xlsx
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+import base_contas
+import esquema_contas
+import sequencia_numeros
+from trava_arquivo import TEMPO_ESPERA_PADRAO, travado
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_EXCEL = os.path.join(os.path.dirname(BASE_DIR), 'dados', 'contasapagar_automacao.xlsx')
+
+# O que fazer com um boleto já lançado
+PULAR = 'pular'
+MARCAR = 'marcar'
+MODOS_DUPLICADOS = [PULAR, MARCAR]
+
+try:
+    from config import MODO_DUPLICADOS
+except ImportError:
+    MODO_DUPLICADOS = PULAR
+
+# Histórico gravado pela automação: "... - Doc: 12345 - arquivo.pdf"
+_DOCUMENTO_NO_HISTORICO = re.compile(r'Doc: (.+?) - ')
+_COLUNAS_LIVRO = ['Número', 'Fornecedor', 'Histórico', 'Dt. Vencimento', 'Vr. Título']
+
+
+def caminho_indice(caminho_planilha):
+    """Arquivo do índice (mesmo nome da planilha, extensão .indice.sqlite3)."""
+    return os.path.splitext(str(caminho_planilha))[0] + '.indice.sqlite3'
+
+
+def _caminho_trava(caminho_planilha):
+    return os.path.splitext(str(caminho_planilha))[0] + '.indice.lock'
+
+
+# ---------------------------------------------------------------------------
+# Chave normalizada
+# ---------------------------------------------------------------------------
+
+def normalizar_fornecedor(nome):
+    """Maiúsculas, sem acentos e com pontuação/espaços repetidos reduzidos a um espaço."""
+    if nome is None or pd.isna(nome):
+        return ''
+    texto = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^A-Z0-9]+', ' ', texto.upper()).strip()
+
+
+def normalizar_documento(documento):
+    """Só letras e dígitos, sem zeros à esquerda ('0001.234-5' vira '12345')."""
+    if documento is None or pd.isna(documento):
+        return ''
+    return re.sub(r'[^A-Z0-9]', '', str(documento).upper()).lstrip('0')
+
+
+def _centavos(valor):
+    try:
+        return str(round(float(valor) * 100))
+    except (TypeError, ValueError):
+        return ''
+
+
+def _data_iso(valor):
+    """'31/12/2025', Timestamp e datetime viram '2025-12-31' (vazio se inválida)."""
+    if isinstance(valor, str):
+        data = pd.to_datetime(valor, format='%d/%m/%Y', errors='coerce')
+    else:
+        data = pd.to_datetime(valor, errors='coerce')
+    return '' if pd.isna(data) else data.strftime('%Y-%m-%d')
+
+
+def chave(fornecedor, valor, vencimento, documento=None, codigo_barras=None):
+    """Chave do boleto no índice (o documento tem precedência sobre o código de barras)."""
+    identificador = normalizar_documento(documento) or (codigo_barras or '')
+    return '|'.join([normalizar_fornecedor(fornecedor), _centavos(valor), _data_iso(vencimento), identificador])
+
+
+def chave_dos_dados(dados, fornecedor=None):
+    """Chave dos dados extraídos de um PDF (processar_pdf), opcionalmente com outro fornecedor."""
+    return chave(
+        fornecedor or dados.get('Fornecedor'), dados.get('Valor'), dados.get('Vencimento'),
+        dados.get('Numero_Documento'), dados.get('Codigo_Barras'),
+    )
+
+
+def chaves_do_livro(livro):
+    """Chave de cada linha do livro (Fornecedor, Vr. Título, Dt. Vencimento e Doc do Histórico)."""
+    documentos = livro['Histórico'].astype(object).where(livro['Histórico'].notna(), '')
+    documentos = documentos.astype(str).str.extract(_DOCUMENTO_NO_HISTORICO, expand=False)
+    return pd.Series([
+        chave(fornecedor, valor, vencimento, documento)
+        for fornecedor, valor, vencimento, documento in zip(
+            livro['Fornecedor'], livro['Vr. Título'], livro['Dt. Vencimento'], documentos
+        )
+    ], index=livro.index, dtype=object)
+
+
+# ---------------------------------------------------------------------------
+# Índice persistente
+# ---------------------------------------------------------------------------
+
+def _conectar(caminho):
+    conexao = sqlite3.connect(caminho, timeout=30)
+    conexao.execute(
+        "CREATE TABLE IF NOT EXISTS boletos ("
+        "chave TEXT PRIMARY KEY, numero INTEGER, numero_texto TEXT, arquivo TEXT, registrado_em TEXT)"
+    )
+    conexao.execute("CREATE INDEX IF NOT EXISTS idx_boletos_numero ON boletos (numero)")
+    conexao.execute("CREATE TABLE IF NOT EXISTS estado (nome TEXT PRIMARY KEY, valor TEXT)")
+    return conexao
+
+
+def _ler_livro(caminho_planilha):
+    """Colunas do livro oficial (base SQLite, se em uso, ou a planilha) usadas nas chaves."""
+    if base_contas.usar_sqlite() and os.path.exists(base_contas.caminho_base(caminho_planilha)):
+        return base_contas.ler_colunas(base_contas.caminho_base(caminho_planilha), _COLUNAS_LIVRO)
+    if not os.path.exists(caminho_planilha):
+        return pd.DataFrame(columns=_COLUNAS_LIVRO)
+    livro = esquema_contas.ler_planilha(caminho_planilha, usecols=lambda coluna: coluna in _COLUNAS_LIVRO)
+    return livro.reindex(columns=_COLUNAS_LIVRO)
+
+
+def _linhas_do_livro(livro):
+    """Registros do índice para as linhas do livro com Número válido (ignora 'Total Geral')."""
+    agora = datetime.now().isoformat(timespec='seconds')
+    inteiros = [sequencia_numeros.numero_inteiro(numero) for numero in livro['Número'].astype(object)]
+    return [
+        (chave_linha, inteiro, sequencia_numeros.formatar(inteiro), None, agora)
+        for chave_linha, inteiro in zip(chaves_do_livro(livro), inteiros)
+        if inteiro is not None
+    ]
+
+
+def _semear(conexao, caminho_planilha):
+    linhas = _linhas_do_livro(_ler_livro(caminho_planilha))
+    conexao.executemany("INSERT OR IGNORE INTO boletos VALUES (?, ?, ?, ?, ?)", linhas)
+    conexao.execute(
+        "INSERT OR REPLACE INTO estado VALUES ('semeado_em', ?)", (datetime.now().isoformat(timespec='seconds'),)
+    )
+
+
+@contextmanager
+def aberto(caminho_planilha, tempo_espera=TEMPO_ESPERA_PADRAO):
+    """
+    Índice travado para consulta e registro de um lote.
+
+    A trava vale até o fim do bloco: consulta, gravação no livro e registro
+    das chaves novas acontecem sem que outro processo inclua o mesmo boleto
+    no meio. As alterações são confirmadas na saída sem erro.
+
+    Yields:
+        sqlite3.Connection: Conexão para marcar_duplicatas() e registrar()
+    """
+    with travado(_caminho_trava(caminho_planilha), tempo_espera):
+        conexao = _conectar(caminho_indice(caminho_planilha))
+        try:
+            if conexao.execute("SELECT 1 FROM estado WHERE nome = 'semeado_em'").fetchone() is None:
+                _semear(conexao, caminho_planilha)
+            yield conexao
+            conexao.commit()
+        except BaseException:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
+
+
+def marcar_duplicatas(conexao, lista_dados):
+    """
+    Procura cada boleto do lote no índice e nos anteriores do próprio lote.
+
+    Grava em dados['Chave_Boleto'] a chave e, nas duplicatas, em
+    dados['Duplicata_De'] onde o boleto já está ('Nº 000051' ou
+    'arquivo.pdf (mesmo lote)'). Boletos com o fornecedor trocado pelo nome
+    canônico (fornecedores_contas.canonizar_lote) também são procurados
+    pelo nome extraído, que é o das chaves gravadas antes do cadastro.
+
+    Returns:
+        int: Quantidade de duplicatas encontradas
+    """
+    vistos = {}
+    duplicatas = 0
+    for dados in lista_dados:
+        chave_boleto = chave_dos_dados(dados)
+        dados['Chave_Boleto'] = chave_boleto
+        consultas = [chave_boleto]
+        if dados.get('Fornecedor_Extraido'):
+            consultas.append(chave_dos_dados(dados, dados['Fornecedor_Extraido']))
+        existente = conexao.execute(
+            f"SELECT numero_texto FROM boletos WHERE chave IN ({', '.join('?' * len(consultas))})", consultas
+        ).fetchone()
+        if existente:
+            dados['Duplicata_De'] = f"Nº {existente[0]}"
+        elif chave_boleto in vistos:
+            dados['Duplicata_De'] = f"{vistos[chave_boleto]} (mesmo lote)"
+        else:
+            vistos[chave_boleto] = dados.get('Arquivo_PDF')
+            continue
+        duplicatas += 1
+    return duplicatas
+
+
+def registrar(conexao, lancados):
+    """Registra as chaves dos boletos gravados no livro: pares (dados, Número)."""
+    agora = datetime.now().isoformat(timespec='seconds')
+    conexao.executemany("INSERT OR IGNORE INTO boletos VALUES (?, ?, ?, ?, ?)", [
+        (dados['Chave_Boleto'], sequencia_numeros.numero_inteiro(numero), numero, dados.get('Arquivo_PDF'), agora)
+        for dados, numero in lancados
+        if numero and dados.get('Chave_Boleto')
+    ])
+
+
+def registrar_linhas(conexao, linhas):
+    """Registra as chaves de linhas gravadas direto no livro (ex.: digitadas no editor do dashboard)."""
+    conexao.executemany("INSERT OR IGNORE INTO boletos VALUES (?, ?, ?, ?, ?)", _linhas_do_livro(linhas))
+
+
+def _inteiros(numeros):
+    return {sequencia_numeros.numero_inteiro(numero) for numero in numeros.astype(object)} - {None}
+
+
+def remover(caminho_planilha, anteriores, atuais):
+    """
+    Retira do índice as chaves das linhas de `anteriores` que não estão mais
+    em `atuais` (o livro antes e depois de uma exclusão, ou só as linhas
+    excluídas e as que ficaram).
+
+    A chave de cada linha sai do índice só se nenhuma linha que ficou tem a
+    mesma chave: um Número repetido em vários boletos não leva os outros
+    junto. Números que deixaram de existir no livro perdem também as chaves
+    por código de barras, que não podem ser refeitas a partir das linhas.
+
+    Returns:
+        int: Chaves removidas
+    """
+    if not os.path.exists(caminho_indice(caminho_planilha)) or anteriores.empty:
+        return 0
+    # Só as linhas que ficaram com o mesmo valor podem ter as mesmas chaves
+    candidatas = atuais[atuais['Vr. Título'].isin(anteriores['Vr. Título'])]
+    chaves = set(chaves_do_livro(anteriores)) - set(chaves_do_livro(candidatas))
+    numeros = _inteiros(anteriores['Número']) - _inteiros(atuais['Número'])
+    if not chaves and not numeros:
+        return 0
+    with travado(_caminho_trava(caminho_planilha)):
+        conexao = _conectar(caminho_indice(caminho_planilha))
+        try:
+            with conexao:
+                removidas = conexao.executemany(
+                    "DELETE FROM boletos WHERE chave = ?", [(chave_linha,) for chave_linha in chaves]
+                ).rowcount
+                removidas += conexao.executemany(
+                    "DELETE FROM boletos WHERE numero = ?", [(numero,) for numero in numeros]
+                ).rowcount
+            return removidas
+        finally:
+            conexao.close()
+
+
+def reconstruir(caminho_planilha):
+    """
+    Ressincroniza o índice com o livro.
+
+    Remove as chaves de Números que não estão mais no livro e acrescenta as
+    linhas do livro sem chave. Chaves por código de barras (que não fica no
+    livro) são mantidas enquanto o Número existir.
+
+    Returns:
+        dict: removidas, incluidas e total
+    """
+    livro = _ler_livro(caminho_planilha)
+    linhas = _linhas_do_livro(livro)
+    numeros_livro = {numero for _, numero, _, _, _ in linhas}
+    with aberto(caminho_planilha) as conexao:
+        registrados = [numero for (numero,) in conexao.execute("SELECT DISTINCT numero FROM boletos")]
+        orfaos = [(numero,) for numero in registrados if numero not in numeros_livro]
+        removidas = conexao.executemany("DELETE FROM boletos WHERE numero = ?", orfaos).rowcount if orfaos else 0
+        antes = conexao.execute("SELECT COUNT(*) FROM boletos").fetchone()[0]
+        conexao.executemany("INSERT OR IGNORE INTO boletos VALUES (?, ?, ?, ?, ?)", linhas)
+        total = conexao.execute("SELECT COUNT(*) FROM boletos").fetchone()[0]
+    return {'removidas': removidas, 'incluidas': total - antes, 'total': total}
+
+
+def duplicados_no_livro(caminho_planilha):
+    """Linhas do livro com a mesma chave de outra linha (lançamentos repetidos já gravados)."""
+    livro = _ler_livro(caminho_planilha)
+    if livro.empty:
+        return livro
+    chaves = chaves_do_livro(livro)
+    repetidas = chaves.duplicated(keep=False)
+    return livro[repetidas].assign(Chave=chaves[repetidas]).sort_values(['Chave', 'Número'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índice de boletos lançados - Fusion Tech")
+    parser.add_argument('comando', choices=['mostrar', 'duplicados', 'reconstruir'])
+    parser.add_argument('--planilha', default=ARQUIVO_EXCEL, help="Planilha do livro (padrão: a da automação)")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'reconstruir':
+        resumo = reconstruir(args.planilha)
+        print(f"✓ Índice reconstruído: {resumo['total']} chave(s) "
+              f"({resumo['incluidas']} incluída(s), {resumo['removidas']} removida(s))")
+        return
+
+    if args.comando == 'duplicados':
+        repetidos = duplicados_no_livro(args.planilha)
+        if repetidos.empty:
+            print("✓ Nenhum lançamento repetido no livro")
+            return
+        print(f"⚠️  {len(repetidos)} linha(s) em {repetidos['Chave'].nunique()} grupo(s) de lançamentos repetidos:")
+        print(repetidos.drop(columns='Chave').to_string(index=False))
+        print("\nPara excluir: python codigo/baixas_contas.py excluir <números>")
+        return
+
+    if not os.path.exists(caminho_indice(args.planilha)):
+        print(f"Índice ainda não criado ({caminho_indice(args.planilha)})")
+        return
+    conexao = _conectar(caminho_indice(args.planilha))
+    try:
+        total = conexao.execute("SELECT COUNT(*) FROM boletos").fetchone()[0]
+        semeado = conexao.execute("SELECT valor FROM estado WHERE nome = 'semeado_em'").fetchone()
+    finally:
+        conexao.close()
+    print(f"Chaves no índice: {total}")
+    if semeado:
+        print(f"Semeado em: {semeado[0]}")
+
+
+if __name__ == "__main__":
+    main()
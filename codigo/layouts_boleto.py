@@ -0,0 +1,173 @@
+"""
+Layouts de Boleto - Fusion Tech
+Registro dos layouts conhecidos por emissor e classificador de layout.
+
+O classificador olha só o início do texto (palavras-chave do cabeçalho) e
+o código do banco da linha digitável. Cada layout traz os próprios padrões
+por campo, na ordem de prioridade; o motor de extração (extracao_campos)
+roda apenas esses padrões e recorre à cascata completa quando um campo não
+é encontrado. Para suportar um novo banco basta acrescentar uma entrada em
+LAYOUTS, sem alterar as funções extrair_*.
+
+Um campo cujos padrões diferem entre os extratores da automação e do
+dashboard traz um dict por variante (VARIANTE_AUTOMACAO/VARIANTE_DASHBOARD de
+extracao_campos), como PADROES_VALOR; a variante sem entrada usa a cascata.
+"""
+
+from collections import Counter, defaultdict
+
+LAYOUT_GENERICO = 'generico'
+
+# Variantes do extrator (mesmos valores de extracao_campos.VARIANTE_*)
+AUTOMACAO = 'automacao'
+DASHBOARD = 'dashboard'
+
+# Quantos caracteres do início do texto o classificador inspeciona
+TAMANHO_CABECALHO = 600
+
+# Ordem importa: o primeiro layout cuja palavra-chave aparece no cabeçalho vence
+LAYOUTS = {
+    'braspress': {
+        'nome': 'Braspress',
+        'palavras_chave': ('braspress',),
+        'codigos_banco': (),
+        'padroes': {
+            'valor': [
+                (r'VALOR\s+L.QUIDO\s+R\$\s*\n?\s*([\d.,]+)', 'valor'),
+            ],
+            'vencimento': [
+                (r'(\d{2}/\d{2}/\d{4})\s+(?:REAL|Ag\./Cód)', None),
+            ],
+            'data_emissao': [
+                (r'Emiss[ãa]o:\s+(\d{1,2})\s+de\s+(\w+)\s+de\s+(\d{4})', 'emiss'),
+            ],
+            'fornecedor': [
+                (r'Benefici[áa]rio\s+Final[^\n]*\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+?)(?:\s+\d|\s+CNPJ)', 'benefici'),
+            ],
+            'numero_documento': [
+                (r'N[úu]mero\s+da\s+Fatura[:\s]*(\d+)', 'fatura'),
+                (r'Nº\s+Fatura[:\s]*(\d+)', 'nº'),
+            ],
+        },
+    },
+    'safra': {
+        'nome': 'Banco Safra',
+        'palavras_chave': ('safra',),
+        'codigos_banco': ('422',),
+        'padroes': {
+            'valor': [
+                (r'\(=\)\s*Valor\s+do\s+Documento\s*\n.*?R\$\s*([\d.,]+)', '(=)'),
+                (r'\(=\)\s*Valor\s+do\s+Documento\s*\n\s*([\d.,]+)', '(=)'),
+                (r'Valor\s+do\s+Documento\s*\n.*?R\$\s*([\d.,]+)', 'valor'),
+                (r'Valor\s+do\s+Documento\s*\n\s*([\d.,]+)', 'valor'),
+            ],
+            'vencimento': [
+                (r'Data\s+Documento\s+Vencimento.*?\n.*?\n\d{2}/\d{2}/\d{4}\s+(\d{2}/\d{2}/\d{4})', 'vencimento'),
+                (r'Vencimento\s*\n\s*(\d{2}/\d{2}/\d{4})', 'vencimento'),
+            ],
+            'data_emissao': [
+                (r'Data\s+Documento\s+Vencimento.*?\n.*?\n(\d{2}/\d{2}/\d{4})', 'vencimento'),
+                (r'Data\s+do\s+Documento[^\n]*\n\s*(\d{2}/\d{2}/\d{4})', 'documento'),
+            ],
+            'fornecedor': [
+                (r'Benefici[áa]rio\s+CNPJ\s*/\s*CPF[^\n]+\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)', 'benefici'),
+                (r'Benefici[áa]rio\s+Ag\./C[óo]d\.[^\n]+\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)', 'benefici'),
+                (r'Benefici[áa]rio\s*\n\s*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)', 'benefici'),
+            ],
+            'numero_documento': {
+                AUTOMACAO: [
+                    (r'N[úu]mero\s+do\s+Documento[:\s]*([\w\/.-]+)', 'documento'),
+                ],
+                # Qualquer texto na linha seguinte: só o extrator do dashboard aceita
+                DASHBOARD: [
+                    (r'N[úu]mero\s+do\s+Documento\s*\n\s*(\S+)', 'documento'),
+                    (r'N[úu]mero\s+do\s+Documento[:\s]*([\w\/.-]+)', 'documento'),
+                ],
+            },
+        },
+    },
+    'itau': {
+        'nome': 'Itaú',
+        'palavras_chave': ('itaú', 'itau'),
+        'codigos_banco': ('341',),
+        'padroes': {
+            'valor': {
+                AUTOMACAO: [
+                    (r'\(=\)\s*Valor\s+do\s+Doc\.\s+([\d.,]+)', '(=)'),
+                    (r'Valor\s+do\s+Documento[:\s]*([\d.,]+)', 'valor'),
+                ],
+                DASHBOARD: [
+                    (r'\(=\)\s*Valor\s+do\s+Doc[.:]\s+([\d.,]+)', '(=)'),
+                    (r'Valor\s+do\s+Documento[:\s]*([\d.,]+)', 'valor'),
+                ],
+            },
+            'vencimento': [
+                (r'Vencimento\s*\n\s*(\d{2}/\d{2}/\d{4})', 'vencimento'),
+                (r'Vencimento[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})', 'vencimento'),
+            ],
+            'data_emissao': [
+                (r'Data\s+(?:de\s+)?Emiss[ãa]o[:\s]*(\d{2})[\/\-](\d{2})[\/\-](\d{4})', 'emiss'),
+                (r'Data\s+do\s+Documento[^\n]*\n\s*(\d{2}/\d{2}/\d{4})', 'documento'),
+            ],
+            'fornecedor': [
+                (r'Benefici[áa]rio[:\s]*([A-ZÀ-Ú0-9.,\s&/-]+)', 'benefici'),
+                (r'Cedente[:\s]*([A-ZÀ-Ú][A-ZÀ-Ú\s&.-]+)', 'cedente'),
+            ],
+            'numero_documento': [
+                (r'N[úu]mero\s+do\s+Documento[:\s]*([\w\/.-]+)', 'documento'),
+                (r'Nº\s+do\s+Doc[.:]\s*([\w\/.-]+)', 'nº'),
+            ],
+        },
+    },
+}
+
+# Documentos por layout e quantos precisaram da cascata completa
+_ESTATISTICAS = defaultdict(Counter)
+
+
+def detectar_layout(texto, codigo_banco=None):
+    """
+    Classifica o layout do boleto pelo cabeçalho e pelo código do banco.
+
+    Returns:
+        str: Chave em LAYOUTS ou LAYOUT_GENERICO
+    """
+    cabecalho = texto[:TAMANHO_CABECALHO].casefold()
+    for chave, layout in LAYOUTS.items():
+        if any(palavra in cabecalho for palavra in layout['palavras_chave']):
+            return chave
+    if codigo_banco:
+        for chave, layout in LAYOUTS.items():
+            if codigo_banco in layout['codigos_banco']:
+                return chave
+    return LAYOUT_GENERICO
+
+
+def registrar(layout, fallback):
+    """Conta um documento extraído com o layout (e se caiu na cascata completa)."""
+    _ESTATISTICAS[layout]['documentos'] += 1
+    if fallback:
+        _ESTATISTICAS[layout]['fallback'] += 1
+
+
+def estatisticas():
+    """
+    Contadores por layout desde o início do processo.
+
+    Returns:
+        dict: {layout: {'documentos': n, 'fallback': m}}
+    """
+    return {
+        layout: {'documentos': contagem['documentos'], 'fallback': contagem['fallback']}
+        for layout, contagem in _ESTATISTICAS.items()
+    }
+
+
+def mesclar(outras):
+    """Soma contadores vindos de outro processo (ex.: workers do pool)."""
+    for layout, contagem in outras.items():
+        _ESTATISTICAS[layout].update(contagem)
+
+
+def zerar():
+    _ESTATISTICAS.clear()
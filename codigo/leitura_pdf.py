@@ -0,0 +1,125 @@
+"""
+Leitura de PDFs de Boletos - Fusion Tech
+Extrai o texto das páginas e os campos do boleto, compartilhado pela
+automação (processar_pdf) e pelo dashboard (processar_pdf_integrado).
+
+No modo streaming as páginas são lidas sob demanda, na ordem configurada
+(por padrão: primeira, última e depois as demais). Após cada página os
+extratores são testados e a leitura para assim que valor e vencimento
+confiáveis aparecem. O cache de objetos do pdfplumber de cada página é
+liberado logo após a extração do texto.
+"""
+
+import pdfplumber
+
+import cache_extracao
+import extracao_campos
+import layouts_boleto
+from medicao_etapas import etapa
+
+ORDEM_SEQUENCIAL = 'sequencial'
+ORDEM_PRIMEIRA_ULTIMA = 'primeira_ultima'
+ORDENS_PAGINAS = (ORDEM_PRIMEIRA_ULTIMA, ORDEM_SEQUENCIAL)
+
+
+def ordem_paginas(total, ordem=ORDEM_PRIMEIRA_ULTIMA):
+    """Índices das páginas na ordem de visita."""
+    indices = list(range(total))
+    if ordem == ORDEM_PRIMEIRA_ULTIMA and total > 2:
+        return [0, total - 1] + indices[1:-1]
+    return indices
+
+
+def _liberar_pagina(pagina):
+    """Descarta os objetos de layout já processados da página."""
+    if hasattr(pagina, 'close'):
+        pagina.close()
+    else:
+        pagina.flush_cache()
+
+
+def iterar_textos(pdf, ordem=ORDEM_PRIMEIRA_ULTIMA):
+    """
+    Gera (índice, texto) das páginas sob demanda, na ordem de visita.
+
+    Páginas sem texto extraível são puladas.
+    """
+    paginas = pdf.pages
+    for indice in ordem_paginas(len(paginas), ordem):
+        pagina = paginas[indice]
+        try:
+            with etapa('extract_text'):
+                texto = pagina.extract_text()
+        finally:
+            _liberar_pagina(pagina)
+        if texto:
+            yield indice, texto
+
+
+def _juntar(textos):
+    """Texto acumulado na ordem do documento, no mesmo formato da leitura completa."""
+    return "".join(textos[indice] + "\n" for indice in sorted(textos))
+
+
+def ler_texto(caminho_pdf, variante=extracao_campos.VARIANTE_AUTOMACAO,
+              streaming=True, ordem=ORDEM_PRIMEIRA_ULTIMA):
+    """
+    Lê o texto do PDF.
+
+    Com streaming, para de ler páginas assim que as páginas lidas contêm
+    valor e vencimento confiáveis; sem streaming, lê todas as páginas.
+
+    Returns:
+        str: Texto das páginas visitadas, na ordem do documento ("" se vazio)
+    """
+    textos = {}
+    encontrados = set()
+    with etapa('pdfplumber.open'):
+        pdf = pdfplumber.open(caminho_pdf)
+    with pdf:
+        for indice, texto in iterar_textos(pdf, ordem):
+            textos[indice] = texto
+            if not streaming:
+                continue
+            # Cada página é testada isoladamente: custo linear no número de páginas
+            with etapa('parada_antecipada'):
+                encontrados |= extracao_campos.obrigatorios_encontrados(texto, variante)
+            if encontrados >= extracao_campos.CAMPOS_OBRIGATORIOS:
+                break
+    return _juntar(textos)
+
+
+def _variante_cache(variante, streaming, ordem):
+    # A leitura antecipada pode enxergar menos páginas: entra na chave do cache
+    if not streaming:
+        return variante
+    return f"{variante}:{ordem}"
+
+
+def campos_do_pdf(caminho_pdf, variante=extracao_campos.VARIANTE_AUTOMACAO,
+                  streaming=True, ordem=ORDEM_PRIMEIRA_ULTIMA):
+    """
+    Extrai os campos do boleto, consultando antes o cache de extração.
+
+    O layout guardado com os campos conta nas estatísticas de layouts_boleto
+    também quando os campos vêm do cache.
+
+    Returns:
+        tuple: (campos, do_cache) - campos é None se o PDF não tiver texto
+    """
+    with etapa('cache_extracao'):
+        chave_cache = cache_extracao.hash_arquivo(caminho_pdf)
+        variante_cache = _variante_cache(variante, streaming, ordem)
+        campos = cache_extracao.obter(chave_cache, variante_cache)
+    if campos is not None:
+        layouts_boleto.registrar(campos['layout'], campos['fallback'])
+        return campos, True
+
+    texto = ler_texto(caminho_pdf, variante, streaming, ordem)
+    if not texto:
+        return None, False
+
+    campos = extracao_campos.extrair_campos(texto, variante)
+    with etapa('cache_extracao'):
+        cache_extracao.gravar(chave_cache, variante_cache, campos)
+    return campos, False
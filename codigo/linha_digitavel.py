@@ -0,0 +1,182 @@
+"""
+Linha Digitável - Fusion Tech
+Localiza, valida e decodifica a linha digitável (47 dígitos) ou o código
+de barras (44 dígitos) de boletos bancários.
+
+Layout do código de barras (FEBRABAN):
+    BBB M K FFFF VVVVVVVVVV LLLLLLLLLLLLLLLLLLLLLLLLL
+    banco, moeda, DV geral (módulo 11), fator de vencimento,
+    valor em centavos e campo livre (25 dígitos).
+
+A linha digitável reorganiza o código de barras em 5 campos; os três
+primeiros têm DV próprio (módulo 10). Só é aceita a linha em que todos os
+DVs conferem, então um número qualquer no texto não é confundido com ela.
+"""
+
+import re
+from datetime import date, timedelta
+from operator import mul
+
+# Linha digitável com ou sem pontos/espaços: AAAAA.AAAAA BBBBB.BBBBBB CCCCC.CCCCCC D EEEEEEEEEEEEEE
+_LINHA = re.compile(
+    r'(?<!\d)(\d{5})\.?(\d{5})\s*(\d{5})\.?(\d{6})\s*(\d{5})\.?(\d{6})\s*(\d)\s*(\d{14})(?!\d)'
+)
+_CODIGO_BARRAS = re.compile(r'(?<!\d)(\d{44})(?!\d)')
+
+# Pré-filtro: dígitos viram b'0' e o resto vira espaço
+_DIGITO = ord('0')
+_MAPA_DIGITOS = bytes(_DIGITO if ord('0') <= i <= ord('9') else ord(' ') for i in range(256))
+_BLOCO_FATOR_VALOR = b'0' * 14
+# Distância máxima entre o início da linha digitável e o bloco fator + valor
+_ALCANCE_LINHA = 100
+
+# Fator 1000 reiniciou em 22/02/2025, depois de atingir 9999 em 21/02/2025
+DATA_BASE_FATOR = date(1997, 10, 7)
+DATA_BASE_FATOR_2025 = date(2025, 2, 22)
+
+
+# Módulo 10: dígitos alternam peso 2 e 1 da direita para a esquerda; para
+# o peso 2 soma-se os algarismos do produto (ex.: 7*2=14 -> 1+4=5)
+_DOBRO_SOMADO = bytes.maketrans(b'0123456789', b'0246813579')
+# Módulo 11: pesos 2 a 9 da direita para a esquerda, em ciclo
+_PESOS_MODULO11 = tuple(2 + i % 8 for i in range(43))
+
+
+def _modulo10(numero):
+    digitos = numero.encode('ascii')[::-1]
+    # Soma dos bytes menos 48 por dígito = soma dos algarismos
+    soma = sum(digitos[0::2].translate(_DOBRO_SOMADO)) + sum(digitos[1::2]) - 48 * len(digitos)
+    return (10 - soma % 10) % 10
+
+
+def _modulo11(numero):
+    digitos = numero.encode('ascii')[::-1]
+    pesos = _PESOS_MODULO11[:len(digitos)]
+    soma = sum(map(mul, digitos, pesos)) - 48 * sum(pesos)
+    dv = 11 - soma % 11
+    return 1 if dv in (0, 10, 11) else dv
+
+
+def codigo_barras_valido(codigo):
+    """Confere o DV geral (posição 5) de um código de barras de 44 dígitos."""
+    return len(codigo) == 44 and int(codigo[4]) == _modulo11(codigo[:4] + codigo[5:])
+
+
+def linha_para_codigo_barras(linha):
+    """
+    Converte a linha digitável (47 dígitos) em código de barras.
+
+    Returns:
+        str | None: Código de barras ou None se algum DV não conferir
+    """
+    campo1, campo2, campo3 = linha[0:10], linha[10:21], linha[21:32]
+    for campo in (campo1, campo2, campo3):
+        if int(campo[-1]) != _modulo10(campo[:-1]):
+            return None
+    codigo = linha[0:4] + linha[32] + linha[33:47] + campo1[4:9] + campo2[:10] + campo3[:10]
+    return codigo if codigo_barras_valido(codigo) else None
+
+
+def data_do_fator(fator, referencia=None):
+    """
+    Converte o fator de vencimento em data.
+
+    Como o fator reiniciou em 2025, o mesmo número vale para duas datas;
+    fica a mais próxima da data de referência (hoje, por padrão).
+    """
+    if fator == 0:
+        return None
+    referencia = referencia or date.today()
+    data = DATA_BASE_FATOR + timedelta(days=fator)
+    if fator >= 1000:
+        data_2025 = DATA_BASE_FATOR_2025 + timedelta(days=fator - 1000)
+        if abs((data_2025 - referencia).days) < abs((data - referencia).days):
+            return data_2025
+    return data
+
+
+def decodificar_codigo_barras(codigo, referencia=None):
+    """
+    Extrai valor e vencimento de um código de barras válido.
+
+    Returns:
+        dict: banco (código de 3 dígitos), valor (float ou None),
+            vencimento (DD/MM/AAAA ou None) e codigo_barras (44 dígitos)
+    """
+    centavos = int(codigo[9:19])
+    vencimento = data_do_fator(int(codigo[5:9]), referencia)
+    return {
+        'banco': codigo[:3],
+        'valor': centavos / 100 if centavos else None,
+        'vencimento': f"{vencimento.day:02d}/{vencimento.month:02d}/{vencimento.year}" if vencimento else None,
+        'codigo_barras': codigo,
+    }
+
+
+def fator_da_data(vencimento):
+    """Fator de vencimento de uma data (inverso de data_do_fator)."""
+    if vencimento >= DATA_BASE_FATOR_2025:
+        return 1000 + (vencimento - DATA_BASE_FATOR_2025).days
+    return (vencimento - DATA_BASE_FATOR).days
+
+
+def gerar_linha_digitavel(banco, valor, vencimento, campo_livre, moeda='9'):
+    """
+    Monta uma linha digitável válida (formatada com pontos e espaços).
+
+    Args:
+        banco: Código do banco com 3 dígitos
+        valor: Valor em reais
+        vencimento: date do vencimento
+        campo_livre: 25 dígitos definidos pelo banco
+    """
+    fator_valor = f"{fator_da_data(vencimento):04d}{round(valor * 100):010d}"
+    sem_dv = banco + moeda + fator_valor + campo_livre
+    dv_geral = str(_modulo11(sem_dv))
+    campo1 = banco + moeda + campo_livre[0:5]
+    campo2 = campo_livre[5:15]
+    campo3 = campo_livre[15:25]
+    campo1 += str(_modulo10(campo1))
+    campo2 += str(_modulo10(campo2))
+    campo3 += str(_modulo10(campo3))
+    return (
+        f"{campo1[:5]}.{campo1[5:]} {campo2[:5]}.{campo2[5:]} "
+        f"{campo3[:5]}.{campo3[5:]} {dv_geral} {fator_valor}"
+    )
+
+
+def _trechos_candidatos(texto):
+    """
+    Gera (início, fim) dos trechos que podem conter a linha digitável.
+
+    Toda linha digitável ou código de barras tem ao menos 14 dígitos
+    seguidos (fator + valor). O texto vira um mapa de bytes (dígito/não
+    dígito) e a busca desses blocos é feita por bytes.find, bem mais barato
+    que rodar a regex completa em todas as posições do texto.
+    """
+    mapa = texto.encode('ascii', 'replace').translate(_MAPA_DIGITOS)
+    inicio = mapa.find(_BLOCO_FATOR_VALOR)
+    while inicio != -1:
+        fim = inicio + len(_BLOCO_FATOR_VALOR)
+        while fim < len(mapa) and mapa[fim] == _DIGITO:
+            fim += 1
+        yield max(0, inicio - _ALCANCE_LINHA), fim
+        inicio = mapa.find(_BLOCO_FATOR_VALOR, fim)
+
+
+def ler_linha_digitavel(texto, referencia=None):
+    """
+    Procura a primeira linha digitável (ou código de barras) válida no texto.
+
+    Returns:
+        dict | None: banco, valor, vencimento e codigo_barras, ou None se não houver
+    """
+    for inicio, fim in _trechos_candidatos(texto):
+        for match in _LINHA.finditer(texto, inicio, fim):
+            codigo = linha_para_codigo_barras(''.join(match.groups()))
+            if codigo:
+                return decodificar_codigo_barras(codigo, referencia)
+        for match in _CODIGO_BARRAS.finditer(texto, inicio, fim):
+            if codigo_barras_valido(match.group(1)):
+                return decodificar_codigo_barras(match.group(1), referencia)
+    return None
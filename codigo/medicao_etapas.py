@@ -0,0 +1,153 @@
+"""
+Medição de Etapas - Fusion Tech
+Cronometra as etapas do processamento de cada boleto: abertura do PDF,
+extração de texto, cada extrair_*, leitura/gravação da planilha e a
+movimentação do arquivo, em tempo de parede e de CPU.
+
+Uso:
+    medicao = nova_medicao('boleto.pdf')
+    with medindo(medicao):
+        with etapa('read_excel'):
+            ...
+    gravar_registros([medicao])
+
+As chamadas etapa() fora de um bloco medindo() (ou com HABILITADO falso)
+não medem nada; dentro dele custam duas leituras de relógio por etapa.
+Cada PDF vira um registro JSON em ARQUIVO_METRICAS (uma linha por PDF).
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DIRETORIO_DADOS = os.path.join(os.path.dirname(BASE_DIR), 'dados')
+ARQUIVO_METRICAS = os.path.join(DIRETORIO_DADOS, 'metricas_processamento.jsonl')
+
+HABILITADO = True
+
+# Medição do arquivo em processamento (por thread/contexto: o Streamlit
+# atende cada sessão em uma thread própria)
+_medicao_atual = ContextVar('medicao_atual', default=None)
+
+
+def nova_medicao(arquivo):
+    """Cria a medição de um arquivo: {'arquivo': nome, 'etapas': {etapa: [parede, cpu]}}"""
+    return {'arquivo': arquivo, 'etapas': {}}
+
+
+@contextmanager
+def medindo(medicao):
+    """Direciona as etapas executadas dentro do bloco para a medição."""
+    token = _medicao_atual.set(medicao if HABILITADO else None)
+    try:
+        yield medicao
+    finally:
+        _medicao_atual.reset(token)
+
+
+@contextmanager
+def etapa(nome):
+    """Soma o tempo de parede e de CPU (da thread) do bloco na etapa `nome`."""
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        yield
+        return
+    inicio_parede = time.perf_counter()
+    inicio_cpu = time.thread_time()
+    try:
+        yield
+    finally:
+        tempos = medicao['etapas'].setdefault(nome, [0.0, 0.0])
+        tempos[0] += time.perf_counter() - inicio_parede
+        tempos[1] += time.thread_time() - inicio_cpu
+
+
+def mesclar(medicao, etapas):
+    """Soma etapas medidas em outro processo (ex.: workers do pool)."""
+    for nome, (parede, cpu) in etapas.items():
+        tempos = medicao['etapas'].setdefault(nome, [0.0, 0.0])
+        tempos[0] += parede
+        tempos[1] += cpu
+
+
+def registro(medicao, **extras):
+    """
+    Converte a medição no registro JSON do arquivo (tempos em ms).
+
+    Returns:
+        dict: arquivo, timestamp, etapas {nome: {parede_ms, cpu_ms}} e totais
+    """
+    etapas = {
+        nome: {'parede_ms': round(parede * 1000, 3), 'cpu_ms': round(cpu * 1000, 3)}
+        for nome, (parede, cpu) in medicao['etapas'].items()
+    }
+    return {
+        'arquivo': medicao['arquivo'],
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        **extras,
+        'etapas': etapas,
+        'total_parede_ms': round(sum(e['parede_ms'] for e in etapas.values()), 3),
+        'total_cpu_ms': round(sum(e['cpu_ms'] for e in etapas.values()), 3),
+    }
+
+
+def gravar_registros(registros, caminho=ARQUIVO_METRICAS):
+    """Acrescenta os registros ao arquivo JSONL (um registro por linha)."""
+    if not HABILITADO or not registros:
+        return
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'a', encoding='utf-8') as f:
+            for item in registros:
+                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+    except OSError:
+        # Métricas não podem derrubar o processamento
+        pass
+
+
+def resumo_lote(medicoes):
+    """
+    Agrega as medições do lote por etapa, na ordem em que apareceram.
+
+    Returns:
+        list[dict]: etapa, arquivos, parede/CPU total (ms), média e máximo por arquivo (ms)
+    """
+    agregado = {}
+    for medicao in medicoes:
+        for nome, (parede, cpu) in medicao['etapas'].items():
+            item = agregado.setdefault(nome, {'arquivos': 0, 'parede': 0.0, 'cpu': 0.0, 'maximo': 0.0})
+            item['arquivos'] += 1
+            item['parede'] += parede
+            item['cpu'] += cpu
+            item['maximo'] = max(item['maximo'], parede)
+    return [
+        {
+            'etapa': nome,
+            'arquivos': item['arquivos'],
+            'parede_ms': item['parede'] * 1000,
+            'cpu_ms': item['cpu'] * 1000,
+            'media_ms': item['parede'] * 1000 / item['arquivos'],
+            'maximo_ms': item['maximo'] * 1000,
+        }
+        for nome, item in agregado.items()
+    ]
+
+
+def imprimir_resumo(medicoes):
+    """Tabela de tempo por etapa do lote, da etapa mais cara para a mais barata."""
+    linhas = sorted(resumo_lote(medicoes), key=lambda item: item['parede_ms'], reverse=True)
+    if not linhas:
+        return
+    total = sum(item['parede_ms'] for item in linhas) or 1.0
+    print("\nTempo por etapa (ms):")
+    print(f"   {'Etapa':<28}{'Arq.':>6}{'Parede':>12}{'CPU':>12}{'Média':>10}{'Máx.':>10}{'%':>7}")
+    for item in linhas:
+        print(
+            f"   {item['etapa']:<28}{item['arquivos']:>6}{item['parede_ms']:>12.1f}"
+            f"{item['cpu_ms']:>12.1f}{item['media_ms']:>10.2f}{item['maximo_ms']:>10.2f}"
+            f"{item['parede_ms'] / total:>7.1%}"
+        )
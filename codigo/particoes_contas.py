@@ -0,0 +1,251 @@
+"""
+Partições Mensais do Livro - Fusion Tech
+Cópia do livro de contas a pagar particionada por mês de Dt. Vencimento,
+para análises que só precisam de alguns meses.
+
+As partições ficam em <planilha>.particoes/ (um arquivo por mês, AAAA-MM,
+e sem-vencimento para as linhas sem data), descritas em manifesto.json com
+a versão do livro de origem e, por partição, linhas e vencimentos mínimo e
+máximo. O livro oficial continua sendo a planilha (ou a base SQLite).
+
+Limitação: as gravações no livro (automação, baixas, editor do dashboard)
+não atualizam as partições. Qualquer gravação muda a versão do livro, e a
+leitura seguinte lê o livro inteiro e regrava todas as partições; o recorte
+por meses só evita a leitura completa entre uma gravação e outra. Regravar
+tudo custa menos que comparar hashes de cada partição para achar as que
+mudaram.
+
+ler(planilha, inicio, fim) abre apenas as partições dos meses do
+intervalo (predicate pushdown) e depois filtra as linhas pela data exata;
+sem intervalo, lê todo o histórico (inclusive sem-vencimento).
+
+Formato dos arquivos: Parquet com pyarrow instalado; sem ele, pickle.
+
+Para executar:
+    python codigo/particoes_contas.py atualizar dados/contasapagar_1.xlsx
+    python codigo/particoes_contas.py mostrar dados/contasapagar_1.xlsx
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+import base_contas
+import esquema_contas
+from trava_arquivo import travado
+
+try:
+    import pyarrow  # noqa: F401
+    FORMATO = 'parquet'
+except ImportError:
+    FORMATO = 'pickle'
+
+SEM_VENCIMENTO = 'sem-vencimento'
+_EXTENSOES = {'parquet': '.parquet', 'pickle': '.pkl'}
+# Posição da linha no livro, para devolver as linhas na ordem original
+_COLUNA_ORDEM = '_linha'
+
+
+def pasta_particoes(caminho_planilha):
+    """Pasta das partições (mesmo nome da planilha, extensão .particoes)."""
+    return os.path.splitext(str(caminho_planilha))[0] + '.particoes'
+
+
+def _caminho_manifesto(caminho_planilha):
+    return os.path.join(pasta_particoes(caminho_planilha), 'manifesto.json')
+
+
+def _caminho_trava(caminho_planilha):
+    return os.path.splitext(str(caminho_planilha))[0] + '.particoes.lock'
+
+
+def ler_manifesto(caminho_planilha):
+    """Manifesto das partições (None se ainda não foram geradas)."""
+    try:
+        with open(_caminho_manifesto(caminho_planilha), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _gravar_atomico(caminho, gravar):
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    gravar(temporario)
+    with open(temporario, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+def _gravar_particao(df, caminho):
+    if FORMATO == 'parquet':
+        _gravar_atomico(caminho, lambda destino: df.to_parquet(destino, index=False))
+    else:
+        _gravar_atomico(caminho, lambda destino: df.to_pickle(destino))
+
+
+def _ler_particao(caminho, formato):
+    if formato == 'parquet':
+        return pd.read_parquet(caminho)
+    return pd.read_pickle(caminho)
+
+
+def _particoes(livro):
+    """Pares (nome, linhas) por mês de vencimento ('AAAA-MM'), com SEM_VENCIMENTO por último."""
+    meses = livro['Dt. Vencimento'].dt.to_period('M')
+    for mes, parte in livro.groupby(meses, sort=True, dropna=False):
+        yield (SEM_VENCIMENTO if pd.isna(mes) else str(mes)), parte
+
+
+def atualizar(caminho_planilha, forcar=False):
+    """
+    Regrava todas as partições se o livro mudou desde a última versão.
+
+    Returns:
+        dict: O manifesto atual
+    """
+    with travado(_caminho_trava(caminho_planilha)):
+        manifesto = ler_manifesto(caminho_planilha)
+        if (not forcar and manifesto and manifesto.get('formato') == FORMATO
+                and manifesto['versao_origem'] == base_contas.versao_livro(caminho_planilha)):
+            return manifesto
+
+        livro, versao = base_contas.ler_livro(caminho_planilha)
+        livro[_COLUNA_ORDEM] = range(len(livro))
+        pasta = pasta_particoes(caminho_planilha)
+        os.makedirs(pasta, exist_ok=True)
+
+        particoes = {}
+        for nome, parte in _particoes(livro):
+            arquivo = nome + _EXTENSOES[FORMATO]
+            _gravar_particao(parte, os.path.join(pasta, arquivo))
+            vencimentos = parte['Dt. Vencimento'].dropna()
+            particoes[nome] = {
+                'arquivo': arquivo,
+                'linhas': len(parte),
+                'vencimento_min': vencimentos.min().strftime('%Y-%m-%d') if len(vencimentos) else None,
+                'vencimento_max': vencimentos.max().strftime('%Y-%m-%d') if len(vencimentos) else None,
+            }
+
+        manifesto = {
+            'origem': os.path.basename(str(caminho_planilha)),
+            'versao_origem': versao,
+            'formato': FORMATO,
+            'colunas': [coluna for coluna in livro.columns if coluna != _COLUNA_ORDEM],
+            # Resolução das datas do livro (o Parquet pode devolver outra)
+            'tipos_data': {coluna: str(livro[coluna].dtype) for coluna in esquema_contas.COLUNAS_DATA
+                           if coluna in livro.columns},
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'particoes': particoes,
+        }
+
+        def gravar_manifesto(destino):
+            with open(destino, 'w', encoding='utf-8') as f:
+                json.dump(manifesto, f, ensure_ascii=False, indent=1)
+        _gravar_atomico(_caminho_manifesto(caminho_planilha), gravar_manifesto)
+
+        # Meses que sumiram do livro (ou gravados no outro formato)
+        validos = {info['arquivo'] for info in particoes.values()}
+        for arquivo in os.listdir(pasta):
+            if arquivo.endswith(tuple(_EXTENSOES.values())) and arquivo not in validos:
+                os.remove(os.path.join(pasta, arquivo))
+        return manifesto
+
+
+def _limite(valor, fim=False):
+    if valor is None:
+        return None
+    if isinstance(valor, str) and len(valor) == 7:
+        periodo = pd.Period(valor, freq='M')
+        return periodo.end_time.normalize() if fim else periodo.start_time
+    return pd.Timestamp(valor).normalize()
+
+
+def limites(inicio=None, fim=None):
+    """
+    Primeiro e último dia do período (None: lado em aberto).
+
+    'AAAA-MM' vale o mês inteiro: primeiro dia em `inicio`, último em `fim`.
+    """
+    return _limite(inicio), _limite(fim, fim=True)
+
+
+def particoes_do_intervalo(manifesto, inicio=None, fim=None):
+    """Nomes das partições que podem ter vencimentos entre `inicio` e `fim` (inclusive)."""
+    inicio, fim = limites(inicio, fim)
+    if inicio is None and fim is None:
+        return list(manifesto['particoes'])
+    selecionadas = []
+    for nome in manifesto['particoes']:
+        if nome == SEM_VENCIMENTO:
+            continue
+        mes = pd.Period(nome, freq='M')
+        if (inicio is None or mes.end_time >= inicio) and (fim is None or mes.start_time <= fim):
+            selecionadas.append(nome)
+    return selecionadas
+
+
+def ler(caminho_planilha, inicio=None, fim=None):
+    """
+    Linhas do livro com Dt. Vencimento entre `inicio` e `fim` (inclusive).
+
+    Só as partições dos meses do intervalo são lidas. Sem `inicio` e `fim`
+    o resultado é todo o histórico, inclusive as linhas sem vencimento.
+
+    Args:
+        inicio, fim: Datas (Timestamp ou texto) ou meses 'AAAA-MM'; None
+            deixa o lado em aberto
+
+    Returns:
+        pd.DataFrame: Colunas e tipos do livro (esquema_contas), na ordem original
+    """
+    manifesto = atualizar(caminho_planilha)
+    pasta = pasta_particoes(caminho_planilha)
+    partes = [
+        _ler_particao(os.path.join(pasta, manifesto['particoes'][nome]['arquivo']), manifesto['formato'])
+        for nome in particoes_do_intervalo(manifesto, inicio, fim)
+    ]
+    if not partes:
+        return esquema_contas.tipar(pd.DataFrame(columns=manifesto['colunas']))
+    df = pd.concat(partes, ignore_index=True).sort_values(_COLUNA_ORDEM)
+    df = df.drop(columns=_COLUNA_ORDEM).reset_index(drop=True)
+
+    limite_inicio, limite_fim = limites(inicio, fim)
+    if limite_inicio is not None:
+        df = df[df['Dt. Vencimento'] >= limite_inicio]
+    if limite_fim is not None:
+        df = df[df['Dt. Vencimento'] < limite_fim + pd.Timedelta(days=1)]
+    # Categorias de partições diferentes: unificadas de novo pelo esquema
+    return esquema_contas.tipar(df.reset_index(drop=True)).astype(manifesto.get('tipos_data', {}))
+
+
+def meses_disponiveis(caminho_planilha):
+    """Meses ('AAAA-MM') com partição, em ordem."""
+    return [nome for nome in atualizar(caminho_planilha)['particoes'] if nome != SEM_VENCIMENTO]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Partições mensais do livro de contas - Fusion Tech")
+    parser.add_argument('comando', choices=['atualizar', 'mostrar'])
+    parser.add_argument('planilha', help="Planilha do livro")
+    parser.add_argument('--forcar', action='store_true', help="Regrava todas as partições")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'atualizar':
+        manifesto = atualizar(args.planilha, forcar=args.forcar)
+        print(f"✓ {len(manifesto['particoes'])} partição(ões) em {pasta_particoes(args.planilha)} ({manifesto['formato']})")
+        return
+
+    manifesto = ler_manifesto(args.planilha)
+    if manifesto is None:
+        print(f"Partições ainda não geradas ({pasta_particoes(args.planilha)})")
+        return
+    print(f"Origem: {manifesto['origem']} | gerado em {manifesto['gerado_em']} | formato {manifesto['formato']}")
+    for nome, info in manifesto['particoes'].items():
+        print(f"   {nome:>15}: {info['linhas']:>7} linha(s)")
+
+
+if __name__ == "__main__":
+    main()
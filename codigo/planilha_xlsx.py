@@ -0,0 +1,492 @@
+"""
+Planilha xlsx In-place - Fusion Tech
+Inclusão de linhas e alteração de células direto na planilha, sem converter
+a planilha inteira para DataFrame e regravar todas as células
+(pd.read_excel + pd.concat + to_excel).
+
+As linhas novas entram no fim da aba ativa, na ordem das colunas do
+cabeçalho, copiando o formato (data/número) da última linha preenchida.
+Atualizações de status mexem só nas células envolvidas (openpyxl).
+
+Para a inclusão, anexar_linhas insere as linhas direto no XML da aba dentro
+do arquivo xlsx, sem interpretar as células existentes: o custo fica em
+descompactar/recompactar a aba, bem abaixo de carregar a planilha no
+openpyxl. Planilhas com estrutura que esse caminho não cobre (várias abas,
+tabelas, autofiltro, cabeçalho sem as colunas) usam o openpyxl.
+
+Concorrência (automação, dashboard e scripts gravando a mesma planilha):
+- toda gravação é atômica: o arquivo novo é escrito ao lado e trocado de
+  uma vez (os.replace), então um leitor nunca vê a planilha pela metade;
+- ciclos ler-alterar-gravar rodam dentro de trava(caminho), uma trava entre
+  processos no arquivo <planilha>.lock (anexar_linhas já a obtém);
+- versao(caminho) identifica o conteúdo gravado (inode, mtime, tamanho).
+  Quem leu a planilha e vai regravá-la inteira confere a versão lida dentro
+  da trava com verificar_versao(), que levanta ConflitoDeVersao se outro
+  processo gravou no meio do caminho.
+"""
+
+import os
+import re
+import stat
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from copy import copy
+from datetime import datetime
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, unescape
+
+import openpyxl
+import pandas as pd
+from openpyxl.utils import column_index_from_string
+from openpyxl.utils.datetime import to_excel
+
+from trava_arquivo import TEMPO_ESPERA_PADRAO, travado
+
+FORMATO_PADRAO = 'General'
+
+_NS = {
+    'm': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+_LINHA = re.compile(rb'<row\b[^>]*?\br="(\d+)"')
+_CELULA = re.compile(rb'<c\b[^>]*?\br="([A-Z]+)\d+"[^>]*?(?:/>|>.*?</c>)', re.S)
+_ESTILO = re.compile(rb'\bs="(\d+)"')
+_TIPO = re.compile(rb'\bt="(\w+)"')
+_VALOR = re.compile(rb'<v>(.*?)</v>', re.S)
+_TEXTO = re.compile(rb'<t(?:\s[^>]*)?>(.*?)</t>', re.S)
+_TEM_VALOR = re.compile(rb'<v>|<is>|<f>|<f ')
+_DIMENSAO = re.compile(rb'<dimension ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"\s*/>')
+
+
+class EstruturaNaoSuportada(Exception):
+    """A planilha não pode receber linhas direto no XML (usar o openpyxl)."""
+
+
+class ConflitoDeVersao(Exception):
+    """A planilha foi gravada por outro processo depois da versão lida."""
+
+
+# ---------------------------------------------------------------------------
+# Trava, versão e gravação atômica
+# ---------------------------------------------------------------------------
+
+def trava(caminho, tempo_espera=TEMPO_ESPERA_PADRAO):
+    """
+    Trava exclusiva da planilha entre processos (arquivo <planilha>.lock).
+
+    Não é reentrante: dentro do bloco use salvar()/gravar_dataframe(), e não
+    anexar_linhas()/garantir_planilha(), que obtêm a trava por conta própria.
+    """
+    return travado(f"{caminho}.lock", tempo_espera)
+
+
+def _versao_stat(info):
+    return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+
+def versao(caminho):
+    """Identificador do conteúdo gravado (None se a planilha não existe)."""
+    try:
+        return _versao_stat(os.stat(caminho))
+    except FileNotFoundError:
+        return None
+
+
+def verificar_versao(caminho, esperada):
+    """Levanta ConflitoDeVersao se a planilha não está mais na versão `esperada`."""
+    if versao(caminho) != esperada:
+        raise ConflitoDeVersao(
+            f"{os.path.basename(str(caminho))} foi alterada por outro processo desde a leitura"
+        )
+
+
+def ler_com_versao(caminho, **opcoes):
+    """
+    pd.read_excel junto com a versão exata do conteúdo lido.
+
+    Returns:
+        tuple: (DataFrame, versão)
+    """
+    with open(caminho, 'rb') as arquivo:
+        versao_lida = _versao_stat(os.fstat(arquivo.fileno()))
+        return pd.read_excel(arquivo, **opcoes), versao_lida
+
+
+@contextmanager
+def _substituicao_atomica(caminho):
+    """
+    Entrega um caminho temporário ao lado de `caminho`; ao fim do bloco, o
+    temporário vai para o disco (fsync) e substitui o original de uma vez.
+    """
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(suffix='.xlsx', dir=pasta)
+    os.close(descritor)
+    try:
+        yield temporario
+        # mkstemp cria com permissão 0600: manter a do arquivo original
+        if os.path.exists(caminho):
+            os.chmod(temporario, stat.S_IMODE(os.stat(caminho).st_mode))
+        else:
+            mascara = os.umask(0)
+            os.umask(mascara)
+            os.chmod(temporario, 0o666 & ~mascara)
+        with open(temporario, 'rb+') as arquivo:
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def gravar_dataframe(df, caminho):
+    """Regrava a planilha inteira a partir do DataFrame (troca atômica)."""
+    with _substituicao_atomica(caminho) as temporario:
+        df.to_excel(temporario, index=False)
+
+
+def garantir_planilha(caminho, colunas):
+    """Cria a planilha só com o cabeçalho, se ainda não existir. Retorna True se criou."""
+    if os.path.exists(caminho):
+        return False
+    with trava(caminho):
+        if os.path.exists(caminho):
+            return False
+        gravar_dataframe(pd.DataFrame(columns=colunas), caminho)
+        return True
+
+
+def abrir(caminho):
+    """
+    Abre a planilha para edição (ou cria uma vazia, se não existir).
+
+    Returns:
+        tuple: (workbook, aba ativa, {nome da coluna: índice 1-based})
+    """
+    wb = openpyxl.load_workbook(caminho) if os.path.exists(caminho) else openpyxl.Workbook()
+    ws = wb.active
+    cabecalho = {}
+    if ws.max_row >= 1:
+        for celula in ws[1]:
+            if celula.value is not None:
+                cabecalho[str(celula.value)] = celula.column
+    return wb, ws, cabecalho
+
+
+def _valor_celula(valor, coluna_data):
+    """Converte o valor para o tipo nativo gravado pelo openpyxl."""
+    if valor is None:
+        return None
+    if coluna_data:
+        data = pd.to_datetime(valor, errors='coerce', dayfirst=isinstance(valor, str) and '/' in valor)
+        return None if pd.isna(data) else data.to_pydatetime()
+    if isinstance(valor, (pd.Timestamp, datetime)):
+        return None if pd.isna(valor) else pd.Timestamp(valor).to_pydatetime()
+    if not isinstance(valor, str) and pd.isna(valor):
+        return None
+    if hasattr(valor, 'item'):  # escalares numpy
+        return valor.item()
+    return valor
+
+
+def _ultima_linha_preenchida(ws):
+    """Última linha com algum valor (linhas vazias só com formatação são ignoradas)."""
+    for numero_linha in range(ws.max_row, 1, -1):
+        if any(celula.value is not None for celula in ws[numero_linha]):
+            return numero_linha
+    return 1
+
+
+def anexar(ws, cabecalho, linhas, colunas, colunas_data=()):
+    """
+    Acrescenta as linhas (dicts) no fim da aba.
+
+    Colunas de `colunas` que ainda não existem no cabeçalho são criadas à
+    direita; em uma aba vazia o cabeçalho é escrito na ordem de `colunas`.
+
+    Returns:
+        int: Linhas acrescentadas
+    """
+    if not cabecalho:
+        # Aba vazia (ou sem cabeçalho): começa do zero
+        for indice, nome in enumerate(colunas, start=1):
+            ws.cell(row=1, column=indice, value=nome)
+            cabecalho[nome] = indice
+    for nome in colunas:
+        if nome not in cabecalho:
+            indice = max(cabecalho.values(), default=0) + 1
+            ws.cell(row=1, column=indice, value=nome)
+            cabecalho[nome] = indice
+
+    # Formato de referência: última linha preenchida, coluna a coluna
+    ultima = _ultima_linha_preenchida(ws)
+    referencia = {}
+    if ultima >= 2:
+        for nome, indice in cabecalho.items():
+            celula = ws.cell(row=ultima, column=indice)
+            if celula.has_style and celula.number_format != FORMATO_PADRAO:
+                referencia[indice] = celula
+
+    for deslocamento, linha in enumerate(linhas, start=1):
+        numero_linha = ultima + deslocamento
+        for nome in colunas:
+            indice = cabecalho[nome]
+            valor = _valor_celula(linha.get(nome), nome in colunas_data)
+            celula = ws.cell(row=numero_linha, column=indice, value=valor)
+            if indice in referencia and valor is not None:
+                celula._style = copy(referencia[indice]._style)
+    return len(linhas)
+
+
+def tabela(ws, cabecalho, nomes):
+    """
+    Colunas da aba como DataFrame, indexado pelo número da linha na planilha.
+
+    Colunas ausentes no cabeçalho vêm vazias.
+    """
+    primeira, ultima = 2, ws.max_row
+    dados = {}
+    for nome in nomes:
+        if nome in cabecalho and ultima >= primeira:
+            indice = cabecalho[nome]
+            (valores,) = ws.iter_cols(
+                min_col=indice, max_col=indice, min_row=primeira, max_row=ultima, values_only=True
+            )
+            dados[nome] = list(valores)
+        else:
+            dados[nome] = [None] * max(ultima - primeira + 1, 0)
+    return pd.DataFrame(dados, index=pd.RangeIndex(primeira, max(ultima + 1, primeira)), dtype=object)
+
+
+def gravar_celulas(ws, cabecalho, coluna, valores, formato_de=None):
+    """
+    Grava {linha: valor} na coluna, sem tocar nas demais células.
+
+    Args:
+        formato_de: Coluna cujo formato numérico é copiado (ex.: outra coluna de data)
+
+    Returns:
+        int: Células alteradas
+    """
+    indice = cabecalho[coluna]
+    indice_formato = cabecalho.get(formato_de)
+    for numero_linha, valor in valores.items():
+        valor = _valor_celula(valor, False)
+        # ws.cell(..., value=None) não apaga o conteúdo: atribuição direta
+        celula = ws.cell(row=numero_linha, column=indice)
+        celula.value = valor
+        if valor is not None and indice_formato:
+            modelo = ws.cell(row=numero_linha, column=indice_formato)
+            if modelo.has_style:
+                celula.number_format = modelo.number_format
+    return len(valores)
+
+
+def atualizar_celulas(ws, cabecalho, linhas, coluna, valor, formato_de=None):
+    """Grava o mesmo `valor` na coluna das linhas informadas (ver gravar_celulas)."""
+    return gravar_celulas(ws, cabecalho, coluna, dict.fromkeys(linhas, valor), formato_de)
+
+
+def salvar(wb, caminho):
+    """Grava o workbook (troca atômica). Em ler-alterar-gravar, chamar dentro de trava()."""
+    with _substituicao_atomica(caminho) as temporario:
+        wb.save(temporario)
+
+
+def ler_coluna(caminho, nome):
+    """Valores de uma coluna, em modo somente leitura (sem montar as células em memória)."""
+    if not os.path.exists(caminho):
+        return []
+    wb = openpyxl.load_workbook(caminho, read_only=True)
+    try:
+        linhas = wb.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, ())
+        if nome not in cabecalho:
+            return []
+        indice = cabecalho.index(nome)
+        return [linha[indice] if indice < len(linha) else None for linha in linhas]
+    finally:
+        wb.close()
+
+
+# ---------------------------------------------------------------------------
+# Inclusão direto no XML da aba
+# ---------------------------------------------------------------------------
+
+def _caminho_aba_ativa(zf):
+    """Caminho (dentro do zip) do XML da aba ativa; só planilhas de uma aba."""
+    workbook = ElementTree.fromstring(zf.read('xl/workbook.xml'))
+    abas = workbook.findall('m:sheets/m:sheet', _NS)
+    if len(abas) != 1:
+        raise EstruturaNaoSuportada("planilha com mais de uma aba")
+    id_relacao = abas[0].get(f"{{{_NS['r']}}}id")
+    relacoes = ElementTree.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    for relacao in relacoes.findall('rel:Relationship', _NS):
+        if relacao.get('Id') == id_relacao:
+            alvo = relacao.get('Target')
+            return alvo.lstrip('/') if alvo.startswith('/') else 'xl/' + alvo
+    raise EstruturaNaoSuportada("aba não encontrada")
+
+
+def _textos_compartilhados(zf, indices):
+    """Só as strings compartilhadas pedidas (o cabeçalho costuma usar as primeiras)."""
+    if not indices or 'xl/sharedStrings.xml' not in zf.namelist():
+        return {}
+    procurados, textos = set(indices), {}
+    with zf.open('xl/sharedStrings.xml') as arquivo:
+        posicao = 0
+        for _, elemento in ElementTree.iterparse(arquivo):
+            if elemento.tag != f"{{{_NS['m']}}}si":
+                continue
+            if posicao in procurados:
+                textos[posicao] = ''.join(t.text or '' for t in elemento.iter(f"{{{_NS['m']}}}t"))
+                if len(textos) == len(procurados):
+                    break
+            posicao += 1
+            elemento.clear()
+    return textos
+
+
+def _cabecalho_xml(zf, xml):
+    """{nome da coluna: letra} a partir da primeira linha da aba."""
+    inicio = xml.find(b'<row ')
+    fim = xml.find(b'</row>', inicio)
+    if inicio == -1 or fim == -1 or _LINHA.match(xml, inicio).group(1) != b'1':
+        raise EstruturaNaoSuportada("aba sem cabeçalho na linha 1")
+    celulas = []
+    for celula in _CELULA.finditer(xml, inicio, fim):
+        abertura, _, conteudo = celula.group(0).partition(b'>')
+        tipo = _TIPO.search(abertura)
+        tipo = tipo.group(1) if tipo else None
+        textos = _TEXTO.findall(conteudo) if tipo == b'inlineStr' else _VALOR.findall(conteudo)
+        if textos:
+            celulas.append((celula.group(1).decode(), tipo, unescape(b''.join(textos).decode('utf-8'))))
+    compartilhados = _textos_compartilhados(zf, [int(valor) for _, tipo, valor in celulas if tipo == b's'])
+    cabecalho = {}
+    for letra, tipo, valor in celulas:
+        if tipo == b's':
+            valor = compartilhados.get(int(valor))
+        if valor is not None:
+            cabecalho[valor] = letra
+    return cabecalho
+
+
+def _fim_ultima_linha_preenchida(xml, fim_dados):
+    """
+    Posição logo após a última <row> com valor e o número dela.
+
+    Linhas finais só com formatação (comuns em planilhas salvas pelo Excel)
+    ficam depois desse ponto e são descartadas.
+    """
+    fim = fim_dados
+    while True:
+        inicio = xml.rfind(b'<row ', 0, fim)
+        if inicio == -1:
+            raise EstruturaNaoSuportada("aba sem linhas")
+        if _TEM_VALOR.search(xml, inicio, fim):
+            fim_linha = xml.find(b'</row>', inicio, fim_dados) + len(b'</row>')
+            return fim_linha, int(_LINHA.match(xml, inicio).group(1))
+        fim = inicio
+
+
+def _estilos_da_linha(xml, inicio, fim):
+    """{letra da coluna: índice de estilo} das células de uma linha."""
+    estilos = {}
+    for celula in _CELULA.finditer(xml, inicio, fim):
+        estilo = _ESTILO.search(celula.group(0).split(b'>', 1)[0])
+        if estilo:
+            estilos[celula.group(1).decode()] = estilo.group(1).decode()
+    return estilos
+
+
+def _celula_xml(referencia, valor, estilo):
+    atributo_estilo = f' s="{estilo}"' if estilo else ''
+    if isinstance(valor, bool):
+        return f'<c r="{referencia}" t="b"{atributo_estilo}><v>{int(valor)}</v></c>'
+    if isinstance(valor, datetime):
+        return f'<c r="{referencia}"{atributo_estilo}><v>{to_excel(valor)!r}</v></c>'
+    if isinstance(valor, (int, float)):
+        return f'<c r="{referencia}"{atributo_estilo}><v>{valor!r}</v></c>'
+    texto = escape(str(valor))
+    return (f'<c r="{referencia}" t="inlineStr"{atributo_estilo}>'
+            f'<is><t xml:space="preserve">{texto}</t></is></c>')
+
+
+def _anexar_xml(caminho, linhas, colunas, colunas_data):
+    with zipfile.ZipFile(caminho) as zf:
+        caminho_aba = _caminho_aba_ativa(zf)
+        xml = zf.read(caminho_aba)
+        if b'<tableParts' in xml or b'<autoFilter' in xml:
+            raise EstruturaNaoSuportada("aba com tabela ou autofiltro")
+        fim_dados = xml.rfind(b'</sheetData>')
+        if fim_dados == -1:
+            raise EstruturaNaoSuportada("aba sem dados")
+        cabecalho = _cabecalho_xml(zf, xml)
+        if any(nome not in cabecalho for nome in colunas):
+            raise EstruturaNaoSuportada("colunas ausentes no cabeçalho")
+
+        fim_ultima, ultima = _fim_ultima_linha_preenchida(xml, fim_dados)
+        estilos = _estilos_da_linha(xml, xml.rfind(b'<row ', 0, fim_ultima), fim_ultima) if ultima > 1 else {}
+        # Datas sem formato na última linha (ex.: Dt. Pagamento vazia) usam o de outra coluna de data
+        estilo_data = next(
+            (estilos[cabecalho[nome]] for nome in colunas_data if cabecalho[nome] in estilos), None
+        )
+        if colunas_data and estilo_data is None:
+            raise EstruturaNaoSuportada("sem formato de data de referência")
+
+        ordem = sorted(colunas, key=lambda nome: column_index_from_string(cabecalho[nome]))
+        novas = []
+        for deslocamento, linha in enumerate(linhas, start=1):
+            numero_linha = ultima + deslocamento
+            celulas = []
+            for nome in ordem:
+                valor = _valor_celula(linha.get(nome), nome in colunas_data)
+                if valor is None:
+                    continue
+                letra = cabecalho[nome]
+                estilo = estilos.get(letra) or (estilo_data if nome in colunas_data else None)
+                celulas.append(_celula_xml(f"{letra}{numero_linha}", valor, estilo))
+            novas.append(f'<row r="{numero_linha}">{"".join(celulas)}</row>')
+
+        ultima_nova = ultima + len(linhas)
+        novo_xml = xml[:fim_ultima] + ''.join(novas).encode('utf-8') + xml[fim_dados:]
+        dimensao = _DIMENSAO.search(novo_xml, 0, fim_ultima)
+        if dimensao:
+            coluna_final = dimensao.group(3) or dimensao.group(1)
+            referencia = f'<dimension ref="{dimensao.group(1).decode()}1:{coluna_final.decode()}{ultima_nova}"/>'
+            novo_xml = novo_xml[:dimensao.start()] + referencia.encode() + novo_xml[dimensao.end():]
+
+        itens = [
+            (item, novo_xml if item.filename == caminho_aba else zf.read(item)) for item in zf.infolist()
+        ]
+
+    # Original já fechado antes da troca (exigência do Windows)
+    with _substituicao_atomica(caminho) as temporario:
+        with zipfile.ZipFile(temporario, 'w', zipfile.ZIP_DEFLATED) as destino:
+            for item, conteudo in itens:
+                destino.writestr(item, conteudo, compress_type=zipfile.ZIP_DEFLATED, compresslevel=1)
+    return len(linhas)
+
+
+def anexar_linhas(caminho, linhas, colunas, colunas_data=()):
+    """
+    Acrescenta as linhas no fim da planilha e salva. Retorna quantas entraram.
+
+    Usa a inclusão direto no XML da aba; se a estrutura da planilha não
+    permitir, abre e salva com o openpyxl. Obtém a trava da planilha: linhas
+    incluídas por outros processos ao mesmo tempo nunca se perdem.
+    """
+    if not linhas:
+        return 0
+    with trava(caminho):
+        if os.path.exists(caminho):
+            try:
+                return _anexar_xml(caminho, linhas, colunas, colunas_data)
+            except (EstruturaNaoSuportada, KeyError, zipfile.BadZipFile, ElementTree.ParseError):
+                pass
+        wb, ws, cabecalho = abrir(caminho)
+        total = anexar(ws, cabecalho, linhas, colunas, colunas_data)
+        salvar(wb, caminho)
+        return total
@@ -0,0 +1,180 @@
+"""
+Projeção de Caixa - Contas a Pagar Fusion Tech
+Quanto sai do caixa em cada um dos próximos dias ou semanas, pelas contas
+pendentes (sem Dt. Pagamento e com Número válido, como no aging) e suas
+datas de vencimento.
+
+A projeção é um calendário diário denso (array numpy, posição 0 = hoje):
+as saídas de cada dia saem de um np.bincount pelo deslocamento do
+vencimento, o acumulado de np.cumsum e as semanas de np.add.reduceat,
+sem laços em Python por conta ou por dia. Dois cenários para as contas
+já vencidas (a conta vence à meia-noite do dia, como em indicadores_contas):
+
+- pagar hoje: todas as vencidas saem no dia 0
+- rolar: as vencidas são empurradas para daqui a N dias (padrão 30)
+
+As pendentes vêm agrupadas por dia dos agregados do livro
+(agregados_contas.pendentes), sem reler a planilha.
+
+Para executar:
+    python codigo/projecao_contas.py dados/contasapagar_1.xlsx
+    python codigo/projecao_contas.py dados/contasapagar_1.xlsx --dias 180 --rolar 15 --diario
+"""
+
+import argparse
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import agregados_contas
+import esquema_contas
+
+PAGAR_HOJE = 'pagar hoje'
+ROLAR = 'rolar'
+CENARIOS = [PAGAR_HOJE, ROLAR]
+HORIZONTE_DIAS = 90
+DIAS_ROLAGEM = 30
+
+
+@dataclass(frozen=True)
+class Projecao:
+    """Saídas diárias projetadas a partir de hoje, calculadas em projetar()."""
+    inicio: pd.Timestamp         # Dia 0 do calendário (hoje)
+    saidas: np.ndarray           # Vr. Título que sai em cada dia do horizonte
+    cenario: str
+    vencido: float               # Valor das contas já vencidas (todas no dia 0 ou rolado)
+    alem_do_horizonte: float     # Valor com saída depois do último dia projetado
+    sem_vencimento: float        # Valor pendente sem Dt. Vencimento (fora do calendário)
+
+    @property
+    def dias(self):
+        return pd.date_range(self.inicio, periods=len(self.saidas), freq='D')
+
+    @property
+    def acumulado(self):
+        return np.cumsum(self.saidas)
+
+    def diario(self):
+        """Saídas e acumulado por dia."""
+        return pd.DataFrame({'saida': self.saidas, 'acumulado': self.acumulado},
+                            index=pd.Index(self.dias, name='dia'))
+
+    def semanal(self):
+        """Saídas e acumulado por semana (7 dias a partir de hoje; a última pode ser menor)."""
+        inicios = np.arange(0, len(self.saidas), 7)
+        saidas = np.add.reduceat(self.saidas, inicios) if len(self.saidas) else np.array([])
+        return pd.DataFrame({'saida': saidas, 'acumulado': np.cumsum(saidas)},
+                            index=pd.Index(self.dias[inicios], name='semana'))
+
+    def nos_proximos(self, dias):
+        """Total que sai nos próximos `dias` dias (hoje incluído)."""
+        return float(self.saidas[:dias].sum())
+
+
+def pendentes_do_livro(df):
+    """
+    Contas pendentes de um livro tipado no formato de agregados_contas.pendentes
+    (o "Total Geral" do rodapé e linhas em branco, sem Número válido, não são contas).
+    """
+    pendentes = df['Dt. Pagamento'].isna()
+    if 'Número' in df.columns:
+        pendentes &= esquema_contas.numerados(df['Número'])
+    pendentes = df[pendentes]
+    return pd.DataFrame({
+        'vencimento': pendentes['Dt. Vencimento'].to_numpy(),
+        'linhas': 1,
+        'titulo': pendentes['Vr. Título'].to_numpy(dtype=float, na_value=np.nan),
+    })
+
+
+def projetar(pendentes, referencia=None, horizonte=HORIZONTE_DIAS, cenario=PAGAR_HOJE, dias_rolagem=DIAS_ROLAGEM):
+    """
+    Calendário de saídas das contas pendentes.
+
+    Args:
+        pendentes: DataFrame com vencimento e titulo (agregados_contas.pendentes
+            ou pendentes_do_livro)
+        referencia: Instante de referência (padrão: agora)
+        horizonte: Dias projetados a partir de hoje
+        cenario: PAGAR_HOJE ou ROLAR (destino das contas já vencidas)
+        dias_rolagem: Em ROLAR, dias até a saída das vencidas
+
+    Returns:
+        Projecao
+    """
+    if cenario not in CENARIOS:
+        raise ValueError(f"Cenário desconhecido: {cenario} (use {', '.join(CENARIOS)})")
+    if horizonte < 1 or dias_rolagem < 0:
+        raise ValueError("Horizonte deve ter pelo menos 1 dia e a rolagem não pode ser negativa")
+    referencia = pd.Timestamp.now() if referencia is None else pd.Timestamp(referencia)
+    # Hoje = último dia já vencido na referência (mesma regra de indicadores_contas)
+    hoje = (referencia - pd.Timedelta(1, 'ns')).normalize()
+
+    vencimento = pendentes['vencimento'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+    valor = np.nan_to_num(pendentes['titulo'].to_numpy(dtype=float))
+    sem_vencimento = np.isnat(vencimento)
+    deslocamento = np.where(sem_vencimento, 0, (vencimento - np.datetime64(hoje, 'D')).astype(np.int64))
+    vencida = ~sem_vencimento & (deslocamento <= 0)
+    dia = np.where(vencida, 0 if cenario == PAGAR_HOJE else dias_rolagem, deslocamento)
+
+    no_horizonte = ~sem_vencimento & (dia < horizonte)
+    saidas = np.bincount(dia[no_horizonte], weights=valor[no_horizonte], minlength=horizonte)
+    return Projecao(
+        inicio=hoje,
+        saidas=saidas,
+        cenario=cenario,
+        vencido=float(valor[vencida].sum()),
+        alem_do_horizonte=float(valor[~sem_vencimento & ~no_horizonte].sum()),
+        sem_vencimento=float(valor[sem_vencimento].sum()),
+    )
+
+
+def comparar(pendentes, referencia=None, horizonte=HORIZONTE_DIAS, dias_rolagem=DIAS_ROLAGEM):
+    """Projeções dos dois cenários, {cenário: Projecao}."""
+    return {
+        cenario: projetar(pendentes, referencia, horizonte, cenario, dias_rolagem)
+        for cenario in CENARIOS
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Projeção de caixa das contas a pagar - Fusion Tech")
+    parser.add_argument('planilha', help="Planilha do livro")
+    parser.add_argument('--dias', type=int, default=HORIZONTE_DIAS, help="Horizonte da projeção em dias")
+    parser.add_argument('--rolar', type=int, default=DIAS_ROLAGEM,
+                        help="No cenário rolar, dias até o pagamento das vencidas")
+    parser.add_argument('--diario', action='store_true', help="Saídas por dia (padrão: por semana)")
+    args = parser.parse_args(argv)
+
+    projecoes = comparar(agregados_contas.pendentes(args.planilha), horizonte=args.dias, dias_rolagem=args.rolar)
+    hoje, rolar = projecoes[PAGAR_HOJE], projecoes[ROLAR]
+    tabela_hoje = hoje.diario() if args.diario else hoje.semanal()
+    tabela_rolar = rolar.diario() if args.diario else rolar.semanal()
+
+    print("=" * 78)
+    print(f"PROJEÇÃO DE CAIXA - próximos {args.dias} dias a partir de {hoje.inicio:%d/%m/%Y}")
+    print("=" * 78)
+    print(f"{'Dia' if args.diario else 'Semana':<12}{'Pagar hoje':>16}{'Acumulado':>16}"
+          f"{f'Rolar {args.rolar}d':>16}{'Acumulado':>16}")
+    for inicio, linha_hoje, linha_rolar in zip(tabela_hoje.index, tabela_hoje.itertuples(), tabela_rolar.itertuples()):
+        if args.diario and not (linha_hoje.saida or linha_rolar.saida):
+            continue
+        print(f"{inicio:%d/%m/%Y}  {linha_hoje.saida:>16,.2f}{linha_hoje.acumulado:>16,.2f}"
+              f"{linha_rolar.saida:>16,.2f}{linha_rolar.acumulado:>16,.2f}")
+
+    print("-" * 78)
+    print(f"Vencido (sai hoje no cenário 'pagar hoje'): R$ {hoje.vencido:,.2f}")
+    for dias in (7, 30):
+        if dias <= args.dias:
+            print(f"Saídas nos próximos {dias} dias: R$ {hoje.nos_proximos(dias):,.2f} (pagar hoje) | "
+                  f"R$ {rolar.nos_proximos(dias):,.2f} (rolar)")
+    if hoje.alem_do_horizonte or rolar.alem_do_horizonte:
+        print(f"Após o horizonte: R$ {hoje.alem_do_horizonte:,.2f} (pagar hoje) | "
+              f"R$ {rolar.alem_do_horizonte:,.2f} (rolar)")
+    if hoje.sem_vencimento:
+        print(f"⚠️  Pendente sem vencimento (fora da projeção): R$ {hoje.sem_vencimento:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
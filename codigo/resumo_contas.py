@@ -0,0 +1,188 @@
+"""
+Resumo de Vários Livros - Fusion Tech
+Análise de vários livros de contas a pagar (um por filial, um por ano...)
+sem juntá-los em memória.
+
+Cada livro vira um resumo parcial com os agregados de agregados_contas
+(linhas e somas por dia de vencimento, situação, fornecedor e forma de
+pagamento; vazios por dia e coluna), as colunas do livro e as datas de
+emissão mínima e máxima. Resumos se juntam somando os agregados, então a
+ordem e a divisão dos livros não mudam o resultado: indicadores, cubo
+mensal e pendentes do resumo são os mesmos de um único livro com todas as
+linhas. Os livros são lidos em paralelo (um processo por livro, pelas
+partições mensais de particoes_contas) e cada resumo é somado ao total
+assim que fica pronto: a memória fica limitada a um livro por worker.
+
+Para executar:
+    python codigo/resumo_contas.py "dados/filiais/*.xlsx" --workers 4
+    python codigo/resumo_contas.py dados/contasapagar_2024.xlsx dados/contasapagar_2025.xlsx --de 2025-01
+"""
+
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+import pandas as pd
+
+import agregados_contas
+import cubo_contas
+import particoes_contas
+from agregados_contas import CHAVES, MEDIDAS
+
+
+@dataclass(frozen=True)
+class Resumo:
+    """Agregados de um ou mais livros, calculados em resumir() e somados em juntar()."""
+    livros: tuple               # Livros resumidos
+    grupos: pd.DataFrame        # Como agregados_contas.agrupar: por vencimento, situação, fornecedor e forma
+    vazios: pd.DataFrame        # Vazios por vencimento e coluna
+    colunas: tuple              # Colunas dos livros, na ordem em que aparecem
+    emissao_min: pd.Timestamp   # NaT se nenhuma linha tem Dt. Emissão
+    emissao_max: pd.Timestamp
+
+    @property
+    def registros(self):
+        return int(self.grupos['linhas'].sum())
+
+    def indicadores(self, referencia=None):
+        """indicadores_contas.Indicadores de todas as linhas resumidas."""
+        return agregados_contas.indicadores_dos_grupos(self.grupos, self.vazios, self.colunas, referencia)
+
+    def cubo(self, referencia=None):
+        """cubo_contas.Cubo com o status na referência (padrão: agora)."""
+        return cubo_contas.Cubo(agregados_contas.cubo_dos_grupos(self.grupos, referencia))
+
+    def pendentes(self):
+        """Pendentes por dia e fornecedor, como agregados_contas.pendentes()."""
+        return agregados_contas.pendentes_dos_grupos(self.grupos)
+
+    def fornecedores(self):
+        """Registros por fornecedor (nomes como estão nos livros)."""
+        com_nome = self.grupos[self.grupos['fornecedor'] != agregados_contas.SEM_VALOR]
+        return com_nome.groupby('fornecedor')['linhas'].sum()
+
+
+def resumir(caminho_planilha, inicio=None, fim=None):
+    """
+    Resumo de um livro, só com as linhas de Dt. Vencimento entre `inicio` e
+    `fim` (como particoes_contas.ler()).
+
+    Returns:
+        Resumo
+    """
+    df = particoes_contas.ler(caminho_planilha, inicio, fim)
+    grupos, vazios = agregados_contas.agrupar(df, list(df.columns))
+    emissao = df['Dt. Emissão'] if 'Dt. Emissão' in df.columns else pd.Series(pd.NaT, index=df.index)
+    return Resumo(
+        livros=(str(caminho_planilha),),
+        grupos=grupos,
+        vazios=vazios,
+        colunas=tuple(df.columns),
+        emissao_min=emissao.min(),
+        emissao_max=emissao.max(),
+    )
+
+
+def _vazios_sem_coluna(resumo, colunas):
+    """Colunas que o livro não tem: vazias em todas as linhas dele."""
+    por_dia = resumo.grupos.groupby('vencimento')['linhas'].sum()
+    return pd.DataFrame([
+        (vencimento, coluna, quantidade)
+        for coluna in colunas
+        for vencimento, quantidade in por_dia.items()
+    ], columns=['vencimento', 'coluna', 'quantidade'])
+
+
+def juntar(resumos):
+    """
+    Soma dos resumos (a ordem não muda o resultado).
+
+    Uma coluna que só alguns livros têm conta como vazia nas linhas dos
+    outros, como ficaria na concatenação dos livros.
+
+    Returns:
+        Resumo
+    """
+    resumos = list(resumos)
+    colunas = tuple(dict.fromkeys(coluna for resumo in resumos for coluna in resumo.colunas))
+    vazios = [resumo.vazios for resumo in resumos]
+    vazios += [_vazios_sem_coluna(resumo, [c for c in colunas if c not in resumo.colunas]) for resumo in resumos]
+    grupos = pd.concat([resumo.grupos for resumo in resumos], ignore_index=True)
+    vazios = pd.concat([parte for parte in vazios if not parte.empty] or [resumos[0].vazios], ignore_index=True)
+    return Resumo(
+        livros=tuple(livro for resumo in resumos for livro in resumo.livros),
+        grupos=grupos.groupby(CHAVES, as_index=False, sort=False)[MEDIDAS].sum(),
+        vazios=vazios.groupby(['vencimento', 'coluna'], as_index=False, sort=False)['quantidade'].sum(),
+        colunas=colunas,
+        emissao_min=min((r.emissao_min for r in resumos if pd.notna(r.emissao_min)), default=pd.NaT),
+        emissao_max=max((r.emissao_max for r in resumos if pd.notna(r.emissao_max)), default=pd.NaT),
+    )
+
+
+def expandir(padroes):
+    """
+    Livros dos padrões glob (ou caminhos), em ordem e sem repetição.
+
+    Raises:
+        FileNotFoundError: Se um padrão não corresponde a nenhum livro
+    """
+    caminhos = {}
+    for padrao in padroes:
+        encontrados = sorted(glob.glob(padrao)) or ([padrao] if os.path.exists(padrao) else [])
+        if not encontrados:
+            raise FileNotFoundError(f"Nenhum livro encontrado em: {padrao}")
+        for caminho in encontrados:
+            caminhos.setdefault(os.path.realpath(caminho), caminho)
+    return list(caminhos.values())
+
+
+def resumir_livros(caminhos, inicio=None, fim=None, workers=1):
+    """
+    Resumo de vários livros, lidos em paralelo com `workers` processos.
+
+    Returns:
+        Resumo
+    """
+    caminhos = list(caminhos)
+    if not caminhos:
+        raise ValueError("Informe ao menos um livro")
+    resumir_periodo = partial(resumir, inicio=inicio, fim=fim)
+    if workers <= 1 or len(caminhos) == 1:
+        return _somar_na_ordem(map(resumir_periodo, caminhos))
+    with ProcessPoolExecutor(max_workers=min(workers, len(caminhos))) as executor:
+        return _somar_na_ordem(executor.map(resumir_periodo, caminhos))
+
+
+def _somar_na_ordem(parciais):
+    """Soma cada resumo ao total assim que ele chega (só o total fica em memória)."""
+    total = next(parciais)
+    for parcial in parciais:
+        total = juntar([total, parcial])
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumo de vários livros de contas a pagar - Fusion Tech")
+    parser.add_argument('livros', nargs='+', help="Planilhas ou padrões glob (ex.: 'dados/filiais/*.xlsx')")
+    parser.add_argument('--de', metavar='AAAA-MM', help="Primeiro mês de vencimento")
+    parser.add_argument('--ate', metavar='AAAA-MM', help="Último mês de vencimento")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Livros lidos em paralelo")
+    args = parser.parse_args(argv)
+
+    resumo = resumir_livros(expandir(args.livros), args.de, args.ate, args.workers)
+    indicadores = resumo.indicadores()
+    print(f"Livros: {len(resumo.livros)}")
+    for livro in resumo.livros:
+        print(f"   - {livro}")
+    print(f"Registros: {indicadores.total_registros}")
+    print(f"Pagas: {indicadores.contas_pagas} | pendentes: {indicadores.contas_pendentes} | "
+          f"vencidas: {indicadores.contas_vencidas} | a vencer: {indicadores.contas_a_vencer}")
+    print(f"Total em títulos: R$ {indicadores.total_titulos:,.2f} | pago: R$ {indicadores.total_pago:,.2f} | "
+          f"vencido: R$ {indicadores.total_vencido:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Sequência de Números - Fusion Tech
+Numeração da coluna Número sem varrer a planilha a cada inclusão.
+
+O próximo número fica em um arquivo JSON ao lado da planilha (mesmo nome,
+extensão .sequencia.json), protegido por trava entre processos: automação e
+dashboard podem incluir boletos ao mesmo tempo sem repetir números. Cada
+reserva custa ler e regravar esse arquivo pequeno, independente do tamanho
+da planilha, e um lote reserva uma faixa inteira de uma vez.
+
+Na primeira utilização a sequência é semeada uma única vez com o maior
+Número da planilha (ou da base SQLite). Números reservados e não gravados
+(ex.: falha ao salvar) ficam sem uso; a sequência nunca volta atrás.
+
+Para executar:
+    python codigo/sequencia_numeros.py mostrar dados/contasapagar_automacao.xlsx
+    python codigo/sequencia_numeros.py ressemear dados/contasapagar_automacao.xlsx
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+import base_contas
+import planilha_xlsx
+from trava_arquivo import travado
+
+DIGITOS = 6
+
+
+def caminho_sequencia(caminho_planilha):
+    """Arquivo da sequência (mesmo nome da planilha, extensão .sequencia.json)."""
+    return os.path.splitext(str(caminho_planilha))[0] + '.sequencia.json'
+
+
+def _caminho_trava(caminho_planilha):
+    return os.path.splitext(str(caminho_planilha))[0] + '.sequencia.lock'
+
+
+def formatar(numero):
+    """Número no formato da planilha: 6 dígitos com zeros à esquerda."""
+    return f"{numero:0{DIGITOS}d}"
+
+
+def numero_inteiro(valor):
+    """Número da planilha como inteiro: '001000', 1000, 1000.0 e '1000.0' viram 1000."""
+    if valor is None:
+        return None
+    if isinstance(valor, float):
+        return int(valor) if valor.is_integer() else None
+    texto = str(valor).strip()
+    if texto.endswith('.0'):
+        texto = texto[:-2]
+    return int(texto) if texto.isdigit() else None
+
+
+def maior_numero(valores):
+    """Maior Número válido da coluna (textos como 'Total Geral' são ignorados)."""
+    numeros = [numero for numero in map(numero_inteiro, valores) if numero is not None]
+    return max(numeros, default=0)
+
+
+def _ler(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _gravar(caminho, estado):
+    """Troca atômica: o arquivo nunca fica pela metade."""
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+def _estado_semeado(valores_existentes, origem):
+    return {
+        'proximo': maior_numero(valores_existentes) + 1,
+        'semeado_de': origem,
+        'atualizado_em': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def reservar(caminho_planilha, quantidade=1, semente=None):
+    """
+    Reserva `quantidade` números consecutivos.
+
+    Args:
+        caminho_planilha: Planilha (ou livro) a que a sequência pertence
+        quantidade: Tamanho da faixa
+        semente: Função sem argumentos que devolve os Números existentes;
+            chamada só quando a sequência ainda não existe
+
+    Returns:
+        range: Números reservados (inteiros; use formatar() para o texto)
+    """
+    if quantidade < 1:
+        return range(0)
+    caminho = caminho_sequencia(caminho_planilha)
+    with travado(_caminho_trava(caminho_planilha)):
+        if os.path.exists(caminho):
+            estado = _ler(caminho)
+        else:
+            estado = _estado_semeado(semente() if semente else [], os.path.basename(str(caminho_planilha)))
+        primeiro = int(estado['proximo'])
+        estado['proximo'] = primeiro + quantidade
+        estado['atualizado_em'] = datetime.now().isoformat(timespec='seconds')
+        _gravar(caminho, estado)
+    return range(primeiro, primeiro + quantidade)
+
+
+def ressemear(caminho_planilha, valores_existentes):
+    """
+    Reposiciona a sequência logo após o maior Número existente.
+
+    Nunca recua: se a sequência já estiver à frente, é mantida.
+
+    Returns:
+        int: Próximo número a ser entregue
+    """
+    caminho = caminho_sequencia(caminho_planilha)
+    with travado(_caminho_trava(caminho_planilha)):
+        estado = _estado_semeado(valores_existentes, os.path.basename(str(caminho_planilha)))
+        if os.path.exists(caminho):
+            estado['proximo'] = max(estado['proximo'], int(_ler(caminho)['proximo']))
+        _gravar(caminho, estado)
+    return estado['proximo']
+
+
+def proximo(caminho_planilha):
+    """Próximo número a ser entregue, sem reservar (None se a sequência não existe)."""
+    caminho = caminho_sequencia(caminho_planilha)
+    if not os.path.exists(caminho):
+        return None
+    return int(_ler(caminho)['proximo'])
+
+
+def numeros_existentes(caminho_planilha):
+    """Números do livro oficial (base SQLite, se em uso, ou a planilha), para semear a sequência."""
+    if base_contas.usar_sqlite() and os.path.exists(base_contas.caminho_base(caminho_planilha)):
+        return base_contas.ler_numeros(base_contas.caminho_base(caminho_planilha))
+    if not os.path.exists(caminho_planilha):
+        return []
+    return [valor for valor in planilha_xlsx.ler_coluna(caminho_planilha, 'Número') if valor is not None]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sequência da coluna Número - Fusion Tech")
+    parser.add_argument('comando', choices=['mostrar', 'ressemear'])
+    parser.add_argument('planilha', help="Planilha xlsx a que a sequência pertence")
+    args = parser.parse_args(argv)
+
+    if args.comando == 'mostrar':
+        seguinte = proximo(args.planilha)
+        if seguinte is None:
+            print(f"Sequência ainda não criada ({caminho_sequencia(args.planilha)})")
+        else:
+            print(f"Próximo número: {formatar(seguinte)}")
+        return
+
+    seguinte = ressemear(args.planilha, numeros_existentes(args.planilha))
+    print(f"✓ Sequência ajustada. Próximo número: {formatar(seguinte)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Trava de Arquivo - Fusion Tech
+Trava exclusiva entre processos (automação, dashboard, scripts) por meio de
+um arquivo .lock ao lado do recurso protegido.
+
+Uso:
+    with travado('dados/contasapagar_automacao.sequencia.lock'):
+        ...
+
+No Linux/macOS usa fcntl.flock (trava consultiva: só protege quem também
+usa travado()); no Windows, msvcrt.locking. A trava é liberada pelo
+sistema operacional se o processo morrer dentro do bloco.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+TEMPO_ESPERA_PADRAO = 30.0
+_INTERVALO_TENTATIVA = 0.05
+
+
+class TravaOcupada(TimeoutError):
+    """Outro processo manteve a trava além do tempo de espera."""
+
+
+def _tentar_travar(descritor):
+    try:
+        if fcntl is not None:
+            fcntl.flock(descritor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(descritor, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _destravar(descritor):
+    if fcntl is not None:
+        fcntl.flock(descritor, fcntl.LOCK_UN)
+    else:
+        os.lseek(descritor, 0, os.SEEK_SET)
+        msvcrt.locking(descritor, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def travado(caminho_trava, tempo_espera=TEMPO_ESPERA_PADRAO):
+    """
+    Mantém a trava exclusiva de `caminho_trava` durante o bloco.
+
+    Raises:
+        TravaOcupada: Se a trava não for obtida em `tempo_espera` segundos
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(caminho_trava)), exist_ok=True)
+    descritor = os.open(caminho_trava, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        limite = time.monotonic() + tempo_espera
+        while not _tentar_travar(descritor):
+            if time.monotonic() >= limite:
+                raise TravaOcupada(f"Trava ocupada por outro processo: {caminho_trava}")
+            time.sleep(_INTERVALO_TENTATIVA)
+        try:
+            yield
+        finally:
+            _destravar(descritor)
+    finally:
+        os.close(descritor)
@@ -12,6 +12,18 @@ import seaborn as sns
 import numpy as np
 from datetime import datetime
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'codigo'))
+
+import agregados_contas
+import aging_contas
+import base_contas
+import cubo_contas
+import fornecedores_contas
+import indicadores_contas
+import particoes_contas
+import projecao_contas
 
 # Configuração da página
 st.set_page_config(
@@ -74,43 +86,64 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Função para carregar dados
+def localizar_livro():
+    """Caminho da planilha do livro (ou da planilha que dá nome à base SQLite)"""
+    # Tentar diferentes caminhos
+    caminhos = ['../dados/contasapagar_1.xlsx', 'dados/contasapagar_1.xlsx']
+    for caminho in caminhos:
+        if base_contas.usar_sqlite() and os.path.exists(base_contas.caminho_base(caminho)):
+            return caminho
+        if os.path.exists(caminho):
+            return caminho
+    return None
+
+
 @st.cache_data
-def carregar_dados():
-    """Carrega os dados da planilha"""
+def carregar_dados(caminho, versao, inicio=None, fim=None):
+    """Carrega os dados do livro com vencimento no período (None: todo o histórico).
+
+    `versao` (versão do livro de origem) só entra na chave do cache.
+    """
     try:
-        # Tentar diferentes caminhos
-        caminhos = ['../dados/contasapagar_1.xlsx', 'dados/contasapagar_1.xlsx']
-        for caminho in caminhos:
-            if os.path.exists(caminho):
-                return pd.read_excel(caminho)
-        st.error("❌ Arquivo não encontrado! Verifique se contasapagar_1.xlsx está na pasta 'dados/'")
-        return None
+        return particoes_contas.ler(caminho, inicio, fim)
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
         return None
 
 
+@st.cache_data
+def carregar_cubo(caminho, versao, dia):
+    """Cubo mensal do livro (cubo_contas); `versao` e `dia` só entram na chave do cache."""
+    return cubo_contas.carregar(caminho)
+
+
 def format_brl(valor: float) -> str:
     """Formata valores monetários para o padrão brasileiro."""
     return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 # Carregar dados
-df = carregar_dados()
+caminho_livro = localizar_livro()
+df = None
+if caminho_livro is None:
+    st.error("❌ Arquivo não encontrado! Verifique se contasapagar_1.xlsx está na pasta 'dados/'")
+else:
+    # Período: só as partições mensais dos meses escolhidos são lidas
+    with st.sidebar:
+        st.markdown("**🗓️ Período (vencimento)**")
+        meses = particoes_contas.meses_disponiveis(caminho_livro)
+        todo_historico = st.checkbox("Todo o histórico", value=True) or not meses
+        inicio = fim = None
+        if not todo_historico:
+            inicio, fim = st.select_slider(
+                "Meses", options=meses, value=(meses[max(len(meses) - 3, 0)], meses[-1])
+            )
+        st.markdown("---")
+    versao_livro = str(base_contas.versao_livro(caminho_livro))
+    df = carregar_dados(caminho_livro, versao_livro, inicio, fim)
 
 if df is not None:
-    df = df.replace(r'^\s*$', pd.NA, regex=True)
-
-    # Preparar dados
+    # Tipos do esquema (datas, valores, categorias) já aplicados na leitura
     df = df.copy()
-    colunas_datas = ['Dt. Emissão', 'Dt. Vencimento', 'Dt. Pagamento']
-    for coluna in colunas_datas:
-        if coluna in df.columns:
-            df[coluna] = pd.to_datetime(df[coluna], errors='coerce')
-    
-    if 'Vr. Título' in df.columns:
-        df['Vr. Título'] = pd.to_numeric(df['Vr. Título'], errors='coerce')
-    if 'Vr. Dev/Pag' in df.columns:
-        df['Vr. Dev/Pag'] = pd.to_numeric(df['Vr. Dev/Pag'], errors='coerce')
 
     def format_brl(valor: float) -> str:
         return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
@@ -138,20 +171,18 @@ if df is not None:
         st.markdown("**👥 Equipe**")
         st.markdown("IBMEC 2025.02  \nProgramação Estruturada")
     
-    # CALCULAR MÉTRICAS
-    total_registros = len(df)
-    contas_pagas = df['Dt. Pagamento'].notna().sum()
-    contas_pendentes = df['Dt. Pagamento'].isna().sum()
-    hoje = pd.Timestamp.now()
-    contas_vencidas = df[(df['Dt. Pagamento'].isna()) & (df['Dt. Vencimento'] < hoje)]
-    total_vencido = contas_vencidas['Vr. Título'].sum()
-    total_titulos = df['Vr. Título'].sum()
-    dados_vazios_critical = df['Dt. Pagamento'].isnull().sum()
-    perc_sem_pagamento = (dados_vazios_critical / total_registros * 100) if total_registros else 0
-    perc_vencidas = (len(contas_vencidas) / total_registros * 100) if total_registros else 0
-    fornecedores_faltantes = df['Fornecedor'].isna().sum() if 'Fornecedor' in df.columns else 0
-    historicos_faltantes = df['Histórico'].isna().sum() if 'Histórico' in df.columns else 0
-    valores_faltantes = df['Vr. Título'].isna().sum() if 'Vr. Título' in df.columns else 0
+    # CALCULAR MÉTRICAS (agregados mantidos a cada gravação do livro)
+    indicadores = agregados_contas.indicadores(caminho_livro, inicio, fim)
+    total_registros = indicadores.total_registros
+    contas_pagas = indicadores.contas_pagas
+    contas_vencidas = indicadores.contas_vencidas
+    contas_a_vencer = indicadores.contas_a_vencer
+    total_vencido = indicadores.total_vencido
+    dados_vazios_critical = indicadores.vazios['Dt. Pagamento']
+    perc_sem_pagamento = indicadores.percentual(dados_vazios_critical)
+    perc_vencidas = indicadores.percentual(contas_vencidas)
+    # Cubo mensal (mês x fornecedor x forma x status) para a timeline
+    cubo = carregar_cubo(caminho_livro, versao_livro, datetime.now().strftime("%Y-%m-%d")).fatiar(inicio, fim)
     
     # SEÇÃO 1: KPIs PRINCIPAIS
     st.header("📈 Indicadores Principais")
@@ -168,7 +199,7 @@ if df is not None:
     with col2:
         st.metric(
             label="Contas Vencidas",
-            value=len(contas_vencidas)
+            value=contas_vencidas
         )
     
     with col3:
@@ -182,7 +213,7 @@ if df is not None:
     with col4:
         st.metric(
             label="Dados Vazios",
-            value=f"{dados_vazios_critical} ({(dados_vazios_critical/total_registros*100):.1f}%)"
+            value=f"{dados_vazios_critical} ({perc_sem_pagamento:.1f}%)"
         )
 
     st.info(
@@ -196,14 +227,16 @@ if df is not None:
     # SEÇÃO 2: VISUALIZAÇÕES (MOVIDA PARA ANTES DOS INSIGHTS)
     st.header("📊 Visualizações dos Dados")
     
-    tab1, tab2, tab3, tab4 = st.tabs(["Status das Contas", "Formas de Pagamento", "Dados Vazios", "Timeline"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(
+        ["Status das Contas", "Formas de Pagamento", "Dados Vazios", "Timeline", "Aging"]
+    )
     
     with tab1:
         col1, col2 = st.columns([2, 1])
         
         with col1:
             fig, ax = plt.subplots(figsize=(6, 6))
-            status_data = [contas_pagas, len(contas_vencidas), contas_pendentes - len(contas_vencidas)]
+            status_data = [contas_pagas, contas_vencidas, contas_a_vencer]
             labels = ['Pagas', 'Vencidas', 'A Vencer']
             colors = ['#2ecc71', '#e74c3c', '#f39c12']
             explode = (0.05, 0.1, 0)
@@ -216,9 +249,9 @@ if df is not None:
         with col2:
             st.markdown("### 📌 Análise")
             st.markdown(f"""
-            - **{contas_pagas} contas pagas** ({(contas_pagas/total_registros*100):.1f}%)
-            - **{len(contas_vencidas)} contas vencidas** ({(len(contas_vencidas)/total_registros*100):.1f}%)
-            - **{contas_pendentes - len(contas_vencidas)} contas a vencer** ({((contas_pendentes - len(contas_vencidas))/total_registros*100):.1f}%)
+            - **{contas_pagas} contas pagas** ({indicadores.percentual(contas_pagas):.1f}%)
+            - **{contas_vencidas} contas vencidas** ({perc_vencidas:.1f}%)
+            - **{contas_a_vencer} contas a vencer** ({indicadores.percentual(contas_a_vencer):.1f}%)
             
             **🔴 Alerta:** Mais da metade das contas estão vencidas!
             """)
@@ -228,10 +261,7 @@ if df is not None:
         
         with col1:
             fig, ax = plt.subplots(figsize=(10, 6))
-            if 'Forma de Pgto.' in df.columns:
-                formas_pgto = df['Forma de Pgto.'].dropna().astype(str).value_counts()
-            else:
-                formas_pgto = pd.Series(dtype=int)
+            formas_pgto = indicadores.formas_pgto
             colors_bar = ['#3498db', '#9b59b6', '#1abc9c']
             
             if not formas_pgto.empty:
@@ -255,7 +285,7 @@ if df is not None:
                 top_formas = formas_pgto.head(3)
                 linhas = []
                 for idx, (nome, qtd) in enumerate(top_formas.items(), start=1):
-                    percentual = (qtd / total_registros * 100) if total_registros else 0
+                    percentual = indicadores.percentual(qtd)
                     linhas.append(f"{idx}. **{nome}:** {qtd} ({percentual:.1f}%)")
                 itens = "\n".join(linhas)
                 st.markdown(
@@ -271,8 +301,8 @@ if df is not None:
         
         with col1:
             fig, ax = plt.subplots(figsize=(10, 8))
-            dados_vazios = df.isnull().sum().sort_values(ascending=True)
-            percentual = (dados_vazios / len(df) * 100).round(1)
+            dados_vazios = indicadores.vazios.sort_values(ascending=True)
+            percentual = indicadores.percentual_vazios[dados_vazios.index].round(1)
             colors_vazios = ['#e74c3c' if x > 20 else '#3498db' for x in percentual]
             
             y_pos = range(len(dados_vazios))
@@ -285,7 +315,7 @@ if df is not None:
             for i, (v, p) in enumerate(zip(dados_vazios.values, percentual.values)):
                 ax.text(v + 0.5, i, f'{v} ({p}%)', va='center', fontweight='bold')
             
-            ref_line = len(df) * 0.2
+            ref_line = total_registros * indicadores_contas.LIMITE_VAZIOS / 100
             ax.axvline(x=ref_line, color='red', linestyle='--', linewidth=2, alpha=0.7, label='Limite 20%')
             ax.legend()
             
@@ -307,9 +337,8 @@ if df is not None:
     with tab4:
         possui_vencimento = 'Dt. Vencimento' in df.columns
         if possui_vencimento:
-            df_timeline = df[df['Dt. Vencimento'].notna()].copy()
-            df_timeline['Mes_Venc'] = df_timeline['Dt. Vencimento'].dt.to_period('M')
-            vencimentos_mes = df_timeline.groupby('Mes_Venc').size().sort_index()
+            totais_mes = cubo.somar('mes').drop(cubo_contas.SEM_VENCIMENTO, errors='ignore')
+            vencimentos_mes = totais_mes['linhas']
         else:
             vencimentos_mes = pd.Series(dtype=int)
         
@@ -360,7 +389,181 @@ if df is not None:
                     st.markdown("Não há dados suficientes para analisar o comportamento dos vencimentos.")
                 else:
                     st.markdown("A planilha não possui informação de vencimentos para análise.")
-    
+
+        if not vencimentos_mes.empty:
+            st.markdown("#### Valor dos títulos por mês de vencimento")
+            detalhes = {"Status": 'status', "Forma de pagamento": 'forma', "Fornecedor": 'fornecedor'}
+            detalhe = st.radio("Detalhar por", list(detalhes), horizontal=True)
+            dimensao = detalhes[detalhe]
+            com_vencimento = cubo.fatiar(mes=list(vencimentos_mes.index))
+            tabela = com_vencimento.cruzar('mes', dimensao, 'titulo')
+            tabela.columns = tabela.columns.where(tabela.columns != '', 'Não informado')
+            if dimensao == 'status':
+                tabela = tabela.reindex(columns=[status for status in cubo_contas.STATUS if status in tabela.columns])
+            elif tabela.shape[1] > 8:
+                # Maiores valores no período; o resto somado em "Outros"
+                maiores = tabela.sum().nlargest(7).index
+                tabela = tabela[maiores].assign(Outros=tabela.drop(columns=maiores).sum(axis=1))
+
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                fig, ax = plt.subplots(figsize=(12, 6))
+                cores = [cubo_contas.CORES_STATUS[status] for status in tabela.columns] if dimensao == 'status' else None
+                tabela.plot(kind='bar', stacked=True, ax=ax, color=cores, edgecolor='black', linewidth=0.8)
+                ax.set_xlabel('Mês de Vencimento', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Vr. Título (R$)', fontsize=12, fontweight='bold')
+                ax.set_title(f'Títulos por Mês e {detalhe}', fontsize=16, fontweight='bold', pad=20)
+                ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
+                ax.legend(title=detalhe, fontsize=9)
+                plt.tight_layout()
+                st.pyplot(fig)
+            with col2:
+                resumo = com_vencimento.somar(dimensao).sort_values('titulo', ascending=False).head(10)
+                st.dataframe(
+                    pd.DataFrame({
+                        detalhe: [nome or 'Não informado' for nome in resumo.index],
+                        'Contas': resumo['linhas'].values,
+                        'Vr. Título': [format_brl(valor) for valor in resumo['titulo']],
+                    }),
+                    hide_index=True, use_container_width=True,
+                )
+
+    with tab5:
+        col1, col2 = st.columns(2)
+        with col1:
+            texto_vencidas = st.text_input(
+                "Faixas de atraso (dias)", ", ".join(map(str, aging_contas.FAIXAS_VENCIDAS))
+            )
+        with col2:
+            texto_a_vencer = st.text_input(
+                "Faixas a vencer (dias)", ", ".join(map(str, aging_contas.FAIXAS_A_VENCER))
+            )
+        try:
+            faixas_vencidas = [int(dias) for dias in texto_vencidas.replace(",", " ").split()]
+            faixas_a_vencer = [int(dias) for dias in texto_a_vencer.replace(",", " ").split()]
+            aging_contas.rotulos_faixas(faixas_vencidas, faixas_a_vencer)
+        except ValueError:
+            st.warning("⚠️ Informe as faixas em dias, em ordem crescente (ex.: 30, 60, 90). Usando as faixas padrão.")
+            faixas_vencidas = faixas_a_vencer = None
+
+        # Pendentes agrupadas por dia e fornecedor nos agregados: sem reler o livro
+        pendentes = agregados_contas.pendentes(caminho_livro, inicio, fim)
+        # Grafias do mesmo fornecedor somadas sob o nome canônico
+        pendentes['fornecedor'] = fornecedores_contas.identificar(caminho_livro, pendentes['fornecedor'])['fornecedor']
+        aging = aging_contas.calcular_grupos(
+            pendentes,
+            referencia=indicadores.referencia,
+            faixas_vencidas=faixas_vencidas,
+            faixas_a_vencer=faixas_a_vencer,
+        )
+        totais_aging = aging.totais
+
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            fig, ax = plt.subplots(figsize=(12, 6))
+            tons_vencidas = plt.cm.Reds(np.linspace(0.9, 0.45, len(aging.vencidas)))
+            tons_a_vencer = plt.cm.Oranges(np.linspace(0.35, 0.7, len(aging.a_vencer)))
+            cores = list(tons_vencidas) + list(tons_a_vencer) + ['#95a5a6']
+            ax.bar(range(len(totais_aging)), totais_aging['Vr. Título'], color=cores, edgecolor='black', linewidth=1)
+            ax.set_xticks(range(len(totais_aging)))
+            ax.set_xticklabels(totais_aging.index, rotation=45, ha='right')
+            ax.set_ylabel('Vr. Título (R$)', fontsize=12, fontweight='bold')
+            ax.set_title('Aging das Contas Pendentes', fontsize=16, fontweight='bold', pad=20)
+            for i, qtd in enumerate(totais_aging['Contas']):
+                ax.text(i, totais_aging['Vr. Título'].iloc[i], str(qtd), ha='center', va='bottom', fontweight='bold')
+            plt.tight_layout()
+            st.pyplot(fig)
+
+        with col2:
+            st.markdown("### 📌 Análise")
+            vencido_recente = totais_aging.loc[aging.vencidas[-1], 'Vr. Título']
+            proximos = totais_aging.loc[aging.a_vencer[0], 'Vr. Título']
+            st.markdown(
+                f"- **Total vencido:** {format_brl(aging.total_vencido)}\n"
+                f"- **{aging.vencidas[0]}:** {format_brl(totais_aging.loc[aging.vencidas[0], 'Vr. Título'])}\n"
+                f"- **{aging.vencidas[-1]}:** {format_brl(vencido_recente)}\n"
+                f"- **{aging.a_vencer[0]}:** {format_brl(proximos)}\n\n"
+                "Quanto mais antiga a faixa, maior o risco de multa, juros e bloqueio do fornecedor."
+            )
+
+        st.markdown("#### Aging por fornecedor (Vr. Título)")
+        por_fornecedor = aging.valores[aging.valores.sum(axis=1) > 0]
+        if por_fornecedor.empty:
+            st.info("Não há contas pendentes no período.")
+        else:
+            st.dataframe(por_fornecedor.map(format_brl), use_container_width=True)
+
+    st.markdown("---")
+
+    # SEÇÃO: PROJEÇÃO DE CAIXA (todas as pendentes, independente do período escolhido)
+    st.header("💸 Projeção de Caixa")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        horizonte = st.slider("Horizonte (dias)", min_value=7, max_value=365, value=projecao_contas.HORIZONTE_DIAS)
+    with col2:
+        dias_rolagem = st.number_input(
+            "Rolar vencidas por (dias)", min_value=0, max_value=365, value=projecao_contas.DIAS_ROLAGEM
+        )
+    with col3:
+        agrupamento = st.radio("Agrupar por", ["Semana", "Dia"], horizontal=True)
+
+    projecoes = projecao_contas.comparar(
+        agregados_contas.pendentes(caminho_livro),
+        referencia=indicadores.referencia, horizonte=horizonte, dias_rolagem=int(dias_rolagem),
+    )
+    pagar_hoje = projecoes[projecao_contas.PAGAR_HOJE]
+    rolar = projecoes[projecao_contas.ROLAR]
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Vencido (sai hoje)", format_brl(pagar_hoje.vencido))
+    with col2:
+        st.metric("Próximos 7 dias", format_brl(pagar_hoje.nos_proximos(7)),
+                  delta=f"{format_brl(rolar.nos_proximos(7))} rolando", delta_color="off")
+    with col3:
+        st.metric("Próximos 30 dias", format_brl(pagar_hoje.nos_proximos(30)),
+                  delta=f"{format_brl(rolar.nos_proximos(30))} rolando", delta_color="off")
+    with col4:
+        st.metric(f"Total em {horizonte} dias", format_brl(pagar_hoje.acumulado[-1]),
+                  delta=f"{format_brl(rolar.acumulado[-1])} rolando", delta_color="off")
+
+    tabela_hoje = pagar_hoje.semanal() if agrupamento == "Semana" else pagar_hoje.diario()
+    tabela_rolar = rolar.semanal() if agrupamento == "Semana" else rolar.diario()
+    fig, ax = plt.subplots(figsize=(14, 6))
+    posicoes = np.arange(len(tabela_hoje))
+    largura = 0.4
+    ax.bar(posicoes - largura / 2, tabela_hoje['saida'], width=largura, color='#e74c3c', label='Saídas - pagar hoje')
+    ax.bar(posicoes + largura / 2, tabela_rolar['saida'], width=largura, color='#3498db',
+           label=f'Saídas - rolar {int(dias_rolagem)} dias')
+    ax2 = ax.twinx()
+    ax2.plot(posicoes, tabela_hoje['acumulado'], color='#c0392b', linewidth=2.5, label='Acumulado - pagar hoje')
+    ax2.plot(posicoes, tabela_rolar['acumulado'], color='#2980b9', linewidth=2.5, linestyle='--',
+             label=f'Acumulado - rolar {int(dias_rolagem)} dias')
+    passo = max(len(posicoes) // 20, 1)
+    ax.set_xticks(posicoes[::passo])
+    ax.set_xticklabels([dia.strftime('%d/%m') for dia in tabela_hoje.index[::passo]], rotation=45, ha='right')
+    ax.set_xlabel('Semana (início)' if agrupamento == "Semana" else 'Dia', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Saídas (R$)', fontsize=12, fontweight='bold')
+    ax2.set_ylabel('Acumulado (R$)', fontsize=12, fontweight='bold')
+    ax.set_title('Projeção de Saídas de Caixa', fontsize=16, fontweight='bold', pad=20)
+    linhas_legenda = ax.get_legend_handles_labels()
+    linhas_acumulado = ax2.get_legend_handles_labels()
+    ax.legend(linhas_legenda[0] + linhas_acumulado[0], linhas_legenda[1] + linhas_acumulado[1], loc='upper left')
+    plt.tight_layout()
+    st.pyplot(fig)
+
+    avisos = []
+    if pagar_hoje.alem_do_horizonte or rolar.alem_do_horizonte:
+        avisos.append(
+            f"{format_brl(pagar_hoje.alem_do_horizonte)} vencem depois do horizonte "
+            f"({format_brl(rolar.alem_do_horizonte)} rolando as vencidas)"
+        )
+    if pagar_hoje.sem_vencimento:
+        avisos.append(f"{format_brl(pagar_hoje.sem_vencimento)} pendentes sem data de vencimento ficam fora da projeção")
+    if avisos:
+        st.caption(" · ".join(avisos))
+
     st.markdown("---")
     
     # SEÇÃO 3: PRINCIPAIS INSIGHTS (MOVIDA PARA DEPOIS DOS GRÁFICOS)
@@ -410,9 +613,9 @@ if df is not None:
         <p>Isso gera <strong>incoerência na receita final</strong> devido à falta de informações sobre despesas reais.</p>
         </div>
         """.format(
-            forn_sem=fornecedores_faltantes,
-            hist_sem=historicos_faltantes,
-            valor_sem=valores_faltantes
+            forn_sem=indicadores.vazios.get('Fornecedor', 0),
+            hist_sem=indicadores.vazios.get('Histórico', 0),
+            valor_sem=indicadores.vazios.get('Vr. Título', 0)
         ), unsafe_allow_html=True)
         
         st.markdown("""